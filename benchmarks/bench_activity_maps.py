@@ -0,0 +1,25 @@
+"""Benchmarks of the generation of activity maps."""
+
+import pytest
+from synthetic import VERSION
+
+from premise.activity_maps import InventorySet
+
+MAPS = {
+    "powerplant": lambda inventory: inventory.generate_powerplant_map(),
+    "fuel": lambda inventory: inventory.generate_fuel_map(),
+    "cement": lambda inventory: inventory.generate_cement_map(),
+    "steel": lambda inventory: inventory.generate_steel_map(),
+    "heat": lambda inventory: inventory.generate_heat_map(inventory.model),
+    "trucks": lambda inventory: inventory.generate_transport_map("truck"),
+}
+
+
+@pytest.mark.benchmark(group="activity maps")
+@pytest.mark.parametrize("mapping", list(MAPS))
+def test_generate_map(benchmark, database, mapping):
+    inventory = InventorySet(database=database, version=VERSION, model="remind")
+
+    result = benchmark(MAPS[mapping], inventory)
+
+    assert any(result.values())
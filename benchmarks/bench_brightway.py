@@ -0,0 +1,53 @@
+"""Benchmarks of the fast Brightway writers, in a throwaway project."""
+
+import csv
+
+import bw2data
+import pytest
+from synthetic import BIOSPHERE_DB, BIOSPHERE_FLOWS, copy_database
+
+if int(bw2data.__version__[0]) >= 4:
+    from premise.brightway25 import write_brightway_database
+else:
+    from premise.brightway2 import write_brightway_database
+
+PROJECT = "premise-benchmarks"
+
+
+@pytest.fixture(scope="module")
+def project():
+    current = bw2data.projects.current
+    bw2data.projects.set_current(PROJECT)
+
+    with open(BIOSPHERE_FLOWS, encoding="utf-8") as file:
+        bw2data.Database(BIOSPHERE_DB).write(
+            {
+                (BIOSPHERE_DB, code): {
+                    "name": name,
+                    "categories": (
+                        (category,)
+                        if subcategory == "unspecified"
+                        else (category, subcategory)
+                    ),
+                    "unit": unit,
+                    "type": "emission",
+                }
+                for name, category, subcategory, unit, code in csv.reader(file)
+            }
+        )
+
+    yield PROJECT
+
+    bw2data.projects.set_current(current)
+    bw2data.projects.delete_project(PROJECT, delete_dir=True)
+
+
+@pytest.mark.benchmark(group="brightway")
+def test_write_brightway_database_fast(benchmark, database, project):
+    benchmark.pedantic(
+        write_brightway_database,
+        setup=lambda: ((copy_database(database), "benchmark"), {"fast": True}),
+        rounds=3,
+    )
+
+    assert len(bw2data.Database("benchmark")) == len(database)
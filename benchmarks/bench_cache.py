@@ -0,0 +1,80 @@
+"""Benchmarks of the database caches: writing and reading the shards."""
+
+import pickle
+
+import pytest
+from synthetic import copy_database
+
+from premise.shared_database import SharedDatabase
+from premise.utils import (
+    create_cache,
+    create_scenario_cache,
+    load_cached_database,
+    load_database,
+)
+
+
+@pytest.mark.benchmark(group="cache")
+def test_create_cache(benchmark, database, tmp_path):
+    benchmark.pedantic(
+        create_cache,
+        setup=lambda: ((copy_database(database), tmp_path / "db.pickle"), {}),
+        rounds=3,
+    )
+
+
+@pytest.mark.benchmark(group="cache")
+def test_load_cached_database(benchmark, database, tmp_path):
+    create_cache(copy_database(database), tmp_path / "db.pickle")
+
+    loaded = benchmark(load_cached_database, tmp_path / "db.pickle")
+
+    assert len(loaded) == len(database)
+
+
+@pytest.mark.benchmark(group="cache")
+def test_create_scenario_cache(benchmark, database, tmp_path):
+    benchmark.pedantic(
+        create_scenario_cache,
+        setup=lambda: ((copy_database(database), tmp_path / "scenario.pickle"), {}),
+        rounds=3,
+    )
+
+
+@pytest.mark.benchmark(group="cache")
+def test_load_scenario_database(benchmark, database, tmp_path):
+    database_ref, metadata_ref = create_scenario_cache(
+        copy_database(database), tmp_path / "scenario.pickle"
+    )
+
+    def setup():
+        scenario = {
+            "database filepath": database_ref,
+            "database metadata filepath": metadata_ref,
+        }
+        return (scenario, []), {"delete": False}
+
+    benchmark.pedantic(load_database, setup=setup, rounds=3)
+
+
+@pytest.mark.benchmark(group="base database")
+def test_unpickle_base_database(benchmark, database):
+    # what each export worker did before the base database was shared
+    payload = pickle.dumps(database, -1)
+
+    benchmark(pickle.loads, payload)
+
+
+@pytest.mark.benchmark(group="base database")
+def test_attach_shared_base_database(benchmark, database, tmp_path):
+    with SharedDatabase.create(database, tmp_path / "base.shared") as shared:
+        payload = pickle.dumps(shared)
+
+        def attach():
+            # a worker attaches and reads the dataset keys and locations
+            attached = pickle.loads(payload)
+            keys = attached.dataset_keys()
+            attached.close()
+            return keys
+
+        assert len(benchmark(attach)) == len(shared.dataset_keys())
@@ -0,0 +1,66 @@
+"""Benchmarks of the superstructure and matrix exports."""
+
+import random
+
+import pytest
+from synthetic import BIOSPHERE_DB, SOURCE_DB, VERSION, copy_database
+
+from premise.export import Export, generate_scenario_difference_file
+
+# number of scenarios in the superstructure
+N_SCENARIOS = 2
+
+
+def _scenario_database(database, seed):
+    # a tenth of the technosphere exchanges change in each scenario
+    rng = random.Random(seed)
+    scenario_database = copy_database(database)
+    for ds in scenario_database:
+        for exc in ds["exchanges"]:
+            if exc["type"] == "technosphere" and rng.random() < 0.1:
+                exc["amount"] *= rng.uniform(0.5, 1.5)
+    return scenario_database
+
+
+@pytest.fixture(scope="module")
+def scenarios(database):
+    return [
+        {"database": _scenario_database(database, seed)} for seed in range(N_SCENARIOS)
+    ]
+
+
+@pytest.mark.benchmark(group="export")
+def test_generate_scenario_difference_file(benchmark, database, scenarios):
+    df, _, _ = benchmark.pedantic(
+        generate_scenario_difference_file,
+        kwargs={
+            "db_name": "superstructure",
+            "origin_db": database,
+            "scenarios": scenarios,
+            "version": VERSION,
+            "scenario_list": [f"scenario {i}" for i in range(N_SCENARIOS)],
+            "biosphere_name": BIOSPHERE_DB,
+        },
+        rounds=1,
+    )
+
+    assert len(df) > 0
+
+
+@pytest.mark.benchmark(group="export")
+def test_export_db_to_matrices(benchmark, database, tmp_path):
+    exporter = Export(
+        scenario={
+            "database": database,
+            "model": "remind",
+            "pathway": SOURCE_DB,
+            "year": 2050,
+        },
+        filepath=tmp_path,
+        version=VERSION,
+        system_model="cutoff",
+    )
+
+    benchmark.pedantic(exporter.export_db_to_matrices, rounds=3)
+
+    assert (tmp_path / "A_matrix.csv").exists()
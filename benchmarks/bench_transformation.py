@@ -0,0 +1,54 @@
+"""Benchmarks of the relinking of datasets moved to IAM regions."""
+
+import pytest
+from conftest import IAM_SCENARIOS, YEAR
+from synthetic import VERSION, copy_database
+
+from premise.compact import compact_database
+from premise.transformation import BaseTransformation
+
+# number of datasets relinked per round
+N_RELINKED = 500
+
+
+@pytest.fixture(scope="module")
+def transformation(database, iam_data):
+    return BaseTransformation(
+        database=database,
+        iam_data=iam_data,
+        model=iam_data.model,
+        pathway=IAM_SCENARIOS[iam_data.model],
+        year=YEAR,
+        version=VERSION,
+        system_model="cutoff",
+    )
+
+
+@pytest.mark.benchmark(group="relink")
+@pytest.mark.parametrize("compact", [False, True], ids=["dict", "compact"])
+def test_relink_technosphere_exchanges(benchmark, database, transformation, compact):
+    regions = [region for region in transformation.regions if region != "World"]
+    datasets = [
+        ds
+        for ds in database
+        if any(exc["type"] == "technosphere" for exc in ds["exchanges"])
+    ][:N_RELINKED]
+
+    def setup():
+        # new regional datasets, relinked with an empty location cache
+        relocated = copy_database(datasets)
+        if compact:
+            compact_database(relocated)
+        for i, ds in enumerate(relocated):
+            ds["location"] = regions[i % len(regions)]
+            for exc in ds["exchanges"]:
+                if exc["type"] == "production":
+                    exc["location"] = ds["location"]
+        transformation.cache = {}
+        return (relocated,), {}
+
+    def relink(relocated):
+        for ds in relocated:
+            transformation.relink_technosphere_exchanges(ds)
+
+    benchmark.pedantic(relink, setup=setup, rounds=3)
@@ -0,0 +1,26 @@
+"""Benchmarks of the validation of scenario databases."""
+
+import pytest
+from conftest import IAM_SCENARIOS, YEAR
+from synthetic import BIOSPHERE_DB, VERSION, copy_database
+
+from premise.validation import BaseDatasetValidator
+
+
+@pytest.mark.benchmark(group="validation")
+def test_run_all_checks(benchmark, database, iam_data):
+    def setup():
+        validator = BaseDatasetValidator(
+            model=iam_data.model,
+            scenario=IAM_SCENARIOS[iam_data.model],
+            year=YEAR,
+            regions=iam_data.regions,
+            database=copy_database(database),
+            original_database=database,
+            db_name="validated",
+            biosphere_name=BIOSPHERE_DB,
+            version=VERSION,
+        )
+        return (validator,), {}
+
+    benchmark.pedantic(BaseDatasetValidator.run_all_checks, setup=setup, rounds=3)
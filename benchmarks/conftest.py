@@ -0,0 +1,62 @@
+"""
+Fixtures of the benchmark suite. The synthetic inputs are generated once
+per session; set ``PREMISE_BENCHMARK_SCALE`` (default 1, the size of
+ecoinvent) to run on a smaller database.
+
+premise writes logs and reports (``export/``, ``unlinked.log``,
+``missing_classifications.csv``) to the working directory, some of them
+when it is imported: it is imported from a temporary directory, and each
+benchmark runs in its own ``tmp_path``.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+_IMPORT_DIRECTORY = tempfile.TemporaryDirectory(prefix="premise-benchmarks-")
+_cwd = os.getcwd()
+os.chdir(_IMPORT_DIRECTORY.name)
+try:
+    from synthetic import synthetic_database, synthetic_iam_file
+
+    from premise.data_collection import IAMDataCollection
+finally:
+    os.chdir(_cwd)
+
+SCALE = float(os.environ.get("PREMISE_BENCHMARK_SCALE", 1))
+
+IAM_SCENARIOS = {
+    "remind": "SSP2-PkBudg1150",
+    "image": "SSP2-M",
+}
+
+YEAR = 2050
+
+
+@pytest.fixture(autouse=True)
+def working_directory(tmp_path, monkeypatch):
+    """Run each benchmark in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Synthetic source database. Benchmarks must not modify it."""
+    return synthetic_database(scale=SCALE)
+
+
+@pytest.fixture(scope="session", params=list(IAM_SCENARIOS))
+def iam_data(request, tmp_path_factory):
+    """IAM data read from a synthetic IAM file, for each region set."""
+    model, pathway = request.param, IAM_SCENARIOS[request.param]
+    directory = tmp_path_factory.mktemp("iam")
+    synthetic_iam_file(model, pathway, directory)
+    return IAMDataCollection(
+        model=model,
+        pathway=pathway,
+        year=YEAR,
+        filepath_iam_files=directory,
+        key=None,
+    )
@@ -0,0 +1,387 @@
+"""
+Synthetic inputs with the shape of an ecoinvent database and of IAM
+result files, so that the benchmarks run without licensed data.
+
+The database has, at full scale, 25,000 datasets and 600,000 exchanges.
+Its products come in families of one to a dozen locations (always with a
+RoW dataset when regionalized), drawn from the ecoinvent locations used
+by premise with a skew towards GLO, RoW, RER and a few large countries.
+Dataset names include the filters of the premise mappings, so that
+activity maps find matches. Biosphere exchanges use the flows premise
+knows for the ecoinvent version. The generation is seeded: the same
+scale always yields the same database.
+"""
+
+import csv
+import itertools
+import json
+import math
+import random
+import uuid
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import yaml
+
+from premise.filesystem_constants import DATA_DIR, VARIABLES_DIR
+from premise.heat_data import heat_expression_variables, load_heat_mapping
+from premise.scenario_downloader import get_scenario_file_stems
+
+FULL_SCALE_DATASETS = 25_000
+FULL_SCALE_EXCHANGES = 600_000
+
+SOURCE_DB = "ecoinvent-3.12-cutoff"
+BIOSPHERE_DB = "ecoinvent-3.12-biosphere"
+VERSION = "3.12"
+
+TOPOLOGIES_DIR = VARIABLES_DIR / "topologies"
+BIOSPHERE_FLOWS = DATA_DIR / "utils" / "export" / "flows_biosphere_312.csv"
+
+# share of datasets in each location, the rest is spread across countries
+LOCATION_WEIGHTS = {
+    "GLO": 0.10,
+    "RER": 0.06,
+    "CH": 0.06,
+    "Europe without Switzerland": 0.03,
+    "RNA": 0.02,
+    "RAS": 0.02,
+    "RLA": 0.01,
+    "RAF": 0.01,
+    "DE": 0.03,
+    "FR": 0.02,
+    "US": 0.03,
+    "CN": 0.03,
+    "IN": 0.02,
+    "BR": 0.02,
+    "CA-QC": 0.01,
+}
+
+UNITS = ["kilogram", "kilowatt hour", "megajoule", "cubic meter", "ton kilometer"]
+
+# share of technosphere exchanges, the rest being biosphere exchanges
+TECHNOSPHERE_SHARE = 0.45
+
+# synthetic IAM files cover these years, as the real ones do
+IAM_YEARS = list(range(2005, 2101, 5))
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _mapping_names() -> List[str]:
+    """Names of the datasets looked for by the premise activity mappings."""
+
+    names = set()
+    for filepath in sorted(VARIABLES_DIR.glob("*.yaml")):
+        with open(filepath, encoding="utf-8") as file:
+            content = yaml.safe_load(file)
+
+        if not isinstance(content, dict):
+            continue
+
+        for entry in content.values():
+            if not isinstance(entry, dict):
+                continue
+            for key, value in entry.items():
+                if not key.startswith("ecoinvent") or not isinstance(value, dict):
+                    continue
+                fltr = value.get("fltr", [])
+                if isinstance(fltr, dict):
+                    fltr = fltr.get("name", [])
+                if isinstance(fltr, str):
+                    fltr = [fltr]
+                names.update(name for name in fltr if isinstance(name, str))
+
+    return sorted(names)
+
+
+def _countries() -> List[str]:
+    with open(TOPOLOGIES_DIR / "remind-topology.json", encoding="utf-8") as file:
+        topology = json.load(file)
+
+    return sorted({country for countries in topology.values() for country in countries})
+
+
+def _biosphere_flows() -> List[Tuple[str, tuple, str, str]]:
+    flows = []
+    with open(BIOSPHERE_FLOWS, encoding="utf-8") as file:
+        for name, category, subcategory, unit, code in csv.reader(file):
+            categories = (
+                (category,) if subcategory == "unspecified" else (category, subcategory)
+            )
+            flows.append((name, categories, unit, code))
+    return flows
+
+
+def _family_locations(rng: random.Random, locations: list, weights: list) -> list:
+    # half of the products are produced in a single location,
+    # the others in a RoW dataset and up to a dozen more locations
+    if rng.random() < 0.5:
+        return [rng.choices(["GLO", "RER", "CH", "RoW"], [6, 2, 1, 1])[0]]
+
+    count = min(int(rng.paretovariate(1.2)) + 1, 12)
+    chosen = {"RoW"}
+    while len(chosen) < count + 1:
+        chosen.add(rng.choices(locations, weights)[0])
+    chosen.discard("GLO")
+    return sorted(chosen)
+
+
+def _amount(rng: random.Random) -> float:
+    return rng.lognormvariate(-2, 2)
+
+
+def _exchange_uncertainty(rng: random.Random, amount: float) -> dict:
+    if rng.random() < 0.4:
+        return {"uncertainty type": 0}
+    return {
+        "uncertainty type": 2,
+        "loc": math.log(abs(amount)),
+        "scale": rng.uniform(0.05, 0.5),
+        "negative": False,
+    }
+
+
+def synthetic_database(scale: float = 1.0, seed: int = 0) -> List[dict]:
+    """
+    Generate a database with the shape of ecoinvent, in the format premise
+    works with after extraction.
+
+    :param scale: fraction of the ecoinvent size (25,000 datasets, 600,000
+        exchanges)
+    :param seed: seed of the random generator
+    :return: list of datasets
+    """
+
+    rng = random.Random(seed)
+    n_datasets = max(int(FULL_SCALE_DATASETS * scale), 100)
+    exchanges_per_dataset = FULL_SCALE_EXCHANGES / FULL_SCALE_DATASETS - 1
+
+    countries = _countries()
+    locations = list(LOCATION_WEIGHTS) + countries
+    spread = (1 - sum(LOCATION_WEIGHTS.values())) / len(countries)
+    weights = list(LOCATION_WEIGHTS.values()) + [spread] * len(countries)
+
+    mapping_names = _mapping_names()
+    biosphere_flows = _biosphere_flows()
+
+    # product families: (name, reference product, unit) and their locations
+    families = []
+    n_products, n_family_datasets = 0, 0
+    while n_family_datasets < n_datasets:
+        if n_products < len(mapping_names):
+            name = mapping_names[n_products]
+            product = name.split(", ")[-1] if ", " in name else name
+        else:
+            product = f"product {n_products}"
+            name = rng.choice(["market for", "production of", "treatment of"])
+            name = f"{name} {product}"
+        unit = rng.choice(UNITS)
+        family_locations = _family_locations(rng, locations, weights)
+        family_locations = family_locations[: n_datasets - n_family_datasets]
+        families.append((name, product, unit, family_locations))
+        n_products += 1
+        n_family_datasets += len(family_locations)
+
+    # a few products (electricity, transport, heat...) are used everywhere
+    popularity = [1 / (rank + 1) for rank in range(len(families))]
+    rng.shuffle(popularity)
+    popularity = list(itertools.accumulate(popularity))
+    flow_popularity = list(
+        itertools.accumulate(
+            1 / (rank + 1) ** 0.8 for rank in range(len(biosphere_flows))
+        )
+    )
+
+    database = []
+    for name, product, unit, family_locations in families:
+        for location in family_locations:
+            exchanges = [
+                {
+                    "name": name,
+                    "product": product,
+                    "location": location,
+                    "unit": unit,
+                    "amount": 1.0,
+                    "type": "production",
+                    "production volume": rng.lognormvariate(10, 3),
+                    "uncertainty type": 0,
+                }
+            ]
+
+            n_exchanges = max(int(rng.expovariate(1 / exchanges_per_dataset)), 1)
+            n_technosphere = int(n_exchanges * TECHNOSPHERE_SHARE)
+
+            suppliers = rng.choices(families, cum_weights=popularity, k=n_technosphere)
+            for s_name, s_product, s_unit, s_locations in suppliers:
+                if (s_name, s_product) == (name, product):
+                    continue
+                if location in s_locations:
+                    s_location = location
+                elif "GLO" in s_locations:
+                    s_location = "GLO"
+                elif "RoW" in s_locations:
+                    s_location = "RoW"
+                else:
+                    s_location = s_locations[0]
+                amount = _amount(rng)
+                exchanges.append(
+                    {
+                        "name": s_name,
+                        "product": s_product,
+                        "location": s_location,
+                        "unit": s_unit,
+                        "amount": amount,
+                        "type": "technosphere",
+                        **_exchange_uncertainty(rng, amount),
+                    }
+                )
+
+            flows = rng.choices(
+                biosphere_flows,
+                cum_weights=flow_popularity,
+                k=n_exchanges - n_technosphere,
+            )
+            for f_name, f_categories, f_unit, f_code in flows:
+                amount = _amount(rng)
+                exchanges.append(
+                    {
+                        "name": f_name,
+                        "categories": f_categories,
+                        "unit": f_unit,
+                        "amount": amount,
+                        "type": "biosphere",
+                        "input": (BIOSPHERE_DB, f_code),
+                        **_exchange_uncertainty(rng, amount),
+                    }
+                )
+
+            database.append(
+                {
+                    "name": name,
+                    "reference product": product,
+                    "location": location,
+                    "unit": unit,
+                    "database": SOURCE_DB,
+                    "code": _uuid(rng),
+                    "type": "process",
+                    "production amount": 1.0,
+                    "activity type": (
+                        "market activity"
+                        if name.startswith("market")
+                        else "ordinary transforming activity"
+                    ),
+                    "comment": f"Synthetic dataset of {product} in {location}.",
+                    "classifications": [
+                        ("ISIC rev.4 ecoinvent", f"{rng.randint(100, 9999)}")
+                    ],
+                    "filename": f"{uuid.UUID(int=rng.getrandbits(128))}.spold",
+                    "exchanges": exchanges,
+                }
+            )
+
+    return database
+
+
+def copy_database(database: List[dict]) -> List[dict]:
+    """
+    Copy the datasets and exchanges of a database, for the benchmarks
+    of functions that modify it in place. Faster than a deep copy, as
+    the values of the exchanges are not copied.
+
+    :param database: list of datasets
+    :return: copy of the database
+    """
+
+    return [
+        {**dataset, "exchanges": [dict(exc) for exc in dataset["exchanges"]]}
+        for dataset in database
+    ]
+
+
+def _iam_variables(model: str) -> List[str]:
+    """IAM variables premise reads for `model`, from its variable mappings."""
+
+    variables = set()
+
+    def collect(content):
+        if isinstance(content, dict):
+            for key, value in content.items():
+                if key == model and isinstance(value, str):
+                    variables.add(value)
+                elif key == model and isinstance(value, list):
+                    variables.update(v for v in value if isinstance(v, str))
+                else:
+                    collect(value)
+        elif isinstance(content, list):
+            for value in content:
+                collect(value)
+
+    for filepath in sorted(VARIABLES_DIR.glob("*.yaml")):
+        with open(filepath, encoding="utf-8") as file:
+            collect(yaml.safe_load(file))
+
+    variables.update(heat_expression_variables(_heat_mapping(model)))
+
+    return sorted(variables)
+
+
+def _heat_mapping(model: str) -> dict:
+    return load_heat_mapping(VARIABLES_DIR / "heat.yaml", model)
+
+
+def synthetic_iam_file(
+    model: str, pathway: str, directory: Path, seed: int = 0
+) -> Path:
+    """
+    Write an IAM result file covering the regions of `model` and all the
+    variables premise reads for it, with smooth random trajectories.
+
+    :param model: IAM model, e.g. "remind" or "image"
+    :param pathway: pathway name, used in the file name
+    :param directory: output directory
+    :param seed: seed of the random generator
+    :return: path to the file
+    """
+
+    rng = random.Random(f"{model}-{pathway}-{seed}")
+
+    with open(TOPOLOGIES_DIR / f"{model}-topology.json", encoding="utf-8") as file:
+        regions = [region for region in json.load(file) if region != "World"]
+    regions.append("World")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    filepath = directory / f"{get_scenario_file_stems(model, pathway)[0]}.csv"
+
+    # variables subtracted in heat balances are kept small,
+    # so that the balances stay positive
+    subtracted = {
+        term["variable"]
+        for metadata in _heat_mapping(model).values()
+        for term in metadata["terms"]
+        if term["coefficient"] < 0
+    }
+
+    with open(filepath, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Region", "Variable", "Unit", *IAM_YEARS])
+        for variable in _iam_variables(model):
+            for region in regions:
+                value, growth = rng.uniform(1, 100), rng.uniform(-0.02, 0.04)
+                if variable in subtracted:
+                    value /= 1e4
+                writer.writerow(
+                    [
+                        region,
+                        variable,
+                        "EJ/yr",
+                        *(
+                            round(value * (1 + growth) ** (year - 2005), 6)
+                            for year in IAM_YEARS
+                        ),
+                    ]
+                )
+
+    return filepath
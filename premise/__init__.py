@@ -11,6 +11,7 @@ __all__ = (
     "PathwaysDataPackage",
     "clear_cache",
     "clear_inventory_cache",
+    "clear_result_cache",
     "get_regions_definition",
 )
 __version__ = (2, 4, 9, 2)
@@ -19,5 +20,6 @@ __version__ = (2, 4, 9, 2)
 from premise.new_database import NewDatabase
 from premise.incremental import IncrementalDatabase
 from premise.pathways import PathwaysDataPackage
+from premise.result_cache import clear_result_cache
 from premise.utils import clear_cache, clear_inventory_cache, get_regions_definition
 import premise.scenario_downloader
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
+import json
+from collections import OrderedDict, defaultdict
 from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
@@ -71,6 +72,29 @@ def get_mapping(
 FilterType = Union[str, List[str], Dict[str, Union[str, List[str]]]]
 ActivityMapping = Dict[str, List[dict]]
 
+# positions of the datasets matched by a set of filters, by signature of the
+# database and filters. The years of a pathway share the same structure, so
+# the filters are evaluated once and resolved against the database of each year.
+_FILTER_RESULTS: "OrderedDict[tuple, Dict[str, List[int]]]" = OrderedDict()
+_FILTER_RESULTS_SIZE = 256
+
+
+def _database_signature(database: List[dict]) -> tuple:
+    """Signature of the fields read by the mapping filters, for each dataset in order.
+
+    :param database: Life cycle inventory database.
+    :type database: List[dict]
+    :return: Number of datasets and hash of their name, reference product and unit.
+    :rtype: tuple
+    """
+
+    return len(database), hash(
+        tuple(
+            (ds.get("name"), ds.get("reference product"), ds.get("unit"))
+            for ds in database
+        )
+    )
+
 
 def act_fltr(
     database: List[dict],
@@ -539,6 +563,54 @@ class InventorySet:
         """
 
         database = database or self.database
+        if not isinstance(database, list):
+            database = list(database)
+
+        signature = (
+            _database_signature(database),
+            json.dumps(filtr, sort_keys=True, default=str),
+        )
+        positions = _FILTER_RESULTS.get(signature)
+        if positions is None:
+            positions = self._filter_positions(filtr, database)
+            _FILTER_RESULTS[signature] = positions
+            if len(_FILTER_RESULTS) > _FILTER_RESULTS_SIZE:
+                _FILTER_RESULTS.popitem(last=False)
+        else:
+            _FILTER_RESULTS.move_to_end(signature)
+
+        mapping = {
+            tech: [database[position] for position in positions[tech]] for tech in filtr
+        }
+
+        # check if all keys have values
+        # if not, log
+        for key, val in mapping.items():
+            if not val:
+                logger.info(
+                    f"{self.model}|{key}|No activities found for this technology.||"
+                )
+            # else:
+            #    for v in val:
+            #        logger.info(
+            #            f"{self.model}|{key}|{v['name']}|{v['reference product']}|{v['location']}"
+            #        )
+
+        return mapping
+
+    @staticmethod
+    def _filter_positions(
+        filtr: Dict[str, Dict[str, FilterType]], database: List[dict]
+    ) -> Dict[str, List[int]]:
+        """Evaluate Wurst filter specifications against ``database``.
+
+        :param filtr: Filter configuration mapping technology names to filter definitions.
+        :type filtr: Dict[str, Dict[str, FilterType]]
+        :param database: Database to apply the filters on.
+        :type database: List[dict]
+        :return: Positions in ``database`` of the matching activities, by technology name.
+        :rtype: Dict[str, List[int]]
+        """
 
         names: List[str] = []
 
@@ -559,24 +631,12 @@ class InventorySet:
             )
         )
 
-        techs = {
-            tech: act_fltr(subset, fltr.get("fltr"), fltr.get("mask"))
+        positions = {id(ds): position for position, ds in enumerate(database)}
+
+        return {
+            tech: [
+                positions[id(ds)]
+                for ds in act_fltr(subset, fltr.get("fltr"), fltr.get("mask"))
+            ]
             for tech, fltr in filtr.items()
         }
-
-        mapping = techs
-
-        # check if all keys have values
-        # if not, log
-        for key, val in mapping.items():
-            if not val:
-                logger.info(
-                    f"{self.model}|{key}|No activities found for this technology.||"
-                )
-            # else:
-            #    for v in val:
-            #        logger.info(
-            #            f"{self.model}|{key}|{v['name']}|{v['reference product']}|{v['location']}"
-            #        )
-
-        return mapping
@@ -8,8 +8,9 @@ import yaml
 
 from .filesystem_constants import DATA_DIR
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import BaseTransformation, IAMDataCollection, List, np, ws
-from .validation import BatteryValidation
+from .validation import BatteryValidation, get_validation_context
 
 logger = create_logger("battery")
 
@@ -70,6 +71,7 @@ def _update_battery(scenario, version, system_model):
         regions=scenario["iam data"].regions,
         database=battery.database,
         iam_data=scenario["iam data"],
+        context=get_validation_context(scenario, version),
     )
     validation.run_battery_checks()
 
@@ -108,6 +110,7 @@ class Battery(BaseTransformation):
         )
         self.system_model = system_model
 
+    @profiled
     def adjust_battery_market_shares(self) -> None:
         """
         Based on scenario data, adjust the shares within the datasets:
@@ -212,6 +215,7 @@ class Battery(BaseTransformation):
 
             self.write_log(ds, status=f"modified ({market_type})")
 
+    @profiled
     def adjust_battery_mass(self) -> None:
         """
         Adjust vehicle components (e.g., battery).
@@ -12,6 +12,7 @@ import yaml
 from .export import biosphere_flows_dictionary
 from .filesystem_constants import VARIABLES_DIR, DATA_DIR
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
@@ -22,7 +23,7 @@ from .transformation import (
     ws,
 )
 from .activity_maps import InventorySet, act_fltr, get_mapping
-from .validation import BiomassValidation
+from .validation import BiomassValidation, get_validation_context
 
 IAM_BIOMASS_VARS = VARIABLES_DIR / "biomass.yaml"
 BIOMASS_ACTIVITIES = DATA_DIR / "biomass" / "biomass_activities.yaml"
@@ -63,6 +64,7 @@ def _update_biomass(scenario, version, system_model):
         database=biomass.database,
         iam_data=scenario["iam data"],
         system_model=system_model,
+        context=get_validation_context(scenario, version),
     )
 
     validate.run_biomass_checks()
@@ -171,6 +173,7 @@ class Biomass(BaseTransformation):
 
         return ordered_mapping
 
+    @profiled
     def regionalize_wood_chips_activities(self):
         """
         Regionalize wood chips and forestry-related activities,
@@ -210,6 +213,7 @@ class Biomass(BaseTransformation):
                     self.cache[dataset["location"]].pop(self.model, None)
                 self.relink_technosphere_exchanges(dataset)
 
+    @profiled
     def create_regional_biomass_markets(self):
 
         self.process_and_add_markets(
@@ -226,6 +230,7 @@ class Biomass(BaseTransformation):
             },
         )
 
+    @profiled
     def replace_biomass_inputs(self):
 
         new_candidate = {
@@ -11,6 +11,7 @@ import xarray as xr
 
 from .filesystem_constants import DATA_DIR, VARIABLES_DIR
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
@@ -18,6 +19,7 @@ from .transformation import (
     List,
     uuid,
     ws,
+    get_parameter_table,
     get_suppliers_of_a_region,
 )
 from .electricity import filter_technology
@@ -128,7 +130,10 @@ class CarbonDioxideRemoval(BaseTransformation):
         self.version = version
         self.system_model = system_model
         self.mapping = InventorySet(self.database)
+        # efficiencies selected for each carrier, with the array they come from
+        self._cdr_efficiencies_by_carrier = {}
 
+    @profiled
     def regionalize_cdr_activities(self) -> None:
         """
         Generates regional variants of mapped carbon dioxide removal activities.
@@ -360,6 +365,7 @@ class CarbonDioxideRemoval(BaseTransformation):
 
         return constrained
 
+    @profiled
     def create_cdr_markets(
         self,
     ):
@@ -459,6 +465,19 @@ class CarbonDioxideRemoval(BaseTransformation):
 
         return constrained
 
+    def _cdr_efficiency_table(self, efficiencies, carrier):
+        """
+        Parameter table of the efficiencies of `carrier` at the year of the
+        scenario. The efficiencies of each carrier are selected once.
+        """
+        if carrier is None or "carrier" not in efficiencies.dims:
+            return get_parameter_table(efficiencies, self.year)
+
+        by_carrier = self._cdr_efficiencies_by_carrier
+        if by_carrier.get(carrier, (None,))[0] is not efficiencies:
+            by_carrier[carrier] = (efficiencies, efficiencies.sel(carrier=carrier))
+        return get_parameter_table(by_carrier[carrier][1], self.year)
+
     def _get_cdr_efficiency(self, technology, region, carrier):
         efficiencies = getattr(self.iam_data, "cdr_technology_efficiencies", None)
         if efficiencies is None:
@@ -479,16 +498,24 @@ class CarbonDioxideRemoval(BaseTransformation):
                 return None
             selector["region"] = region
 
-        if "year" in efficiencies.coords:
+        table = None
+        if "region" in selector and "year" in efficiencies.coords:
+            table = self._cdr_efficiency_table(efficiencies, selector.get("carrier"))
+
+        if table is not None:
+            efficiency = table.get(region, technology)
+        elif "year" in efficiencies.coords:
             if self.year in efficiencies.coords["year"].values:
                 selector["year"] = self.year
-                efficiency = efficiencies.sel(**selector)
+                efficiency = efficiencies.sel(**selector).values.item(0)
             else:
-                efficiency = efficiencies.sel(**selector).interp(year=self.year)
+                efficiency = (
+                    efficiencies.sel(**selector).interp(year=self.year).values.item(0)
+                )
         else:
-            efficiency = efficiencies.sel(**selector)
+            efficiency = efficiencies.sel(**selector).values.item(0)
 
-        efficiency = float(efficiency.values.item(0))
+        efficiency = float(efficiency)
         if not np.isfinite(efficiency) or efficiency == 0:
             return None
 
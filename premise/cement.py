@@ -12,6 +12,7 @@ import uuid
 
 from .export import biosphere_flows_dictionary
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
@@ -20,7 +21,7 @@ from .transformation import (
     np,
     ws,
 )
-from .validation import CementValidation
+from .validation import CementValidation, get_validation_context
 
 logger = create_logger("cement")
 
@@ -63,6 +64,7 @@ def _update_cement(scenario, version, system_model):
             regions=scenario["iam data"].regions,
             database=cement.database,
             iam_data=scenario["iam data"],
+            context=get_validation_context(scenario, version),
         )
 
         validate.run_cement_checks()
@@ -139,6 +141,7 @@ class Cement(BaseTransformation):
 
         self.biosphere_dict = biosphere_flows_dictionary(self.version)
 
+    @profiled
     def build_clinker_production_datasets(self) -> list:
         """
         Builds clinker production datasets for each IAM region.
@@ -773,6 +776,7 @@ class Cement(BaseTransformation):
 
         return dataset
 
+    @profiled
     def replace_clinker_production_with_markets(self):
         """
         Some cement production datasets in ecoinvent receive an input from clinker production datasets.
@@ -790,6 +794,7 @@ class Cement(BaseTransformation):
                 if exc["name"] == "clinker production" and exc["product"] == "clinker":
                     exc["name"] = "market for clinker"
 
+    @profiled
     def create_clinker_market_datasets(self) -> None:
         """
         Runs a series of methods that create new clinker and cement production datasets
@@ -806,6 +811,7 @@ class Cement(BaseTransformation):
             system_model=self.system_model,
         )
 
+    @profiled
     def create_cement_market_datasets(self):
         # exclude the regionalization of these datasets
         # because they are very rarely used in the database
@@ -884,6 +890,7 @@ class Cement(BaseTransformation):
                 system_model=self.system_model,
             )
 
+    @profiled
     def create_cement_production_datasets(self):
         # cement production
         production_datasets = [
@@ -900,6 +907,7 @@ class Cement(BaseTransformation):
             mapping=cement,
         )
 
+    @profiled
     def create_clinker_technology_datasets(self):
 
         clinker_dataset = ws.get_one(
@@ -930,6 +938,7 @@ class Cement(BaseTransformation):
             self.write_log(new_dataset, "created")
             self.database.append(new_dataset)
 
+    @profiled
     def create_cement_CCS_datasets(self):
 
         # add CCS datasets
@@ -3,9 +3,13 @@
 from __future__ import annotations
 
 import csv
+import pickle
 import pprint
+import time
+from functools import partial
+from multiprocessing import Pool
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import bw2io
 import numpy as np
@@ -18,7 +22,12 @@ from bw2data.database import DatabaseChooser
 from tqdm import tqdm
 from wurst import searching as ws
 
-from ._bw2_backend_compat import ActivityDataset, ExchangeDataset, SQLiteBackend
+from ._bw2_backend_compat import (
+    ActivityDataset,
+    ExchangeDataset,
+    SQLiteBackend,
+    sqlite3_lci_db,
+)
 from .data_collection import get_delimiter
 from .filesystem_constants import DATA_DIR
 
@@ -46,6 +55,15 @@ def load_methane_correction_list() -> List[str]:
     return methane_correction_list
 
 
+def _remove_exchange_uncertainty(exchange: Dict[str, Any]) -> Dict[str, Any]:
+    exchange["uncertainty type"] = 0
+    exchange["loc"] = float(exchange["amount"])
+    for key in ("scale", "shape", "minimum", "maximum"):
+        exchange[key] = np.nan
+
+    return exchange
+
+
 def remove_uncertainty(database: List[dict]) -> List[dict]:
     """Remove uncertainty information from database exchanges.
 
@@ -55,15 +73,9 @@ def remove_uncertainty(database: List[dict]) -> List[dict]:
     :rtype: List[dict]
     """
 
-    uncertainty_keys = ["scale", "shape", "minimum", "maximum"]
-    nan_value = np.nan
-
     for dataset in database:
         for exchange in dataset["exchanges"]:
-            exchange["uncertainty type"] = 0
-            exchange["loc"] = float(exchange["amount"])
-            for key in uncertainty_keys:
-                exchange[key] = nan_value
+            _remove_exchange_uncertainty(exchange)
 
     return database
 
@@ -124,6 +136,10 @@ def get_biosphere_flow_categories(
     }
 
 
+def _remove_none_values(exchange: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in exchange.items() if value is not None}
+
+
 def remove_nones(database: List[dict]) -> List[dict]:
     """Remove exchanges with ``None`` values from the database.
 
@@ -133,11 +149,10 @@ def remove_nones(database: List[dict]) -> List[dict]:
     :rtype: List[dict]
     """
 
-    def exists(exchange: Dict[str, Any]) -> Dict[str, Any]:
-        return {key: value for key, value in exchange.items() if value is not None}
-
     for dataset in database:
-        dataset["exchanges"] = [exists(exc) for exc in dataset["exchanges"]]
+        dataset["exchanges"] = [
+            _remove_none_values(exc) for exc in dataset["exchanges"]
+        ]
 
     return database
 
@@ -215,44 +230,72 @@ def _extract_parameters(parameters: Any) -> Dict[str, Any]:
     }
 
 
-def _extract_activity_for_premise(
-    proxy: ActivityDataset, add_identifiers: bool = False
+def _activity_for_premise(
+    data: Dict[str, Any],
+    location: str,
+    database: str,
+    code: str,
+    name: str,
+    product: str,
+    activity_type: str,
+    activity_id: int,
+    add_identifiers: bool = False,
 ) -> Dict[str, Any]:
     obj = {
-        "location": proxy.location,
-        "database": proxy.database,
-        "code": proxy.code,
-        "name": proxy.name,
-        "reference product": proxy.product,
-        "unit": proxy.data.get("unit", ""),
+        "location": location,
+        "database": database,
+        "code": code,
+        "name": name,
+        "reference product": product,
+        "unit": data.get("unit", ""),
         "exchanges": [],
-        "type": proxy.type,
+        "type": activity_type,
     }
 
-    classifications = proxy.data.get("classifications")
+    classifications = data.get("classifications")
     if classifications:
         obj["classifications"] = classifications
 
-    comment = proxy.data.get("comment")
+    comment = data.get("comment")
     if comment:
         obj["comment"] = comment
 
-    categories = proxy.data.get("categories")
+    categories = data.get("categories")
     if categories:
         obj["categories"] = categories
 
-    parameters = _extract_parameters(proxy.data.get("parameters", []))
+    parameters = _extract_parameters(data.get("parameters", []))
     if parameters:
         obj["parameters"] = parameters
 
     if add_identifiers:
-        obj["id"] = proxy.id
+        obj["id"] = activity_id
 
     return obj
 
 
-def _extract_exchange_for_premise(
-    proxy: ExchangeDataset, add_properties: bool = False
+def _extract_activity_for_premise(
+    proxy: ActivityDataset, add_identifiers: bool = False
+) -> Dict[str, Any]:
+    return _activity_for_premise(
+        proxy.data,
+        proxy.location,
+        proxy.database,
+        proxy.code,
+        proxy.name,
+        proxy.product,
+        proxy.type,
+        proxy.id,
+        add_identifiers=add_identifiers,
+    )
+
+
+def _exchange_for_premise(
+    exchange: Dict[str, Any],
+    exchange_type: str,
+    input_key: Tuple[str, str],
+    output_key: Tuple[str, str],
+    add_properties: bool = False,
 ) -> Dict[str, Any]:
     uncertainty_fields = (
         "uncertainty type",
@@ -264,30 +307,42 @@ def _extract_exchange_for_premise(
         "amount",
         "pedigree",
     )
-    data = {key: proxy.data[key] for key in uncertainty_fields if key in proxy.data}
+    data = {key: exchange[key] for key in uncertainty_fields if key in exchange}
     assert "amount" in data, "Exchange has no `amount` field"
 
     if "uncertainty type" not in data:
         data["uncertainty type"] = 0
         data["loc"] = data["amount"]
 
-    data["type"] = proxy.type
+    data["type"] = exchange_type
 
-    production_volume = proxy.data.get("production volume")
+    production_volume = exchange.get("production volume")
     if production_volume is not None:
         data["production volume"] = production_volume
 
-    data["input"] = (proxy.input_database, proxy.input_code)
-    data["output"] = (proxy.output_database, proxy.output_code)
+    data["input"] = input_key
+    data["output"] = output_key
 
     if add_properties:
-        properties = proxy.data.get("properties")
+        properties = exchange.get("properties")
         if properties:
             data["properties"] = properties
 
     return data
 
 
+def _extract_exchange_for_premise(
+    proxy: ExchangeDataset, add_properties: bool = False
+) -> Dict[str, Any]:
+    return _exchange_for_premise(
+        proxy.data,
+        proxy.type,
+        (proxy.input_database, proxy.input_code),
+        (proxy.output_database, proxy.output_code),
+        add_properties=add_properties,
+    )
+
+
 def _add_exchanges_to_consumers_for_premise(
     activities: List[Dict[str, Any]],
     exchange_qs,
@@ -420,6 +475,300 @@ def extract_brightway_databases_for_premise(
     return activities
 
 
+# number of rows fetched at once from the Brightway SQLite database
+SQLITE_FETCH_SIZE = 20_000
+
+
+def _decode_activity_row(row: tuple, add_identifiers: bool = False) -> Dict[str, Any]:
+    return _activity_for_premise(
+        pickle.loads(row[0]), *row[1:], add_identifiers=add_identifiers
+    )
+
+
+def _decode_exchange_row(row: tuple, add_properties: bool = False) -> Dict[str, Any]:
+    return _exchange_for_premise(
+        pickle.loads(row[0]),
+        row[1],
+        (row[2], row[3]),
+        (row[4], row[5]),
+        add_properties=add_properties,
+    )
+
+
+def _decode_input_row(row: tuple) -> tuple:
+    data = pickle.loads(row[0])
+    return (row[2], row[3]), (
+        row[4],
+        row[5],
+        data.get("unit"),
+        row[1],
+        row[7],
+        data.get("categories"),
+    )
+
+
+def _iter_sqlite_rows(
+    connection, query: str, parameters: list, decode: Callable, pool=None
+) -> Iterable[Dict[str, Any]]:
+    """
+    Yield the decoded rows of a query, fetched in batches of
+    `SQLITE_FETCH_SIZE` rows and decoded in `pool` if one is given.
+    """
+
+    cursor = connection.execute(query, parameters)
+    try:
+        while True:
+            rows = cursor.fetchmany(SQLITE_FETCH_SIZE)
+            if not rows:
+                break
+
+            if pool is None:
+                yield from map(decode, rows)
+            else:
+                yield from pool.imap(decode, rows, chunksize=1_000)
+    finally:
+        cursor.close()
+
+
+def _strip_exchange_strings(exc: Dict[str, Any]) -> None:
+    exc["name"] = exc["name"].strip()
+    # also check for unicode characters like \xa0
+    exc["name"] = exc["name"].replace("\xa0", "")
+    if exc.get("product"):
+        exc["product"] = exc["product"].strip()
+        exc["product"] = exc["product"].replace("\xa0", "")
+    if exc.get("location"):
+        exc["location"] = exc["location"].strip()
+    if exc.get("unit"):
+        exc["unit"] = exc["unit"].strip()
+
+
+def extract_brightway_databases_from_sqlite(
+    database_names,
+    add_properties: bool = False,
+    add_identifiers: bool = False,
+    processes: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Extract Brightway databases by reading their SQLite tables directly.
+
+    Returns the same datasets as `extract_brightway_databases_for_premise`
+    followed by `remove_categories` and `strip_string_from_spaces`, but the
+    raw rows are fetched in large batches and each row is decoded and
+    cleaned in a single pass, without building ORM objects.
+
+    :param database_names: name(s) of the Brightway databases to extract.
+    :param add_properties: add the properties of exchanges.
+    :param add_identifiers: add the ids and codes of activities and exchange inputs.
+    :param processes: number of processes used to decode the rows, if more than one.
+    :return: list of datasets.
+    """
+    if isinstance(database_names, str):
+        database_names = [database_names]
+
+    error = "Must pass list of database names"
+    assert isinstance(database_names, (list, tuple, set)), error
+
+    databases = [DatabaseChooser(name) for name in database_names]
+    error = "Wrong type of database object (must be SQLiteBackend)"
+    assert all(isinstance(obj, SQLiteBackend) for obj in databases), error
+
+    database_names = list(database_names)
+    names = set(database_names)
+    placeholders = ", ".join("?" for _ in database_names)
+    activity_table = ActivityDataset._meta.table_name
+    exchange_table = ExchangeDataset._meta.table_name
+    activity_columns = "data, location, database, code, name, product, type, id"
+
+    connection = sqlite3_lci_db.db.connection()
+    pool = Pool(processes) if processes and processes > 1 else None
+
+    try:
+        activities, inputs = [], {}
+        decode_activity = partial(_decode_activity_row, add_identifiers=True)
+
+        print("Getting activity data")
+        for obj in tqdm(
+            _iter_sqlite_rows(
+                connection,
+                f"SELECT {activity_columns} FROM {activity_table} "
+                f"WHERE database IN ({placeholders})",
+                database_names,
+                decode_activity,
+                pool,
+            )
+        ):
+            inputs[(obj["database"], obj["code"])] = (
+                obj["name"],
+                obj["reference product"],
+                obj["unit"],
+                obj["location"],
+                obj["id"],
+                obj.get("categories"),
+            )
+
+            if not add_identifiers:
+                del obj["id"]
+            obj.pop("categories", None)
+            obj["name"] = obj["name"].strip()
+            # also check for unicode characters like \xa0
+            obj["name"] = obj["name"].replace("\xa0", "")
+            obj["reference product"] = obj["reference product"].strip()
+            obj["location"] = obj["location"].strip()
+            activities.append(obj)
+
+        # activities of other databases (e.g., biosphere) used as inputs
+        for key, values in _iter_sqlite_rows(
+            connection,
+            f"SELECT {activity_columns} FROM {activity_table} "
+            f"WHERE database IN (SELECT DISTINCT input_database FROM {exchange_table} "
+            f"WHERE output_database IN ({placeholders})) "
+            f"AND database NOT IN ({placeholders})",
+            database_names * 2,
+            _decode_input_row,
+            pool,
+        ):
+            inputs.setdefault(key, values)
+
+        lookup = {(o["database"], o["code"]): o for o in activities}
+
+        print("Adding exchange data to activities")
+        for exc in tqdm(
+            _iter_sqlite_rows(
+                connection,
+                "SELECT data, type, input_database, input_code, output_database, "
+                f"output_code FROM {exchange_table} "
+                f"WHERE output_database IN ({placeholders})",
+                database_names,
+                partial(_decode_exchange_row, add_properties=add_properties),
+                pool,
+            )
+        ):
+            name, product, unit, location, input_id, categories = inputs[exc["input"]]
+
+            if exc["input"][0] in names:
+                exc["product"] = product
+                exc["name"] = name
+            else:
+                exc["name"] = name
+                exc["product"] = product
+            exc["unit"] = unit
+            exc["location"] = location
+
+            if add_identifiers:
+                exc["id"] = input_id
+                exc["code"] = exc["input"][1]
+
+            if exc["type"] in labels.biosphere_edge_types and categories:
+                exc["categories"] = categories
+
+            if exc["input"][0] in names:
+                del exc["input"]
+
+            _strip_exchange_strings(exc)
+            lookup[exc.pop("output")]["exchanges"].append(exc)
+
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return activities
+
+
+class CleaningStep:
+    """A step of the cleaning pipeline.
+
+    A step declares a hook applied to each dataset and/or a hook applied to
+    each exchange of a dataset. Exchange hooks receive the exchange and its
+    dataset and return the exchange to keep (possibly a new dictionary), or
+    ``None`` to remove it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dataset_hook: Optional[Callable[[dict], None]] = None,
+        exchange_hook: Optional[Callable[[dict, dict], Optional[dict]]] = None,
+        description: Optional[str] = None,
+    ) -> None:
+        """
+        :param name: Name of the step, used to report its timing.
+        :param dataset_hook: Function applied to each dataset.
+        :param exchange_hook: Function applied to each exchange of a dataset.
+        :param description: Message printed when the pipeline runs.
+        """
+        self.name = name
+        self.dataset_hook = dataset_hook
+        self.exchange_hook = exchange_hook
+        self.description = description
+
+
+class CleaningPipeline:
+    """Apply cleaning steps to a database in a single traversal.
+
+    Each dataset goes through the steps in order. The exchange hooks of
+    consecutive steps are applied together to each exchange, so that the
+    result is the same as running the steps one after the other over the
+    whole database, as long as the steps only depend on the dataset at hand
+    and on lookups built beforehand.
+    """
+
+    def __init__(self, steps: List[CleaningStep]) -> None:
+        """
+        :param steps: Steps to apply, in order.
+        """
+        self.steps = steps
+        self.timings: Dict[str, float] = {step.name: 0.0 for step in steps}
+
+    def _apply_exchange_hooks(self, dataset: dict, hooks: list) -> None:
+        timings = self.timings
+        exchanges = []
+        for exc in dataset["exchanges"]:
+            start = time.perf_counter()
+            for name, hook in hooks:
+                exc = hook(exc, dataset)
+                end = time.perf_counter()
+                timings[name] += end - start
+                start = end
+                if exc is None:
+                    break
+            else:
+                exchanges.append(exc)
+
+        dataset["exchanges"] = exchanges
+
+    def run(self, database: List[dict]) -> List[dict]:
+        """Apply the steps to all datasets of ``database``.
+
+        :param database: Inventory database to clean, modified in place.
+        :type database: List[dict]
+        :return: The cleaned database.
+        :rtype: List[dict]
+        """
+
+        for step in self.steps:
+            if step.description:
+                print(step.description)
+
+        timings = self.timings
+        for dataset in database:
+            hooks = []
+            for step in self.steps:
+                if step.dataset_hook is not None:
+                    if hooks:
+                        self._apply_exchange_hooks(dataset, hooks)
+                        hooks = []
+                    start = time.perf_counter()
+                    step.dataset_hook(dataset)
+                    timings[step.name] += time.perf_counter() - start
+                if step.exchange_hook is not None:
+                    hooks.append((step.name, step.exchange_hook))
+            if hooks:
+                self._apply_exchange_hooks(dataset, hooks)
+
+        return database
+
+
 class DatabaseCleaner:
     """Clean datasets contained in inventory databases for further processing."""
 
@@ -443,16 +792,19 @@ class DatabaseCleaner:
         :raises NameError: If the Brightway database is empty.
         """
 
+        self.version = version
+        # time spent in each cleaning step, in seconds
+        self.timings: Dict[str, float] = {}
+
         if source_type == "brightway":
             # Check that database exists
             if len(DatabaseChooser(source_db)) == 0:
                 raise NameError(
                     "The database selected is empty. Make sure the name is correct"
                 )
-            self.database = extract_brightway_databases_for_premise(source_db)
-            self.database = remove_categories(self.database)
-            # strip strings form spaces
-            self.database = strip_string_from_spaces(self.database)
+            # datasets are read from the SQLite database, cleaned of
+            # categories and stripped of spaces in a single pass
+            self.database = extract_brightway_databases_from_sqlite(source_db)
 
         if source_type == "ecospold":
             if source_file_path is None:
@@ -471,13 +823,17 @@ class DatabaseCleaner:
             # strip strings form spaces
             self.database = strip_string_from_spaces(self.database)
 
-            # Location field is added to exchanges
-            self.add_location_field_to_exchanges()
-            # Product field is added to exchanges
-            self.add_product_field_to_exchanges()
-            # Parameter field is converted from a list to a dictionary
-            self.transform_parameter_field()
-        self.version = version
+            # Location and product fields are added to exchanges and
+            # the parameter field is converted from a list to a dictionary
+            pipeline = CleaningPipeline(
+                [
+                    self._exchange_location_step(),
+                    self._exchange_product_step(),
+                    self._parameter_field_step(),
+                ]
+            )
+            pipeline.run(self.database)
+            self.timings.update(pipeline.timings)
 
     def find_product_given_lookup_dict(self, lookup_dict: Dict[str, str]) -> List[str]:
         """Return products matching the filters in ``lookup_dict``.
@@ -509,86 +865,121 @@ class DatabaseCleaner:
             )
         ]
 
-    def add_location_field_to_exchanges(self) -> None:
-        """Add the ``location`` key to production and technosphere exchanges.
+    def _biosphere_flow_lookups(self) -> Tuple[Dict, Dict]:
+        """Return the biosphere flow UUIDs and categories, read once."""
+        if getattr(self, "_biosphere_flows", None) is None:
+            dict_bio_uuid = get_biosphere_flow_uuid(self.version)
+            dict_bio_cat = {
+                v: (k[1], k[2]) if k[2] != "unspecified" else (k[1],)
+                for k, v in dict_bio_uuid.items()
+            }
+            self._biosphere_flows = (dict_bio_uuid, dict_bio_cat)
 
-        :raises KeyError: If no matching activity can be found for an exchange input.
-        """
+        return self._biosphere_flows
+
+    def _exchange_location_step(self) -> CleaningStep:
         d_location = {(a["database"], a["code"]): a["location"] for a in self.database}
-        for dataset in self.database:
-            for exchange in dataset["exchanges"]:
-                if exchange["type"] == "technosphere":
-                    exc_input = exchange["input"]
-                    exchange["location"] = d_location[exc_input]
 
-    def add_product_field_to_exchanges(self) -> None:
-        """Populate the ``product`` key on production and technosphere exchanges.
+        def add_location(exchange, dataset):
+            if exchange["type"] == "technosphere":
+                exchange["location"] = d_location[exchange["input"]]
+            return exchange
 
-        :raises KeyError: If no corresponding activity can be found for an exchange input.
-        """
+        return CleaningStep("exchange location", exchange_hook=add_location)
+
+    def _exchange_product_step(self) -> CleaningStep:
         # Create a dictionary that contains the 'code' field as key and the 'product' field as value
         d_product = {
             a["code"]: (a["reference product"], a["name"]) for a in self.database
         }
-        # Add a `product` field to the production exchange
-        for dataset in self.database:
-            for exchange in dataset["exchanges"]:
-                if exchange["type"] == "production":
-                    if "product" not in exchange:
-                        exchange["product"] = dataset["reference product"]
-
-                    if exchange["name"] != dataset["name"]:
-                        exchange["name"] = dataset["name"]
-
-        # Add a `product` field to technosphere exchanges
-        for dataset in self.database:
-            for exchange in dataset["exchanges"]:
-                if exchange["type"] == "technosphere":
-                    # Check if the field 'product' is present
-                    if "product" not in exchange:
+
+        def add_product(exchange, dataset):
+            # Add a `product` field to the production exchange
+            if exchange["type"] == "production":
+                if "product" not in exchange:
+                    exchange["product"] = dataset["reference product"]
+
+                if exchange["name"] != dataset["name"]:
+                    exchange["name"] = dataset["name"]
+
+            # Add a `product` field to technosphere exchanges
+            elif exchange["type"] == "technosphere":
+                # Check if the field 'product' is present
+                if "product" not in exchange:
+                    exchange["product"] = d_product[exchange["input"][1]][0]
+
+                # If a 'reference product' field is present,
+                # we make sure it matches with the new 'product' field
+                if "reference product" in exchange:
+                    try:
+                        assert exchange["product"] == exchange["reference product"]
+                    except AssertionError:
                         exchange["product"] = d_product[exchange["input"][1]][0]
 
-                    # If a 'reference product' field is present,
-                    # we make sure it matches with the new 'product' field
-                    if "reference product" in exchange:
-                        try:
-                            assert exchange["product"] == exchange["reference product"]
-                        except AssertionError:
-                            exchange["product"] = d_product[exchange["input"][1]][0]
+                # Ensure the name is correct
+                exchange["name"] = d_product[exchange["input"][1]][1]
 
-                    # Ensure the name is correct
-                    exchange["name"] = d_product[exchange["input"][1]][1]
+            return exchange
 
-    def transform_parameter_field(self) -> None:
-        """Transform the parameter field from lists to dictionaries."""
+        return CleaningStep("exchange product", exchange_hook=add_product)
+
+    @staticmethod
+    def _parameter_field_step() -> CleaningStep:
         # When handling ecospold files directly, the parameter field is a list.
         # It is here transformed into a dictionary
-        for dataset in self.database:
+        def transform_parameters(dataset):
             dataset["parameters"] = {
                 k["name"]: k["amount"] for k in dataset["parameters"]
             }
 
-    # Functions to clean up Wurst import and additional technologies
-    def fix_unset_technosphere_and_production_exchange_locations(
-        self, matching_fields: Tuple[str, str] = ("name", "unit")
-    ) -> None:
-        """Fill missing locations for production and technosphere exchanges.
+        return CleaningStep("parameter field", dataset_hook=transform_parameters)
 
-        :param matching_fields: Fields used to look up potential location matches.
-        :type matching_fields: Tuple[str, str]
+    def add_location_field_to_exchanges(self) -> None:
+        """Add the ``location`` key to production and technosphere exchanges.
+
+        :raises KeyError: If no matching activity can be found for an exchange input.
         """
-        for dataset in self.database:
-            # collect production exchanges that simply do not have a location key and set it to
-            # the location of the dataset
-            for exc in wurst.production(dataset):
+        CleaningPipeline([self._exchange_location_step()]).run(self.database)
+
+    def add_product_field_to_exchanges(self) -> None:
+        """Populate the ``product`` key on production and technosphere exchanges.
+
+        :raises KeyError: If no corresponding activity can be found for an exchange input.
+        """
+        CleaningPipeline([self._exchange_product_step()]).run(self.database)
+
+    def transform_parameter_field(self) -> None:
+        """Transform the parameter field from lists to dictionaries."""
+        CleaningPipeline([self._parameter_field_step()]).run(self.database)
+
+    # Functions to clean up Wurst import and additional technologies
+    def _unset_exchange_location_step(
+        self,
+        matching_fields: Tuple[str, str] = ("name", "unit"),
+        default_location: Optional[str] = None,
+    ) -> CleaningStep:
+        # locations of datasets, indexed by the values of the matching fields;
+        # `default_location` replaces missing locations when the datasets
+        # are given one by a previous step of the same pipeline
+        locations = {}
+        for ds in self.database:
+            location = ds.get("location")
+            if location is None and default_location is not None:
+                location = default_location
+            locations.setdefault(tuple(ds.get(k) for k in matching_fields), []).append(
+                location
+            )
+
+        def fix_location(exc, dataset):
+            # production exchanges that simply do not have a location key
+            # are set to the location of the dataset
+            if exc.get("type") == "production":
                 if "location" not in exc:
                     exc["location"] = dataset["location"]
 
-            for exc in wurst.technosphere(dataset):
+            elif exc.get("type") == "technosphere":
                 if "location" not in exc:
-                    locs = self.find_location_given_lookup_dict(
-                        {k: exc.get(k) for k in matching_fields}
-                    )
+                    locs = locations.get(tuple(exc.get(k) for k in matching_fields), [])
                     if len(locs) == 1:
                         exc["location"] = locs[0]
                     else:
@@ -596,85 +987,101 @@ class DatabaseCleaner:
                             f"No unique location found for exchange:\n{pprint.pformat(exc)}\nFound: {locs}"
                         )
 
-    def fix_biosphere_flow_categories(self) -> None:
-        """Ensure biosphere exchanges include category information."""
+            return exc
+
+        return CleaningStep(
+            "unset exchange locations",
+            exchange_hook=fix_location,
+            description="Correct missing location of technosphere exchanges.",
+        )
 
-        dict_bio_cat = get_biosphere_flow_categories(self.version)
-        dict_bio_uuid = get_biosphere_flow_uuid(self.version)
-
-        for dataset in self.database:
-            for exc in dataset["exchanges"]:
-                if exc["type"] == "biosphere":
-                    if "categories" not in exc:
-                        # from the uuid, fetch the flow category
-                        if "input" in exc:
-                            if exc["input"][1] in dict_bio_cat:
-                                key = exc["input"][1]
-                                exc["categories"] = dict_bio_cat[key]
-                            else:
-                                print(f"no flow code for {exc['name']}")
-                                exc["delete"] = True
-
-                        elif "flow" in exc:
-                            if exc["flow"] in dict_bio_cat:
-                                key = exc["flow"]
-                                exc["categories"] = dict_bio_cat[key]
-                            else:
-                                print(f"no flow code for {exc['name']}")
-                                exc["delete"] = True
+    def fix_unset_technosphere_and_production_exchange_locations(
+        self, matching_fields: Tuple[str, str] = ("name", "unit")
+    ) -> None:
+        """Fill missing locations for production and technosphere exchanges.
 
+        :param matching_fields: Fields used to look up potential location matches.
+        :type matching_fields: Tuple[str, str]
+        """
+        CleaningPipeline([self._unset_exchange_location_step(matching_fields)]).run(
+            self.database
+        )
+
+    def _biosphere_flow_categories_step(self) -> CleaningStep:
+        dict_bio_uuid, dict_bio_cat = self._biosphere_flow_lookups()
+
+        def fix_categories(exc, dataset):
+            if exc["type"] == "biosphere":
+                if "categories" not in exc:
+                    # from the uuid, fetch the flow category
+                    if "input" in exc:
+                        if exc["input"][1] in dict_bio_cat:
+                            key = exc["input"][1]
+                            exc["categories"] = dict_bio_cat[key]
                         else:
-                            print(f"no input or categories for {exc['name']}")
+                            print(f"no flow code for {exc['name']}")
                             exc["delete"] = True
 
-                    if "input" not in exc:
-                        if "flow" in exc:
-                            exc["input"] = ("biosphere3", exc["flow"])
-
-                        elif "categories" in exc:
-                            # from the category, fetch the uuid of that biosphere flow
-                            cat = (
-                                exc["categories"]
-                                if len(exc["categories"]) > 1
-                                else (exc["categories"][0], "unspecified")
-                            )
-                            uuid = dict_bio_uuid[
-                                exc["name"], cat[0], cat[1], exc["unit"]
-                            ]
-                            exc["input"] = ("biosphere3", uuid)
-
-                            if "delete" in exc:
-                                del exc["delete"]
+                    elif "flow" in exc:
+                        if exc["flow"] in dict_bio_cat:
+                            key = exc["flow"]
+                            exc["categories"] = dict_bio_cat[key]
                         else:
-                            print(f"no input or categories for {exc['name']}")
+                            print(f"no flow code for {exc['name']}")
                             exc["delete"] = True
 
-            dataset["exchanges"] = [
-                exc for exc in dataset["exchanges"] if "delete" not in exc
-            ]
-
-    def correct_biogas_activities(self) -> None:
-        """Balance carbon and energy flows for specific biogas activities."""
+                    else:
+                        print(f"no input or categories for {exc['name']}")
+                        exc["delete"] = True
+
+                if "input" not in exc:
+                    if "flow" in exc:
+                        exc["input"] = ("biosphere3", exc["flow"])
+
+                    elif "categories" in exc:
+                        # from the category, fetch the uuid of that biosphere flow
+                        cat = (
+                            exc["categories"]
+                            if len(exc["categories"]) > 1
+                            else (exc["categories"][0], "unspecified")
+                        )
+                        uuid = dict_bio_uuid[exc["name"], cat[0], cat[1], exc["unit"]]
+                        exc["input"] = ("biosphere3", uuid)
 
-        list_biogas_activities = load_methane_correction_list()
-        biosphere_codes = get_biosphere_flow_uuid(self.version)
+                        if "delete" in exc:
+                            del exc["delete"]
+                    else:
+                        print(f"no input or categories for {exc['name']}")
+                        exc["delete"] = True
 
-        # find datasets that have a name in the list
-        filters = [
-            ws.either(*[ws.equals("name", name) for name in list_biogas_activities]),
-        ]
+            return None if "delete" in exc else exc
 
-        biogas_datasets = ws.get_many(
-            self.database,
-            *filters,
-            ws.equals("reference product", "biogas"),
-            ws.equals("unit", "cubic meter"),
+        return CleaningStep(
+            "biosphere flow categories",
+            exchange_hook=fix_categories,
+            description="Correct missing flow categories for biosphere exchanges",
         )
 
-        # add a flow of "Carbon dioxide, in air" to the dataset
-        # if not present. We add 1.96 kg CO2/m3 biogas.
+    def fix_biosphere_flow_categories(self) -> None:
+        """Ensure biosphere exchanges include category information."""
+        CleaningPipeline([self._biosphere_flow_categories_step()]).run(self.database)
+
+    def _biogas_activities_step(self) -> CleaningStep:
+        list_biogas_activities = set(load_methane_correction_list())
+        biosphere_codes = self._biosphere_flow_lookups()[0]
+
+        def correct_biogas(ds):
+            # find datasets that have a name in the list
+            if (
+                ds.get("name") not in list_biogas_activities
+                or ds.get("reference product") != "biogas"
+                or ds.get("unit") != "cubic meter"
+            ):
+                return
+
+            # add a flow of "Carbon dioxide, in air" to the dataset
+            # if not present. We add 1.96 kg CO2/m3 biogas.
 
-        for ds in biogas_datasets:
             # Add CO2 uptake
             if not any(
                 exc
@@ -731,6 +1138,12 @@ class DatabaseCleaner:
                     }
                 )
 
+        return CleaningStep("biogas activities", dataset_hook=correct_biogas)
+
+    def correct_biogas_activities(self) -> None:
+        """Balance carbon and energy flows for specific biogas activities."""
+        CleaningPipeline([self._biogas_activities_step()]).run(self.database)
+
     def prepare_datasets(self, keep_uncertainty_data: bool) -> List[dict]:
         """Run the standard cleaning pipeline on the loaded database.
 
@@ -740,29 +1153,44 @@ class DatabaseCleaner:
         :rtype: List[dict]
         """
 
-        # Set missing locations to ```GLO``` for datasets in ``database``
-        print("Set missing location of datasets to global scope.")
-        wurst.default_global_location(self.database)
-
-        # Set missing locations to ```GLO``` for exchanges in ``datasets``
-        print("Set missing location of production exchanges to scope of dataset.")
-
-        print("Correct missing location of technosphere exchanges.")
-        self.fix_unset_technosphere_and_production_exchange_locations()
-
-        print("Correct missing flow categories for biosphere exchanges")
-        self.fix_biosphere_flow_categories()
-
-        # Remove empty exchanges
-        print("Remove empty exchanges.")
-        remove_nones(self.database)
-
-        # correct carbon and energy balance
-        self.correct_biogas_activities()
+        def default_global_location(dataset):
+            if dataset.get("location") is None:
+                dataset["location"] = "GLO"
+
+        steps = [
+            # Set missing locations to ```GLO``` for datasets in ``database``
+            CleaningStep(
+                "default global location",
+                dataset_hook=default_global_location,
+                description="Set missing location of datasets to global scope.",
+            ),
+            # Set missing locations of production and technosphere exchanges
+            self._unset_exchange_location_step(default_location="GLO"),
+            self._biosphere_flow_categories_step(),
+            # Remove empty exchanges
+            CleaningStep(
+                "remove nones",
+                exchange_hook=lambda exc, dataset: _remove_none_values(exc),
+                description="Remove empty exchanges.",
+            ),
+            # correct carbon and energy balance
+            self._biogas_activities_step(),
+        ]
 
         # Remove uncertainty data
         if not keep_uncertainty_data:
-            print("Remove uncertainty data.")
-            self.database = remove_uncertainty(self.database)
+            steps.append(
+                CleaningStep(
+                    "remove uncertainty",
+                    exchange_hook=lambda exc, dataset: _remove_exchange_uncertainty(
+                        exc
+                    ),
+                    description="Remove uncertainty data.",
+                )
+            )
+
+        pipeline = CleaningPipeline(steps)
+        self.database = pipeline.run(self.database)
+        self.timings.update(pipeline.timings)
 
         return self.database
@@ -0,0 +1,242 @@
+"""
+Compact in-memory representation of scenario databases. Exchanges are
+stored as `CompactExchange` objects, with one slot per usual exchange
+field instead of a dictionary, and their strings are interned through
+a shared `SymbolTable`, so that each name, product, location or unit
+is held once across all the datasets and scenarios. A compact exchange
+behaves as a mutable mapping: ``exc["amount"]``, ``exc.get("location")``,
+``exc.items()``, copies and pickling keep working.
+"""
+
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from wurst import rescale_exchange as _rescale_exchange
+
+# exchange fields held in slots, other fields (production volume,
+# comment, bounds of uncertainty distributions...) go to `_extra`
+EXCHANGE_FIELDS = {
+    "name": "name",
+    "product": "product",
+    "location": "location",
+    "unit": "unit",
+    "type": "type",
+    "amount": "amount",
+    "categories": "categories",
+    "input": "input",
+    "uncertainty type": "uncertainty_type",
+    "loc": "loc",
+    "scale": "scale",
+}
+
+# dataset fields whose values are interned
+DATASET_SYMBOL_FIELDS = (
+    "name",
+    "reference product",
+    "location",
+    "unit",
+    "database",
+    "type",
+)
+
+_MISSING = object()
+
+
+class SymbolTable:
+    """
+    Interns strings, and tuples of strings such as categories and
+    inputs, so that equal values share one object.
+    """
+
+    def __init__(self):
+        self._symbols: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def intern(self, value: Any) -> Any:
+        """
+        Return the shared object equal to `value`, if it is a string or
+        a tuple of strings, or `value` itself otherwise.
+        """
+        if isinstance(value, str) or (
+            isinstance(value, tuple) and all(isinstance(v, str) for v in value)
+        ):
+            return self._symbols.setdefault(value, value)
+        return value
+
+    def clear(self) -> None:
+        """Forget the interned values."""
+        self._symbols.clear()
+
+
+# shared by all the databases compacted in the process
+SYMBOLS = SymbolTable()
+
+
+class CompactExchange(MutableMapping):
+    """
+    Exchange with one slot per field of `EXCHANGE_FIELDS`, and a
+    dictionary for the other fields, created only when needed.
+    """
+
+    __slots__ = (*EXCHANGE_FIELDS.values(), "_extra")
+
+    def __init__(self, *args, **kwargs):
+        self._extra = None
+        if args or kwargs:
+            self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        attr = EXCHANGE_FIELDS.get(key)
+        if attr is not None:
+            value = getattr(self, attr, _MISSING)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        attr = EXCHANGE_FIELDS.get(key)
+        if attr is not None:
+            return getattr(self, attr, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key, value):
+        attr = EXCHANGE_FIELDS.get(key)
+        if attr is not None:
+            setattr(self, attr, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        attr = EXCHANGE_FIELDS.get(key)
+        if attr is not None:
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        attr = EXCHANGE_FIELDS.get(key)
+        if attr is not None:
+            return hasattr(self, attr)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key, attr in EXCHANGE_FIELDS.items():
+            if hasattr(self, attr):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def clear(self) -> None:
+        for attr in EXCHANGE_FIELDS.values():
+            if hasattr(self, attr):
+                delattr(self, attr)
+        self._extra = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def copy(self) -> "CompactExchange":
+        """Shallow copy, as `dict.copy`."""
+        return CompactExchange(self.items())
+
+    __copy__ = copy
+
+    def __getstate__(self) -> dict:
+        return dict(self)
+
+    def __setstate__(self, state: dict) -> None:
+        self._extra = None
+        self.update(state)
+
+
+def compact_exchange(
+    exchange: Mapping, symbols: SymbolTable = SYMBOLS
+) -> CompactExchange:
+    """
+    Compact copy of an exchange, with its strings interned.
+
+    :param exchange: exchange
+    :param symbols: symbol table
+    :return: compact exchange
+    """
+    compact = CompactExchange()
+    for key, value in exchange.items():
+        compact[symbols.intern(key)] = symbols.intern(value)
+    return compact
+
+
+def compact_database(
+    database: List[dict], symbols: Optional[SymbolTable] = None
+) -> List[dict]:
+    """
+    Replace, in place, the exchanges of a database by compact exchanges,
+    and intern the names, products, locations and units of its datasets.
+    Exchanges already compact are left as they are.
+
+    :param database: list of datasets
+    :param symbols: symbol table, the shared `SYMBOLS` by default
+    :return: the database
+    """
+    symbols = SYMBOLS if symbols is None else symbols
+
+    for ds in database:
+        for field in DATASET_SYMBOL_FIELDS:
+            if field in ds:
+                ds[field] = symbols.intern(ds[field])
+        ds["exchanges"] = [
+            (
+                exc
+                if isinstance(exc, CompactExchange)
+                else compact_exchange(exc, symbols)
+            )
+            for exc in ds.get("exchanges", [])
+        ]
+
+    return database
+
+
+def expand_database(database: List[dict]) -> List[dict]:
+    """
+    Replace, in place, the compact exchanges of a database by dictionaries.
+
+    :param database: list of datasets
+    :return: the database
+    """
+    for ds in database:
+        ds["exchanges"] = [
+            dict(exc) if isinstance(exc, CompactExchange) else exc
+            for exc in ds.get("exchanges", [])
+        ]
+
+    return database
+
+
+def rescale_exchange(exc: MutableMapping, value, remove_uncertainty: bool = True):
+    """
+    `wurst.rescale_exchange`, for dictionaries and compact exchanges alike.
+    """
+    if isinstance(exc, dict):
+        return _rescale_exchange(exc, value, remove_uncertainty)
+
+    rescaled = _rescale_exchange(dict(exc), value, remove_uncertainty)
+    exc.clear()
+    exc.update(rescaled)
+    return exc
@@ -6,7 +6,10 @@ and emission values for different sectors, carbon capture rates, etc.
 
 import copy
 import csv
+import hashlib
 import os
+import weakref
+from collections import OrderedDict
 from functools import lru_cache
 from io import BytesIO, StringIO
 from itertools import chain
@@ -20,8 +23,8 @@ import yaml
 from cryptography.fernet import Fernet
 from prettytable import PrettyTable
 
-from .filesystem_constants import DATA_DIR, VARIABLES_DIR
-from .geomap import Geomap
+from .filesystem_constants import DATA_DIR, DIR_CACHED_DB, VARIABLES_DIR
+from .geomap import get_geomap
 from .heat_data import (
     evaluate_heat_layers,
     heat_expression_variables,
@@ -54,10 +57,23 @@ IAM_TRANS_TWO_WHEELERS_VARS = VARIABLES_DIR / "transport_two_wheelers.yaml"
 VEHICLES_MAP = DATA_DIR / "transport" / "vehicles_map.yaml"
 CROPS_PROPERTIES = VARIABLES_DIR / "crops.yaml"
 GAINS_GEO_MAP = VARIABLES_DIR / "gains_regions.yaml"
+GAINS_IAM_DATA_DIR = DATA_DIR / "GAINS_emission_factors" / "iam_data"
+DIR_GAINS_CACHE = DIR_CACHED_DB / "gains"
 COAL_POWER_PLANTS_DATA = DATA_DIR / "electricity" / "coal_power_emissions_2012_v1.csv"
 BATTERY_MOBILE_SCENARIO_DATA = DATA_DIR / "battery" / "mobile_scenarios.csv"
 BATTERY_STATIONARY_SCENARIO_DATA = DATA_DIR / "battery" / "stationary_scenarios.csv"
 
+# parsed IAM result files, shared by the scenario years of a same pathway
+IAM_DATA_CACHE_SIZE = 8
+_IAM_DATA_CACHE: OrderedDict = OrderedDict()
+# parsed external scenario datapackages, keyed by the hash of their resources
+EXTERNAL_DATAPACKAGE_CACHE_SIZE = 8
+_EXTERNAL_DATAPACKAGE_CACHE: OrderedDict = OrderedDict()
+# hashes of datapackage resources, keyed by (path, size, modification time)
+# for resources stored in local files, by the resource object otherwise
+_RESOURCE_HASHES: Dict[tuple, str] = {}
+_RESOURCE_OBJECT_HASHES = weakref.WeakKeyDictionary()
+
 
 def print_missing_variables(missing_vars, file_name: str = None):
     if missing_vars:
@@ -109,7 +125,7 @@ def get_oil_product_volumes(model) -> pd.DataFrame:
         na_filter=False,
     )
 
-    geo = Geomap(model=model)
+    geo = get_geomap(model)
 
     df["region"] = df.apply(lambda x: geo.ecoinvent_to_iam_location(x.country), axis=1)
     df = df.drop("country", axis=1)
@@ -157,14 +173,35 @@ def get_metals_intensity_factors_data() -> xr.DataArray:
 
 
 @lru_cache(maxsize=8)
-def get_gains_IAM_data(model, gains_scenario):
-    filepath = Path(
-        DATA_DIR / "GAINS_emission_factors" / "iam_data" / gains_scenario
-    ).glob("*")
+def _gains_source_files(gains_scenario: str) -> List[Path]:
+    return sorted(
+        file
+        for file in (GAINS_IAM_DATA_DIR / gains_scenario).glob("*")
+        if file.is_file()
+    )
+
+
+def gains_source_hash(model: str, gains_scenario: str) -> str:
+    """
+    Hash of the GAINS source tables and of the region mapping used to
+    compile the emission factor array of an IAM model.
+    """
+    digest = hashlib.sha256(f"{model}|{gains_scenario}".encode())
+    for file in [*_gains_source_files(gains_scenario), GAINS_GEO_MAP]:
+        digest.update(file.name.encode())
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def compile_gains_IAM_data(model: str, gains_scenario: str) -> xr.DataArray:
+    """
+    Build the GAINS emission factor array of an IAM model from the
+    GAINS source tables.
+    """
 
     list_arrays = []
 
-    for file in filepath:
+    for file in _gains_source_files(gains_scenario):
         df = pd.read_csv(
             file, sep=get_delimiter(filepath=file), encoding="utf-8", low_memory=False
         )
@@ -204,6 +241,76 @@ def get_gains_IAM_data(model, gains_scenario):
     return arr
 
 
+def _save_gains_array(array: xr.DataArray, filepath: Path) -> None:
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    tmp_filepath = filepath.with_name(f".{filepath.stem}-{os.getpid()}.npz")
+    np.savez(
+        tmp_filepath,
+        values=array.values,
+        dims=np.array(array.dims),
+        name=np.array(array.name or ""),
+        **{
+            f"coord_{dim}": (
+                array.coords[dim].values.astype(str)
+                if array.coords[dim].dtype == object
+                else array.coords[dim].values
+            )
+            for dim in array.dims
+        },
+    )
+    os.replace(tmp_filepath, filepath)
+
+    # compiled arrays of previous versions of the source tables
+    prefix = filepath.stem.rsplit("_", 1)[0]
+    for stale in filepath.parent.glob(f"{prefix}_*.npz"):
+        if stale != filepath and stale.stem.rsplit("_", 1)[0] == prefix:
+            stale.unlink(missing_ok=True)
+
+
+def _load_gains_array(filepath: Path) -> xr.DataArray:
+    with np.load(filepath, allow_pickle=False) as stored:
+        dims = [str(dim) for dim in stored["dims"]]
+        return xr.DataArray(
+            stored["values"],
+            dims=dims,
+            coords={dim: stored[f"coord_{dim}"] for dim in dims},
+            name=str(stored["name"]) or None,
+        )
+
+
+@lru_cache()
+def get_gains_IAM_data(model: str, gains_scenario: str) -> xr.DataArray:
+    """
+    Return the GAINS emission factor array of an IAM model.
+
+    The array is compiled once from the GAINS tables and stored in the cache
+    directory under the hash of its sources, so it is only rebuilt when
+    the tables or the region mapping change. Within a process, all
+    scenarios share the same read-only array.
+    """
+    filepath = (
+        DIR_GAINS_CACHE
+        / f"{gains_scenario}_{model}_{gains_source_hash(model, gains_scenario)[:16]}.npz"
+    )
+
+    array = None
+    if filepath.is_file():
+        try:
+            array = _load_gains_array(filepath)
+        except (OSError, ValueError, KeyError):
+            array = None
+
+    if array is None:
+        array = compile_gains_IAM_data(model, gains_scenario)
+        try:
+            _save_gains_array(array, filepath)
+        except OSError:
+            pass
+
+    array.values.flags.writeable = False
+    return array
+
+
 def fix_efficiencies(data: xr.DataArray, min_year: int) -> xr.DataArray:
     """
     Fix the efficiency data to ensure plausibility.
@@ -253,6 +360,17 @@ def fix_efficiencies(data: xr.DataArray, min_year: int) -> xr.DataArray:
     return data
 
 
+@lru_cache()
+def load_variables_mapping(filepath: Path) -> dict:
+    """
+    Load an IAM variables mapping file. The mapping files are parsed once
+    per process, as each IAMDataCollection reads several label sets from
+    the same file. The returned dictionary must not be modified.
+    """
+    with open(filepath, "r", encoding="utf-8") as stream:
+        return yaml.safe_load(stream)
+
+
 def flatten(list_to_flatten):
     rt = []
     for i in list_to_flatten:
@@ -387,12 +505,443 @@ def _efficiency_ref_years(cfg: Dict) -> Dict[str, Dict[str, Any]]:
     return ref_years
 
 
+def _resource_file_key(resource):
+    """
+    (path, size, modification time) of a resource stored in a local file,
+    or None.
+    """
+    if not getattr(resource, "local", False) or getattr(resource, "multipart", False):
+        return None
+    try:
+        stat = os.stat(resource.source)
+    except (OSError, TypeError):
+        return None
+    return os.path.abspath(resource.source), stat.st_size, stat.st_mtime_ns
+
+
+def _resource_hash(resource) -> str:
+    """
+    SHA-256 of the raw content of a datapackage resource. The hash is
+    memoized, so that the resource is only read again once its file
+    changes.
+    """
+    file_key = _resource_file_key(resource)
+    if file_key is not None:
+        if file_key not in _RESOURCE_HASHES:
+            _RESOURCE_HASHES[file_key] = hashlib.sha256(resource.raw_read()).hexdigest()
+        return _RESOURCE_HASHES[file_key]
+
+    try:
+        return _RESOURCE_OBJECT_HASHES[resource]
+    except (KeyError, TypeError):
+        pass
+    value = hashlib.sha256(resource.raw_read()).hexdigest()
+    try:
+        _RESOURCE_OBJECT_HASHES[resource] = value
+    except TypeError:
+        pass
+    return value
+
+
+def datapackage_hash(datapackage) -> str:
+    """SHA-256 of the raw content of all the resources of a datapackage."""
+    digest = hashlib.sha256()
+    for resource in datapackage.resources:
+        digest.update(_resource_hash(resource).encode())
+    return digest.hexdigest()
+
+
+def load_external_datapackage(datapackage) -> Dict[str, Any]:
+    """
+    Parse the scenario data and configuration of an external scenario
+    datapackage. The parsed table is split by scenario and variable once
+    and kept, keyed by the hash of both resources, so that the scenario
+    entries (years, pathways) sharing a datapackage do not parse it again.
+
+    :param datapackage: datapackage exposing `get_resource(name)`
+    :return: dict with the "config", the "tables" of rows per
+        (scenario, variable), an "empty" table and the "scenarios" data
+        already derived
+    """
+    scen_res = datapackage.get_resource("scenario_data")
+    cfg_res = datapackage.get_resource("config")
+    cache_key = (_resource_hash(scen_res), _resource_hash(cfg_res))
+
+    if cache_key in _EXTERNAL_DATAPACKAGE_CACHE:
+        _EXTERNAL_DATAPACKAGE_CACHE.move_to_end(cache_key)
+        return _EXTERNAL_DATAPACKAGE_CACHE[cache_key]
+
+    df = _apply_headers(_read_tabular_from_resource(scen_res), scen_res)
+    config = yaml.safe_load(cfg_res.raw_read()) or {}
+
+    # only the columns from "region" onwards are used
+    columns = df.loc[:, "region":].columns
+    entry = {
+        "config": config,
+        "tables": {
+            key: table.loc[:, columns]
+            for key, table in df.groupby(["scenario", "variables"], sort=False)
+        },
+        "empty": df.loc[[], columns],
+        "scenarios": {},
+    }
+
+    _EXTERNAL_DATAPACKAGE_CACHE[cache_key] = entry
+    while len(_EXTERNAL_DATAPACKAGE_CACHE) > EXTERNAL_DATAPACKAGE_CACHE_SIZE:
+        _EXTERNAL_DATAPACKAGE_CACHE.popitem(last=False)
+
+    return entry
+
+
+def _scenario_rows(datapackage: Dict[str, Any], scenario: str, labels) -> pd.DataFrame:
+    """
+    Rows of a scenario of a parsed datapackage for the given variables,
+    in the order of the datapackage table.
+    """
+    tables = datapackage["tables"]
+    rows = [tables[scenario, label] for label in labels if (scenario, label) in tables]
+    if not rows:
+        return datapackage["empty"]
+    return pd.concat(rows).sort_index()
+
+
+def _external_scenario_data(
+    datapackage: Dict[str, Any], scenario: str
+) -> Dict[str, Any]:
+    """
+    Production volumes and efficiencies of one external scenario, from
+    the rows of that scenario in a parsed datapackage.
+    """
+    config = datapackage["config"]
+    data: Dict[str, Any] = {"config": config}  # always store for transparency
+
+    # ---------- Production volume ----------
+    pv_map = _pv_variable_map(config)  # internal -> external label
+    if pv_map:
+        ext_labels = dict.fromkeys(pv_map.values())
+        pv_subset = _scenario_rows(datapackage, scenario, ext_labels).copy()
+
+        # rename external labels to internal names
+        inverse_map = {v: k for k, v in pv_map.items()}
+        pv_subset["variables"] = pv_subset["variables"].map(inverse_map)
+
+        pv_arr = _to_xarray(pv_subset)
+        data["production volume"] = pv_arr
+        data["regions"] = pv_subset["region"].unique().tolist()
+
+    # ---------- Efficiency ----------
+    eff_groups = _efficiency_variables(config)  # group -> [ext labels]
+    eff_labels = sorted({lab for labs in eff_groups.values() for lab in labs})
+    if eff_labels:
+        eff_subset = _scenario_rows(datapackage, scenario, eff_labels).copy()
+
+        eff_arr = _to_xarray(eff_subset)
+
+        # reference-year logic & normalization
+        ref_years = _efficiency_ref_years(config)
+
+        # fill missing ref years with earliest year present in the array
+        if "year" in eff_arr.coords and eff_arr.coords["year"].size:
+            earliest_year = int(eff_arr.coords["year"].values.min())
+        else:
+            earliest_year = None
+
+        for var, meta in ref_years.items():
+            if meta.get("reference year") is None and earliest_year is not None:
+                meta["reference year"] = earliest_year
+
+        # apply absolute vs normalized behavior
+        for var, meta in ref_years.items():
+            if var not in eff_arr.coords.get("variables", []):
+                continue  # variable not present after filtering
+
+            absolute = bool(meta.get("absolute", False))
+            if absolute:
+                # treat efficiency time series as given; back/forward fill across years
+                eff_arr.loc[{"variables": var}] = (
+                    eff_arr.loc[{"variables": var}].bfill(dim="year").ffill(dim="year")
+                )
+            else:
+                ref_y = meta.get("reference year")
+                if ref_y is not None:
+                    # normalize by value at reference year
+                    # use method='nearest' so that if the exact year is absent
+                    # (e.g. GCAM starts at 2021 instead of 2020) we fall back
+                    # to the closest available year
+                    denom = eff_arr.loc[{"variables": var}].sel(
+                        year=int(ref_y), method="nearest"
+                    )
+                    eff_arr.loc[{"variables": var}] = (
+                        eff_arr.loc[{"variables": var}] / denom
+                    )
+                    # turn NaNs from division by 0 / missing into ones (neutral factor)
+                    eff_arr = eff_arr.fillna(1)
+
+        data["efficiency"] = eff_arr
+
+    return data
+
+
+# Derived IAM variables, computed on first access and memoized on the
+# IAMDataCollection instance. Each entry maps the attribute name to the
+# provider method computing it and the keyword arguments of that method.
+# Label sets refer to the keys of ``IAMDataCollection.variable_labels``.
+DERIVED_VARIABLES: Dict[str, tuple] = {
+    # market shares
+    "electricity_mix": (
+        "_derive_market_data",
+        {"labels": "electricity_prod", "sector": "electricity"},
+    ),
+    "petrol_blend": (
+        "_derive_market_data",
+        {
+            "labels": "fuel_prod",
+            "prefixes": ("gasoline", "ethanol", "methanol", "bioethanol", "petrol,"),
+            "sector": "petrol",
+        },
+    ),
+    "diesel_blend": (
+        "_derive_market_data",
+        {
+            "labels": "fuel_prod",
+            "prefixes": ("diesel", "biodiesel"),
+            "sector": "diesel",
+        },
+    ),
+    "natural_gas_blend": (
+        "_derive_market_data",
+        {
+            "labels": "fuel_prod",
+            "prefixes": ("biogas", "methane", "natural gas", "biomethane"),
+            "sector": "gas",
+        },
+    ),
+    "hydrogen_blend": (
+        "_derive_market_data",
+        {"labels": "fuel_prod", "prefixes": ("hydrogen",), "sector": "hydrogen"},
+    ),
+    "kerosene_blend": (
+        "_derive_market_data",
+        {"labels": "fuel_prod", "prefixes": ("kerosene",), "sector": "kerosene"},
+    ),
+    "lpg_blend": (
+        "_derive_market_data",
+        {
+            "labels": "fuel_prod",
+            "prefixes": ("liquefied petroleum gas",),
+            "sector": "lpg",
+        },
+    ),
+    "cement_technology_mix": (
+        "_derive_market_data",
+        {"labels": "cement_prod", "sector": "cement"},
+    ),
+    "steel_technology_mix": (
+        "_derive_market_data",
+        {"labels": "steel_prod", "sector": "steel"},
+    ),
+    "cdr_technology_mix": (
+        "_derive_market_data",
+        {"labels": "cdr_prod", "sector": "cdr"},
+    ),
+    "biomass_mix": (
+        "_derive_market_data",
+        {"labels": "biomass_prod", "sector": "biomass"},
+    ),
+    "road_freight_fleet": (
+        "_derive_market_data",
+        {"labels": "roadfreight_prod", "sector": "road transport"},
+    ),
+    "rail_freight_fleet": (
+        "_derive_market_data",
+        {"labels": "railfreight_prod", "sector": "rail transport"},
+    ),
+    "sea_freight_fleet": (
+        "_derive_market_data",
+        {"labels": "seafreight_prod", "sector": "sea transport"},
+    ),
+    "passenger_car_fleet": (
+        "_derive_market_data",
+        {"labels": "passenger_cars_prod", "sector": "passenger car"},
+    ),
+    "bus_fleet": (
+        "_derive_market_data",
+        {"labels": "bus_prod", "sector": "passenger bus"},
+    ),
+    "two_wheelers_fleet": (
+        "_derive_market_data",
+        {"labels": "two_wheelers_prod", "sector": "two-wheeler"},
+    ),
+    # un-normalized or attributional-only series
+    "other_vars": (
+        "_derive_market_data",
+        {"labels": "other", "normalize": False, "system_model": "cutoff"},
+    ),
+    "final_energy_use": (
+        "_derive_market_data",
+        {"labels": "final_energy", "system_model": "cutoff"},
+    ),
+    "cdr_energy_use": (
+        "_derive_market_data",
+        {"labels": "cdr_energy_use", "normalize": False, "system_model": "cutoff"},
+    ),
+    # efficiencies
+    "electricity_technology_efficiencies": (
+        "_derive_efficiencies",
+        {"efficiency_labels": "electricity_eff", "absolute": True},
+    ),
+    "cement_technology_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "efficiency_labels": "cement_eff",
+            "energy_labels": "cement_energy",
+            "production_labels": "cement_prod",
+        },
+    ),
+    "steel_technology_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "efficiency_labels": "steel_eff",
+            "energy_labels": "steel_energy",
+            "production_labels": "steel_prod",
+        },
+    ),
+    "petrol_technology_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "efficiency_labels": "fuel_eff",
+            "prefixes": ("gasoline", "ethanol", "methanol", "bioethanol"),
+        },
+    ),
+    "diesel_technology_efficiencies": (
+        "_derive_efficiencies",
+        {"efficiency_labels": "fuel_eff", "prefixes": ("diesel", "biodiesel")},
+    ),
+    "gas_technology_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "efficiency_labels": "fuel_eff",
+            "prefixes": ("biogas", "methane", "natural gas", "biomethane"),
+        },
+    ),
+    "hydrogen_technology_efficiencies": (
+        "_derive_efficiencies",
+        {"efficiency_labels": "fuel_eff", "prefixes": ("hydrogen",)},
+    ),
+    "kerosene_technology_efficiencies": (
+        "_derive_efficiencies",
+        {"efficiency_labels": "fuel_eff", "prefixes": ("kerosene",)},
+    ),
+    "lpg_technology_efficiencies": (
+        "_derive_efficiencies",
+        {"efficiency_labels": "fuel_eff", "prefixes": ("liquefied petroleum gas",)},
+    ),
+    "cdr_technology_efficiencies": ("_derive_cdr_efficiencies", {}),
+    # we may want to limit the efficiency change for vehicles
+    # as we know those won't improve a lot more in the future
+    "road_freight_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "production_labels": "roadfreight_prod",
+            "energy_labels": "roadfreight_energy",
+            "clip": 1.25,
+        },
+    ),
+    "rail_freight_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "production_labels": "railfreight_prod",
+            "energy_labels": "railfreight_energy",
+        },
+    ),
+    "sea_freight_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "production_labels": "seafreight_prod",
+            "energy_labels": "seafreight_energy",
+            "clip": 1.25,
+        },
+    ),
+    "passenger_car_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "production_labels": "passenger_cars_prod",
+            "energy_labels": "passenger_cars_energy",
+            "clip": 1.25,
+        },
+    ),
+    "bus_efficiencies": (
+        "_derive_efficiencies",
+        {"production_labels": "bus_prod", "energy_labels": "bus_energy", "clip": 1.25},
+    ),
+    "two_wheelers_efficiencies": (
+        "_derive_efficiencies",
+        {
+            "production_labels": "two_wheelers_prod",
+            "energy_labels": "two_wheelers_energy",
+            "clip": 1.25,
+        },
+    ),
+    # heat layers
+    "_heat_layers": ("_derive_heat_layers", {}),
+    "heat_diagnostics": ("_derive_heat_diagnostics", {}),
+    "buildings_heat_end_use": ("_derive_heat_layer", {"layer": "buildings_end_use"}),
+    "industrial_heat_end_use": (
+        "_derive_heat_layer",
+        {"layer": "industrial_end_use"},
+    ),
+    "secondary_heat_supply": ("_derive_heat_layer", {"layer": "secondary_supply"}),
+    # Third-party integrations historically accessed these two attributes.
+    # Keep the names as aliases while the premise heat transformation uses
+    # the explicit layer names above.
+    "buildings_heating_mix": ("_derive_heat_layer", {"layer": "buildings_end_use"}),
+    "industrial_heat_mix": ("_derive_heat_layer", {"layer": "industrial_end_use"}),
+    # production volumes
+    "land_use": ("_derive_production_volumes", {"labels": "land_use", "fill": True}),
+    "land_use_change": (
+        "_derive_production_volumes",
+        {"labels": "land_use_change", "fill": True},
+    ),
+    "production_volumes": ("_derive_total_production_volumes", {}),
+    # data that does not depend on the IAM file
+    "gains_data_IAM": ("_derive_gains_data", {}),
+    "metals_intensity_factors": ("_derive_metals_intensity_factors", {}),
+    "coal_power_plants": ("fetch_external_data_coal_power_plants", {}),
+    "battery_mobile_scenarios": ("fetch_external_data_battery_mobile_scenarios", {}),
+    "battery_stationary_scenarios": (
+        "fetch_external_data_battery_stationary_scenarios",
+        {},
+    ),
+}
+
+# label sets whose variables are summed up into ``production_volumes``
+PRODUCTION_VOLUME_LABELS = (
+    "electricity_prod",
+    "fuel_prod",
+    "cement_prod",
+    "steel_prod",
+    "cdr_prod",
+    "biomass_prod",
+    "roadfreight_prod",
+    "railfreight_prod",
+    "seafreight_prod",
+    "passenger_cars_prod",
+    "bus_prod",
+    "two_wheelers_prod",
+    "final_energy",
+)
+
+
 class IAMDataCollection:
     """
     :var model: name of the IAM model (e.g., "remind")
     :var pathway: name of the IAM scenario (e.g., "SSP2-Base")
     :var year: year to produce the database for
     :var system_model: "cutoff" or "consequential".
+
+    Only the raw IAM array is read when the object is created. Market shares,
+    efficiencies, production volumes, etc. are listed in ``DERIVED_VARIABLES``
+    and computed on first access.
     """
 
     def __init__(
@@ -417,173 +966,123 @@ class IAMDataCollection:
         self.min_year = 2005
         self.max_year = 2100
         self.filepath_iam_files = filepath_iam_files
+        self.gains_scenario = gains_scenario
         key = key or None
 
-        electricity_prod_vars = self.__get_iam_variable_labels(
-            IAM_ELEC_VARS, variable="iam_aliases"
-        )
-        electricity_eff_vars = self.__get_iam_variable_labels(
-            IAM_ELEC_VARS, variable="eff_aliases"
-        )
-
-        fuel_prod_vars = self.__get_iam_variable_labels(
-            IAM_FUELS_VARS, variable="iam_aliases"
-        )
-
-        fuel_eff_vars = self.__get_iam_variable_labels(
-            IAM_FUELS_VARS, variable="eff_aliases"
-        )
-
-        cement_prod_vars = self.__get_iam_variable_labels(
-            IAM_CEMENT_VARS, variable="iam_aliases"
-        )
-
-        cement_energy_vars = self.__get_iam_variable_labels(
-            IAM_CEMENT_VARS, variable="energy_use_aliases"
-        )
-
-        cement_eff_vars = self.__get_iam_variable_labels(
-            IAM_CEMENT_VARS, variable="eff_aliases"
-        )
-
-        steel_prod_vars = self.__get_iam_variable_labels(
-            IAM_STEEL_VARS, variable="iam_aliases"
-        )
-
-        steel_energy_vars = self.__get_iam_variable_labels(
-            IAM_STEEL_VARS, variable="energy_use_aliases"
-        )
-
-        steel_eff_vars = self.__get_iam_variable_labels(
-            IAM_STEEL_VARS, variable="eff_aliases"
-        )
-
-        cdr_prod_vars = self.__get_iam_variable_labels(
-            IAM_CDR_VARS, variable="iam_aliases"
-        )
-
         cdr_energy_vars = self.__get_cdr_energy_variable_labels(IAM_CDR_VARS)
         cdr_efficiency_vars = self.__get_cdr_energy_variable_labels(
             IAM_CDR_VARS, variable="efficiency_use_aliases"
         )
-        cdr_energy_use_vars = self.__flatten_cdr_energy_variable_labels(cdr_energy_vars)
-        cdr_efficiency_use_vars = self.__flatten_cdr_energy_variable_labels(
-            cdr_efficiency_vars
-        )
-        cdr_efficiency_energy_vars = self.__group_cdr_energy_variable_labels(
-            cdr_energy_vars
-        )
-        cdr_efficiency_index_vars = self.__group_cdr_energy_variable_labels(
-            cdr_efficiency_vars
-        )
-
-        biomass_prod_vars = self.__get_iam_variable_labels(
-            IAM_BIOMASS_VARS, variable="iam_aliases"
-        )
-
-        biomass_eff_vars = self.__get_iam_variable_labels(
-            IAM_BIOMASS_VARS, variable="eff_aliases"
-        )
-
-        land_use_vars = self.__get_iam_variable_labels(
-            IAM_CROPS_VARS, variable="land_use"
-        )
-        land_use_change_vars = self.__get_iam_variable_labels(
-            IAM_CROPS_VARS, variable="land_use_change"
-        )
-
-        heat_mapping = load_heat_mapping(IAM_HEATING_VARS, self.model)
-        heat_raw_vars = heat_expression_variables(heat_mapping)
-
-        final_energy_vars = self.__get_iam_variable_labels(
-            IAM_FINAL_ENERGY_VARS, variable="iam_aliases"
-        )
-
-        other_vars = self.__get_iam_variable_labels(
-            IAM_OTHER_VARS, variable="iam_aliases"
-        )
-
-        roadfreight_prod_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_ROADFREIGHT_VARS, variable="iam_aliases"
-        )
-
-        roadfreight_energy_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_ROADFREIGHT_VARS, variable="energy_use_aliases"
-        )
-
-        railfreight_prod_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_RAILFREIGHT_VARS, variable="iam_aliases"
-        )
-
-        railfreight_energy_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_RAILFREIGHT_VARS, variable="energy_use_aliases"
-        )
-
-        seafreight_prod_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_SEAFREIGHT_VARS, variable="iam_aliases"
-        )
-
-        seafreight_energy_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_SEAFREIGHT_VARS, variable="energy_use_aliases"
-        )
-
-        passenger_cars_prod_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_PASS_CARS_VARS, variable="iam_aliases"
-        )
-
-        passenger_cars_energy_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_PASS_CARS_VARS, variable="energy_use_aliases"
-        )
 
-        bus_prod_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_BUS_VARS, variable="iam_aliases"
-        )
-
-        bus_energy_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_BUS_VARS, variable="energy_use_aliases"
-        )
-
-        two_wheelers_prod_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_TWO_WHEELERS_VARS, variable="iam_aliases"
+        self.variable_labels = {
+            name: self.__get_iam_variable_labels(filepath, variable=variable)
+            for name, (filepath, variable) in {
+                "electricity_prod": (IAM_ELEC_VARS, "iam_aliases"),
+                "electricity_eff": (IAM_ELEC_VARS, "eff_aliases"),
+                "fuel_prod": (IAM_FUELS_VARS, "iam_aliases"),
+                "fuel_eff": (IAM_FUELS_VARS, "eff_aliases"),
+                "cement_prod": (IAM_CEMENT_VARS, "iam_aliases"),
+                "cement_energy": (IAM_CEMENT_VARS, "energy_use_aliases"),
+                "cement_eff": (IAM_CEMENT_VARS, "eff_aliases"),
+                "steel_prod": (IAM_STEEL_VARS, "iam_aliases"),
+                "steel_energy": (IAM_STEEL_VARS, "energy_use_aliases"),
+                "steel_eff": (IAM_STEEL_VARS, "eff_aliases"),
+                "cdr_prod": (IAM_CDR_VARS, "iam_aliases"),
+                "biomass_prod": (IAM_BIOMASS_VARS, "iam_aliases"),
+                "biomass_eff": (IAM_BIOMASS_VARS, "eff_aliases"),
+                "land_use": (IAM_CROPS_VARS, "land_use"),
+                "land_use_change": (IAM_CROPS_VARS, "land_use_change"),
+                "final_energy": (IAM_FINAL_ENERGY_VARS, "iam_aliases"),
+                "other": (IAM_OTHER_VARS, "iam_aliases"),
+                "roadfreight_prod": (IAM_TRANS_ROADFREIGHT_VARS, "iam_aliases"),
+                "roadfreight_energy": (
+                    IAM_TRANS_ROADFREIGHT_VARS,
+                    "energy_use_aliases",
+                ),
+                "railfreight_prod": (IAM_TRANS_RAILFREIGHT_VARS, "iam_aliases"),
+                "railfreight_energy": (
+                    IAM_TRANS_RAILFREIGHT_VARS,
+                    "energy_use_aliases",
+                ),
+                "seafreight_prod": (IAM_TRANS_SEAFREIGHT_VARS, "iam_aliases"),
+                "seafreight_energy": (IAM_TRANS_SEAFREIGHT_VARS, "energy_use_aliases"),
+                "passenger_cars_prod": (IAM_TRANS_PASS_CARS_VARS, "iam_aliases"),
+                "passenger_cars_energy": (
+                    IAM_TRANS_PASS_CARS_VARS,
+                    "energy_use_aliases",
+                ),
+                "bus_prod": (IAM_TRANS_BUS_VARS, "iam_aliases"),
+                "bus_energy": (IAM_TRANS_BUS_VARS, "energy_use_aliases"),
+                "two_wheelers_prod": (IAM_TRANS_TWO_WHEELERS_VARS, "iam_aliases"),
+                "two_wheelers_energy": (
+                    IAM_TRANS_TWO_WHEELERS_VARS,
+                    "energy_use_aliases",
+                ),
+            }.items()
+        }
+        self.variable_labels.update(
+            {
+                "cdr_energy_use": self.__flatten_cdr_energy_variable_labels(
+                    cdr_energy_vars
+                ),
+                "cdr_efficiency_use": self.__flatten_cdr_energy_variable_labels(
+                    cdr_efficiency_vars
+                ),
+                "cdr_efficiency_energy": self.__group_cdr_energy_variable_labels(
+                    cdr_energy_vars
+                ),
+                "cdr_efficiency_index": self.__group_cdr_energy_variable_labels(
+                    cdr_efficiency_vars
+                ),
+            }
         )
 
-        two_wheelers_energy_vars = self.__get_iam_variable_labels(
-            IAM_TRANS_TWO_WHEELERS_VARS, variable="energy_use_aliases"
+        self.heat_mapping = load_heat_mapping(IAM_HEATING_VARS, self.model)
+
+        # new_vars is a list of all the IAM variables that are declared above
+        new_vars = list(
+            chain.from_iterable(
+                self.variable_labels[name].values()
+                for name in (
+                    "electricity_prod",
+                    "electricity_eff",
+                    "fuel_prod",
+                    "fuel_eff",
+                    "cement_prod",
+                    "cement_energy",
+                    "cement_eff",
+                    "steel_prod",
+                    "steel_energy",
+                    "cdr_prod",
+                    "cdr_energy_use",
+                    "cdr_efficiency_use",
+                    "biomass_prod",
+                    "biomass_eff",
+                    "land_use",
+                    "land_use_change",
+                )
+            )
         )
-
-        # new_vars is a list of all variables that are declared above
-
-        new_vars = (
-            list(electricity_prod_vars.values())
-            + list(electricity_eff_vars.values())
-            + list(fuel_prod_vars.values())
-            + list(fuel_eff_vars.values())
-            + list(cement_prod_vars.values())
-            + list(cement_energy_vars.values())
-            + list(cement_eff_vars.values())
-            + list(steel_prod_vars.values())
-            + list(steel_energy_vars.values())
-            + list(cdr_prod_vars.values())
-            + list(cdr_energy_use_vars.values())
-            + list(cdr_efficiency_use_vars.values())
-            + list(biomass_prod_vars.values())
-            + list(biomass_eff_vars.values())
-            + list(land_use_vars.values())
-            + list(land_use_change_vars.values())
-            + heat_raw_vars
-            + list(other_vars.values())
-            + list(roadfreight_prod_vars.values())
-            + list(roadfreight_energy_vars.values())
-            + list(railfreight_prod_vars.values())
-            + list(railfreight_energy_vars.values())
-            + list(seafreight_prod_vars.values())
-            + list(seafreight_energy_vars.values())
-            + list(passenger_cars_prod_vars.values())
-            + list(passenger_cars_energy_vars.values())
-            + list(bus_prod_vars.values())
-            + list(bus_energy_vars.values())
-            + list(two_wheelers_prod_vars.values())
-            + list(two_wheelers_energy_vars.values())
+        new_vars += heat_expression_variables(self.heat_mapping)
+        new_vars += list(
+            chain.from_iterable(
+                self.variable_labels[name].values()
+                for name in (
+                    "other",
+                    "roadfreight_prod",
+                    "roadfreight_energy",
+                    "railfreight_prod",
+                    "railfreight_energy",
+                    "seafreight_prod",
+                    "seafreight_energy",
+                    "passenger_cars_prod",
+                    "passenger_cars_energy",
+                    "bus_prod",
+                    "bus_energy",
+                    "two_wheelers_prod",
+                    "two_wheelers_energy",
+                )
+            )
         )
 
         # flatten the list of lists
@@ -592,6 +1091,7 @@ class IAMDataCollection:
         # if "liquid fossil fuels" is in the list of fuel variables
         # we add the split of gasoline, diesel, LPG and kerosene
         # to `data`, because it means it's not already in the IAM file.
+        fuel_prod_vars = self.variable_labels["fuel_prod"]
 
         data = self.__get_iam_data(
             key=key,
@@ -616,428 +1116,122 @@ class IAMDataCollection:
             ),
         )
 
-        self.data = data
-
         self.regions = data.region.values.tolist()
         self.system_model = system_model
 
-        self.gains_data_IAM = get_gains_IAM_data(
-            self.model, gains_scenario=gains_scenario
-        )
-
-        self.electricity_mix = self.__fetch_market_data(
-            data=data,
-            input_vars=electricity_prod_vars,
-            system_model=self.system_model,
-            sector="electricity",
-        )
-
-        self.petrol_blend = self.__fetch_market_data(
-            data=data,
-            input_vars={
-                k: v
-                for k, v in fuel_prod_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "gasoline",
-                        "ethanol",
-                        "methanol",
-                        "bioethanol",
-                        "petrol,",
-                    ]
-                )
-            },
-            system_model=self.system_model,
-            sector="petrol",
-        )
-
-        self.diesel_blend = self.__fetch_market_data(
-            data=data,
-            input_vars={
-                k: v
-                for k, v in fuel_prod_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "diesel",
-                        "biodiesel",
-                    ]
-                )
-            },
-            system_model=self.system_model,
-            sector="diesel",
-        )
-
-        self.natural_gas_blend = self.__fetch_market_data(
-            data=data,
-            input_vars={
-                k: v
-                for k, v in fuel_prod_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in ["biogas", "methane", "natural gas", "biomethane"]
-                )
-            },
-            system_model=self.system_model,
-            sector="gas",
-        )
-
-        self.hydrogen_blend = self.__fetch_market_data(
-            data=data,
-            input_vars={
-                k: v
-                for k, v in fuel_prod_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "hydrogen",
-                    ]
-                )
-            },
-            system_model=self.system_model,
-            sector="hydrogen",
-        )
-
-        self.kerosene_blend = self.__fetch_market_data(
-            data=data,
-            input_vars={
-                k: v
-                for k, v in fuel_prod_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "kerosene",
-                    ]
-                )
-            },
-            system_model=self.system_model,
-            sector="kerosene",
-        )
-
-        self.lpg_blend = self.__fetch_market_data(
-            data=data,
-            input_vars={
-                k: v
-                for k, v in fuel_prod_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "liquefied petroleum gas",
-                    ]
-                )
-            },
-            system_model=self.system_model,
-            sector="lpg",
-        )
-
-        self.cement_technology_mix = self.__fetch_market_data(
-            data=data,
-            input_vars=cement_prod_vars,
-            system_model=self.system_model,
-            sector="cement",
-        )
-        self.steel_technology_mix = self.__fetch_market_data(
-            data=data,
-            input_vars=steel_prod_vars,
-            system_model=self.system_model,
-            sector="steel",
-        )
-        self.cdr_technology_mix = self.__fetch_market_data(
-            data=data,
-            input_vars=cdr_prod_vars,
-            system_model=self.system_model,
-            sector="cdr",
-        )
-
-        self.biomass_mix = self.__fetch_market_data(
-            data=data,
-            input_vars=biomass_prod_vars,
-            system_model=self.system_model,
-            sector="biomass",
-        )
-
-        self.other_vars = self.__fetch_market_data(
-            data=data,
-            input_vars=other_vars,
-            normalize=False,
-            system_model="cutoff",
-        )
-
-        self.road_freight_fleet = self.__fetch_market_data(
-            data=data,
-            input_vars=roadfreight_prod_vars,
-            system_model=self.system_model,
-            sector="road transport",
-        )
-
-        self.rail_freight_fleet = self.__fetch_market_data(
-            data=data,
-            input_vars=railfreight_prod_vars,
-            system_model=self.system_model,
-            sector="rail transport",
-        )
-
-        self.sea_freight_fleet = self.__fetch_market_data(
-            data=data,
-            input_vars=seafreight_prod_vars,
-            system_model=self.system_model,
-            sector="sea transport",
-        )
-
-        self.passenger_car_fleet = self.__fetch_market_data(
-            data=data,
-            input_vars=passenger_cars_prod_vars,
-            system_model=self.system_model,
-            sector="passenger car",
-        )
-
-        self.bus_fleet = self.__fetch_market_data(
-            data=data,
-            input_vars=bus_prod_vars,
-            system_model=self.system_model,
-            sector="passenger bus",
-        )
-
-        self.two_wheelers_fleet = self.__fetch_market_data(
-            data=data,
-            input_vars=two_wheelers_prod_vars,
-            system_model=self.system_model,
-            sector="two-wheeler",
-        )
-
-        heat_layers, self.heat_diagnostics = evaluate_heat_layers(data, heat_mapping)
-        self.buildings_heat_end_use = heat_layers["buildings_end_use"]
-        self.industrial_heat_end_use = heat_layers["industrial_end_use"]
-        self.secondary_heat_supply = heat_layers["secondary_supply"]
-
-        # Third-party integrations historically accessed these two attributes.
-        # Keep the names as aliases while the premise heat transformation uses
-        # the explicit layer names above.
-        self.buildings_heating_mix = self.buildings_heat_end_use
-        self.industrial_heat_mix = self.industrial_heat_end_use
-
-        self.final_energy_use = self.__fetch_market_data(
-            data=data,
-            input_vars=final_energy_vars,
-        )
-
-        self.cdr_energy_use = self.__fetch_market_data(
-            data=data,
-            input_vars=cdr_energy_use_vars,
-            normalize=False,
-        )
-
-        self.electricity_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels=electricity_eff_vars,
-            use_absolute_efficiency=self.use_absolute_efficiency,
-        )
-
-        self.cement_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels=cement_eff_vars,
-            energy_labels=cement_energy_vars,
-            production_labels=cement_prod_vars,
-        )
-
-        self.steel_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            production_labels=steel_prod_vars,
-            energy_labels=steel_energy_vars,
-            efficiency_labels=steel_eff_vars,
-        )
-
-        self.petrol_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels={
-                k: v
-                for k, v in fuel_eff_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in ["gasoline", "ethanol", "methanol", "bioethanol"]
-                )
-            },
-        )
-
-        self.diesel_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels={
-                k: v
-                for k, v in fuel_eff_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "diesel",
-                        "biodiesel",
-                    ]
-                )
-            },
-        )
-
-        self.gas_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels={
-                k: v
-                for k, v in fuel_eff_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in ["biogas", "methane", "natural gas", "biomethane"]
-                )
-            },
-        )
+        # set last: ``__getattr__`` only derives variables once `data` exists
+        self.data = data
 
-        self.hydrogen_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels={
-                k: v
-                for k, v in fuel_eff_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "hydrogen",
-                    ]
-                )
-            },
-        )
+    def __getattr__(self, name: str) -> Any:
+        """
+        Compute a derived variable listed in ``DERIVED_VARIABLES`` on first
+        access and memoize it on the instance, so that only the sectors
+        actually transformed pay for their market shares, efficiencies, etc.
+        """
+        if name not in DERIVED_VARIABLES or "data" not in self.__dict__:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        method, kwargs = DERIVED_VARIABLES[name]
+        value = getattr(self, method)(**kwargs)
+        setattr(self, name, value)
+        return value
 
-        self.kerosene_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels={
-                k: v
-                for k, v in fuel_eff_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "kerosene",
-                    ]
-                )
-            },
-        )
+    def provides(self, name: str) -> bool:
+        """
+        Check whether a variable is available, without computing it.
+        """
+        return name in self.__dict__ or name in DERIVED_VARIABLES
 
-        self.lpg_technology_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            efficiency_labels={
-                k: v
-                for k, v in fuel_eff_vars.items()
-                if any(
-                    k.lower().startswith(x)
-                    for x in [
-                        "liquefied petroleum gas",
-                    ]
-                )
-            },
-        )
+    def __filter_labels(self, labels: str, prefixes: tuple = None) -> dict:
+        labels = self.variable_labels[labels]
+        if prefixes is None:
+            return labels
+        return {
+            k: v
+            for k, v in labels.items()
+            if any(k.lower().startswith(x) for x in prefixes)
+        }
 
-        self.cdr_technology_efficiencies = self.get_iam_efficiencies_by_carrier(
-            data=data,
-            production_labels=cdr_prod_vars,
-            energy_labels_by_carrier=cdr_efficiency_energy_vars,
-            efficiency_labels_by_carrier=cdr_efficiency_index_vars,
+    def _derive_market_data(
+        self,
+        labels: str,
+        prefixes: tuple = None,
+        sector: str = None,
+        normalize: bool = True,
+        system_model: str = None,
+    ) -> [xr.DataArray, None]:
+        return self.__fetch_market_data(
+            data=self.data,
+            input_vars=self.__filter_labels(labels, prefixes),
+            system_model=system_model or self.system_model,
+            normalize=normalize,
+            sector=sector,
         )
 
-        self.road_freight_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            production_labels=roadfreight_prod_vars,
-            energy_labels=roadfreight_energy_vars,
+    def _derive_efficiencies(
+        self,
+        efficiency_labels: str = None,
+        energy_labels: str = None,
+        production_labels: str = None,
+        prefixes: tuple = None,
+        absolute: bool = False,
+        clip: float = None,
+    ) -> [xr.DataArray, None]:
+        efficiencies = self.get_iam_efficiencies(
+            data=self.data,
+            efficiency_labels=(
+                self.__filter_labels(efficiency_labels, prefixes)
+                if efficiency_labels
+                else None
+            ),
+            energy_labels=(
+                self.variable_labels[energy_labels] if energy_labels else None
+            ),
+            production_labels=(
+                self.variable_labels[production_labels] if production_labels else None
+            ),
+            use_absolute_efficiency=self.use_absolute_efficiency and absolute,
         )
-        # we may want to limit the efficiency change for vehicles
-        # as we know those won't improve a lot more in the future
         if (
-            self.road_freight_efficiencies is not None
+            clip is not None
+            and efficiencies is not None
             and self.use_absolute_efficiency == False
         ):
-            self.road_freight_efficiencies = self.road_freight_efficiencies.clip(
-                None, 1.25
-            )
+            efficiencies = efficiencies.clip(None, clip)
+        return efficiencies
 
-        self.rail_freight_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            production_labels=railfreight_prod_vars,
-            energy_labels=railfreight_energy_vars,
+    def _derive_cdr_efficiencies(self) -> [xr.DataArray, None]:
+        return self.get_iam_efficiencies_by_carrier(
+            data=self.data,
+            production_labels=self.variable_labels["cdr_prod"],
+            energy_labels_by_carrier=self.variable_labels["cdr_efficiency_energy"],
+            efficiency_labels_by_carrier=self.variable_labels["cdr_efficiency_index"],
         )
 
-        self.sea_freight_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            production_labels=seafreight_prod_vars,
-            energy_labels=seafreight_energy_vars,
-        )
-        # we may want to limit the efficiency change for vehicles
-        # as we know those won't improve a lot more in the future
-        if (
-            self.sea_freight_efficiencies is not None
-            and self.use_absolute_efficiency == False
-        ):
-            self.sea_freight_efficiencies = self.sea_freight_efficiencies.clip(
-                None, 1.25
-            )
-
-        self.passenger_car_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            production_labels=passenger_cars_prod_vars,
-            energy_labels=passenger_cars_energy_vars,
-        )
-        # we may want to limit the efficiency change for vehicles
-        # as we know those won't improve a lot more in the future
-        if (
-            self.passenger_car_efficiencies is not None
-            and self.use_absolute_efficiency == False
-        ):
-            self.passenger_car_efficiencies = self.passenger_car_efficiencies.clip(
-                None, 1.25
-            )
+    def _derive_heat_layers(self) -> tuple:
+        return evaluate_heat_layers(self.data, self.heat_mapping)
 
-        self.bus_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            production_labels=bus_prod_vars,
-            energy_labels=bus_energy_vars,
-        )
-        # we may want to limit the efficiency change for vehicles
-        # as we know those won't improve a lot more in the future
-        if self.bus_efficiencies is not None and self.use_absolute_efficiency == False:
-            self.bus_efficiencies = self.bus_efficiencies.clip(None, 1.25)
-
-        self.two_wheelers_efficiencies = self.get_iam_efficiencies(
-            data=data,
-            production_labels=two_wheelers_prod_vars,
-            energy_labels=two_wheelers_energy_vars,
-        )
-        # we may want to limit the efficiency change for vehicles
-        # as we know those won't improve a lot more in the future
-        if (
-            self.two_wheelers_efficiencies is not None
-            and self.use_absolute_efficiency == False
-        ):
-            self.two_wheelers_efficiencies = self.two_wheelers_efficiencies.clip(
-                None, 1.25
-            )
+    def _derive_heat_layer(self, layer: str) -> [xr.DataArray, None]:
+        return self._heat_layers[0][layer]
 
-        self.land_use = self.__get_iam_production_volumes(
-            data=data, input_vars=land_use_vars, fill=True
-        )
+    def _derive_heat_diagnostics(self) -> dict:
+        return self._heat_layers[1]
 
-        self.land_use_change = self.__get_iam_production_volumes(
-            data=data, input_vars=land_use_change_vars, fill=True
+    def _derive_production_volumes(
+        self, labels: str, fill: bool = False
+    ) -> [xr.DataArray, None]:
+        return self.__get_iam_production_volumes(
+            data=self.data, input_vars=self.variable_labels[labels], fill=fill
         )
 
-        self.metals_intensity_factors = get_metals_intensity_factors_data()
-
-        self.production_volumes = self.__get_iam_production_volumes(
-            data=data,
+    def _derive_total_production_volumes(self) -> [xr.DataArray, None]:
+        production_volumes = self.__get_iam_production_volumes(
+            data=self.data,
             input_vars={
-                **electricity_prod_vars,
-                **fuel_prod_vars,
-                **cement_prod_vars,
-                **steel_prod_vars,
-                **cdr_prod_vars,
-                **biomass_prod_vars,
-                **roadfreight_prod_vars,
-                **railfreight_prod_vars,
-                **seafreight_prod_vars,
-                **passenger_cars_prod_vars,
-                **bus_prod_vars,
-                **two_wheelers_prod_vars,
-                **final_energy_vars,
+                k: v
+                for labels in PRODUCTION_VOLUME_LABELS
+                for k, v in self.variable_labels[labels].items()
             },
         )
 
@@ -1051,21 +1245,18 @@ class IAMDataCollection:
             if array is not None
         ]
         if heat_production_volumes:
-            arrays = (
-                [self.production_volumes] if self.production_volumes is not None else []
-            )
-            self.production_volumes = xr.concat(
+            arrays = [production_volumes] if production_volumes is not None else []
+            production_volumes = xr.concat(
                 [*arrays, *heat_production_volumes], dim="variables"
             )
 
-        self.coal_power_plants = self.fetch_external_data_coal_power_plants()
+        return production_volumes
 
-        self.battery_mobile_scenarios = (
-            self.fetch_external_data_battery_mobile_scenarios()
-        )
-        self.battery_stationary_scenarios = (
-            self.fetch_external_data_battery_stationary_scenarios()
-        )
+    def _derive_gains_data(self) -> xr.DataArray:
+        return get_gains_IAM_data(self.model, gains_scenario=self.gains_scenario)
+
+    def _derive_metals_intensity_factors(self) -> xr.DataArray:
+        return get_metals_intensity_factors_data()
 
     def fetch_external_data_battery_mobile_scenarios(self):
         """
@@ -1177,8 +1368,7 @@ class IAMDataCollection:
 
         dict_vars = {}
 
-        with open(filepath, "r", encoding="utf-8") as stream:
-            out = yaml.safe_load(stream)
+        out = load_variables_mapping(filepath)
 
         for key, values in out.items():
             if variable in values:
@@ -1201,8 +1391,7 @@ class IAMDataCollection:
 
         dict_vars = {}
 
-        with open(filepath, "r", encoding="utf-8") as stream:
-            out = yaml.safe_load(stream)
+        out = load_variables_mapping(filepath)
 
         for technology, values in out.items():
             energy_aliases = values.get(variable, {})
@@ -1317,6 +1506,29 @@ class IAMDataCollection:
                 url = get_scenario_url(self.model, self.pathway)
                 file_path = download_csv(file_name + ".csv", url, download_folder)
 
+        self.iam_file = Path(file_path)
+
+        # The IAM file holds all years: a scenario year of a pathway already
+        # read reuses a copy of the parsed array instead of reading the file
+        # again (a copy, as derived variables may be computed in place).
+        stat = Path(file_path).stat()
+        cache_key = (
+            str(Path(file_path).resolve()),
+            stat.st_mtime_ns,
+            stat.st_size,
+            key,
+            self.model,
+            tuple(
+                sorted(
+                    (k, str(v)) for k, v in (split_fossil_liquid_fuels or {}).items()
+                )
+            ),
+        )
+        if cache_key in _IAM_DATA_CACHE:
+            _IAM_DATA_CACHE.move_to_end(cache_key)
+            array, self.min_year, self.max_year = _IAM_DATA_CACHE[cache_key]
+            return array.copy()
+
         # Decrypt the file if a key is provided
         if key is not None:
             fernet_obj = Fernet(key)
@@ -1506,7 +1718,11 @@ class IAMDataCollection:
             dataframe.groupby("variables")["unit"].first().to_dict().items()
         )
 
-        return array
+        _IAM_DATA_CACHE[cache_key] = (array, self.min_year, self.max_year)
+        while len(_IAM_DATA_CACHE) > IAM_DATA_CACHE_SIZE:
+            _IAM_DATA_CACHE.popitem(last=False)
+
+        return array.copy()
 
     def __fetch_market_data(
         self,
@@ -1978,91 +2194,13 @@ class IAMDataCollection:
 
         for i, external in enumerate(external_scenarios):
             scenario_name = external["scenario"]
-            dp = external["data"]
-            data[i] = {}
-
-            # ---- Load tabular scenario data ----
-            scen_res = dp.get_resource("scenario_data")
-            df = _apply_headers(_read_tabular_from_resource(scen_res), scen_res)
-
-            # ---- Load config ----
-            cfg_res = dp.get_resource("config")
-            config = yaml.safe_load(cfg_res.raw_read()) or {}
-            data[i]["config"] = config  # always store for transparency
-
-            # ---------- Production volume ----------
-            pv_map = _pv_variable_map(config)  # internal -> external label
-            if pv_map:
-                ext_labels = set(pv_map.values())
-                pv_subset = df.loc[
-                    (df["scenario"] == scenario_name)
-                    & (df["variables"].isin(ext_labels)),
-                    "region":,
-                ].copy()
-
-                # rename external labels to internal names
-                inverse_map = {v: k for k, v in pv_map.items()}
-                pv_subset["variables"] = pv_subset["variables"].map(inverse_map)
-
-                pv_arr = _to_xarray(pv_subset)
-                data[i]["production volume"] = pv_arr
-                data[i]["regions"] = pv_subset["region"].unique().tolist()
-
-            # ---------- Efficiency ----------
-            eff_groups = _efficiency_variables(config)  # group -> [ext labels]
-            eff_labels = sorted({lab for labs in eff_groups.values() for lab in labs})
-            if eff_labels:
-                eff_subset = df.loc[
-                    (df["scenario"] == scenario_name)
-                    & (df["variables"].isin(eff_labels)),
-                    "region":,
-                ].copy()
-
-                eff_arr = _to_xarray(eff_subset)
-
-                # reference-year logic & normalization
-                ref_years = _efficiency_ref_years(config)
-
-                # fill missing ref years with earliest year present in the array
-                if "year" in eff_arr.coords and eff_arr.coords["year"].size:
-                    earliest_year = int(eff_arr.coords["year"].values.min())
-                else:
-                    earliest_year = None
-
-                for var, meta in ref_years.items():
-                    if meta.get("reference year") is None and earliest_year is not None:
-                        meta["reference year"] = earliest_year
-
-                # apply absolute vs normalized behavior
-                for var, meta in ref_years.items():
-                    if var not in eff_arr.coords.get("variables", []):
-                        continue  # variable not present after filtering
-
-                    absolute = bool(meta.get("absolute", False))
-                    if absolute:
-                        # treat efficiency time series as given; back/forward fill across years
-                        eff_arr.loc[{"variables": var}] = (
-                            eff_arr.loc[{"variables": var}]
-                            .bfill(dim="year")
-                            .ffill(dim="year")
-                        )
-                    else:
-                        ref_y = meta.get("reference year")
-                        if ref_y is not None:
-                            # normalize by value at reference year
-                            # use method='nearest' so that if the exact year is absent
-                            # (e.g. GCAM starts at 2021 instead of 2020) we fall back
-                            # to the closest available year
-                            denom = eff_arr.loc[{"variables": var}].sel(
-                                year=int(ref_y), method="nearest"
-                            )
-                            eff_arr.loc[{"variables": var}] = (
-                                eff_arr.loc[{"variables": var}] / denom
-                            )
-                            # turn NaNs from division by 0 / missing into ones (neutral factor)
-                            eff_arr = eff_arr.fillna(1)
-
-                data[i]["efficiency"] = eff_arr
+            datapackage = load_external_datapackage(external["data"])
+            if scenario_name not in datapackage["scenarios"]:
+                datapackage["scenarios"][scenario_name] = _external_scenario_data(
+                    datapackage, scenario_name
+                )
+            # copies, as the external scenario transformation may modify them
+            data[i] = copy.deepcopy(datapackage["scenarios"][scenario_name])
 
         return data
 
@@ -13,11 +13,12 @@ from collections import defaultdict
 from functools import lru_cache
 
 import yaml
-from wurst import rescale_exchange
 
+from .compact import rescale_exchange
 from .export import biosphere_flows_dictionary
 from .filesystem_constants import VARIABLES_DIR
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     Dict,
@@ -26,6 +27,7 @@ from .transformation import (
     List,
     Tuple,
     find_fuel_efficiency,
+    get_parameter_table,
     get_suppliers_of_a_region,
     np,
     uuid,
@@ -36,7 +38,7 @@ from .utils import (
     get_water_consumption_factors,
     rescale_exchanges,
 )
-from .validation import ElectricityValidation
+from .validation import ElectricityValidation, get_validation_context
 
 POWERPLANT_TECHS = VARIABLES_DIR / "electricity.yaml"
 
@@ -281,6 +283,7 @@ def _update_electricity(
         regions=scenario["iam data"].regions,
         database=electricity.database,
         iam_data=scenario["iam data"],
+        context=get_validation_context(scenario, version),
     )
 
     validate.run_electricity_checks()
@@ -312,8 +315,18 @@ def create_fuel_map(database, version, model) -> tuple[InventorySet, dict, dict]
 def select_or_interpolate(data, year, **kwargs):
     """
     Select IAM data at `year` if available, otherwise interpolate.
-    kwargs are passed to .sel()
+    kwargs are passed to .sel(). Values selected by region and variables
+    are read from the parameter table of `data`.
     """
+    table = (
+        get_parameter_table(data, year)
+        if kwargs.keys() == {"region", "variables"}
+        else None
+    )
+    if table is not None:
+        # as `.item(0)`, the value of the first variable
+        return table.get(kwargs["region"], np.atleast_1d(kwargs["variables"])[0])
+
     if year in data.coords["year"].values:
         return data.sel(year=year, **kwargs).values.item(0)
     return data.sel(**kwargs).interp(year=year).values.item(0)
@@ -1254,7 +1267,13 @@ class Electricity(BaseTransformation):
             exc for exc in dataset["exchanges"] if exc["type"] != "production"
         ]
 
-        if self.year in self.iam_data.production_volumes.coords["year"].values:
+        table = get_parameter_table(self.iam_data.production_volumes, self.year)
+        if table is not None:
+            totals = table.region_totals(
+                self.iam_data.electricity_mix.variables.values.tolist()
+            )
+            production_volume = sum(totals[region] for region in regions)
+        elif self.year in self.iam_data.production_volumes.coords["year"].values:
             production_volume = (
                 self.iam_data.production_volumes.sel(
                     region=regions,
@@ -1359,6 +1378,7 @@ class Electricity(BaseTransformation):
 
         return dataset
 
+    @profiled
     def correct_hydropower_water_emissions(self) -> None:
         """
         Correct the emissions of water for hydropower plants.
@@ -1408,6 +1428,7 @@ class Electricity(BaseTransformation):
                                     remove_uncertainty=False,
                                 )
 
+    @profiled
     def update_efficiency_of_solar_pv(self) -> None:
         """
         Update the efficiency of solar PV modules.
@@ -1557,6 +1578,7 @@ class Electricity(BaseTransformation):
                     ):
                         exc["amount"] *= scaling_factor
 
+    @profiled
     def create_region_specific_power_plants(self):
         """
         Some power plant inventories are not native to ecoinvent
@@ -1690,6 +1712,7 @@ class Electricity(BaseTransformation):
         # update self.powerplant_map
         self.powerplant_map = self.mapping.generate_powerplant_map()
 
+    @profiled
     def update_electricity_efficiency(self) -> None:
         """
         This method modifies each ecoinvent coal, gas,
@@ -1796,6 +1819,7 @@ class Electricity(BaseTransformation):
 
                     self.write_log(dataset=dataset, status="updated")
 
+    @profiled
     def adjust_coal_power_plant_emissions(self) -> None:
         """
         Based on:
@@ -1964,6 +1988,7 @@ class Electricity(BaseTransformation):
 
                         self.write_log(dataset=dataset, status="updated")
 
+    @profiled
     def create_missing_power_plant_datasets(self) -> None:
         """
         Create missing power plant datasets.
@@ -2047,6 +2072,7 @@ class Electricity(BaseTransformation):
             for pp in list(v):
                 self.powerplant_map_rev[pp["name"]] = k
 
+    @profiled
     def adjust_aluminium_electricity_markets(self) -> None:
         """
         Aluminium production is a major electricity consumer.
@@ -2118,6 +2144,7 @@ class Electricity(BaseTransformation):
 
                 self.write_log(dataset=dataset, status="updated")
 
+    @profiled
     def update_electricity_markets(self) -> None:
         """
         Delete electricity markets. Create high, medium and low voltage market groups for electricity.
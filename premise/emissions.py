@@ -7,13 +7,14 @@ from functools import lru_cache
 from typing import Union
 
 import numpy as np
-import wurst
 import xarray as xr
 import yaml
 from numpy import ndarray
 
+from .compact import rescale_exchange
 from .filesystem_constants import DATA_DIR
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
@@ -143,6 +144,7 @@ class Emissions(BaseTransformation):
 
         return data
 
+    @profiled
     def update_emissions_in_database(self):
         for ds in self.database:
             name = ds["name"]
@@ -194,9 +196,7 @@ class Emissions(BaseTransformation):
 
             if 1 > scaling_factor > 0:
                 if gains_pollutant not in dataset.get("log parameters", {}):
-                    wurst.rescale_exchange(
-                        exc, scaling_factor, remove_uncertainty=False
-                    )
+                    rescale_exchange(exc, scaling_factor, remove_uncertainty=False)
 
                     logp = dataset.setdefault("log parameters", {})
                     if "GAINS sector" not in logp:
@@ -4,22 +4,24 @@ export.py contains all the functions to format, prepare and export databases.
 
 import csv
 import datetime
+import io
 import unicodedata
 import json
 import multiprocessing as mp
 import os
+import pickle
 import re
+import tempfile
 import uuid
-from collections import defaultdict
+from array import array
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 from functools import lru_cache
-from multiprocessing.pool import ThreadPool as Pool
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Dict, List
 
 import numpy as np
 import pandas as pd
-import sparse
 import yaml
 from datapackage import Package
 from pandas import DataFrame
@@ -29,9 +31,10 @@ from wurst.filesystem import get_uuid
 
 from . import __version__
 from .data_collection import get_delimiter
-from .filesystem_constants import DATA_DIR
+from .filesystem_constants import DATA_DIR, DIR_CACHED_FILES
 from .inventory_imports import get_correspondence_bio_flows, normalize_version
-from .utils import reset_all_codes, get_uuids
+from .profiling import profiled
+from .utils import end_of_process, get_uuids, load_database, reset_all_codes
 from .validation import BaseDatasetValidator
 
 FILEPATH_SIMAPRO_UNITS = DATA_DIR / "utils" / "export" / "simapro_units.yml"
@@ -205,6 +208,374 @@ def get_simapro_biosphere_dictionnary():
     return dict_bio
 
 
+SIMAPRO_FIELDS = [
+    "Process",
+    "Category type",
+    "Type",
+    "Process name",
+    "Time Period",
+    "Geography",
+    "Technology",
+    "Representativeness",
+    "Waste treatment allocation",
+    "Cut off rules",
+    "Capital goods",
+    "Date",
+    "Boundary with nature",
+    "Infrastructure",
+    "Record",
+    "Generator",
+    "Literature references",
+    "External documents",
+    "Comment",
+    "Collection method",
+    "Data treatment",
+    "Verification",
+    "System description",
+    "Allocation rules",
+    "Products",
+    "Waste treatment",
+    "Materials/fuels",
+    "Resources",
+    "Emissions to air",
+    "Emissions to water",
+    "Emissions to soil",
+    "Non material emission",
+    "Social issues",
+    "Economic issues",
+    "Waste to treatment",
+    "End",
+]
+
+# fields that carry the same value for every dataset
+SIMAPRO_CONSTANT_FIELDS = {
+    "Type": "Unit process",
+    "Time Period": "Unspecified",
+    "Technology": "Unspecified",
+    "Representativeness": "Unspecified",
+    "Waste treatment allocation": "Unspecified",
+    "Cut off rules": "Unspecified",
+    "Capital goods": "Unspecified",
+    "Boundary with nature": "Unspecified",
+    "Record": "Unspecified",
+    "Collection method": "Unspecified",
+    "Verification": "Unspecified",
+    "Allocation rules": "Unspecified",
+    "Infrastructure": "No",
+    "System description": "Ecoinvent v3",
+    "External documents": "https://premise.readthedocs.io/en/latest/introduction.html",
+}
+
+# biosphere compartments and the Simapro section they are written to
+SIMAPRO_BIOSPHERE_SECTIONS = {
+    "natural resource": "Resources",
+    "air": "Emissions to air",
+    "water": "Emissions to water",
+    "soil": "Emissions to soil",
+}
+
+SIMAPRO_SYSTEM_DESCRIPTION = [
+    ["System description"],
+    [],
+    ["Name"],
+    ["Ecoinvent v3"],
+    [],
+    ["Category"],
+    ["Others"],
+    [],
+    ["Description"],
+    [""],
+    [],
+    ["Cut-off rules"],
+    [""],
+    [],
+    ["Energy model"],
+    [],
+    [],
+    ["Transport model"],
+    [],
+    [],
+    ["Allocation rules"],
+    [],
+    ["End"],
+    [],
+]
+
+# lookup tables shared with Simapro rendering worker processes
+_SIMAPRO_CONTEXT = {}
+# lookup tables of the scenarios rendered by a shared pool, keyed by the
+# path of the file they are read from
+SIMAPRO_CONTEXTS_CACHE_SIZE = 4
+_SIMAPRO_CONTEXTS: OrderedDict = OrderedDict()
+
+
+def _render_csv_rows(rows: list) -> bytes:
+    """
+    Render rows as semicolon-separated, Latin-1 encoded CSV.
+    """
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerows(rows)
+    return buffer.getvalue().encode("latin1")
+
+
+def render_simapro_dataset(ds: dict, context: dict) -> tuple:
+    """
+    Render one dataset as a Simapro process block.
+
+    :param ds: dataset to render
+    :param context: lookup tables (units, compartments, categories,
+        biosphere flows, UUIDs) prepared by `Export.export_db_to_simapro`
+    :return: the Latin-1 encoded block, the (name, reference product)
+        of the dataset if its category could not be resolved (else None),
+        and the exchanges that could not be placed in any section
+    """
+
+    uuids = context["uuids"]
+    dict_bio = context["dict_bio"]
+    bio_dict = context["bio_dict"]
+    simapro_units = context["simapro_units"]
+    simapro_subs = context["simapro_subs"]
+    dict_cat_simapro = context["dict_cat_simapro"]
+    dataset_suffix = context["dataset_suffix"]
+
+    category_entry = dict_cat_simapro.get(
+        (ds["name"].lower(), ds["reference product"].lower())
+    )
+    main_category, sub_category = resolve_simapro_category(
+        ds["name"], ds["reference product"], dict_cat_simapro
+    )
+    unmatched = None
+    if (
+        category_entry is None
+        or not (category_entry.get("category") or "").strip()
+        or not (category_entry.get("sub_category") or "").strip()
+    ):
+        unmatched = (ds["name"], ds["reference product"])
+
+    is_waste_treatment = main_category.lower() == "waste treatment"
+
+    def technosphere_name(e):
+        return clean_csv_field(
+            f"{e['product']} {{{e.get('location', 'GLO')}}}| {e['name']} | {dataset_suffix}"
+        )
+
+    def technosphere_id(e):
+        return f"{clean_csv_field(e.get('comment'))} | ID = {uuids[(e['name'], e['product'], e['location'])]}"
+
+    def biosphere_row(e, convert_water=False):
+        if len(e["categories"]) > 1:
+            if e["categories"][1] != "fossil well":
+                sub_compartment = simapro_subs.get(
+                    e["categories"][1], e["categories"][1]
+                )
+            else:
+                sub_compartment = ""
+        else:
+            sub_compartment = ""
+
+        amount, unit = e["amount"], e["unit"]
+        if convert_water and e["name"].lower() == "water":
+            # going from cubic meters to kilograms
+            amount, unit = amount * 1000, "kilogram"
+
+        bio_key = (
+            e["name"],
+            e["categories"][0],
+            "unspecified" if len(e["categories"]) == 1 else e["categories"][1],
+            e["unit"],
+        )
+        return [
+            dict_bio.get(e["name"], e["name"]),
+            sub_compartment,
+            simapro_units.get(unit, unit),
+            f"{amount:.3E}",
+            "undefined",
+            0,
+            0,
+            0,
+            f"{clean_csv_field(e.get('comment'))} | ID = {bio_dict.get(bio_key)}",
+        ]
+
+    # single pass over exchanges, sorting them into their Simapro section
+    sections = defaultdict(list)
+    unused = []
+    for e in ds["exchanges"]:
+        if e["type"] == "production":
+            row = [
+                technosphere_name(e),
+                simapro_units.get(e["unit"], e["unit"]),
+                1.0,
+            ]
+            if is_waste_treatment:
+                row += ["not defined", sub_category, technosphere_id(e)]
+                sections["Waste treatment"].append(row)
+            else:
+                row += ["100%", "not defined", sub_category, technosphere_id(e)]
+                sections["Products"].append(row)
+
+        elif e["type"] == "technosphere":
+            key = (e["name"].lower(), e["product"].lower())
+            if key in dict_cat_simapro:
+                exc_cat = dict_cat_simapro[key]["category"]
+            else:
+                exc_cat = "material"
+
+            if exc_cat == "waste treatment":
+                section, amount = "Waste to treatment", e["amount"] * -1
+            else:
+                section, amount = "Materials/fuels", e["amount"]
+
+            sections[section].append(
+                [
+                    technosphere_name(e),
+                    simapro_units.get(e["unit"], e["unit"]),
+                    f"{amount:.3E}",
+                    "undefined",
+                    0,
+                    0,
+                    0,
+                    technosphere_id(e),
+                ]
+            )
+
+        elif (
+            e["type"] == "biosphere"
+            and e.get("categories", (None,))[0] in SIMAPRO_BIOSPHERE_SECTIONS
+        ):
+            section = SIMAPRO_BIOSPHERE_SECTIONS[e["categories"][0]]
+            sections[section].append(
+                biosphere_row(
+                    e,
+                    convert_water=section in ("Emissions to air", "Emissions to water"),
+                )
+            )
+
+        else:
+            unused.append(
+                [
+                    e["name"][:40],
+                    e.get("product", "")[:40],
+                    e.get("categories"),
+                    e.get("location"),
+                ]
+            )
+
+    comment = ds.get("comment", "")
+    if "source" in ds:
+        if len(comment) > 0:
+            comment += f" | Source: {ds['source']}"
+        else:
+            comment = f"Source: {ds['source']}"
+    # Add dataset UUID to comment field
+    ds_uuid = uuids[(ds["name"], ds["reference product"], ds["location"])]
+    if len(comment) > 0:
+        comment += f" | ID: {ds_uuid}"
+    else:
+        comment = f"ID: {ds_uuid}"
+
+    values = {
+        "Process name": clean_csv_field(
+            f"{ds['reference product']} {{{ds.get('location', 'GLO')}}}| {ds['name']} | {dataset_suffix}"
+        ),
+        "Category type": main_category,
+        "Generator": context["generator"],
+        "Geography": ds["location"],
+        "Date": context["date"],
+        "Comment": clean_csv_field(comment),
+    }
+
+    rows = []
+    for item in SIMAPRO_FIELDS:
+        if is_waste_treatment and item == "Products":
+            continue
+        if not is_waste_treatment and item in (
+            "Waste treatment",
+            "Waste treatment allocation",
+        ):
+            continue
+
+        rows.append([item])
+        if item in values:
+            rows.append([values[item]])
+        elif item in SIMAPRO_CONSTANT_FIELDS:
+            rows.append([SIMAPRO_CONSTANT_FIELDS[item]])
+        rows.extend(sections.get(item, []))
+        rows.append([])
+
+    return _render_csv_rows(rows), unmatched, unused
+
+
+def _init_simapro_worker(context: dict) -> None:
+    """Pool initializer: receive the lookup tables once per worker."""
+
+    _SIMAPRO_CONTEXT.clear()
+    _SIMAPRO_CONTEXT.update(context)
+
+
+def _render_simapro_chunk(datasets: list) -> list:
+    return [render_simapro_dataset(ds, _SIMAPRO_CONTEXT) for ds in datasets]
+
+
+def _render_simapro_chunk_in_context(task: tuple) -> list:
+    """Render a chunk with the lookup tables stored in a file."""
+
+    context_path, datasets = task
+    if context_path in _SIMAPRO_CONTEXTS:
+        _SIMAPRO_CONTEXTS.move_to_end(context_path)
+    else:
+        with open(context_path, "rb") as file:
+            _SIMAPRO_CONTEXTS[context_path] = pickle.load(file)
+        while len(_SIMAPRO_CONTEXTS) > SIMAPRO_CONTEXTS_CACHE_SIZE:
+            _SIMAPRO_CONTEXTS.popitem(last=False)
+
+    context = _SIMAPRO_CONTEXTS[context_path]
+    return [render_simapro_dataset(ds, context) for ds in datasets]
+
+
+def _iter_simapro_blocks(database, context, workers=None, chunk_size=250, pool=None):
+    """
+    Yield rendered Simapro blocks in dataset order, rendering
+    chunks of datasets in parallel worker processes.
+
+    With a `pool` shared by several scenarios, the lookup tables of
+    the scenario are written to a file, and each worker reads them once.
+    """
+
+    chunks = [database[i : i + chunk_size] for i in range(0, len(database), chunk_size)]
+
+    if pool is not None and len(chunks) > 1:
+        with tempfile.NamedTemporaryFile(
+            dir=DIR_CACHED_FILES, suffix=".simapro-context", delete=False
+        ) as file:
+            pickle.dump(context, file, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            for rendered in pool.imap(
+                _render_simapro_chunk_in_context,
+                ((file.name, chunk) for chunk in chunks),
+            ):
+                yield from rendered
+        finally:
+            os.remove(file.name)
+        return
+
+    workers = min(workers or mp.cpu_count(), len(chunks))
+
+    if workers <= 1:
+        for ds in database:
+            yield render_simapro_dataset(ds, context)
+        return
+
+    with mp.Pool(
+        processes=workers,
+        initializer=_init_simapro_worker,
+        initargs=(context,),
+    ) as pool:
+        for rendered in pool.imap(_render_simapro_chunk, chunks):
+            yield from rendered
+
+
 def create_index_of_A_matrix(database):
     """
     Create a dictionary with row/column indices of the exchanges
@@ -242,6 +613,7 @@ def create_codes_index_of_exchanges_matrix(database):
     return {database[i]["code"]: i for i in range(0, len(database))}
 
 
+@lru_cache
 def create_codes_index_of_biosphere_flows_matrix(version):
     """
     Create a dictionary with row/column indices of the biosphere matrix
@@ -251,12 +623,22 @@ def create_codes_index_of_biosphere_flows_matrix(version):
     return {v: k for k, v in enumerate(data.values())}
 
 
+@lru_cache
 def create_index_of_biosphere_flows_matrix(version):
     data = biosphere_flows_dictionary(version)
 
     return {v: k for k, v in enumerate(data.keys())}
 
 
+@lru_cache
+def create_rev_index_of_biosphere_flows(version):
+    """
+    Create a dictionary with biosphere flow codes as keys
+    and (name, category, sub-category, unit) as values.
+    """
+    return {v: k for k, v in biosphere_flows_dictionary(version).items()}
+
+
 def create_codes_and_names_of_tech_matrix(database: List[dict]):
     """
     Create a dictionary a tuple (activity name, reference product,
@@ -636,16 +1018,107 @@ def generate_scenario_factor_file(
     return df, extra_acts
 
 
-def generate_new_activities(args):
-    k, v, acts_ind, db_name, version, dict_meta, m = args
-    act = get_act_dict_structure(k, acts_ind, db_name)
-    meta_id = tuple(list(acts_ind[k])[:-1])
-    act.update(dict_meta[meta_id])
+class ScenarioDifferences:
+    """
+    Exchanges of the original and scenario databases, folded one database
+    at a time, so that each database can be released before the next one
+    is loaded. Suppliers and consumers are indexed as they are met, and the
+    amounts of each database are kept as (consumer, supplier, amount)
+    arrays, turned into sparse matrices once all databases are folded.
+
+    :ivar acts_ind_rev: index of each supplier and consumer
+    :ivar dict_meta: metadata of each dataset, the last database folded wins
+    """
+
+    # dataset fields not carried over to the superstructure datasets
+    EXCLUDED_METADATA = {
+        "exchanges",
+        "code",
+        "name",
+        "reference product",
+        "location",
+        "unit",
+        "database",
+    }
+
+    def __init__(self):
+        self.acts_ind_rev: Dict[tuple, int] = {}
+        self.dict_meta: Dict[tuple, dict] = {}
+        self._coordinates: List[tuple] = []
 
-    act["exchanges"].extend(
-        get_exchange(i, acts_ind, db_name, version, amount=m[i, k, 0]) for i in v
-    )
-    return act
+    def _index(self, key: tuple) -> int:
+        return self.acts_ind_rev.setdefault(key, len(self.acts_ind_rev))
+
+    def add(self, database: List[dict]) -> None:
+        """
+        Fold the exchanges of a database.
+
+        :param database: list of datasets
+        """
+
+        consumers, suppliers, amounts = array("q"), array("q"), array("d")
+
+        for ds in database:
+            consumer_key = (
+                ds["name"],
+                ds.get("reference product"),
+                ds.get("categories"),
+                ds.get("location"),
+                ds["unit"],
+                "production",
+            )
+            self.dict_meta[consumer_key[:-1]] = {
+                k: v for k, v in ds.items() if k not in self.EXCLUDED_METADATA
+            }
+            consumer = self._index(consumer_key)
+
+            for exc in ds["exchanges"]:
+                consumers.append(consumer)
+                suppliers.append(
+                    self._index(
+                        (
+                            exc["name"],
+                            exc.get("product"),
+                            exc.get("categories"),
+                            exc.get("location"),
+                            exc["unit"],
+                            exc["type"],
+                        )
+                    )
+                )
+                amounts.append(exc["amount"])
+
+        self._coordinates.append(
+            (
+                np.frombuffer(consumers, dtype=np.int64),
+                np.frombuffer(suppliers, dtype=np.int64),
+                np.frombuffer(amounts, dtype=np.float64),
+            )
+        )
+
+    def matrices(self) -> List[nsp.csr_matrix]:
+        """
+        (consumer, supplier) matrices of the databases folded, in order.
+        Amounts of the same exchange in a dataset are summed.
+        """
+
+        shape = (len(self.acts_ind_rev),) * 2
+        matrices = []
+        for consumers, suppliers, amounts in self._coordinates:
+            matrix = nsp.csr_matrix((amounts, (consumers, suppliers)), shape=shape)
+            matrix.sum_duplicates()
+            matrices.append(matrix)
+        return matrices
+
+
+def _sorted_coordinates(matrix: nsp.spmatrix) -> list[tuple[int, int]]:
+    """Coordinates of the non-zero values of a matrix, row by row."""
+
+    matrix = nsp.csr_matrix(matrix)
+    matrix.eliminate_zeros()
+    matrix.sort_indices()
+    coo = matrix.tocoo()
+    return list(zip(coo.row.tolist(), coo.col.tolist()))
 
 
 def generate_scenario_difference_file(
@@ -655,105 +1128,99 @@ def generate_scenario_difference_file(
     version,
     scenario_list,
     biosphere_name,
-) -> tuple[DataFrame, list[dict], set[Any]]:
+) -> tuple[DataFrame, list[dict], list[tuple]]:
     """
-    Generate a scenario difference file for a given list of databases
+    Generate a scenario difference file for a given list of databases.
+    Scenario databases are folded one at a time: `scenarios` can be an
+    iterator that loads each database and releases it once folded, so
+    that no more than one of them is in memory at once.
+
     :param db_name: name of the new database
     :param origin_db: the original database
-    :param scenarios: list of databases
+    :param scenarios: list, or iterator, of scenario dictionaries
+        holding a database
+    :param version: ecoinvent version
+    :param scenario_list: names of the scenarios
+    :param biosphere_name: name of the biosphere database
+    :return: the scenario difference dataframe, the superstructure
+        database and the list of suppliers and consumers
     """
 
     bio_dict = biosphere_flows_dictionary(version)
 
-    # exc_codes.update(
-    #    {
-    #        (a["name"], a["reference product"], a["location"], a["unit"]): a["code"]
-    #        for a in origin_db
-    #    }
-    # )
-    # Turn list into set for O(1) membership tests
-    list_acts = set(get_list_unique_acts([{"database": origin_db}] + scenarios))
+    differences = ScenarioDifferences()
+    differences.add(origin_db)
+    for scenario in scenarios:
+        differences.add(scenario["database"])
 
+    list_acts = list(differences.acts_ind_rev)
     acts_ind = dict(enumerate(list_acts))
-    acts_ind_rev = {v: k for k, v in acts_ind.items()}
+    dict_meta = differences.dict_meta
 
     list_scenarios = ["original"] + scenario_list
 
-    list_dbs = [origin_db] + [a["database"] for a in scenarios]
+    # indexed by (consumer, supplier)
+    matrices = differences.matrices()
+    if len(matrices) != len(list_scenarios):
+        raise ValueError(
+            f"{len(matrices) - 1} scenario databases for "
+            f"{len(scenario_list)} scenario names."
+        )
 
-    matrices = {
-        a: nsp.lil_matrix((len(list_acts), len(list_acts)))
-        for a, _ in enumerate(list_scenarios)
-    }
+    # datasets of the superstructure database: all the consumers,
+    # with their exchanges in any database, with original amounts
+    original = matrices[0]
+    total = sum(matrices[1:], matrices[0].copy())
+    total.eliminate_zeros()
+    total.sort_indices()
 
-    # Use defaultdict to avoid key errors
-    dict_meta = defaultdict(dict)
-
-    for db in list_dbs:
-        for a in db:
-            key = (a["name"], a["reference product"], None, a["location"], a["unit"])
-            dict_meta[key] = {
-                b: c
-                for b, c in a.items()
-                if b
-                not in [
-                    "exchanges",
-                    "code",
-                    "name",
-                    "reference product",
-                    "location",
-                    "unit",
-                    "database",
-                ]
-            }
+    new_db = []
+    for k in range(total.shape[0]):
+        suppliers = total.indices[total.indptr[k] : total.indptr[k + 1]]
+        if len(suppliers) == 0:
+            continue
 
-    for i, db in enumerate(list_dbs):
-        for ds in db:
-            c = (
-                ds["name"],
-                ds.get("reference product"),
-                ds.get("categories"),
-                ds.get("location"),
-                ds["unit"],
-                "production",
+        original_amounts = dict(
+            zip(
+                original.indices[original.indptr[k] : original.indptr[k + 1]],
+                original.data[original.indptr[k] : original.indptr[k + 1]],
             )
-            for exc in ds["exchanges"]:
-                s = (
-                    exc["name"],
-                    exc.get("product"),
-                    exc.get("categories"),
-                    exc.get("location"),
-                    exc["unit"],
-                    exc["type"],
-                )
-                matrices[i][acts_ind_rev[s], acts_ind_rev[c]] += exc["amount"]
-
-    m = sparse.stack([sparse.COO(x) for x in matrices.values()], axis=-1)
-    inds = sparse.argwhere(m.sum(-1).T != 0)
-    inds = list(map(tuple, inds))
-
-    dataframe_rows = []
-
-    inds_d = defaultdict(list)
-    for ind in inds:
-        inds_d[ind[0]].append(ind[1])
-
-    with Pool(processes=mp.cpu_count()) as pool:
-        new_db = pool.map(
-            generate_new_activities,
-            [
-                (k, v, acts_ind, db_name, version, dict_meta, m)
-                for k, v in inds_d.items()
-            ],
         )
+        act = get_act_dict_structure(k, acts_ind, db_name)
+        act.update(dict_meta[acts_ind[k][:-1]])
+        act["exchanges"].extend(
+            get_exchange(
+                i,
+                acts_ind,
+                db_name,
+                version,
+                amount=float(original_amounts.get(i, 0.0)),
+            )
+            for i in suppliers.tolist()
+        )
+        new_db.append(act)
+
+    # exchanges whose amount differs from the original in any scenario
+    changed = nsp.csr_matrix(original.shape, dtype=bool)
+    for matrix in matrices[1:]:
+        changed = changed + (matrix != original)
 
-    inds_std = sparse.argwhere((m[..., 1:] == m[..., 0, None]).all(axis=-1).T == False)
     inds_std = _include_production_rows_for_changing_self_consumption(
-        indices=inds_std,
+        indices=_sorted_coordinates(changed),
         acts_ind=acts_ind,
     )
 
-    for i in inds_std:
+    if inds_std:
+        consumers, suppliers = map(np.array, zip(*inds_std))
+        values = np.column_stack(
+            [np.asarray(matrix[consumers, suppliers]).ravel() for matrix in matrices]
+        )
+    else:
+        values = np.empty((0, len(matrices)))
+
+    dataframe_rows = []
+
+    for i, scenario_values in zip(inds_std, values):
         c_name, c_ref, c_cat, c_loc, c_unit, _ = acts_ind[i[0]]
         s_name, s_ref, s_cat, s_loc, s_unit, s_type = acts_ind[i[1]]
 
@@ -804,7 +1271,7 @@ def generate_scenario_difference_file(
             s_type,
         ]
 
-        row.extend(m[i[1], i[0], :])
+        row.extend(scenario_values)
 
         dataframe_rows.append(row)
 
@@ -1166,59 +1633,104 @@ def _build_superstructure_db(
     return new_db, df
 
 
-def check_geographical_linking(scenario, original_database):
+def get_dataset_keys(database: List[dict]) -> set:
+    """
+    Return the set of (name, reference product, location) keys of a database.
+    Computed once per export and shared across scenarios, so that
+    new or changed datasets can be found with hashed lookups.
 
-    # geo = Geomap(scenario["model"])
+    :param database: list of datasets
+    :return: set of dataset keys
+    """
 
-    index = scenario.get("index") or {}
-    database = scenario["database"]
-    original_datasets = [
-        (a["name"], a["reference product"], a["location"]) for a in original_database
-    ]
+    return {(ds["name"], ds["reference product"], ds["location"]) for ds in database}
+
+
+def find_new_datasets(database: List[dict], original_keys: set) -> List[dict]:
+    """
+    Return the datasets of `database` that are not part of the original database.
 
-    datasets_to_check = [
+    :param database: scenario database
+    :param original_keys: set of keys returned by `get_dataset_keys`
+    :return: list of new or relocated datasets
+    """
+
+    return [
         ds
         for ds in database
-        if (ds["name"], ds["reference product"], ds["location"])
-        not in original_datasets
+        if (ds["name"], ds["reference product"], ds["location"]) not in original_keys
     ]
 
+
+def check_geographical_linking(scenario, original_database, original_keys=None):
+    """
+    Relink technosphere exchanges of new datasets to suppliers
+    located in the same region, when such suppliers exist.
+
+    :param scenario: scenario dictionary
+    :param original_database: original (unmodified) database
+    :param original_keys: precomputed keys of `original_database`, as
+        returned by `get_dataset_keys`. Computed if not provided.
+    :return: scenario
+    """
+
+    index = scenario.get("index") or {}
+    database = scenario["database"]
+
+    if original_keys is None:
+        original_keys = get_dataset_keys(original_database)
+
+    datasets_to_check = find_new_datasets(database, original_keys)
+
     FORBIDDEN = ["import", "mix", "transport"]
 
+    # locations available per (name, product), built on demand
+    locations_per_key = {}
+
+    def available_locations(key):
+        if key not in locations_per_key:
+            locations_per_key[key] = {k["location"] for k in index.get(key, [])}
+        return locations_per_key[key]
+
     for ds in datasets_to_check:
-        if ds["location"] not in ["GLO", "RoW", "World"]:
-            if "market" not in ds["name"]:
-                for exc in ds["exchanges"]:
-                    if exc["type"] == "technosphere":
-                        if not any(x in exc["name"] for x in FORBIDDEN) and not any(
-                            x in ds["name"] for x in FORBIDDEN
-                        ):
-                            if exc["location"] != ds["location"]:
-                                # check if exchange from the same location as the dataset is available
-                                key = (exc["name"], exc["product"])
-                                if ds["location"] in [
-                                    k["location"] for k in index.get(key, [])
-                                ]:
-                                    # if ds["location"] not in geo.iam_to_ecoinvent_location(exc["location"]):
-                                    if (exc["name"], exc["product"]) != (
-                                        ds["name"],
-                                        ds["reference product"],
-                                    ):
-                                        # there is a better match available
-                                        exc["location"] = ds["location"]
+        if ds["location"] in ["GLO", "RoW", "World"]:
+            continue
+        if "market" in ds["name"]:
+            continue
+        if any(x in ds["name"] for x in FORBIDDEN):
+            continue
+
+        own_key = (ds["name"], ds["reference product"])
+
+        for exc in ds["exchanges"]:
+            if exc["type"] != "technosphere":
+                continue
+            if exc["location"] == ds["location"]:
+                continue
+            if any(x in exc["name"] for x in FORBIDDEN):
+                continue
+
+            # check if exchange from the same location as the dataset is available
+            key = (exc["name"], exc["product"])
+            if key != own_key and ds["location"] in available_locations(key):
+                # there is a better match available
+                exc["location"] = ds["location"]
 
     return scenario
 
 
+@profiled
 def prepare_db_for_export(
-    scenario, name, original_database, version, biosphere_name=None
+    scenario, name, original_database, version, biosphere_name=None, original_keys=None
 ):
     """
     Prepare a database for export.
     """
 
     # ensuring that all geographically appropriate exchanges are present
-    scenario = check_geographical_linking(scenario, original_database)
+    scenario = check_geographical_linking(
+        scenario, original_database, original_keys=original_keys
+    )
 
     # validate the database
     validator = BaseDatasetValidator(
@@ -1238,6 +1750,7 @@ def prepare_db_for_export(
     return validator.database
 
 
+@profiled
 def prepare_db_for_fast_export(scenario, name, version, biosphere_name=None):
     """
     Prepare a database for Brightway export using only the minimal
@@ -1261,7 +1774,9 @@ def prepare_db_for_fast_export(scenario, name, version, biosphere_name=None):
     return validator.database
 
 
-def _prepare_database(scenario, db_name, original_database, biosphere_name, version):
+def _prepare_database(
+    scenario, db_name, original_database, biosphere_name, version, original_keys=None
+):
 
     scenario["database"] = prepare_db_for_export(
         scenario,
@@ -1269,11 +1784,69 @@ def _prepare_database(scenario, db_name, original_database, biosphere_name, vers
         original_database=original_database,
         biosphere_name=biosphere_name,
         version=version,
+        original_keys=original_keys,
     )
 
     return scenario
 
 
+# state shared with matrix export worker processes
+_MATRICES_EXPORT_CONTEXT = {}
+
+
+def _init_matrices_export_worker(context: dict) -> None:
+    """Pool initializer: receive the original database and build the biosphere indexes once."""
+
+    _MATRICES_EXPORT_CONTEXT.clear()
+    _MATRICES_EXPORT_CONTEXT.update(context)
+    create_index_of_biosphere_flows_matrix(context["version"])
+    create_codes_index_of_biosphere_flows_matrix(context["version"])
+    create_rev_index_of_biosphere_flows(context["version"])
+
+
+def export_scenario_matrices(scenario, filepath, context=None) -> bool:
+    """
+    Load, validate and export one scenario as matrices.
+
+    :param scenario: scenario dictionary, with its database in memory or cached
+    :param filepath: directory where the matrices are written
+    :param context: original database, its keys, version, biosphere name and
+        system model. Defaults to the context received by the worker process.
+    :return: False if the scenario did not pass validation, True otherwise
+    """
+
+    context = context or _MATRICES_EXPORT_CONTEXT
+
+    scenario = load_database(
+        scenario=scenario,
+        original_database=context["original_database"],
+        load_metadata=True,
+    )
+
+    try:
+        scenario = _prepare_database(
+            scenario=scenario,
+            db_name="database",
+            original_database=context["original_database"],
+            biosphere_name=context["biosphere_name"],
+            version=context["version"],
+            original_keys=context["original_keys"],
+        )
+    except ValueError:
+        return False
+
+    Export(
+        scenario=scenario,
+        filepath=filepath,
+        version=context["version"],
+        system_model=context["system_model"],
+    ).export_db_to_matrices()
+
+    end_of_process(scenario)
+
+    return True
+
+
 class Export:
     """
     Class that exports the transformed data into matrices:
@@ -1542,7 +2115,7 @@ class Export:
 
     @staticmethod
     def create_rev_index_of_B_matrix(version):
-        return {v: k for k, v in biosphere_flows_dictionary(version).items()}
+        return create_rev_index_of_biosphere_flows(version)
 
     def get_category_of_exchange(self):
         """
@@ -1630,19 +2203,51 @@ class Export:
 
         return dict_categories
 
-    def export_db_to_simapro(self, olca_compartments=False):
+    def export_db_to_simapro(
+        self,
+        olca_compartments: bool = False,
+        workers: int = None,
+        chunk_size: int = 250,
+        pool=None,
+    ):
+        """
+        Export the database as a Simapro CSV file.
+
+        Dataset blocks are rendered in chunks by a pool of worker processes
+        and streamed to the file in dataset order.
+
+        :param olca_compartments: if True, keep ecoinvent sub-compartments (for OpenLCA)
+        :param workers: number of worker processes. Defaults to the number of CPUs.
+            With one worker, or a database that fits in one chunk, datasets
+            are rendered in the current process.
+        :param chunk_size: number of datasets sent to a worker at once
+        :param pool: process pool to render the datasets with, instead of
+            starting one. Used to share one pool, started from the main
+            thread, among scenarios written from several threads.
+        """
         if not os.path.exists(self.filepath):
             os.makedirs(self.filepath)
 
-        dict_bio = get_simapro_biosphere_dictionnary()
-
-        uuids = get_uuids(self.db)
-        dataset_suffix = "Cut-off, U" if self.system_model == "cutoff" else "Conseq, U"
+        context = {
+            "dict_bio": get_simapro_biosphere_dictionnary(),
+            "uuids": get_uuids(self.db),
+            "dataset_suffix": (
+                "Cut-off, U" if self.system_model == "cutoff" else "Conseq, U"
+            ),
+            # mapping between BW2 and Simapro units
+            "simapro_units": get_simapro_units(),
+            # mapping between BW2 and Simapro sub-compartments
+            "simapro_subs": {} if olca_compartments else get_simapro_compartments(),
+            "dict_cat_simapro": get_simapro_category_of_exchange(),
+            "bio_dict": self.bio_dict,
+            "generator": "premise " + str(__version__),
+            "date": f"{datetime.today():%d.%m.%Y}",
+        }
 
         headers = [
             "{SimaPro 9.1.1.7}",
             "{processes}",
-            "{Project: premise import" + f"{datetime.today():%d.%m.%Y}" + "}",
+            "{Project: premise import" + context["date"] + "}",
             "{CSV Format version: 9.0.0}",
             "{CSV separator: Semicolon}",
             "{Decimal separator: .}",
@@ -1655,440 +2260,28 @@ class Export:
             "{Include sub product stages and processes: Yes}",
         ]
 
-        fields = [
-            "Process",
-            "Category type",
-            "Type",
-            "Process name",
-            "Time Period",
-            "Geography",
-            "Technology",
-            "Representativeness",
-            "Waste treatment allocation",
-            "Cut off rules",
-            "Capital goods",
-            "Date",
-            "Boundary with nature",
-            "Infrastructure",
-            "Record",
-            "Generator",
-            "Literature references",
-            "External documents",
-            "Comment",
-            "Collection method",
-            "Data treatment",
-            "Verification",
-            "System description",
-            "Allocation rules",
-            "Products",
-            "Waste treatment",
-            "Materials/fuels",
-            "Resources",
-            "Emissions to air",
-            "Emissions to water",
-            "Emissions to soil",
-            "Non material emission",
-            "Social issues",
-            "Economic issues",
-            "Waste to treatment",
-            "End",
-        ]
-
-        # mapping between BW2 and Simapro units
-        simapro_units = get_simapro_units()
-
-        # mapping between BW2 and Simapro sub-compartments
-        if olca_compartments:
-            simapro_subs = {}
-        else:
-            simapro_subs = get_simapro_compartments()
-
         filename = f"simapro_export_{self.model}_{self.scenario}_{self.year}.csv"
 
-        dict_cat_simapro = get_simapro_category_of_exchange()
-
-        unlinked_biosphere_flows = []
-
-        with open(
-            Path(self.filepath) / filename, "w", newline="", encoding="latin1"
-        ) as csvFile:
-            writer = csv.writer(csvFile, delimiter=";")
-            for item in headers:
-                writer.writerow([item])
-            writer.writerow([])
-
-            for ds in self.db:
-                ds_uuid = uuids[(ds["name"], ds["reference product"], ds["location"])]
-                category_entry = dict_cat_simapro.get(
-                    (ds["name"].lower(), ds["reference product"].lower())
-                )
-                main_category, sub_category = resolve_simapro_category(
-                    ds["name"], ds["reference product"], dict_cat_simapro
-                )
-                if (
-                    category_entry is None
-                    or not (category_entry.get("category") or "").strip()
-                    or not (category_entry.get("sub_category") or "").strip()
-                ):
-                    self.unmatched_category_flows.append(
-                        (ds["name"], ds["reference product"])
-                    )
-
-                for item in fields:
-                    if (
-                        main_category.lower() == "waste treatment"
-                        and item == "Products"
-                    ):
-                        continue
-
-                    if main_category.lower() != "waste treatment" and item in (
-                        "Waste treatment",
-                        "Waste treatment allocation",
-                    ):
-                        continue
-
-                    writer.writerow([item])
-
-                    if item == "Process name":
-                        name = f"{ds['reference product']} {{{ds.get('location', 'GLO')}}}| {ds['name']} | {dataset_suffix}"
-
-                        writer.writerow([clean_csv_field(name)])
-
-                    if item == "Type":
-                        writer.writerow(["Unit process"])
-
-                    if item == "Category type":
-                        writer.writerow([main_category])
-
-                    if item == "Generator":
-                        writer.writerow(["premise " + str(__version__)])
-
-                    if item == "Geography":
-                        writer.writerow([ds["location"]])
-
-                    if item == "Date":
-                        writer.writerow([f"{datetime.today():%d.%m.%Y}"])
-
-                    if item == "Comment":
-                        string = ""
-                        if "comment" in ds:
-                            string = ds["comment"]
-
-                        if "source" in ds:
-                            if len(string) > 0:
-                                string += f" | Source: {ds['source']}"
-                            else:
-                                string = f"Source: {ds['source']}"
-
-                        # Add dataset UUID to comment field
-                        if len(string) > 0:
-                            string += f" | ID: {ds_uuid}"
-                        else:
-                            string = f"ID: {ds_uuid}"
-
-                        writer.writerow([clean_csv_field(string)])
-
-                    if item in (
-                        "Cut off rules",
-                        "Capital goods",
-                        "Technology",
-                        "Representativeness",
-                        "Waste treatment allocation",
-                        "Boundary with nature",
-                        "Allocation rules",
-                        "Collection method",
-                        "Verification",
-                        "Time Period",
-                        "Record",
-                    ):
-                        writer.writerow(["Unspecified"])
-                    if item == "System description":
-                        writer.writerow(["Ecoinvent v3"])
-                    if item == "Infrastructure":
-                        writer.writerow(["No"])
-                    if item == "External documents":
-                        writer.writerow(
-                            [
-                                "https://premise.readthedocs.io/en/latest/introduction.html"
-                            ]
-                        )
-                    if item in ("Waste treatment", "Products"):
-                        for e in ds["exchanges"]:
-                            if e["type"] == "production":
-                                name = f"{e['product']} {{{e.get('location', 'GLO')}}}| {e['name']} | {dataset_suffix}"
-                                name = clean_csv_field(name)
-
-                                if item == "Waste treatment":
-                                    writer.writerow(
-                                        [
-                                            name,
-                                            simapro_units.get(e["unit"], e["unit"]),
-                                            1.0,
-                                            "not defined",
-                                            sub_category,
-                                            f"{clean_csv_field(e.get('comment'))} | ID = {uuids[(e['name'],e['product'],e['location'])]}",
-                                        ]
-                                    )
-
-                                else:
-                                    writer.writerow(
-                                        [
-                                            name,
-                                            simapro_units.get(e["unit"], e["unit"]),
-                                            1.0,
-                                            "100%",
-                                            "not defined",
-                                            sub_category,
-                                            f"{clean_csv_field(e.get('comment'))} | ID = {uuids[(e['name'], e['product'], e['location'])]}",
-                                        ]
-                                    )
-                                e["used"] = True
-                    if item == "Materials/fuels":
-                        for e in ds["exchanges"]:
-                            if e["type"] == "technosphere":
-                                key = (e["name"].lower(), e["product"].lower())
-                                if key in dict_cat_simapro:
-                                    exc_cat = dict_cat_simapro.get(key)["category"]
-                                else:
-                                    exc_cat = "material"
-
-                                if exc_cat != "waste treatment":
-                                    name = f"{e['product']} {{{e.get('location', 'GLO')}}}| {e['name']} | {dataset_suffix}"
-                                    name = clean_csv_field(name)
-
-                                    writer.writerow(
-                                        [
-                                            name,
-                                            simapro_units.get(e["unit"], e["unit"]),
-                                            f"{e['amount']:.3E}",
-                                            "undefined",
-                                            0,
-                                            0,
-                                            0,
-                                            f"{clean_csv_field(e.get('comment'))} | ID = {uuids[(e['name'], e['product'], e['location'])]}",
-                                        ]
-                                    )
-                                    e["used"] = True
-                    if item == "Resources":
-                        for e in ds["exchanges"]:
-                            if (
-                                e["type"] == "biosphere"
-                                and e.get("categories", (None,))[0]
-                                == "natural resource"
-                            ):
-                                if e["name"] not in dict_bio:
-                                    unlinked_biosphere_flows.append(
-                                        [e["name"], " - ", e["categories"][0]]
-                                    )
-
-                                if len(e["categories"]) > 1:
-                                    if e["categories"][1] != "fossil well":
-                                        sub_compartment = simapro_subs.get(
-                                            e["categories"][1], e["categories"][1]
-                                        )
-                                    else:
-                                        sub_compartment = ""
-
-                                writer.writerow(
-                                    [
-                                        dict_bio.get(e["name"], e["name"]),
-                                        sub_compartment,
-                                        simapro_units.get(e["unit"], e["unit"]),
-                                        f"{e['amount']:.3E}",
-                                        "undefined",
-                                        0,
-                                        0,
-                                        0,
-                                        f"{clean_csv_field(e.get('comment'))} | ID = {self.bio_dict.get((e['name'],e['categories'][0],'unspecified' if len(e['categories']) == 1 else e['categories'][1], e['unit']))}",
-                                    ]
-                                )
-                                e["used"] = True
-                    if item == "Emissions to air":
-                        for e in ds["exchanges"]:
-                            if (
-                                e["type"] == "biosphere"
-                                and e.get("categories", (None,))[0] == "air"
-                            ):
-                                if len(e["categories"]) > 1:
-                                    sub_compartment = simapro_subs.get(
-                                        e["categories"][1], e["categories"][1]
-                                    )
-                                else:
-                                    sub_compartment = ""
-
-                                if e["name"].lower() == "water":
-                                    unit = "kilogram"
-                                    # going from cubic meters to kilograms
-                                    e["amount"] *= 1000
-                                else:
-                                    unit = e["unit"]
-
-                                if e["name"] not in dict_bio:
-                                    unlinked_biosphere_flows.append(
-                                        [e["name"], " - ", e["categories"][0]]
-                                    )
-
-                                writer.writerow(
-                                    [
-                                        dict_bio.get(e["name"], e["name"]),
-                                        sub_compartment,
-                                        simapro_units.get(unit, unit),
-                                        f"{e['amount']:.3E}",
-                                        "undefined",
-                                        0,
-                                        0,
-                                        0,
-                                        f"{clean_csv_field(e.get('comment'))} | ID = {self.bio_dict.get((e['name'], e['categories'][0], 'unspecified' if len(e['categories']) == 1 else e['categories'][1], e['unit']))}",
-                                    ]
-                                )
-                                e["used"] = True
-                    if item == "Emissions to water":
-                        for e in ds["exchanges"]:
-                            if (
-                                e["type"] == "biosphere"
-                                and e.get("categories", (None,))[0] == "water"
-                            ):
-                                if len(e["categories"]) > 1:
-                                    sub_compartment = simapro_subs.get(
-                                        e["categories"][1], e["categories"][1]
-                                    )
-                                else:
-                                    sub_compartment = ""
+        unused_exchanges = []
+        seen_unused = set()
 
-                                if e["name"].lower() == "water":
-                                    unit = "kilogram"
-                                    # going from cubic meters to kilograms
-                                    e["amount"] *= 1000
-                                else:
-                                    unit = e["unit"]
+        with open(Path(self.filepath) / filename, "wb") as stream:
+            stream.write(_render_csv_rows([[item] for item in headers] + [[]]))
 
-                                if e["name"] not in dict_bio:
-                                    unlinked_biosphere_flows.append(
-                                        [e["name"], " - ", e["categories"][0]]
-                                    )
+            for block, unmatched, unused in _iter_simapro_blocks(
+                self.db, context, workers=workers, chunk_size=chunk_size, pool=pool
+            ):
+                stream.write(block)
 
-                                writer.writerow(
-                                    [
-                                        dict_bio.get(e["name"], e["name"]),
-                                        sub_compartment,
-                                        simapro_units.get(unit, unit),
-                                        f"{e['amount']:.3E}",
-                                        "undefined",
-                                        0,
-                                        0,
-                                        0,
-                                        f"{clean_csv_field(e.get('comment'))} | ID = {self.bio_dict.get((e['name'], e['categories'][0], 'unspecified' if len(e['categories']) == 1 else e['categories'][1], e['unit']))}",
-                                    ]
-                                )
-                                e["used"] = True
-                    if item == "Emissions to soil":
-                        for e in ds["exchanges"]:
-                            if (
-                                e["type"] == "biosphere"
-                                and e.get("categories", (None,))[0] == "soil"
-                            ):
-                                if len(e["categories"]) > 1:
-                                    sub_compartment = simapro_subs.get(
-                                        e["categories"][1], e["categories"][1]
-                                    )
-                                else:
-                                    sub_compartment = ""
+                if unmatched is not None:
+                    self.unmatched_category_flows.append(unmatched)
 
-                                if e["name"] not in dict_bio:
-                                    unlinked_biosphere_flows.append(
-                                        [e["name"], " - ", e["categories"][0]]
-                                    )
+                for row in unused:
+                    if repr(row) not in seen_unused:
+                        seen_unused.add(repr(row))
+                        unused_exchanges.append(row)
 
-                                writer.writerow(
-                                    [
-                                        dict_bio.get(e["name"], e["name"]),
-                                        sub_compartment,
-                                        simapro_units.get(e["unit"], e["unit"]),
-                                        f"{e['amount']:.3E}",
-                                        "undefined",
-                                        0,
-                                        0,
-                                        0,
-                                        f"{clean_csv_field(e.get('comment'))} | ID = {self.bio_dict.get((e['name'], e['categories'][0], 'unspecified' if len(e['categories']) == 1 else e['categories'][1], e['unit']))}",
-                                    ]
-                                )
-                                e["used"] = True
-                    if item == "Waste to treatment":
-                        for e in ds["exchanges"]:
-                            if e["type"] == "technosphere":
-                                key = (e["name"].lower(), e["product"].lower())
-                                if key in dict_cat_simapro:
-                                    exc_cat = dict_cat_simapro.get(key)["category"]
-                                else:
-                                    exc_cat = "material"
-
-                                if exc_cat == "waste treatment":
-                                    name = f"{e['product']} {{{e.get('location', 'GLO')}}}| {e['name']} | {dataset_suffix}"
-                                    name = clean_csv_field(name)
-
-                                    writer.writerow(
-                                        [
-                                            name,
-                                            simapro_units.get(e["unit"], e["unit"]),
-                                            f"{e['amount'] * -1:.3E}",
-                                            "undefined",
-                                            0,
-                                            0,
-                                            0,
-                                            f"{clean_csv_field(e.get('comment'))} | ID = {uuids[(e['name'], e['product'], e['location'])]}",
-                                        ]
-                                    )
-                                    e["used"] = True
-
-                    writer.writerow([])
-
-            # System description
-            writer.writerow(["System description"])
-            writer.writerow([])
-            writer.writerow(["Name"])
-            writer.writerow(["Ecoinvent v3"])
-            writer.writerow([])
-            writer.writerow(["Category"])
-            writer.writerow(["Others"])
-            writer.writerow([])
-            writer.writerow(["Description"])
-            writer.writerow([""])
-            writer.writerow([])
-            writer.writerow(["Cut-off rules"])
-            writer.writerow([""])
-            writer.writerow([])
-            writer.writerow(["Energy model"])
-            writer.writerow([])
-            writer.writerow([])
-            writer.writerow(["Transport model"])
-            writer.writerow([])
-            writer.writerow([])
-            writer.writerow(["Allocation rules"])
-            writer.writerow([])
-            writer.writerow(["End"])
-            writer.writerow([])
-
-        csvFile.close()
-
-        # check that all exchanges have been used
-        unused_exchanges = []
-        for ds in self.db:
-            for e in ds["exchanges"]:
-                if "used" not in e:
-                    if [
-                        e["name"][:40],
-                        e.get("product", "")[:40],
-                        e.get("categories"),
-                        e.get("location"),
-                    ] not in unused_exchanges:
-                        unused_exchanges.append(
-                            [
-                                e["name"][:40],
-                                e.get("product", "")[:40],
-                                e.get("categories"),
-                                e.get("location"),
-                            ]
-                        )
+            stream.write(_render_csv_rows(SIMAPRO_SYSTEM_DESCRIPTION))
 
         if len(unused_exchanges) > 0:
             print("The following exchanges have not been used in the Simapro export:")
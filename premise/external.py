@@ -8,7 +8,7 @@ import uuid
 from collections import defaultdict
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, List, Union
 from pprint import pprint
 
 import numpy as np
@@ -21,6 +21,7 @@ from wurst import searching as ws
 
 from .activity_maps import InventorySet
 from .clean_datasets import get_biosphere_flow_uuid
+from .compact import rescale_exchange
 from .data_collection import IAMDataCollection
 from .external_data_validation import check_inventories, find_iam_efficiency_change
 from .filesystem_constants import DATA_DIR
@@ -29,6 +30,7 @@ from .inventory_imports import (
     get_biosphere_code,
     get_correspondence_bio_flows,
 )
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     find_fuel_efficiency,
@@ -72,6 +74,80 @@ def _interpolate_year_with_bounds(data: xr.DataArray, year: int) -> xr.DataArray
     return data.interp(year=year)
 
 
+def compile_exchange_filter(replace: dict) -> Callable[[dict], bool]:
+    """
+    Compile a `replaces` entry of an external scenario configuration into
+    a single predicate on exchanges, equivalent to the chain of `wurst`
+    filters on the fields given ("location" is always matched exactly).
+
+    :param replace: dictionary with `name`, `product`, `location`, `unit`
+        and optionally `operator` ("equals" or "contains")
+    :return: function returning True for the exchanges to replace
+    """
+    operator = replace.get("operator", "equals")
+    checks = [
+        (field, replace[field], field == "location" or operator == "equals")
+        for field in ["name", "product", "location", "unit"]
+        if field in replace
+    ]
+
+    def exchange_filter(exc: dict) -> bool:
+        for field, value, exact in checks:
+            if exact:
+                if not exc.get(field) == value:
+                    return False
+            elif value not in exc.get(field):
+                return False
+        return True
+
+    return exchange_filter
+
+
+def compile_exchange_filters(replaces: list) -> Callable[[dict], list]:
+    """
+    Compile the `replaces` entries of an external scenario configuration
+    into one function selecting, in a single pass over the technosphere
+    exchanges of a dataset, the exchanges matched by any entry. Entries
+    matching names exactly are indexed by name, so each exchange is only
+    checked against the entries that can match it. Exchanges are returned
+    grouped by entry, in the order of `replaces`, as when the entries are
+    applied one after the other.
+
+    :param replaces: list of dictionaries with `name`, `product`, `location`,
+        `unit` and optionally `operator` ("equals" or "contains")
+    :return: function returning the exchanges of a dataset to replace
+    """
+    by_name = defaultdict(list)
+    others = []
+    for i, replace in enumerate(replaces):
+        entry = (i, replace, compile_exchange_filter(replace))
+        if "name" in replace and replace.get("operator", "equals") == "equals":
+            by_name[replace["name"]].append(entry)
+        else:
+            others.append(entry)
+
+    def select(dataset: dict) -> list:
+        matches = [[] for _ in replaces]
+        for exc in dataset["exchanges"]:
+            if exc["type"] != "technosphere":
+                continue
+            for i, replace, exchange_filter in (
+                *by_name.get(exc.get("name"), ()),
+                *others,
+            ):
+                try:
+                    if exchange_filter(exc):
+                        matches[i].append(exc)
+                except TypeError as err:
+                    raise ValueError(
+                        f"Cannot find exchanges for dataset {dataset['name']} "
+                        f"with filters {replace}."
+                    ) from err
+        return [exc for group in matches for exc in group]
+
+    return select
+
+
 def _update_external_scenarios(
     scenario: dict,
     version: str,
@@ -343,14 +419,14 @@ def adjust_efficiency(dataset: dict, fuels_specs: dict, fuel_map_reverse: dict)
                                 dataset,
                                 *filters,
                             ):
-                                wurst.rescale_exchange(
+                                rescale_exchange(
                                     exc, scaling_factor, remove_uncertainty=False
                                 )
                         else:
                             for exc in ws.technosphere(
                                 dataset,
                             ):
-                                wurst.rescale_exchange(
+                                rescale_exchange(
                                     exc, scaling_factor, remove_uncertainty=False
                                 )
                     else:
@@ -365,14 +441,14 @@ def adjust_efficiency(dataset: dict, fuels_specs: dict, fuel_map_reverse: dict)
                                 dataset,
                                 *filters,
                             ):
-                                wurst.rescale_exchange(
+                                rescale_exchange(
                                     exc, scaling_factor, remove_uncertainty=False
                                 )
                         else:
                             for exc in ws.biosphere(
                                 dataset,
                             ):
-                                wurst.rescale_exchange(
+                                rescale_exchange(
                                     exc, scaling_factor, remove_uncertainty=False
                                 )
     return dataset
@@ -481,6 +557,7 @@ class ExternalScenario(BaseTransformation):
 
         self.dict_bio_flows = get_biosphere_flow_uuid(self.version)
         self.outdated_flows = get_correspondence_bio_flows()
+        self.production_volumes_at_year = {}
 
     def regionalize_inventories(self, ds_names, regions, data: dict) -> None:
         """
@@ -650,77 +727,24 @@ class ExternalScenario(BaseTransformation):
         )
         new_excs = []
 
-        if (
-            self.year
-            in self.external_scenarios_data[i]["production volume"]
-            .coords["year"]
-            .values
-        ):
-            word_production_volume = (
-                self.external_scenarios_data[i]["production volume"]
-                .sel(
-                    variables=pathways,
-                    region=[r for r in regions if r != "World"],
-                    year=self.year,
-                )
-                .sum(dim=["variables", "region"])
-                .values.item(0)
-            )
-        else:
-            word_production_volume = (
-                self.external_scenarios_data[i]["production volume"]
-                .sel(variables=pathways, region=[r for r in regions if r != "World"])
-                .sum(dim=["variables", "region"])
-                .interp(year=self.year)
-                .values.item(0)
-            )
+        word_production_volume = self.get_world_production_volume(i, pathways, regions)
 
         # update production volume field in the world market
         for e in ws.production(world_market):
             e["production volume"] = word_production_volume
 
         # fetch the supply share for each regional market
+        regional_production_volumes = self.get_market_production_volumes(
+            i, pathways, regions, bounded=False
+        )
+
         for region in regions:
-            if (
-                self.year
-                in self.external_scenarios_data[i]["production volume"]
-                .coords["year"]
-                .values
-            ):
-                supply_share = np.clip(
-                    (
-                        self.external_scenarios_data[i]["production volume"]
-                        .sel(region=region, variables=pathways, year=self.year)
-                        .sum(dim="variables")
-                        / self.external_scenarios_data[i]["production volume"]
-                        .sel(
-                            variables=pathways,
-                            region=[r for r in regions if r != "World"],
-                            year=self.year,
-                        )
-                        .sum(dim=["variables", "region"])
-                    ).values.item(0),
-                    0,
-                    1,
-                )
-            else:
-                supply_share = np.clip(
-                    (
-                        self.external_scenarios_data[i]["production volume"]
-                        .sel(region=region, variables=pathways)
-                        .sum(dim="variables")
-                        .interp(year=self.year)
-                        / self.external_scenarios_data[i]["production volume"]
-                        .sel(
-                            variables=pathways,
-                            region=[r for r in regions if r != "World"],
-                        )
-                        .sum(dim=["variables", "region"])
-                        .interp(year=self.year)
-                    ).values.item(0),
-                    0,
-                    1,
-                )
+            supply_share = np.clip(
+                regional_production_volumes[region]
+                / np.float64(word_production_volume),
+                0,
+                1,
+            )
 
             if supply_share == 0:
                 continue
@@ -842,6 +866,48 @@ class ExternalScenario(BaseTransformation):
                                 for ds in suppliers:
                                     ds["custom scenario dataset"] = True
 
+    def get_production_volumes_at_year(self, i: int) -> tuple:
+        """
+        Production volumes of an external scenario at the scenario year
+        (or at the closest year provided), for all regions and variables.
+        They are extracted once per external scenario, instead of being
+        selected and interpolated for each market, region and supplier.
+
+        :param i: index of the scenario
+        :return: production volumes (region x variables), with the
+            positions of regions and variables
+        """
+
+        if i not in self.production_volumes_at_year:
+            production_volume = self.external_scenarios_data[i][
+                "production volume"
+            ].transpose("region", "variables", "year")
+            years = production_volume.coords["year"].values
+            year = min(max(self.year, years.min()), years.max())
+
+            self.production_volumes_at_year[i] = (
+                np.array(
+                    [
+                        [np.interp(year, years, series) for series in region]
+                        for region in production_volume.values
+                    ]
+                ).reshape(production_volume.shape[:2]),
+                {
+                    region: position
+                    for position, region in enumerate(
+                        production_volume.coords["region"].values.tolist()
+                    )
+                },
+                {
+                    variable: position
+                    for position, variable in enumerate(
+                        production_volume.coords["variables"].values.tolist()
+                    )
+                },
+            )
+
+        return self.production_volumes_at_year[i]
+
     def fetch_supply_share(
         self, i: int, region: str, var: str, variables: list
     ) -> np.ndarray:
@@ -854,94 +920,81 @@ class ExternalScenario(BaseTransformation):
         :return: np.ndarray
         """
 
-        if self.year < min(
-            self.external_scenarios_data[i]["production volume"].coords["year"].values
-        ):
-            return np.clip(
-                (
-                    self.external_scenarios_data[i]["production volume"]
-                    .sel(
-                        region=region,
-                        variables=var,
-                    )
-                    .interp(
-                        year=min(
-                            self.external_scenarios_data[i]["production volume"]
-                            .coords["year"]
-                            .values
-                        )
-                    )
-                    / self.external_scenarios_data[i]["production volume"]
-                    .sel(
-                        region=region,
-                        variables=variables,
-                    )
-                    .interp(
-                        year=min(
-                            self.external_scenarios_data[i]["production volume"]
-                            .coords["year"]
-                            .values
-                        )
+        volumes, regions, variables_index = self.get_production_volumes_at_year(i)
+        region_index = regions[region]
+        total = np.nansum(
+            volumes[region_index, [variables_index[v] for v in variables]]
+        )
+
+        return np.clip(volumes[region_index, variables_index[var]] / total, 0, 1)
+
+    def get_world_production_volume(
+        self, i: int, variables: list, regions: list
+    ) -> float:
+        """
+        Return the production volume of a world market, i.e., the sum of the
+        production volumes of its variables over all regions but "World".
+        :param i: index of the scenario
+        :param variables: variables supplying the market
+        :param regions: regions of the market
+        :return: production volume
+        """
+
+        volumes, regions_index, variables_index = self.get_production_volumes_at_year(i)
+
+        return float(
+            np.nansum(
+                volumes[
+                    np.ix_(
+                        [regions_index[r] for r in regions if r != "World"],
+                        [variables_index[v] for v in variables],
                     )
-                    .sum(dim="variables")
-                ).values.item(0),
-                0,
-                1,
+                ]
             )
-        elif self.year > max(
-            self.external_scenarios_data[i]["production volume"].coords["year"].values
-        ):
-            return np.clip(
-                (
-                    self.external_scenarios_data[i]["production volume"]
-                    .sel(
-                        region=region,
-                        variables=var,
-                    )
-                    .interp(
-                        year=max(
-                            self.external_scenarios_data[i]["production volume"]
-                            .coords["year"]
-                            .values
-                        )
-                    )
-                    / self.external_scenarios_data[i]["production volume"]
-                    .sel(
-                        region=region,
-                        variables=variables,
-                    )
-                    .interp(
-                        year=max(
-                            self.external_scenarios_data[i]["production volume"]
-                            .coords["year"]
-                            .values
-                        )
+        )
+
+    def get_market_production_volumes(
+        self, i: int, variables: list, regions: list, bounded: bool = True
+    ) -> dict:
+        """
+        Return the production volume of a market, i.e., the sum of the
+        production volumes of its variables, in each region.
+        :param i: index of the scenario
+        :param variables: variables supplying the market
+        :param regions: regions of the market
+        :param bounded: whether the closest year is used for a year
+            outside the years provided (NaN otherwise)
+        :return: dictionary with regions as keys
+        """
+
+        production_volume = self.external_scenarios_data[i]["production volume"]
+        years = production_volume.coords["year"].values
+        year = min(max(self.year, years.min()), years.max()) if bounded else self.year
+
+        volumes = {}
+        for region in regions:
+            if self.year in years:
+                volumes[region] = (
+                    production_volume.sel(
+                        variables=variables, region=region, year=self.year
                     )
                     .sum(dim="variables")
-                ).values.item(0),
-                0,
-                1,
-            )
-        else:
-            return np.clip(
-                (
-                    self.external_scenarios_data[i]["production volume"]
-                    .sel(
-                        region=region,
-                        variables=var,
-                    )
-                    .interp(year=self.year)
-                    / self.external_scenarios_data[i]["production volume"]
-                    .sel(
-                        region=region,
-                        variables=variables,
+                    .values.item(0)
+                )
+            else:
+                volumes[region] = float(
+                    np.interp(
+                        year,
+                        years,
+                        production_volume.sel(variables=variables, region=region)
+                        .sum(dim="variables")
+                        .values,
+                        left=np.nan,
+                        right=np.nan,
                     )
-                    .interp(year=self.year)
-                    .sum(dim="variables")
-                ).values.item(0),
-                0,
-                1,
-            )
+                )
+
+        return volumes
 
     def fetch_potential_suppliers(
         self, possible_locations: list, name: str, ref_prod: str
@@ -954,26 +1007,24 @@ class ExternalScenario(BaseTransformation):
         :return: list of potential suppliers
         """
 
-        act, counter = [], 0
+        # a single pass over the database,
+        # then the candidates are searched by location
+        candidates = [
+            a
+            for a in self.database
+            if a["name"].lower() == name.lower()
+            and a["reference product"].lower() == ref_prod.lower()
+        ]
 
+        act = []
         for loc in possible_locations:
-            if not act:
-                act = [
-                    a
-                    for a in self.database
-                    if a["name"].lower() == name.lower()
-                    and a["reference product"].lower() == ref_prod.lower()
-                    and a["location"] == loc
-                ]
+            act = [a for a in candidates if a["location"] == loc]
+            if act:
+                break
 
         if not act:
 
-            act = [
-                a
-                for a in self.database
-                if a["name"].lower() == name.lower()
-                and a["reference product"].lower() == ref_prod.lower()
-            ]
+            act = candidates
 
             if act:
                 # create a copy of the dataset
@@ -1111,9 +1162,7 @@ class ExternalScenario(BaseTransformation):
                             fltr.append(wurst.contains(k, v))
 
                     for exc in ws.technosphere(datatset, *(fltr or [])):
-                        wurst.rescale_exchange(
-                            exc, scaling_factor, remove_uncertainty=False
-                        )
+                        rescale_exchange(exc, scaling_factor, remove_uncertainty=False)
 
                 if "biosphere" in ineff["includes"]:
                     fltr = []
@@ -1122,9 +1171,7 @@ class ExternalScenario(BaseTransformation):
                             fltr.append(wurst.contains(k, v))
 
                     for exc in ws.biosphere(datatset, *(fltr or [])):
-                        wurst.rescale_exchange(
-                            exc, scaling_factor, remove_uncertainty=False
-                        )
+                        rescale_exchange(exc, scaling_factor, remove_uncertainty=False)
         return datatset
 
     def get_region_for_non_null_production_volume(self, i, variables):
@@ -1144,6 +1191,7 @@ class ExternalScenario(BaseTransformation):
             for x in nz
         ]
 
+    @profiled
     def create_markets(self) -> None:
         """
         Create new markets, and create a `World` market
@@ -1184,6 +1232,10 @@ class ExternalScenario(BaseTransformation):
                     if "World" in regions and len(regions) > 1:
                         regions.remove("World")
 
+                    market_production_volumes = self.get_market_production_volumes(
+                        i, pathways, regions
+                    )
+
                     # Loop through regions
                     for region in regions:
                         # Create market dictionary
@@ -1191,71 +1243,7 @@ class ExternalScenario(BaseTransformation):
                             market=market_vars, region=region, waste_market=waste_market
                         )
 
-                        if (
-                            self.year
-                            in self.external_scenarios_data[i]["production volume"]
-                            .coords["year"]
-                            .values
-                        ):
-                            production_volume = (
-                                self.external_scenarios_data[i]["production volume"]
-                                .sel(
-                                    variables=pathways,
-                                    region=region,
-                                    year=self.year,
-                                )
-                                .sum(dim="variables")
-                                .values.item(0)
-                            )
-                        else:
-                            if self.year < min(
-                                self.external_scenarios_data[i]["production volume"]
-                                .coords["year"]
-                                .values
-                            ):
-                                production_volume = (
-                                    self.external_scenarios_data[i]["production volume"]
-                                    .sel(variables=pathways, region=region)
-                                    .sum(dim="variables")
-                                    .interp(
-                                        year=min(
-                                            self.external_scenarios_data[i][
-                                                "production volume"
-                                            ]
-                                            .coords["year"]
-                                            .values
-                                        )
-                                    )
-                                    .values.item(0)
-                                )
-                            elif self.year > max(
-                                self.external_scenarios_data[i]["production volume"]
-                                .coords["year"]
-                                .values
-                            ):
-                                production_volume = (
-                                    self.external_scenarios_data[i]["production volume"]
-                                    .sel(variables=pathways, region=region)
-                                    .sum(dim="variables")
-                                    .interp(
-                                        year=max(
-                                            self.external_scenarios_data[i][
-                                                "production volume"
-                                            ]
-                                            .coords["year"]
-                                            .values
-                                        )
-                                    )
-                                    .values.item(0)
-                                )
-                            else:
-                                production_volume = (
-                                    self.external_scenarios_data[i]["production volume"]
-                                    .sel(variables=pathways, region=region)
-                                    .sum(dim="variables")
-                                    .interp(year=self.year)
-                                    .values.item(0)
-                                )
+                        production_volume = market_production_volumes[region]
 
                         # Update production volume of the market
                         for e in ws.production(new_market):
@@ -1538,49 +1526,27 @@ class ExternalScenario(BaseTransformation):
 
         # also filter out datasets that
         # have the same name and ref product
-        # as new_name and new_ref
+        # as new_name and new_ref, or that are replaced
+        excluded_datasets = {(x["name"], x["product"]) for x in replaces}
+        excluded_datasets.add((new_name, new_ref))
         datasets = [
             d
             for d in datasets
-            if not (d["name"] == new_name and d["reference product"] == new_ref)
+            if (d["name"], d["reference product"]) not in excluded_datasets
         ]
 
-        datasets = [
-            d
-            for d in datasets
-            if (d["name"], d["reference product"])
-            not in [(x["name"], x["product"]) for x in replaces]
-        ]
-
-        list_fltr = []
-        for k in replaces:
-            fltr = []
-            operator = k.get("operator", "equals")
-            for field in ["name", "product", "location", "unit"]:
-                if field in k:
-                    if field == "location":
-                        fltr.append(ws.equals(field, k[field]))
-                    else:
-                        if operator == "equals":
-                            fltr.append(ws.equals(field, k[field]))
-                        else:
-                            fltr.append(ws.contains(field, k[field]))
-            list_fltr.append(fltr)
+        select_exchanges = compile_exchange_filters(replaces)
 
         for dataset in datasets:
-            filtered_exchanges = []
-            for fltr in list_fltr:
-                try:
-                    filtered_exchanges.extend(list(ws.technosphere(dataset, *fltr)))
-                except TypeError as err:
-                    raise ValueError(
-                        f"Cannot find exchanges for dataset {dataset['name']} "
-                        f"with filters {fltr}."
-                    ) from err
+            filtered_exchanges = select_exchanges(dataset)
+
+            if not filtered_exchanges:
+                continue
 
             # remove filtered exchanges from the dataset
+            filtered_ids = {id(exc) for exc in filtered_exchanges}
             dataset["exchanges"] = [
-                exc for exc in dataset["exchanges"] if exc not in filtered_exchanges
+                exc for exc in dataset["exchanges"] if id(exc) not in filtered_ids
             ]
 
             new_exchanges = []
@@ -48,5 +48,11 @@ DIR_CACHED_DB.mkdir(parents=True, exist_ok=True)
 DIR_CACHED_FILES = USER_DATA_BASE_DIR / "cached_files"
 DIR_CACHED_FILES.mkdir(parents=True, exist_ok=True)
 
+DIR_CACHED_RESULTS = USER_DATA_BASE_DIR / "cached_results"
+DIR_CACHED_RESULTS.mkdir(parents=True, exist_ok=True)
+
+DIR_CHECKPOINTS = USER_DATA_BASE_DIR / "checkpoints"
+DIR_CHECKPOINTS.mkdir(parents=True, exist_ok=True)
+
 USER_LOGS_DIR = platformdirs.user_log_path(appname="premise", appauthor="pylca")
 USER_LOGS_DIR.mkdir(parents=True, exist_ok=True)
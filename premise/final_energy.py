@@ -6,6 +6,7 @@ datasets based on IAM output data.
 from typing import List
 
 from .data_collection import IAMDataCollection
+from .profiling import profiled
 from .transformation import BaseTransformation, InventorySet
 
 
@@ -80,6 +81,7 @@ class FinalEnergy(BaseTransformation):
         mapping = InventorySet(database=database, version=version, model=model)
         self.final_energy_map = mapping.generate_final_energy_map()
 
+    @profiled
     def regionalize_heating_datasets(self):
 
         self.process_and_add_activities(
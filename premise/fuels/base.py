@@ -10,7 +10,7 @@ from .config import FUEL_GROUPS
 from ..transformation import (
     BaseTransformation,
 )
-from ..validation import FuelsValidation
+from ..validation import FuelsValidation, get_validation_context
 from ..activity_maps import InventorySet
 from ..inventory_imports import get_biosphere_code
 from ..logger import create_logger
@@ -63,6 +63,7 @@ def _update_fuels(scenario, version, system_model):
         regions=scenario["iam data"].regions,
         database=fuels.database,
         iam_data=scenario["iam data"],
+        context=get_validation_context(scenario, version),
     )
 
     validate.run_fuel_checks()
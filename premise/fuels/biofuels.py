@@ -201,18 +201,9 @@ class BiofuelsMixin:
                     lower_heating_value = dataset.get("LHV [MJ/kg dry]", 0)
 
                 # Ha/GJ
-                if self.year in self.iam_data.land_use.coords["year"].values:
-                    land_use = self.iam_data.land_use.sel(
-                        region=dataset["location"], variables=crop_type, year=self.year
-                    ).values
-                else:
-                    land_use = (
-                        self.iam_data.land_use.sel(
-                            region=dataset["location"], variables=crop_type
-                        )
-                        .interp(year=self.year)
-                        .values
-                    )
+                land_use = self.get_iam_value(
+                    self.iam_data.land_use, dataset["location"], crop_type
+                )
 
                 # replace NA values with 0
                 if np.isnan(land_use):
@@ -271,18 +262,9 @@ class BiofuelsMixin:
         # those are given in kg CO2-eq./GJ of primary crop energy
 
         # kg CO2/GJ
-        if self.year in self.iam_data.land_use_change.coords["year"].values:
-            land_use_co2 = self.iam_data.land_use_change.sel(
-                region=dataset["location"], variables=crop_type, year=self.year
-            ).values
-        else:
-            land_use_co2 = (
-                self.iam_data.land_use_change.sel(
-                    region=dataset["location"], variables=crop_type
-                )
-                .interp(year=self.year)
-                .values
-            )
+        land_use_co2 = self.get_iam_value(
+            self.iam_data.land_use_change, dataset["location"], crop_type
+        )
 
         # replace NA values with 0
         if np.isnan(land_use_co2):
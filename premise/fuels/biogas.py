@@ -1,11 +1,13 @@
 from .utils import fetch_mapping
 from .config import METHANE_SOURCES
+from ..profiling import profiled
 from ..transformation import ws
 
 from collections import defaultdict
 
 
 class BiogasMixin:
+    @profiled
     def generate_biogas_activities(self):
         """
         Generate region-specific biogas datasets from methane source mappings.
@@ -5,12 +5,14 @@ from .utils import (
     adjust_electrolysis_electricity_requirement,
 )
 from .config import HYDROGEN_SOURCES
+from ..profiling import profiled
 from ..transformation import ws, uuid, np
 
 hydrogen_parameters = fetch_mapping(HYDROGEN_SOURCES)
 
 
 class HydrogenMixin:
+    @profiled
     def generate_hydrogen_activities(self):
 
         self._regionalize_hydrogen_activities()
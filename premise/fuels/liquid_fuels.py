@@ -1,5 +1,6 @@
 from collections import defaultdict
 
+from ..profiling import profiled
 from ..transformation import ws
 from .config import (
     LIQUID_FUEL_SOURCES,
@@ -184,6 +185,7 @@ class SyntheticFuelsMixin:
 
             self.fuel_map[variable] = filtered
 
+    @profiled
     def generate_synthetic_fuel_activities(self):
         """
         Generate region-specific synthetic fuel datasets.
@@ -36,6 +36,8 @@ class Geomap:
         self.ei312_geographies = self.fetch_topology("ei312")
 
         self.setup_geography()
+        # GIS matches of the transformations, by regions and search arguments
+        self.gis_matches: Dict[tuple, list] = {}
 
     @staticmethod
     def load_constants() -> Dict[str, Any]:
@@ -99,7 +101,7 @@ class Geomap:
             if isinstance(x, tuple) and x[0] == self.model.upper()
         ]
 
-    @lru_cache
+    @lru_cache(maxsize=None)
     def iam_to_ecoinvent_location(
         self, location: str, contained: bool = True
     ) -> List[str]:
@@ -145,7 +147,7 @@ class Geomap:
 
         return ecoinvent_locations
 
-    @lru_cache
+    @lru_cache(maxsize=None)
     def ecoinvent_to_iam_location(self, location: str) -> str:
         """
         Return an IAM region name for an ecoinvent location given.
@@ -224,3 +226,16 @@ class Geomap:
             f"Multiple IAM regions found for '{location}': {iam_locations}. "
             f"None matches the preferred order: {preferred_order}."
         )
+
+
+@lru_cache
+def get_geomap(model: str) -> Geomap:
+    """
+    Return the Geomap of an IAM model. The instance is shared, so that
+    location lookups made for one scenario year are reused by the other
+    years and sectors of the same model.
+
+    :param model: IAM model (e.g., "remind", "image")
+    :return: Geomap instance
+    """
+    return Geomap(model=model)
@@ -13,15 +13,17 @@ from .heat_data import load_heat_mapping
 from .inventory_imports import get_biosphere_code
 from .logger import create_logger
 from .marginal_mixes import consequential_method
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
     List,
     find_fuel_efficiency,
+    get_parameter_table,
     get_shares_from_production_volume,
     ws,
 )
-from .validation import HeatValidation
+from .validation import HeatValidation, get_validation_context
 
 logger = create_logger("heat")
 
@@ -158,6 +160,7 @@ def _update_heat(scenario, version, system_model):
         regions=scenario["iam data"].regions,
         database=heat.database,
         iam_data=scenario["iam data"],
+        context=get_validation_context(scenario, version),
     )
 
     validate.run_heat_checks()
@@ -262,6 +265,7 @@ class Heat(BaseTransformation):
 
         return reverse
 
+    @profiled
     def fetch_fuel_market_co2_emissions(self):
         """
         Fetch CO2 emissions from fuel markets.
@@ -314,6 +318,7 @@ class Heat(BaseTransformation):
 
         self.carbon_intensity_markets.update(new_keys)
 
+    @profiled
     def regionalize_activities(self):
 
         production_volumes_vars = [
@@ -337,6 +342,7 @@ class Heat(BaseTransformation):
         )
         self.heat_techs = self.mapping.generate_heat_map(model=self.model)
 
+    @profiled
     def adjust_carbon_dioxide_emissions(self):
         """
         Regionalize heat production.
@@ -460,12 +466,6 @@ class Heat(BaseTransformation):
     def _has_positive_values(array: xr.DataArray | None) -> bool:
         return array is not None and bool((array.fillna(0) > 0).any())
 
-    @staticmethod
-    def _select_year(array: xr.DataArray, year: int) -> xr.DataArray:
-        if year in array.coords["year"]:
-            return array.sel(year=year)
-        return array.interp(year=year)
-
     def _select_suppliers(self, technology: str, region: str) -> tuple[list, str]:
         activities = self.heat_techs.get(technology, [])
         suppliers = [ds for ds in activities if ds["location"] == region]
@@ -692,22 +692,18 @@ class Heat(BaseTransformation):
     def _record_volume_diagnostics(
         self, raw: xr.DataArray, delivered: xr.DataArray, layer: str
     ) -> None:
-        raw_year = self._select_year(raw, self.year)
-        delivered_year = self._select_year(delivered, self.year)
-        raw_totals = raw_year.sum(dim="variables")
-        totals = delivered_year.sum(dim="variables")
+        raw_year = get_parameter_table(raw, self.year)
+        delivered_year = get_parameter_table(delivered, self.year)
+        raw_totals = raw_year.region_totals()
+        totals = delivered_year.region_totals()
         records = []
         residual = delivered.attrs.get("residual", raw.attrs.get("residual", {}))
         for technology in raw.coords["variables"].values.tolist():
             for region in [region for region in self.regions if region != "World"]:
-                raw_value = float(
-                    raw_year.sel(variables=technology, region=region).values
-                )
-                delivered_value = float(
-                    delivered_year.sel(variables=technology, region=region).values
-                )
-                total = float(totals.sel(region=region).values)
-                raw_total = float(raw_totals.sel(region=region).values)
+                raw_value = raw_year.get(region, technology)
+                delivered_value = delivered_year.get(region, technology)
+                total = totals[region]
+                raw_total = raw_totals[region]
                 records.append(
                     {
                         "technology": technology,
@@ -806,6 +802,7 @@ class Heat(BaseTransformation):
             if dataset.get("code") not in before
         )
 
+    @profiled
     def create_layered_heat_markets(self) -> None:
         secondary = self.iam_data.secondary_heat_supply
         if secondary is None and (
@@ -889,6 +886,7 @@ class Heat(BaseTransformation):
                 exchange["location"] = target_location
                 exchange.pop("input", None)
 
+    @profiled
     def assert_no_heat_cycles(self) -> None:
         """Reject direct or indirect links among generated heat datasets."""
 
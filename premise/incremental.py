@@ -1,4 +1,7 @@
+import hashlib
+import uuid
 from datetime import datetime
+from pathlib import Path
 
 from .new_database import (
     NewDatabase,
@@ -14,7 +17,9 @@ from .new_database import (
     _update_vehicles,
     _update_external_scenarios,
 )
-from .utils import dump_database, load_database
+from .filesystem_constants import DIR_CACHED_FILES
+from .utils import dump_database
+from .validation import _dataset_key
 from copy import copy
 from tqdm import tqdm
 
@@ -32,6 +37,66 @@ SECTORS = {
 }
 
 
+def _identities(database: list) -> list:
+    """
+    Return the identity of each dataset of a database: its name,
+    reference product and location, along with the number of datasets
+    sharing them found before it.
+    """
+    seen, identities = {}, []
+    for dataset in database:
+        key = _dataset_key(dataset)
+        identities.append((*key, seen.get(key, 0)))
+        seen[key] = seen.get(key, 0) + 1
+
+    return identities
+
+
+def _fingerprint_dataset(dataset: dict) -> tuple:
+    """
+    Return the digest of a dataset, along with its pickled payload.
+    Any change to the dataset, or to one of its exchanges, changes its digest.
+    """
+    payload = pickle.dumps(dataset, -1)
+    return hashlib.sha1(payload).digest(), payload
+
+
+def _fingerprint_datasets(database: list) -> dict:
+    """
+    Return the digest of each dataset, by identity.
+    """
+    return {
+        identity: _fingerprint_dataset(dataset)[0]
+        for identity, dataset in zip(_identities(database), database)
+    }
+
+
+def write_increment_delta(database: list, fingerprints: dict) -> Path:
+    """
+    Persist the delta of an increment: the identities of its datasets, in
+    order, and the payload of the datasets which were created or changed
+    since the previous increment (or the original database).
+
+    :param database: database of the increment
+    :param fingerprints: digests of the datasets at the previous increment, updated in place
+    :return: filepath of the delta
+    """
+
+    order, datasets = _identities(database), {}
+    for identity, dataset in zip(order, database):
+        digest, payload = _fingerprint_dataset(dataset)
+        if fingerprints.get(identity) != digest:
+            datasets[identity] = payload
+            fingerprints[identity] = digest
+
+    DIR_CACHED_FILES.mkdir(parents=True, exist_ok=True)
+    filepath = DIR_CACHED_FILES / f"{uuid.uuid4().hex} (delta).pickle"
+    with open(filepath, "wb") as file:
+        pickle.dump({"order": order, "datasets": datasets}, file, -1)
+
+    return filepath
+
+
 class IncrementalDatabase(NewDatabase):
     """
     Class for creating an incremental database. Incremental databases allow measuring the
@@ -126,24 +191,22 @@ class IncrementalDatabase(NewDatabase):
         self.scenarios = new_scenarios
 
         with tqdm(total=len(self.scenarios), ncols=70) as pbar_outer:
-            database_filepath, scenario_id = None, None
+            # the running database of a scenario is kept in memory from one
+            # increment to the next; only the delta of each increment is stored
+            original_fingerprints, database, fingerprints, chain = None, None, None, []
+            scenario_id = None
             for s, scenario in enumerate(self.scenarios):
 
-                if s == 0:
-                    scenario["database"] = pickle.loads(pickle.dumps(self.database, -1))
-                else:
-                    if (
-                        f"{scenario['model']} - {scenario['pathway'].split('...')[0]} - {scenario['year']}"
-                        == scenario_id
-                    ):
-                        scenario["database filepath"] = database_filepath
-                        scenario = load_database(
-                            scenario, delete=False, original_database=self.database
-                        )
-                    else:
-                        scenario["database"] = pickle.loads(
-                            pickle.dumps(self.database, -1)
-                        )
+                if (
+                    f"{scenario['model']} - {scenario['pathway'].split('...')[0]} - {scenario['year']}"
+                    != scenario_id
+                ):
+                    if original_fingerprints is None:
+                        original_fingerprints = _fingerprint_datasets(self.database)
+                    database = pickle.loads(pickle.dumps(self.database, -1))
+                    fingerprints, chain = dict(original_fingerprints), []
+
+                scenario["database"] = database
 
                 updates = updates_to_apply[s][-1]
 
@@ -156,9 +219,9 @@ class IncrementalDatabase(NewDatabase):
                     fixed_args = sector_update_methods[update]["args"]
                     scenario = update_func(scenario, *fixed_args)
 
-                dump_database(scenario)
-                if "database filepath" in scenario:
-                    database_filepath = scenario["database filepath"]
+                database = scenario.pop("database")
+                chain = chain + [write_increment_delta(database, fingerprints)]
+                scenario["database delta chain"] = chain
 
                 scenario_id = f"{scenario['model']} - {scenario['pathway'].split('...')[0]} - {scenario['year']}"
 
@@ -166,6 +229,106 @@ class IncrementalDatabase(NewDatabase):
 
         print("Done!\n")
 
+    def _load_increments(self, original_database: list = None):
+        """
+        Rebuild the database of each increment from the original database
+        and the chain of deltas leading to it, one increment at a time.
+        Increments are yielded once their database is loaded.
+
+        :param original_database: original database, loaded if not given
+        """
+
+        if original_database is None:
+            original_database = self._load_original_database()
+        original_positions = {
+            identity: position
+            for position, identity in enumerate(_identities(original_database))
+        }
+        chain, orders, payloads = [], {}, {}
+
+        for scenario in self.scenarios:
+            if (
+                scenario.get("database") is not None
+                or "database delta chain" not in scenario
+            ):
+                continue
+
+            deltas = scenario["database delta chain"]
+            if deltas[: len(chain)] != chain:
+                chain, orders, payloads = [], {}, {}
+
+            for filepath in deltas[len(chain) :]:
+                with open(filepath, "rb") as file:
+                    delta = pickle.load(file)
+                orders[filepath] = delta["order"]
+                # later deltas hold the latest version of a dataset
+                payloads.update(delta["datasets"])
+                chain.append(filepath)
+
+            scenario["database"] = [
+                (
+                    pickle.loads(payloads[identity])
+                    if identity in payloads
+                    else pickle.loads(
+                        pickle.dumps(
+                            original_database[original_positions[identity]], -1
+                        )
+                    )
+                )
+                for identity in orders[deltas[-1]]
+            ]
+
+            yield scenario
+
+    def _dump_increments(self) -> None:
+        """
+        Store the database of each increment in the scenario cache,
+        for the exports handling scenarios one at a time.
+        """
+
+        deltas = set()
+        for scenario in self._load_increments():
+            dump_database(scenario)
+            deltas.update(scenario.pop("database delta chain"))
+
+        for filepath in deltas:
+            Path(filepath).unlink(missing_ok=True)
+
+    def _iter_loaded_scenarios(self, original_database: list):
+        """
+        Rebuild the database of each increment, one at a time, for the
+        superstructure builder, and release it once the builder moves
+        on to the next increment.
+        """
+
+        if not all("database delta chain" in s for s in self.scenarios):
+            yield from super()._iter_loaded_scenarios(original_database)
+            return
+
+        for scenario in self._load_increments(original_database):
+            yield scenario
+            scenario.pop("database", None)
+
+    def write_db_to_brightway(self, *args, **kwargs):
+        self._dump_increments()
+        return super().write_db_to_brightway(*args, **kwargs)
+
+    def write_db_to_matrices(self, *args, **kwargs):
+        self._dump_increments()
+        return super().write_db_to_matrices(*args, **kwargs)
+
+    def write_db_to_simapro(self, *args, **kwargs):
+        self._dump_increments()
+        return super().write_db_to_simapro(*args, **kwargs)
+
+    def write_db_to_olca(self, *args, **kwargs):
+        self._dump_increments()
+        return super().write_db_to_olca(*args, **kwargs)
+
+    def write_datapackage(self, *args, **kwargs):
+        self._dump_increments()
+        return super().write_datapackage(*args, **kwargs)
+
     def write_increment_db_to_brightway(
         self,
         name: str = f"super_db_{datetime.now().strftime('%d-%m-%Y')}",
@@ -5,7 +5,9 @@ https://chemrxiv.org/engage/chemrxiv/article-details/63ee10cdfcfb27a31fe227df
 
 """
 
+import hashlib
 import warnings
+from collections import OrderedDict
 from functools import lru_cache
 from typing import Tuple
 
@@ -21,6 +23,10 @@ IAM_LEADTIMES = DATA_DIR / "consequential" / "leadtimes.yaml"
 IAM_LIFETIMES = DATA_DIR / "consequential" / "lifetimes.yaml"
 CONSTRAINED_SUPPLIERS = DATA_DIR / "consequential" / "constrained_suppliers.yaml"
 
+# yearly-interpolated IAM series, per (sector, IAM data)
+INTERPOLATION_CACHE_SIZE = 64
+_INTERPOLATION_CACHE = OrderedDict()
+
 
 @lru_cache
 def get_lifetime(list_tech: Tuple) -> np.ndarray:
@@ -208,18 +214,20 @@ def _validate_consequential_args(args: dict) -> tuple:
     )
 
 
-def _get_time_parameters(
+def _time_windows(
     year: int,
     range_time: int,
     duration: int,
     foresight: bool,
     individual_lead_times: bool,
     lead_times: np.ndarray,
-    shares: xr.DataArray,
+    avg_lead_time,
 ) -> dict:
-    """Return supplier-specific and market-average observation intervals."""
-
-    avg_lead_time = fetch_avg_leadtime(lead_times, shares)
+    """
+    Return supplier-specific and market-average observation intervals.
+    ``avg_lead_time`` can be a scalar or an array of shape (regions, 1),
+    in which case intervals are returned for all regions at once.
+    """
 
     if range_time:
         average_centre = year if foresight else year + avg_lead_time
@@ -263,6 +271,28 @@ def _get_time_parameters(
     }
 
 
+def _get_time_parameters(
+    year: int,
+    range_time: int,
+    duration: int,
+    foresight: bool,
+    individual_lead_times: bool,
+    lead_times: np.ndarray,
+    shares: xr.DataArray,
+) -> dict:
+    """Return supplier-specific and market-average observation intervals."""
+
+    return _time_windows(
+        year=year,
+        range_time=range_time,
+        duration=duration,
+        foresight=foresight,
+        individual_lead_times=individual_lead_times,
+        lead_times=lead_times,
+        avg_lead_time=fetch_avg_leadtime(lead_times, shares),
+    )
+
+
 def _nearest_available_year(
     value, available_years: np.ndarray, parameter_name: str = "year"
 ):
@@ -282,25 +312,243 @@ def _nearest_available_year(
     return nearest.item() if requested.ndim == 0 else nearest
 
 
-def _select_technology_values(data: xr.DataArray, years) -> np.ndarray:
-    """Select or interpolate one value per technology for scalar or array years."""
+def _interpolate_yearly(data: xr.DataArray, sector: str) -> xr.DataArray:
+    """
+    Interpolate IAM data to yearly values with Akima splines.
 
-    requested = np.asarray(years, dtype=float)
-    available_years = np.asarray(data.coords["year"].values, dtype=float)
-    values = np.asarray(data.values, dtype=float)
+    The result only depends on the IAM data of the market, not on the year
+    the database is built for, so it is memoized per sector and data: the
+    marginal mixes of the other years of a scenario reuse it.
+    """
 
-    if requested.ndim == 0:
-        return np.asarray(
-            [np.interp(float(requested), available_years, row) for row in values]
-        )
-    if requested.shape != (values.shape[0],):
-        raise ValueError("Expected one observation year per technology.")
-    return np.asarray(
-        [
-            np.interp(requested_year, available_years, row)
-            for requested_year, row in zip(requested, values)
-        ]
+    data = data.transpose("region", "variables", "year")
+    digest = hashlib.sha1(np.ascontiguousarray(data.values, dtype=float).tobytes())
+    for dim in data.dims:
+        digest.update(repr(data.coords[dim].values.tolist()).encode())
+    key = (sector, digest.hexdigest())
+
+    if key in _INTERPOLATION_CACHE:
+        _INTERPOLATION_CACHE.move_to_end(key)
+        return _INTERPOLATION_CACHE[key].copy()
+
+    # Since there can be different start and end values,
+    # we interpolate the entire data of the IAM instead
+    # of doing it each time over
+    minimum = min(data.year.values)
+    maximum = max(data.year.values)
+    years_to_interp_for = list(range(minimum, maximum + 1))
+
+    data_full = xr.DataArray(
+        np.nan,
+        dims=["region", "variables", "year"],
+        coords={
+            "region": data.region,
+            "year": years_to_interp_for,
+            "variables": data.variables,
+        },
     )
+    data_full.loc[{"year": data.year}] = data
+    # interpolation is done using cubic spline interpolation
+    data_full = data_full.interpolate_na(dim="year", method="akima")
+
+    _INTERPOLATION_CACHE[key] = data_full
+    while len(_INTERPOLATION_CACHE) > INTERPOLATION_CACHE_SIZE:
+        _INTERPOLATION_CACHE.popitem(last=False)
+
+    return data_full.copy()
+
+
+def _take_years(values: np.ndarray, first_year: int, years) -> np.ndarray:
+    """
+    Pick, for each region and technology, the value of a yearly series
+    (regions, technologies, years) at the given year(s).
+    """
+
+    indices = np.broadcast_to(
+        np.asarray(years).astype(int) - first_year, values.shape[:2]
+    )
+    return np.take_along_axis(values, indices[..., None], axis=-1)[..., 0]
+
+
+def _interp_years(values: np.ndarray, years: np.ndarray, requested) -> np.ndarray:
+    """
+    Linear interpolation of yearly series (regions, technologies, years)
+    at one (fractional) year per region and technology, as `np.interp`.
+    """
+
+    requested = np.broadcast_to(np.asarray(requested, dtype=float), values.shape[:2])
+    position = np.clip(requested - years[0], 0, len(years) - 1)
+    lower = np.minimum(np.floor(position).astype(int), len(years) - 2)
+    lower = np.maximum(lower, 0)
+    y_lower = np.take_along_axis(values, lower[..., None], axis=-1)[..., 0]
+    y_upper = np.take_along_axis(
+        values, np.minimum(lower + 1, len(years) - 1)[..., None], axis=-1
+    )[..., 0]
+    x_lower = years[lower].astype(float)
+    result = (y_upper - y_lower) * (requested - x_lower) + y_lower
+    result = np.where(requested == x_lower, y_lower, result)
+    result = np.where(requested <= years[0], values[..., 0], result)
+    return np.where(requested >= years[-1], values[..., -1], result)
+
+
+def _masked_slopes(
+    values: np.ndarray, years: np.ndarray, start: np.ndarray, end: np.ndarray
+) -> np.ndarray:
+    """
+    Least-squares slope over the years of [start, end] of each region and
+    technology, ignoring missing values, as a degree-1 `polyfit`.
+    """
+
+    x = years.astype(float)
+    window = (x >= start[..., None]) & (x <= end[..., None])
+    mask = (window & ~np.isnan(values)).astype(float)
+    y = np.where(mask > 0, values, 0.0)
+    count = mask.sum(axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = (mask * x).sum(axis=-1) / count
+        y_mean = y.sum(axis=-1) / count
+        dx = (x - x_mean[..., None]) * mask
+        slopes = (dx * (y - y_mean[..., None])).sum(axis=-1) / (dx**2).sum(axis=-1)
+
+        # A single observation has no unique fit: `polyfit` returns the
+        # minimum-norm solution, with columns scaled over the years kept
+        # in the window of any technology of the region.
+        kept = window.any(axis=1, keepdims=True)
+        mean_square = (kept * x**2).sum(axis=-1) / kept.sum(axis=-1)
+        x_single = (mask * x).sum(axis=-1)
+        slopes = np.where(
+            count == 1,
+            y.sum(axis=-1) * x_single / (x_single**2 + mean_square),
+            slopes,
+        )
+    return np.where(count == 0, np.nan, slopes)
+
+
+def _normalize_rows(values: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return values / np.nansum(values, axis=-1, keepdims=True)
+
+
+def _marginal_growth(
+    measurement: int,
+    values: np.ndarray,
+    years: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    avg_start: np.ndarray,
+    avg_end: np.ndarray,
+    cap_repl_rate: [np.ndarray, None],
+    decreasing: np.ndarray,
+    weighted_slope_start: float,
+    weighted_slope_end: float,
+) -> np.ndarray:
+    """
+    Production growth of each technology within its observation interval,
+    for all regions at once (regions, technologies).
+    """
+
+    first_year = int(years[0])
+    data_start = _take_years(values, first_year, start)
+    data_end = _take_years(values, first_year, end)
+
+    # second, we measure production growth
+    # within the determined time interval
+    # for each technology
+    # using the selected measuring method and baseline
+    if measurement in (0, 5):
+        growth = (data_end - data_start) / (end - start)
+        if cap_repl_rate is not None:
+            # subtract the capital replacement (which is negative) rate
+            # to the changes market share
+            growth -= cap_repl_rate
+
+        if measurement == 5:
+            # keep the sign of the growth of the suppliers in line with the
+            # market trend and use their production volume as their indicator
+            growth = np.where(
+                decreasing[:, None],
+                np.where(growth >= 0, 0.0, np.where(growth < 0, -1.0, growth)),
+                np.where(growth <= 0, 0.0, np.where(growth > 0, 1.0, growth)),
+            )
+            growth *= data_start
+        return growth
+
+    if measurement == 1:
+        growth = _masked_slopes(values, years, start, end)
+        if cap_repl_rate is not None:
+            growth -= cap_repl_rate
+        return growth
+
+    if measurement == 2:
+        mask = (years >= start[..., None]) & (years <= end[..., None])
+        coeff = np.where(mask, values, 0).sum(axis=-1)
+        n = end - start
+
+        total_area = 0.5 * (2 * coeff - data_end - data_start)
+        baseline_area = data_start * n
+        growth = (total_area - baseline_area) / n
+
+        if cap_repl_rate is not None:
+            # this bit differs from above
+            growth -= cap_repl_rate * (n**2) * 0.5
+        return growth
+
+    if measurement == 3:
+        slope = (data_end - data_start) / (end - start)
+
+        short_slope_start = start + (end - start) * weighted_slope_start
+        short_slope_end = start + (end - start) * weighted_slope_end
+        short_slope = (
+            _interp_years(values, years, short_slope_end)
+            - _interp_years(values, years, short_slope_start)
+        ) / (short_slope_end - short_slope_start)
+
+        if cap_repl_rate is not None:
+            slope -= cap_repl_rate
+            short_slope -= cap_repl_rate
+
+        x = np.divide(
+            short_slope,
+            slope,
+            out=np.zeros(short_slope.shape, dtype=float),
+            where=slope != 0,
+        )
+
+        split_year = np.where(x < 0, -1, 1)
+        split_year = np.where(
+            (x > -500) & (x < 500),
+            2 * (np.exp(-1 + x) / (1 + np.exp(-1 + x)) - 0.5),
+            split_year,
+        )
+        return slope + slope * split_year
+
+    # measurement 4: use average start and end years
+    n = avg_end - avg_start
+    growth = np.zeros(values.shape[:2])
+    for step in range(int(n.max(initial=0))):
+        active = step < n
+        split_year = np.minimum(avg_start + step, years[-1] - 1)
+        current = _take_years(values, first_year, split_year[:, None])
+        split = _take_years(values, first_year, split_year[:, None] + 1) - current
+
+        if cap_repl_rate is not None:
+            # In cases where a technology is fully phased out somewhere during
+            # the time interval we do not want to add capital replacement rate
+            split -= cap_repl_rate * (current != 0)
+
+        split = np.where(
+            decreasing[:, None],
+            # we remove suppliers with a positive growth, and reverse the sign
+            # so that the suppliers are still seen as negative in the next step
+            -_normalize_rows(np.where(split > 0, 0.0, split)),
+            # we remove suppliers with a negative growth
+            _normalize_rows(np.where(split < 0, 0.0, split)),
+        )
+        growth[active] += split[active]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return growth / n[:, None]
 
 
 def consequential_method(
@@ -320,6 +568,9 @@ def consequential_method(
     Measurement method 4 requires a common interval and therefore only supports
     the market-average lead-time mode.
 
+    Observation intervals, volume changes, lifetimes and capital replacement
+    rates are computed for all regions and technologies at once.
+
     :param data: IAM data
     :param year: year to calculate the mix for
     :param args: arguments for the method
@@ -345,25 +596,7 @@ def consequential_method(
         data.interp(year=[year]),
     )
 
-    # Since there can be different start and end values,
-    # we interpolate the entire data of the IAM instead
-    # of doing it each time over
-    minimum = min(data.year.values)
-    maximum = max(data.year.values)
-    years_to_interp_for = list(range(minimum, maximum + 1))
-
-    data_full = xr.DataArray(
-        np.nan,
-        dims=["region", "variables", "year"],
-        coords={
-            "region": data.region,
-            "year": years_to_interp_for,
-            "variables": data.variables,
-        },
-    )
-    data_full.loc[{"year": data.year}] = data
-    # interpolation is done using cubic spline interpolation
-    data_full = data_full.interpolate_na(dim="year", method="akima")
+    data_full = _interpolate_yearly(data, sector)
 
     techs = tuple(data_full.variables.values.tolist())
     constrained_suppliers = get_list_contrained_suppliers()
@@ -375,397 +608,134 @@ def consequential_method(
         dict(variables=[tech for tech in techs if tech in constrained_suppliers])
     ] = 0
 
-    # create a list to store variables values
-    # for each region
-    # to print a pretty table at the end
-    summary = []
-
-    for region in data.coords["region"].values:
-        # we don't yet know the exact start year
-        # of the time interval, so as an approximation
-        # we use for current_shares the start year
-        # of the change
-        shares = data_full.sel(region=region, year=year) / data_full.sel(
-            region=region, year=year
-        ).sum(dim="variables")
-
-        # are all shares to zero?
-        if shares.isnull().all():
-            continue
-
-        params = _get_time_parameters(
-            year=year,
-            range_time=range_time,
-            duration=duration,
-            foresight=foresight,
-            individual_lead_times=individual_lead_times,
-            lead_times=leadtime,
-            shares=shares,
-        )
-        start = params["start"]
-        end = params["end"]
-        avg_start = params["start_avg"]
-        avg_end = params["end_avg"]
-
-        # Now that we do know the start year of the time interval,
-        # we can use this to "more accurately" calculate the current shares
-
-        available_years = data_full.coords["year"].values
-        avg_start = _nearest_available_year(
-            avg_start, available_years, "average start year"
-        )
-        avg_end = _nearest_available_year(avg_end, available_years, "average end year")
-        start = _nearest_available_year(start, available_years, "start year")
-        end = _nearest_available_year(end, available_years, "end year")
-
-        shares = data_full.sel(region=region, year=avg_start) / data_full.sel(
-            region=region, year=avg_start
-        ).sum(dim="variables")
-
-        # we first need to calculate the average capital replacement rate of the market
-        # which is here defined as the inverse of the production-weighted average lifetime
-
-        # again was put in to deal with Nan values in data
-        avg_lifetime = fetch_avg_lifetime(lifetime, shares)
-
-        # again was put in to deal with Nan values in data
-        avg_cap_repl_rate = fetch_avg_capital_replacement_rate(
-            avg_lifetime, data_full.sel(region=region, year=avg_start)
-        )
+    years = data_full.coords["year"].values
+    values = data_full.values
+    regions = data_full.coords["region"].values
+
+    # we don't yet know the exact start year
+    # of the time interval, so as an approximation
+    # we use for current_shares the start year
+    # of the change
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current = data_full.sel(year=year).values
+        shares = current / np.nansum(current, axis=1, keepdims=True)
+
+    # regions where all shares are null are left with zeros
+    active = ~np.isnan(shares).all(axis=1)
+    values = values[active]
+
+    avg_lead_time = np.nansum(shares[active] * leadtime, axis=1).astype(int)
+    params = _time_windows(
+        year=year,
+        range_time=range_time,
+        duration=duration,
+        foresight=foresight,
+        individual_lead_times=individual_lead_times,
+        lead_times=leadtime,
+        avg_lead_time=avg_lead_time[:, None],
+    )
+    shape = values.shape[:2]
+    avg_start = _nearest_available_year(
+        np.broadcast_to(params["start_avg"], (shape[0], 1))[:, 0],
+        years,
+        "average start year",
+    )
+    avg_end = _nearest_available_year(
+        np.broadcast_to(params["end_avg"], (shape[0], 1))[:, 0],
+        years,
+        "average end year",
+    )
+    start = _nearest_available_year(
+        np.broadcast_to(params["start"], shape), years, "start year"
+    )
+    end = _nearest_available_year(
+        np.broadcast_to(params["end"], shape), years, "end year"
+    )
 
-        volume_change = fetch_volume_change(
-            data_full.sel(region=region), avg_start, avg_end
+    # Now that we do know the start year of the time interval,
+    # we can use this to "more accurately" calculate the current shares
+    first_year = int(years[0])
+    data_avg_start = _take_years(values, first_year, avg_start[:, None])
+    data_avg_end = _take_years(values, first_year, avg_end[:, None])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = data_avg_start / np.nansum(data_avg_start, axis=1, keepdims=True)
+
+        # we first need to calculate the average capital replacement rate of
+        # the market which is here defined as the inverse of the
+        # production-weighted average lifetime
+        avg_lifetime = np.nansum(shares * lifetime, axis=1).astype(int)
+        avg_lifetime[avg_lifetime == 0] = 30
+        avg_cap_repl_rate = -1 / avg_lifetime
+
+        volume_change = (
+            np.nansum(data_avg_end, axis=1) - np.nansum(data_avg_start, axis=1)
+        ) / (avg_end - avg_start)
+
+    # market decreasing faster than the average capital renewal rate
+    if capital_repl_rate:
+        decreasing = volume_change < avg_cap_repl_rate
+        # the capital replacement rate is here defined as -1 / lifetime
+        cap_repl_rate = -1 / lifetime * data_avg_start
+    else:
+        decreasing = volume_change < 0
+        cap_repl_rate = None
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = _marginal_growth(
+            measurement=measurement,
+            values=values,
+            years=years,
+            start=start,
+            end=end,
+            avg_start=avg_start,
+            avg_end=avg_end,
+            cap_repl_rate=cap_repl_rate,
+            decreasing=decreasing,
+            weighted_slope_start=weighted_slope_start,
+            weighted_slope_end=weighted_slope_end,
         )
 
-        # second, we measure production growth
-        # within the determined time interval
-        # for each technology
-        # using the selected measuring method and baseline
-        if measurement == 0:
-            region_data = data_full.sel(region=region)
-            data_start = _select_technology_values(region_data, start)
-            data_end = _select_technology_values(region_data, end)
-
-            market_shares.loc[{"region": region}] = (
-                (data_end - data_start) / (end - start)
-            )[:, None]
-
-            if capital_repl_rate:
-                # get the capital replacement rate
-                # which is here defined as -1 / lifetime
-                cap_repl_rate = fetch_capital_replacement_rates(
-                    lifetime, data_full.sel(region=region, year=avg_start)
-                )
-
-                # subtract the capital replacement (which is negative) rate
-                # to the changes market share
-                market_shares.loc[{"region": region}] -= cap_repl_rate[:, None]
-
-        if measurement == 1:
-            if isinstance(end, np.ndarray):
-                new_end = np.zeros_like(data_full.sel(region=region))
-                new_end[:, :] = end[:, None]
-                end = new_end
-
-            if isinstance(start, np.ndarray):
-                new_start = np.zeros_like(data_full.sel(region=region))
-                new_start[:, :] = start[:, None]
-                start = new_start
-
-            mask_end = data_full.sel(region=region).year.values[None, :] <= end
-            mask_start = data_full.sel(region=region).year.values[None, :] >= start
-            mask = mask_end & mask_start
-
-            maskxr = xr.zeros_like(data_full.sel(region=region))
-            maskxr += mask
-
-            masked_data = data_full.sel(region=region).where(maskxr, drop=True)
-
-            coeff = masked_data.polyfit(dim="year", deg=1)
-
-            market_shares.loc[{"region": region}] = coeff.polyfit_coefficients[
-                0
-            ].values[:, None]
-
-            if capital_repl_rate:
-                # get the capital replacement rate
-                # which is here defined as -1 / lifetime
-                cap_repl_rate = fetch_capital_replacement_rates(
-                    lifetime, data_full.sel(region=region, year=avg_start)
-                )
-
-                # subtract the capital replacement (which is negative) rate
-                # to the changes market share
-                market_shares.loc[{"region": region}] -= cap_repl_rate[:, None]
-
-        if measurement == 2:
-            region_data = data_full.sel(region=region)
-            number_technologies = region_data.sizes["variables"]
-            start_by_technology = (
-                start
-                if isinstance(start, np.ndarray)
-                else np.full(number_technologies, start)
-            )
-            end_by_technology = (
-                end
-                if isinstance(end, np.ndarray)
-                else np.full(number_technologies, end)
-            )
-            data_start = _select_technology_values(region_data, start_by_technology)
-            data_end = _select_technology_values(region_data, end_by_technology)
-
-            mask_end = region_data.year.values[None, :] <= end_by_technology[:, None]
-            mask_start = (
-                region_data.year.values[None, :] >= start_by_technology[:, None]
-            )
-            mask = mask_end & mask_start
-            coeff = np.where(mask, region_data.values, 0).sum(axis=1)
-            n = end_by_technology - start_by_technology
-
-            total_area = 0.5 * (2 * coeff - data_end - data_start)
-
-            baseline_area = data_start * n
-
-            market_shares.loc[{"region": region}] = ((total_area - baseline_area) / n)[
-                :, None
-            ]
-
-            if capital_repl_rate:
-                # this bit differs from above
-                # get the capital replacement rate
-                # which is here defined as -1 / lifetime
-                cap_repl_rate = (
-                    fetch_capital_replacement_rates(
-                        lifetime, data_full.sel(region=region, year=avg_start)
-                    )
-                    * (n**2)
-                    * 0.5
-                )
-
-                # subtract the capital replacement (which is negative) rate
-                # to the changes market share
-                market_shares.loc[{"region": region}] -= cap_repl_rate[:, None]
-
-        if measurement == 3:
-            region_data = data_full.sel(region=region)
-            data_start = _select_technology_values(region_data, start)
-            data_end = _select_technology_values(region_data, end)
-
-            slope = (data_end - data_start) / (end - start)
-
-            short_slope_start = start + (end - start) * weighted_slope_start
-            short_slope_end = start + (end - start) * weighted_slope_end
-            data_short_slope_start = _select_technology_values(
-                region_data, short_slope_start
-            )
-            data_short_slope_end = _select_technology_values(
-                region_data, short_slope_end
-            )
-
-            short_slope = (data_short_slope_end - data_short_slope_start) / (
-                short_slope_end - short_slope_start
-            )
-
-            if short_slope.shape != slope.shape:
-                short_slope = np.repeat(short_slope, slope.shape[0])
-
-            if capital_repl_rate:
-                cap_repl_rate = fetch_capital_replacement_rates(
-                    lifetime, data_full.sel(region=region, year=avg_start)
-                )
-                slope -= cap_repl_rate
-                short_slope -= cap_repl_rate
-
-            x = np.divide(
-                short_slope,
-                slope,
-                out=np.zeros(short_slope.shape, dtype=float),
-                where=slope != 0,
-            )
-
-            split_year = np.where(x < 0, -1, 1)
-            split_year = np.where(
-                (x > -500) & (x < 500),
-                2 * (np.exp(-1 + x) / (1 + np.exp(-1 + x)) - 0.5),
-                split_year,
-            )
-
-            market_shares.loc[{"region": region}] = (slope + slope * split_year)[
-                :, None
-            ]
-
-        if measurement == 4:
-            n = avg_end - avg_start
-
-            if isinstance(n, int):
-                n = np.array([n])
-
-            # use average start and end years
-            split_years = range(avg_start, avg_end)
-            for split_year in split_years:
-                market_shares_split = xr.zeros_like(market_shares)
-                market_shares_split.loc[{"region": region}] = (
-                    data_full.sel(region=region, year=split_year + 1)
-                    - data_full.sel(region=region, year=split_year)
-                ).values[:, None]
-
-                if capital_repl_rate:
-                    cap_repl_rate = fetch_capital_replacement_rates(
-                        lifetime, data_full.sel(region=region, year=avg_start)
-                    )
-                    # In cases where a technology is fully phased out somewhere during the time interval we do not want to add capital replacement rate
-                    mask = data_full.sel(region=region, year=split_year) != 0
-                    cap_repl_rate = cap_repl_rate * mask.values
-                    market_shares_split.loc[{"region": region}] -= cap_repl_rate[
-                        :, None
-                    ]
-
-                if (not capital_repl_rate and volume_change < 0) or (
-                    capital_repl_rate and volume_change < avg_cap_repl_rate
-                ):
-                    # we remove suppliers with a positive growth
-                    market_shares_split.loc[{"region": region}].values[
-                        market_shares_split.loc[{"region": region}].values > 0
-                    ] = 0
-                    market_shares_split.loc[
-                        {"region": region}
-                    ] /= market_shares_split.loc[{"region": region}].sum(
-                        dim="variables"
-                    )
-                    # we reverse the sign so that the suppliers are still seen as negative in the next step
-                    market_shares_split.loc[{"region": region}] *= -1
-
-                else:
-                    # we remove suppliers with a negative growth
-                    market_shares_split.loc[{"region": region}].values[
-                        market_shares_split.loc[{"region": region}].values < 0
-                    ] = 0
-                    market_shares_split.loc[
-                        {"region": region}
-                    ] /= market_shares_split.loc[{"region": region}].sum(
-                        dim="variables"
-                    )
-
-                market_shares.loc[{"region": region}] += market_shares_split.loc[
-                    {"region": region}
-                ]
-
-            market_shares.loc[{"region": region}] /= n[:, None]
+    growth = growth.round(3)
+    # we remove NaNs and np.inf
+    growth[growth == np.inf] = 0
+    growth[np.isnan(growth)] = 0
+
+    # market decreasing faster than the average capital renewal rate
+    # in this case, the idea is that oldest/non-competitive technologies
+    # are likely to supply by increasing their lifetime
+    # as the market does not justify additional capacity installation:
+    # we remove suppliers with a positive growth and reverse the sign of
+    # negative growth suppliers.
+    # Otherwise (increasing market or market decreasing slowlier than the
+    # capital renewal rate), we remove suppliers with a negative growth.
+    growth = np.where(
+        decreasing[:, None],
+        _normalize_rows(-np.where(growth > 0, 0.0, growth)),
+        _normalize_rows(np.where(growth < 0, 0.0, growth)),
+    )
 
-        if measurement == 5:
-            # if the capital replacement rate is not used,
-            region_data = data_full.sel(region=region)
-            data_start = _select_technology_values(region_data, start)
-            data_end = _select_technology_values(region_data, end)
-
-            market_shares.loc[{"region": region}] = (
-                (data_end - data_start) / (end - start)
-            )[:, None]
-
-            if capital_repl_rate:
-                # get the capital replacement rate
-                # which is here defined as -1 / lifetime
-                cap_repl_rate = fetch_capital_replacement_rates(
-                    lifetime, data_full.sel(region=region, year=avg_start)
-                )
-
-                # subtract the capital replacement (which is negative) rate
-                # to the changes market share
-                market_shares.loc[{"region": region}] -= cap_repl_rate[:, None]
-
-            if (not capital_repl_rate and volume_change < 0) or (
-                capital_repl_rate and volume_change < avg_cap_repl_rate
-            ):
-                # we remove suppliers with a positive growth
-                market_shares.loc[{"region": region}].values[
-                    market_shares.loc[{"region": region}].values >= 0
-                ] = 0
-                # we keep suppliers with a negative growth
-                # we use negative 1 so that in the next step they are still seen as negative
-                market_shares.loc[{"region": region}].values[
-                    market_shares.loc[{"region": region}].values < 0
-                ] = -1
-                # and use their production volume as their indicator
-                market_shares.loc[{"region": region}] *= data_start[:, None]
-            # increasing market or
-            # market decreasing slower than the
-            # capital renewal rate
-            else:
-                # we remove suppliers with a negative growth
-                market_shares.loc[{"region": region}].values[
-                    market_shares.loc[{"region": region}].values <= 0
-                ] = 0
-                # we keep suppliers with a positive growth
-                market_shares.loc[{"region": region}].values[
-                    market_shares.loc[{"region": region}].values > 0
-                ] = 1
-                # and use their production volume as their indicator
-                market_shares.loc[{"region": region}] *= data_start[:, None]
-
-        market_shares.loc[{"region": region}] = market_shares.loc[
-            {"region": region}
-        ].round(3)
-
-        # we remove NaNs and np.inf
-        market_shares.loc[{"region": region}].values[
-            market_shares.loc[{"region": region}].values == np.inf
-        ] = 0
-        market_shares.loc[{"region": region}] = market_shares.loc[
-            {"region": region}
-        ].fillna(0)
-
-        summary.append(
-            (
-                region,
-                measurement,
-                foresight,
-                "individual" if individual_lead_times else "average",
-                params["average lead time"],
-                range_time,
-                duration,
-                avg_start,
-                avg_end,
-                np.round(avg_cap_repl_rate, 2),
-                np.round(volume_change, 2),
-            )
+    # in such case, we use the average shares, minus the constrained suppliers
+    no_marginal_supplier = np.nansum(growth, axis=1) == 0
+    for region in regions[active][no_marginal_supplier]:
+        print(f"WARNING: All market shares for {region} are zero for {sector}. ")
+        print("Using average shares for unconstrained suppliers.")
+    growth[no_marginal_supplier] = shares[no_marginal_supplier]
+
+    result = np.zeros((len(regions), len(techs)))
+    result[active] = growth
+    market_shares[...] = (
+        xr.DataArray(
+            result[..., None],
+            dims=("region", "variables", "year"),
+            coords={
+                "region": regions,
+                "variables": list(techs),
+                "year": [year],
+            },
         )
-
-        # market decreasing faster than the average capital renewal rate
-        # in this case, the idea is that oldest/non-competitive technologies
-        # are likely to supply by increasing their lifetime
-        # as the market does not justify additional capacity installation
-        if (not capital_repl_rate and volume_change < 0) or (
-            capital_repl_rate and volume_change < avg_cap_repl_rate
-        ):
-            # we remove suppliers with a positive growth
-            market_shares.loc[{"region": region}].values[
-                market_shares.loc[{"region": region}].values > 0
-            ] = 0
-            # we reverse the sign of negative growth suppliers
-            market_shares.loc[{"region": region}] *= -1
-            market_shares.loc[{"region": region}] /= market_shares.loc[
-                {"region": region}
-            ].sum(dim="variables")
-
-        # increasing market or
-        # market decreasing slowlier than the
-        # capital renewal rate
-        else:
-            # we remove suppliers with a negative growth
-            market_shares.loc[{"region": region}].values[
-                market_shares.loc[{"region": region}].values < 0
-            ] = 0
-            market_shares.loc[{"region": region}] /= market_shares.loc[
-                {"region": region}
-            ].sum(dim="variables")
-
-        if market_shares.sel(region=region).sum(dim="variables").values == 0:
-            # in such case, we use the average shares, minus the constrained suppliers
-
-            print(f"WARNING: All market shares for {region} are zero for {sector}. ")
-            print("Using average shares for unconstrained suppliers.")
-
-            market_shares.loc[{"region": region}] = shares
+        .transpose(*market_shares.dims)
+        .values
+    )
 
     # print a summary of the results
     print()
@@ -785,8 +755,30 @@ def consequential_method(
             "Vol ch.",
         ]
     )
-    for row in summary:
-        table.add_row(row)
+    for row in zip(
+        regions[active],
+        avg_lead_time,
+        avg_start,
+        avg_end,
+        avg_cap_repl_rate,
+        volume_change,
+    ):
+        region, lead_time, start_year, end_year, cap_rate, change = row
+        table.add_row(
+            (
+                region,
+                measurement,
+                foresight,
+                "individual" if individual_lead_times else "average",
+                lead_time,
+                range_time,
+                duration,
+                start_year,
+                end_year,
+                np.round(cap_rate, 2),
+                np.round(change, 2),
+            )
+        )
 
     table._max_width = {
         "Region": 10,
@@ -20,6 +20,7 @@ import yaml
 
 from .export import biosphere_flows_dictionary
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     Dict,
@@ -30,7 +31,7 @@ from .transformation import (
     ws,
 )
 from .utils import DATA_DIR
-from .validation import MetalsValidation
+from .validation import MetalsValidation, get_validation_context
 
 logger = create_logger("metal")
 
@@ -370,6 +371,7 @@ def _update_metals(scenario, version, system_model):
         iam_data=scenario["iam data"],
         system_model=metals.system_model,
         version=metals.version,
+        context=get_validation_context(scenario, version),
     )
 
     validate.prim_sec_split = metals.prim_sec_split
@@ -1332,6 +1334,7 @@ class Metals(BaseTransformation):
 
         self.prim_sec_split = load_primary_secondary_split()
 
+    @profiled
     def update_metals_use_in_database(self):
         """
         Update the database with metals use factors.
@@ -2340,6 +2343,7 @@ class Metals(BaseTransformation):
 
         return pd.DataFrame(rows)
 
+    @profiled
     def create_metal_markets(self):
         dataframe = load_mining_shares_mapping(self.version)
         dataframe = dataframe.loc[dataframe["Work done"] == "Yes"]
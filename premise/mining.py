@@ -8,6 +8,7 @@ import uuid
 import xarray as xr
 import numpy as np
 from collections import defaultdict
+from .profiling import profiled
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
@@ -16,7 +17,7 @@ from .transformation import (
 )
 from .utils import DATA_DIR
 from .logger import create_logger
-from .geomap import Geomap
+from .geomap import get_geomap
 from .activity_maps import InventorySet
 
 logger = create_logger("mining")
@@ -165,10 +166,11 @@ class Mining(BaseTransformation):
         )
         self.year = int(year)
         self.tailings_shares = load_tailings_config(model)
-        self.geomap = Geomap(model)
+        self.geomap = get_geomap(model)
         inv = InventorySet(database=database, version=version, model=model)
         self.mining_map = inv.generate_mining_waste_map()
 
+    @profiled
     def update_tailings_treatment(self):
 
         processed_datasets = []
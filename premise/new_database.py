@@ -7,11 +7,18 @@ as well as export it back.
 import gc
 import inspect
 import logging
+import multiprocessing as mp
 import os
 import pickle
+import uuid
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from typing import List, Union
+from types import SimpleNamespace
+from typing import Iterator, List, Union
 
 import bw2data
 import datapackage
@@ -23,7 +30,8 @@ from .battery import _update_battery
 from .biomass import _update_biomass
 from .cement import _update_cement
 from .clean_datasets import DatabaseCleaner
-from .data_collection import IAMDataCollection
+from .compact import SYMBOLS, compact_database
+from .data_collection import IAMDataCollection, datapackage_hash
 from .carbon_dioxide_removal import _update_cdr
 from .electricity import _update_electricity
 from .emissions import _update_emissions
@@ -31,16 +39,24 @@ from .final_energy import _update_final_energy
 from .export import (
     Export,
     _build_superstructure_db,
+    _init_matrices_export_worker,
     _prepare_database,
     build_datapackage,
+    export_scenario_matrices,
     generate_scenario_factor_file,
     generate_superstructure_db,
+    get_dataset_keys,
     prepare_db_for_export,
     prepare_db_for_fast_export,
 )
 from .external import _update_external_scenarios
 from .external_data_validation import check_external_scenarios
-from .filesystem_constants import DIR_CACHED_DB, IAM_OUTPUT_DIR, INVENTORY_DIR
+from .filesystem_constants import (
+    DIR_CACHED_DB,
+    DIR_CACHED_FILES,
+    IAM_OUTPUT_DIR,
+    INVENTORY_DIR,
+)
 from .fuels.base import _update_fuels
 from .heat import _update_heat
 from .inventory_imports import (
@@ -55,17 +71,22 @@ from .scenario_array import (
     _load_scenario_array_dependencies,
     _write_scenario_array_datapackage,
 )
+from .shared_database import SharedDatabase
 from .steel import _update_steel
 from .transport import _update_vehicles
 from .utils import (
     cache_ref_exists,
+    cache_ref_size,
     database_metadata,
     clear_existing_cache,
     clear_runtime_caches,
     create_scenario_list,
+    delete_cache_ref,
     delete_all_pickles,
+    delete_checkpoint,
     dump_database,
     eidb_label,
+    find_checkpoint,
     hide_messages,
     info_on_utils_functions,
     load_constants,
@@ -78,8 +99,18 @@ from .utils import (
     create_cache,
     restore_cached_classifications,
     scenario_metadata,
+    write_checkpoint,
 )
+from .profiling import enable_profiling, profile_stage, profiled
 from .renewables import _update_wind_turbines
+from .result_cache import (
+    cache_ref_fingerprint,
+    file_hash,
+    load_result,
+    result_key,
+    store_result,
+)
+from .validation import ValidationContext
 
 logger = logging.getLogger("module")
 
@@ -234,6 +265,89 @@ FILEPATH_NUCLEAR_HEAT = INVENTORY_DIR / "lci-nuclear-heat.xlsx"
 
 config = load_constants()
 
+# ratio between the memory footprint of a loaded database and its cache size
+CACHE_MEMORY_FACTOR = 4
+
+# sectors which, when updated in the same call, must be updated
+# before a given sector, because it uses the datasets they create
+SECTOR_DEPENDENCIES = {
+    "electricity": ("biomass",),
+    "metals": ("electricity",),
+    "mining": ("metals",),
+    "heat": ("fuels",),
+    "cdr": ("electricity", "heat"),
+    "battery": ("metals",),
+    "cars": ("electricity", "fuels", "battery"),
+    "two_wheelers": ("electricity", "fuels", "battery"),
+    "trucks": ("electricity", "fuels", "battery"),
+    "ships": ("electricity", "fuels"),
+    "buses": ("electricity", "fuels", "battery"),
+    "trains": ("electricity", "fuels"),
+    "final energy": ("electricity", "fuels", "heat"),
+}
+
+# IAM data a sector transforms the database with: the sector
+# is skipped when none of them is available for a scenario
+SECTOR_IAM_INPUTS = {
+    "biomass": ("biomass_mix",),
+    "electricity": ("electricity_mix",),
+    "cement": ("cement_technology_mix",),
+    "steel": ("steel_technology_mix",),
+    "fuels": ("petrol_blend", "diesel_blend", "natural_gas_blend", "hydrogen_blend"),
+    "cdr": ("cdr_technology_mix",),
+    "battery": ("battery_mobile_scenarios",),
+    "final energy": ("final_energy_use",),
+    "emissions": ("gains_data_IAM",),
+}
+
+
+def order_sectors(sectors: List[str]) -> List[str]:
+    """
+    Order sectors so that each sector comes after the sectors it
+    depends on (see `SECTOR_DEPENDENCIES`), keeping the given order
+    otherwise. Dependencies which are not in `sectors` are ignored.
+
+    :param sectors: list of sector names
+    :return: ordered list of sector names
+    """
+
+    ordered = []
+    remaining = list(dict.fromkeys(sectors))
+
+    while remaining:
+        for sector in remaining:
+            if all(
+                dependency not in remaining
+                for dependency in SECTOR_DEPENDENCIES.get(sector, ())
+            ):
+                break
+        else:
+            raise ValueError(f"Circular dependency between sectors {remaining}.")
+
+        ordered.append(sector)
+        remaining.remove(sector)
+
+    return ordered
+
+
+def has_iam_inputs(sector: str, scenario: dict) -> bool:
+    """
+    Check whether the IAM data of a scenario contains
+    the inputs a sector needs to be updated.
+
+    :param sector: sector name
+    :param scenario: scenario dictionary
+    :return: True if the sector can be updated
+    """
+
+    if sector not in SECTOR_IAM_INPUTS or scenario.get("iam data") is None:
+        return True
+
+    return any(
+        getattr(scenario["iam data"], attribute, None) is not None
+        for attribute in SECTOR_IAM_INPUTS[sector]
+    )
+
 
 def check_ei_filepath(filepath: str) -> Path:
     """Check for the existence of the file path."""
@@ -320,6 +434,34 @@ def check_filepath(path: str) -> Path:
     return Path(path)
 
 
+def estimate_scenario_memory(scenario: dict) -> int:
+    """
+    Estimate the memory, in bytes, needed to hold a scenario database,
+    from the size of its cache on disk. Returns 0 if it is not cached.
+    """
+
+    refs = [
+        scenario.get("database filepath"),
+        scenario.get("database metadata filepath"),
+    ]
+
+    return CACHE_MEMORY_FACTOR * sum(cache_ref_size(ref) for ref in refs if ref)
+
+
+def _scenario_for_export_worker(scenario: dict) -> dict:
+    """
+    Copy of a scenario that can be sent to a worker process: the IAM data
+    are replaced by the list of regions, the only part needed for export.
+    """
+
+    worker_scenario = {k: v for k, v in scenario.items() if k != "iam data"}
+    worker_scenario["iam data"] = SimpleNamespace(
+        regions=list(scenario["iam data"].regions)
+    )
+
+    return worker_scenario
+
+
 def check_exclude(list_exc: List[str]) -> List[str]:
     """
     Check for the validity of the list of excluded functions.
@@ -582,6 +724,9 @@ class NewDatabase:
         use_absolute_efficiency=False,
         biosphere_name: str = "biosphere3",
         generate_reports: bool = True,
+        use_cached_results: bool = False,
+        profile: Union[bool, str] = False,
+        compact: bool = False,
     ) -> None:
         """
         Initialize the NewDatabase class.
@@ -607,6 +752,14 @@ class NewDatabase:
             It must match a biosphere database in the current Brightway project
             only when exporting to Brightway. Default is "biosphere3".
         :param generate_reports: whether to generate change and summary reports. Default is True.
+        :param use_cached_results: whether to load a scenario updated earlier with the same inputs
+            from the result store instead of updating it again, and to store updated scenarios. Default is False.
+        :param profile: whether to record the time and memory used by each stage of the run, written
+            next to the change reports. Use "trace" to also write a Chrome trace. Can also be enabled
+            with the `PREMISE_PROFILE` environment variable. Default is False.
+        :param compact: whether to hold the scenario databases being updated in a compact form, with
+            interned strings and slotted exchanges (see `premise.compact`). It halves their memory
+            footprint, at the cost of slower exchange lookups. Default is False.
         """
         self.sector_update_methods = None
         self.source = source_db
@@ -619,6 +772,11 @@ class NewDatabase:
         self.keep_source_db_uncertainty = keep_source_db_uncertainty
         self.biosphere_name = biosphere_name
         self.generate_reports = generate_reports
+        self.use_cached_results = use_cached_results
+        self.compact = compact
+
+        if profile:
+            enable_profiling(trace=profile == "trace")
         self.database_cache_filepath = None
         self.inventories_cache_filepath = None
         self._database_is_complete = False
@@ -735,10 +893,15 @@ class NewDatabase:
 
         print("- Fetching IAM data")
         for scenario in self.scenarios:
-            _fetch_iam_data(scenario)
+            with profile_stage(
+                f"IAM data ({scenario['model']}, {scenario['pathway']}, "
+                f"{scenario['year']})"
+            ):
+                _fetch_iam_data(scenario)
 
         print("Done!")
 
+    @profiled
     def __find_cached_db(self, db_name: str) -> List[dict]:
         """
         If `use_cached_db` = True, then we look for a cached database.
@@ -783,6 +946,7 @@ class NewDatabase:
         self._reload_original_database_from_cache_for_update = True
         return database
 
+    @profiled
     def __find_cached_inventories(self, db_name: str) -> Union[None, List[dict]]:
         """
         If `use_cached_inventories` = True, then we look for a cached inventories.
@@ -839,6 +1003,7 @@ class NewDatabase:
         )
         return None
 
+    @profiled
     def __clean_database(self) -> List[dict]:
         """
         Extracts the ecoinvent database, loads it into a dictionary and does a little bit of housekeeping
@@ -849,6 +1014,7 @@ class NewDatabase:
             self.source, self.source_type, self.source_file_path, self.version
         ).prepare_datasets(self.keep_source_db_uncertainty)
 
+    @profiled
     def __import_inventories(self, collect_data: bool = True) -> List[dict]:
         """
         This method will trigger the import of a number of pickled inventories
@@ -978,15 +1144,16 @@ class NewDatabase:
             ] and self.version in ["3.11", "3.12"]:
                 continue
 
-            inventory = DefaultInventory(
-                database=self.database,
-                version_in=filepath[1],
-                version_out=self.version,
-                path=filepath[0],
-                system_model=self.system_model,
-                keep_uncertainty_data=self.keep_imports_uncertainty,
-            )
-            datasets = inventory.merge_inventory()
+            with profile_stage(f"import {Path(filepath[0]).name}"):
+                inventory = DefaultInventory(
+                    database=self.database,
+                    version_in=filepath[1],
+                    version_out=self.version,
+                    path=filepath[0],
+                    system_model=self.system_model,
+                    keep_uncertainty_data=self.keep_imports_uncertainty,
+                )
+                datasets = inventory.merge_inventory()
             if collect_data:
                 data.extend(datasets)
             self.database.extend(datasets)
@@ -1040,6 +1207,13 @@ class NewDatabase:
         if scenario.get("database") is not None:
             return scenario
 
+        if "checkpoint filepath" in scenario:
+            scenario["database"] = restore_cached_classifications(
+                load_cached_database(scenario["checkpoint filepath"]),
+                scenario.get("database metadata filepath"),
+            )
+            return scenario
+
         if "database filepath" in scenario:
             return load_database(
                 scenario=scenario,
@@ -1072,17 +1246,218 @@ class NewDatabase:
         scenario["database"] = self._load_original_database()
         return scenario
 
+    def _scenario_inputs(self, scenario: dict) -> Union[dict, None]:
+        """
+        Description of every input that affects the update of a scenario,
+        other than the sectors. Returns None if the source database is not
+        cached, as its content is then unknown.
+        """
+        if self.database_cache_filepath is None or (
+            self.inventories_cache_filepath is None
+        ):
+            return None
+
+        iam_file = getattr(scenario.get("iam data"), "iam_file", None)
+
+        return {
+            "premise": __version__,
+            "source": [
+                self.source,
+                self.source_type,
+                self.version,
+                self.keep_source_db_uncertainty,
+                self.keep_imports_uncertainty,
+            ],
+            "system model": [
+                self.system_model,
+                self.system_model_args,
+                self.use_absolute_efficiency,
+                self.gains_scenario,
+            ],
+            "inventories": [
+                cache_ref_fingerprint(self.database_cache_filepath),
+                cache_ref_fingerprint(self.inventories_cache_filepath),
+            ]
+            + [
+                [inventory, file_hash(inventory["filepath"])]
+                for inventory in self.additional_inventories or []
+            ],
+            "iam": [
+                scenario["model"],
+                scenario["pathway"],
+                scenario["year"],
+                file_hash(iam_file) if iam_file is not None else None,
+            ],
+            "external scenarios": [
+                [
+                    external_scenario["scenario"],
+                    datapackage_hash(
+                        datapackage.Package(
+                            f"{external_scenario['data']}/datapackage.json"
+                        )
+                        if isinstance(external_scenario["data"], str)
+                        else external_scenario["data"]
+                    ),
+                ]
+                for external_scenario in scenario.get("external scenarios", [])
+            ],
+        }
+
+    def _scenario_result_key(self, scenario: dict, sectors: List[str]) -> str:
+        """
+        Key, in the result store, of a scenario once `sectors` are applied,
+        derived from every input that affects the result. Returns None if
+        the source database is not cached, as its content is then unknown,
+        or if the scenario was updated earlier without the result store.
+        """
+        if scenario.get("applied functions") and "result key" not in scenario:
+            # updated earlier without the result store
+            return None
+
+        inputs = self._scenario_inputs(scenario)
+        if inputs is None:
+            return None
+
+        return result_key(
+            {
+                **inputs,
+                # the result a previous update of the scenario started from
+                "previous result": scenario.get("result key"),
+                "sectors": sectors,
+            }
+        )
+
+    def _scenario_checkpoint_key(self, scenario: dict) -> str:
+        """
+        Key of the checkpoints of a scenario, derived from its inputs and
+        the sectors already applied to it, so that an update started again
+        in a new process finds them. Scenarios whose source database is not
+        cached get a random key: their checkpoints can then only be resumed
+        by the same `NewDatabase`.
+        """
+        inputs = self._scenario_inputs(scenario)
+        if inputs is None:
+            return uuid.uuid4().hex
+
+        return result_key(
+            {
+                **inputs,
+                "checkpoint": True,
+                "applied functions": scenario.get("applied functions", []),
+                "previous result": scenario.get("result key"),
+            }
+        )
+
+    @staticmethod
+    def _find_scenario_checkpoint(scenario: dict, sectors: List[str]) -> None:
+        """
+        Resume a scenario from the checkpoint left by an earlier update with
+        the same inputs, possibly in another process, if the sectors applied
+        to the checkpoint are all requested.
+        """
+        checkpoint = find_checkpoint(scenario["checkpoint key"])
+        if checkpoint is None:
+            return
+
+        filepath, applied_functions = checkpoint
+        if not set(applied_functions) <= set(sectors) | set(
+            scenario.get("applied functions", [])
+        ):
+            return
+
+        print(
+            f"Resuming {scenario['model']} - {scenario['pathway']} - "
+            f"{scenario['year']} after {', '.join(applied_functions)}."
+        )
+        scenario["checkpoint filepath"] = filepath
+        scenario["checkpoint applied functions"] = applied_functions
+        scenario["applied functions"] = list(applied_functions)
+
+    @staticmethod
+    def _checkpoint_scenario(scenario: dict) -> None:
+        """
+        Write the database of a scenario to the cache, with the
+        sectors applied to it, replacing the previous checkpoint.
+        """
+        previous = scenario.pop("checkpoint filepath", None)
+        filepath = write_checkpoint(
+            scenario["database"],
+            scenario["checkpoint key"],
+            list(scenario.get("applied functions", [])),
+        )
+        if previous is not None and cache_ref_exists(previous):
+            # the cache of a previous update, used as first checkpoint
+            delete_cache_ref(previous)
+        scenario["checkpoint filepath"] = filepath
+        scenario["checkpoint applied functions"] = list(
+            scenario.get("applied functions", [])
+        )
+
+    @staticmethod
+    def _restore_scenario_checkpoint(scenario: dict) -> None:
+        """
+        Drop the database of a scenario left halfway through a sector,
+        so that the next update starts again from the last checkpoint.
+        """
+        scenario.pop("database", None)
+        scenario.pop("validation context", None)
+
+        if "checkpoint filepath" in scenario:
+            scenario["applied functions"] = list(
+                scenario["checkpoint applied functions"]
+            )
+        else:
+            # no sector completed: start again from the original database
+            scenario.pop("applied functions", None)
+
     @staticmethod
-    def _clear_scenario_runtime_state(scenario: dict) -> None:
+    def _discard_scenario_checkpoint(scenario: dict) -> None:
+        if "checkpoint key" in scenario:
+            delete_checkpoint(scenario.pop("checkpoint key"))
+        if "checkpoint filepath" in scenario:
+            filepath = scenario.pop("checkpoint filepath")
+            if cache_ref_exists(filepath):
+                delete_cache_ref(filepath)
+            scenario.pop("checkpoint applied functions", None)
+
+    @staticmethod
+    def _clear_scenario_runtime_state(
+        scenario: dict, keep_structural_caches: bool = False
+    ) -> None:
         if "cache" in scenario:
             scenario["cache"] = {}
 
         if "index" in scenario:
             scenario["index"] = {}
 
-        clear_runtime_caches()
+        scenario.pop("validation context", None)
+
+        clear_runtime_caches(keep_structural_caches=keep_structural_caches)
         gc.collect()
 
+    def _scenario_update_order(self) -> List[int]:
+        """
+        Order in which scenarios are updated: the years of a same
+        (model, pathway) are processed one after the other, so that the
+        structural work of one year (parsed IAM result file, location
+        lookups, GIS matches, datasets matched by the mapping filters) is
+        reused by the next ones.
+
+        :return: list of positions in `self.scenarios`
+        """
+        pathways = {}
+        for position, scenario in enumerate(self.scenarios):
+            pathways.setdefault((scenario["model"], scenario["pathway"]), []).append(
+                position
+            )
+
+        return [
+            position
+            for positions in pathways.values()
+            for position in sorted(positions, key=lambda p: self.scenarios[p]["year"])
+        ]
+
+    @profiled
     def __import_additional_inventories(
         self, data_package: [datapackage.DataPackage, list]
     ) -> List[dict]:
@@ -1126,9 +1501,23 @@ class NewDatabase:
 
         return data
 
-    def update(self, sectors: [str, list, None] = None) -> None:
+    @profiled
+    def update(
+        self, sectors: [str, list, None] = None, checkpoint: bool = False
+    ) -> None:
         """
         Update a specific sector by name.
+
+        Sectors are updated in the order given, except that a sector always
+        comes after the sectors it depends on (see `SECTOR_DEPENDENCIES`).
+        Sectors whose IAM data is missing for a scenario are skipped.
+
+        :param sectors: sector name, list of sector names, or None for all sectors.
+        :param checkpoint: if True, the database of a scenario is written to a
+            checkpoint after each sector. If a sector fails, or the process is
+            killed, calling `update` again, on this or on a new `NewDatabase`
+            with the same inputs, resumes from the last completed sector of
+            each scenario.
         """
         self.sector_update_methods = {
             "biomass": {
@@ -1225,31 +1614,103 @@ class NewDatabase:
             [item for item in sectors if item not in self.sector_update_methods]
         )
 
+        update_order = self._scenario_update_order()
+
         with tqdm(total=len(self.scenarios), desc=description, ncols=70) as pbar_outer:
-            for position, scenario in enumerate(self.scenarios):
+            for position, scenario_index in enumerate(update_order):
+                scenario = self.scenarios[scenario_index]
+
+                key = None
+                if getattr(self, "use_cached_results", False):
+                    key = self._scenario_result_key(scenario, order_sectors(sectors))
+                    if key is not None and load_result(key, scenario):
+                        print(
+                            f"Loaded {scenario['model']} - {scenario['pathway']} - "
+                            f"{scenario['year']} from the result store."
+                        )
+                        self._discard_scenario_checkpoint(scenario)
+                        scenario["result key"] = key
+                        pbar_outer.update()
+                        continue
+
+                if checkpoint and "checkpoint key" not in scenario:
+                    scenario["checkpoint key"] = self._scenario_checkpoint_key(scenario)
+                    if "checkpoint filepath" not in scenario:
+                        self._find_scenario_checkpoint(scenario, sectors)
+
+                if (
+                    checkpoint
+                    and "database filepath" in scenario
+                    and "checkpoint filepath" not in scenario
+                ):
+                    # the cache of a previous update is the first checkpoint
+                    scenario["checkpoint filepath"] = scenario.pop("database filepath")
+                    scenario["checkpoint applied functions"] = list(
+                        scenario.get("applied functions", [])
+                    )
+
                 scenario = self._load_scenario_database_for_update(
-                    scenario=scenario, scenario_position=position
+                    scenario=self.scenarios[scenario_index],
+                    scenario_position=position,
+                )
+                if getattr(self, "compact", False):
+                    compact_database(scenario["database"])
+                scenario["validation context"] = ValidationContext(
+                    model=scenario["model"],
+                    version=self.version,
+                    database=scenario.get("database"),
                 )
 
-                for sector in sectors:
+                for sector in order_sectors(sectors):
                     if sector in scenario.get("applied functions", []):
                         print(
                             f"Function to update {sector} already applied to scenario."
                         )
                         continue
 
-                    # Prepare the function and arguments
-                    update_func = self.sector_update_methods[sector]["func"]
-                    fixed_args = self.sector_update_methods[sector]["args"]
-                    scenario = update_func(scenario, *fixed_args)
+                    if not has_iam_inputs(sector, scenario):
+                        print(f"No {sector} scenario data available -- skipping")
+                    else:
+                        # Prepare the function and arguments
+                        update_func = self.sector_update_methods[sector]["func"]
+                        fixed_args = self.sector_update_methods[sector]["args"]
+                        try:
+                            with profile_stage(
+                                f"update {sector} "
+                                f"({scenario['model']}, {scenario['pathway']}, "
+                                f"{scenario['year']})",
+                                lambda: scenario.get("database"),
+                            ):
+                                scenario = update_func(scenario, *fixed_args)
+                        except Exception:
+                            if checkpoint:
+                                self._restore_scenario_checkpoint(scenario)
+                            raise
 
                     if "applied functions" not in scenario:
                         scenario["applied functions"] = []
                     scenario["applied functions"].append(sector)
 
+                    if checkpoint:
+                        self._checkpoint_scenario(scenario)
+
                 # dump database
                 dump_database(scenario)
-                self._clear_scenario_runtime_state(scenario)
+                self._discard_scenario_checkpoint(scenario)
+
+                if key is not None:
+                    store_result(key, scenario)
+                    scenario["result key"] = key
+                next_scenario = (
+                    self.scenarios[update_order[position + 1]]
+                    if position + 1 < len(update_order)
+                    else {}
+                )
+                self._clear_scenario_runtime_state(
+                    scenario,
+                    keep_structural_caches=next_scenario.get("model")
+                    == scenario["model"],
+                )
                 # Manually update the outer progress bar after each sector is completed
                 pbar_outer.update()
 
@@ -1262,8 +1723,12 @@ class NewDatabase:
             clear_runtime_caches()
             gc.collect()
 
+        if getattr(self, "compact", False):
+            SYMBOLS.clear()
+
         print("Done!\n")
 
+    @profiled
     def write_superstructure_db_to_brightway(
         self,
         name: str = f"super_db_{datetime.now().strftime('%d-%m-%Y')}",
@@ -1302,6 +1767,7 @@ class NewDatabase:
 
         self._finalize_superstructure_export()
 
+    @profiled
     def write_scenario_array_db_to_brightway(
         self,
         name: str = f"scenario_array_db_{datetime.now():%d-%m-%Y}",
@@ -1412,34 +1878,22 @@ class NewDatabase:
             self._validate_superstructure_export_prerequisites()
 
         original_database = self._load_original_database()
+        original_keys = get_dataset_keys(original_database)
 
-        for scenario in self.scenarios:
-            scenario = load_database(
-                scenario=scenario,
-                original_database=original_database,
-                load_metadata=True,
-            )
-
-            try:
-                _prepare_database(
-                    scenario=scenario,
-                    db_name=name,
-                    original_database=original_database,
-                    biosphere_name=self.biosphere_name,
-                    version=self.version,
-                )
-            except ValueError:
-                self.generate_change_report()
-                raise ValueError(
-                    "The database is not ready for export: MAJOR anomalies found. Check the change report."
-                )
+        # scenarios are loaded and prepared one at a time, as the
+        # superstructure builder folds them
+        scenarios = self._iter_prepared_scenarios(
+            name=name,
+            original_database=original_database,
+            original_keys=original_keys,
+        )
 
         scenario_labels = create_scenario_list(self.scenarios)
         dataframe = None
         if scenario_array:
             self.database, dataframe = _build_superstructure_db(
                 origin_db=original_database,
-                scenarios=self.scenarios,
+                scenarios=scenarios,
                 db_name=name,
                 biosphere_name=self.biosphere_name,
                 version=self.version,
@@ -1448,7 +1902,7 @@ class NewDatabase:
         else:
             self.database = generate_superstructure_db(
                 origin_db=original_database,
-                scenarios=self.scenarios,
+                scenarios=scenarios,
                 db_name=name,
                 biosphere_name=self.biosphere_name,
                 filepath=filepath,
@@ -1476,10 +1930,72 @@ class NewDatabase:
             original_database=original_database,
             biosphere_name=self.biosphere_name,
             version=self.version,
+            original_keys=original_keys,
         )
 
         return scenario_labels, dataframe
 
+    def _iter_prepared_scenarios(
+        self, name: str, original_database: list, original_keys
+    ) -> Iterator[dict]:
+        """
+        Load and prepare each scenario database for export, and release it
+        once the caller moves on to the next one: databases loaded from the
+        cache are dropped from memory, and stay in the cache.
+
+        :param name: name of the exported database
+        :param original_database: original database
+        :param original_keys: keys of the datasets of the original database
+        :return: iterator over the prepared scenarios
+        """
+
+        for scenario in self._iter_loaded_scenarios(original_database):
+            try:
+                _prepare_database(
+                    scenario=scenario,
+                    db_name=name,
+                    original_database=original_database,
+                    biosphere_name=self.biosphere_name,
+                    version=self.version,
+                    original_keys=original_keys,
+                )
+            except ValueError:
+                self.generate_change_report()
+                raise ValueError(
+                    "The database is not ready for export: MAJOR anomalies found. Check the change report."
+                )
+
+            yield scenario
+
+    def _iter_loaded_scenarios(self, original_database: list) -> Iterator[dict]:
+        """
+        Load the database of each scenario, one at a time. Databases loaded
+        from the cache are dropped from memory once the caller moves on to
+        the next scenario, and stay in the cache.
+
+        :param original_database: original database
+        :return: iterator over the scenarios, with their database
+        """
+
+        for scenario in self.scenarios:
+            cache_refs = {
+                key: scenario[key]
+                for key in ("database filepath", "database metadata filepath")
+                if key in scenario
+            }
+            scenario = load_database(
+                scenario=scenario,
+                original_database=original_database,
+                delete=False,
+                load_metadata=True,
+            )
+
+            yield scenario
+
+            if "database filepath" in cache_refs:
+                scenario.pop("database", None)
+                scenario.update(cache_refs)
+
     def _validate_superstructure_export_prerequisites(self) -> None:
         """Validate prerequisites shared by both superstructure exporters."""
 
@@ -1505,6 +2021,7 @@ class NewDatabase:
 
         delete_all_pickles()
 
+    @profiled
     def write_db_to_brightway(self, name: [str, List[str]] = None):
         """
         Register the new database into an open brightway project.
@@ -1543,6 +2060,8 @@ class NewDatabase:
 
         print("Write new database(s) to Brightway.")
 
+        original_database, original_keys = None, None
+
         for s, scenario in enumerate(self.scenarios):
             can_use_fast_export = (
                 scenario.get("database") is not None or "database filepath" in scenario
@@ -1583,7 +2102,9 @@ class NewDatabase:
                 end_of_process(scenario)
                 continue
 
-            original_database = self._load_original_database()
+            if original_database is None:
+                original_database = self._load_original_database()
+                original_keys = get_dataset_keys(original_database)
             scenario = load_database(
                 scenario=scenario,
                 original_database=original_database,
@@ -1597,6 +2118,7 @@ class NewDatabase:
                     original_database=original_database,
                     biosphere_name=self.biosphere_name,
                     version=self.version,
+                    original_keys=original_keys,
                 )
             except ValueError:
                 self.generate_change_report()
@@ -1624,7 +2146,13 @@ class NewDatabase:
             # generate change report from logs
             self.generate_change_report()
 
-    def write_db_to_matrices(self, filepath: str = None):
+    @profiled
+    def write_db_to_matrices(
+        self,
+        filepath: str = None,
+        workers: int = 1,
+        max_memory: float = None,
+    ):
         """
 
         Exports the new database as a sparse matrix representation in csv files.
@@ -1637,6 +2165,13 @@ class NewDatabase:
         "iam model" / "pathway" / "year" subdirectories are created under
         the working directory.
         :type filepath: str or list
+        :param workers: number of scenarios loaded, validated and exported
+            in parallel worker processes.
+        :type workers: int
+        :param max_memory: memory limit, in GB, for the scenario databases
+            held by the workers at the same time. The footprint of a scenario
+            is estimated from the size of its cache on disk.
+        :type max_memory: float
 
         """
 
@@ -1669,36 +2204,29 @@ class NewDatabase:
 
         print("Write new database(s) to matrix.")
         original_database = self._load_original_database()
+        context = {
+            "original_database": original_database,
+            "original_keys": get_dataset_keys(original_database),
+            "version": self.version,
+            "biosphere_name": self.biosphere_name,
+            "system_model": self.system_model,
+        }
 
-        for s, scenario in enumerate(self.scenarios):
-            scenario = load_database(
-                scenario=scenario,
-                original_database=original_database,
-                load_metadata=True,
+        if workers > 1 and len(self.scenarios) > 1:
+            ready = self._write_matrices_in_parallel(
+                filepath, context, workers, max_memory
+            )
+        else:
+            ready = all(
+                export_scenario_matrices(scenario, filepath[s], context)
+                for s, scenario in enumerate(self.scenarios)
             )
 
-            try:
-                scenario = _prepare_database(
-                    scenario=scenario,
-                    db_name="database",
-                    original_database=original_database,
-                    biosphere_name=self.biosphere_name,
-                    version=self.version,
-                )
-            except ValueError:
-                self.generate_change_report()
-                raise ValueError(
-                    "The database is not ready for export: MAJOR anomalies found. Check the change report."
-                )
-
-            Export(
-                scenario=scenario,
-                filepath=filepath[s],
-                version=self.version,
-                system_model=self.system_model,
-            ).export_db_to_matrices()
-
-            end_of_process(scenario)
+        if not ready:
+            self.generate_change_report()
+            raise ValueError(
+                "The database is not ready for export: MAJOR anomalies found. Check the change report."
+            )
 
         delete_all_pickles()
 
@@ -1708,110 +2236,211 @@ class NewDatabase:
             # generate change report from logs
             self.generate_change_report()
 
-    def write_db_to_simapro(self, filepath: str = None):
+    def _write_matrices_in_parallel(
+        self,
+        filepaths: List[Path],
+        context: dict,
+        workers: int,
+        max_memory: float = None,
+    ) -> bool:
         """
-        Exports database as a CSV file to be imported in Simapro 9.x
-
-        :param filepath: path provided by the user to store the exported import file
-        :type filepath: str
-
+        Export scenarios as matrices in worker processes. A scenario is only
+        started if the estimated memory of the scenarios being exported stays
+        under `max_memory` (in GB); one scenario always runs.
+        Returns False as soon as a scenario fails validation.
         """
 
-        filepath = filepath or Path(Path.cwd() / "export" / "simapro")
+        budget = max_memory * 1024**3 if max_memory else None
+        estimates = [estimate_scenario_memory(s) for s in self.scenarios]
+        queue = deque(range(len(self.scenarios)))
+        running = {}
+        in_use = 0
+        ready = True
+
+        # workers map the original database from a file, instead of
+        # each unpickling a copy of it
+        shared_database = SharedDatabase.create(
+            context["original_database"],
+            DIR_CACHED_FILES / f"{uuid.uuid4().hex}.shared",
+        )
+        context = {**context, "original_database": shared_database}
+
+        with (
+            shared_database,
+            ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_matrices_export_worker,
+                initargs=(context,),
+            ) as executor,
+        ):
+            while queue or running:
+                while (
+                    ready
+                    and queue
+                    and len(running) < workers
+                    and (
+                        budget is None
+                        or not running
+                        or in_use + estimates[queue[0]] <= budget
+                    )
+                ):
+                    s = queue.popleft()
+                    future = executor.submit(
+                        export_scenario_matrices,
+                        _scenario_for_export_worker(self.scenarios[s]),
+                        filepaths[s],
+                    )
+                    running[future] = s
+                    in_use += estimates[s]
 
-        if not os.path.exists(filepath):
-            os.makedirs(filepath)
+                if not running:
+                    break
 
-        print("Write Simapro import file(s).")
-        original_database = self._load_original_database()
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    s = running.pop(future)
+                    in_use -= estimates[s]
+                    ready = future.result() and ready
 
-        for scenario in self.scenarios:
-            scenario = load_database(
-                scenario=scenario,
-                original_database=original_database,
-                load_metadata=True,
-            )
+                    # the worker consumed the cached database
+                    scenario = self.scenarios[s]
+                    scenario.pop("database filepath", None)
+                    scenario["database"] = None
+                    end_of_process(scenario)
 
-            try:
-                _prepare_database(
-                    scenario=scenario,
-                    db_name="database",
-                    original_database=original_database,
-                    biosphere_name=self.biosphere_name,
-                    version=self.version,
-                )
-            except ValueError:
-                self.generate_change_report()
-                raise ValueError(
-                    "The database is not ready for export: MAJOR anomalies found. Check the change report."
-                )
+        return ready
 
-            export = Export(
-                scenario=scenario,
-                filepath=filepath,
-                version=self.version,
-                system_model=self.system_model,
-            )
-            export.export_db_to_simapro()
+    @profiled
+    def write_db_to_simapro(
+        self,
+        filepath: str = None,
+        workers: int = None,
+        concurrent_scenarios: int = 1,
+    ):
+        """
+        Exports database as a CSV file to be imported in Simapro 9.x
 
-            if len(export.unmatched_category_flows) > 0:
-                scenario["unmatched category flows"] = export.unmatched_category_flows
+        :param filepath: path provided by the user to store the exported import file
+        :type filepath: str
+        :param workers: number of processes used to render datasets. Defaults to the number of CPUs.
+        :type workers: int
+        :param concurrent_scenarios: number of scenarios written at the same time.
+            Each one holds a full database in memory.
+        :type concurrent_scenarios: int
 
-            end_of_process(scenario)
+        """
 
-        delete_all_pickles()
-        if self.generate_reports:
-            # generate scenario report
-            self.generate_scenario_report()
-            # generate change report from logs
-            self.generate_change_report()
+        print("Write Simapro import file(s).")
+        self._write_simapro_files(
+            filepath=filepath or Path(Path.cwd() / "export" / "simapro"),
+            olca_compartments=False,
+            workers=workers,
+            concurrent_scenarios=concurrent_scenarios,
+        )
 
-    def write_db_to_olca(self, filepath: str = None):
+    @profiled
+    def write_db_to_olca(
+        self,
+        filepath: str = None,
+        workers: int = None,
+        concurrent_scenarios: int = 1,
+    ):
         """
         Exports database as a Simapro CSV file to be imported in OpenLCA
 
         :param filepath: path provided by the user to store the exported import file
         :type filepath: str
+        :param workers: number of processes used to render datasets. Defaults to the number of CPUs.
+        :type workers: int
+        :param concurrent_scenarios: number of scenarios written at the same time.
+            Each one holds a full database in memory.
+        :type concurrent_scenarios: int
 
         """
 
-        filepath = filepath or Path(Path.cwd() / "export" / "olca")
+        print("Write Simapro import file(s) for OpenLCA.")
+        self._write_simapro_files(
+            filepath=filepath or Path(Path.cwd() / "export" / "olca"),
+            olca_compartments=True,
+            workers=workers,
+            concurrent_scenarios=concurrent_scenarios,
+        )
+
+    def _write_simapro_files(
+        self,
+        filepath: Union[str, Path],
+        olca_compartments: bool,
+        workers: int = None,
+        concurrent_scenarios: int = 1,
+    ) -> None:
+        """
+        Prepare scenarios one after the other and write their Simapro CSV files.
+        Up to `concurrent_scenarios` files are written in background threads
+        while the next scenario is being prepared. The datasets of all the
+        scenarios are rendered by one process pool, started from the main
+        thread before the writer threads, so that no process is forked from
+        a writer thread.
+        """
 
         if not os.path.exists(filepath):
             os.makedirs(filepath)
 
-        print("Write Simapro import file(s) for OpenLCA.")
+        concurrent_scenarios = max(1, concurrent_scenarios)
+        workers = max(1, workers or os.cpu_count() or 1)
+
         original_database = self._load_original_database()
+        original_keys = get_dataset_keys(original_database)
 
-        for scenario in self.scenarios:
-            scenario = load_database(
+        def export_scenario(scenario):
+            export = Export(
                 scenario=scenario,
-                original_database=original_database,
-                load_metadata=True,
+                filepath=filepath,
+                version=self.version,
+                system_model=self.system_model,
+            )
+            export.export_db_to_simapro(
+                olca_compartments=olca_compartments, workers=workers, pool=processes
             )
 
-            try:
-                _prepare_database(
+            if len(export.unmatched_category_flows) > 0:
+                scenario["unmatched category flows"] = export.unmatched_category_flows
+
+            end_of_process(scenario)
+
+        pending = deque()
+        processes = mp.Pool(processes=workers) if workers > 1 else None
+        pool = ThreadPool(processes=concurrent_scenarios)
+        with processes or nullcontext(), pool:
+            for scenario in self.scenarios:
+                scenario = load_database(
                     scenario=scenario,
-                    db_name="database",
                     original_database=original_database,
-                    biosphere_name=self.biosphere_name,
-                    version=self.version,
-                )
-            except ValueError:
-                self.generate_change_report()
-                raise ValueError(
-                    "The database is not ready for export: MAJOR anomalies found. Check the change report."
+                    load_metadata=True,
                 )
 
-            Export(
-                scenario=scenario,
-                filepath=filepath,
-                version=self.version,
-                system_model=self.system_model,
-            ).export_db_to_simapro(olca_compartments=True)
+                try:
+                    _prepare_database(
+                        scenario=scenario,
+                        db_name="database",
+                        original_database=original_database,
+                        biosphere_name=self.biosphere_name,
+                        version=self.version,
+                        original_keys=original_keys,
+                    )
+                except ValueError:
+                    self.generate_change_report()
+                    raise ValueError(
+                        "The database is not ready for export: MAJOR anomalies found. Check the change report."
+                    )
 
-            end_of_process(scenario)
+                pending.append(pool.apply_async(export_scenario, (scenario,)))
+
+                # bound the number of prepared databases held in memory
+                while len(pending) >= concurrent_scenarios:
+                    pending.popleft().get()
+
+            while pending:
+                pending.popleft().get()
 
         delete_all_pickles()
         if self.generate_reports:
@@ -1820,6 +2449,7 @@ class NewDatabase:
             # generate change report from logs
             self.generate_change_report()
 
+    @profiled
     def write_datapackage(
         self,
         name: str = f"datapackage_{datetime.now().strftime('%d-%m-%Y')} (v.{str(__version__)})",
@@ -1834,33 +2464,17 @@ class NewDatabase:
             raise ValueError(f"No cached inventories found at {cache_fp}.")
 
         original_database = self._load_original_database()
-
-        for scenario in self.scenarios:
-            scenario = load_database(
-                scenario=scenario,
-                original_database=original_database,
-                load_metadata=True,
-            )
-
-            try:
-                _prepare_database(
-                    scenario=scenario,
-                    db_name=name,
-                    original_database=original_database,
-                    biosphere_name=self.biosphere_name,
-                    version=self.version,
-                )
-            except ValueError:
-                self.generate_change_report()
-                raise ValueError(
-                    "The database is not ready for export: MAJOR anomalies found. Check the change report."
-                )
+        original_keys = get_dataset_keys(original_database)
 
         list_scenarios = create_scenario_list(self.scenarios)
 
         df, extra_inventories = generate_scenario_factor_file(
             origin_db=original_database,
-            scenarios=self.scenarios,
+            scenarios=self._iter_prepared_scenarios(
+                name=name,
+                original_database=original_database,
+                original_keys=original_keys,
+            ),
             db_name=name,
             biosphere_name=self.biosphere_name,
             version=self.version,
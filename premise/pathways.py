@@ -4,6 +4,7 @@ used to create a data package for scenario analysis.
 """
 
 import gc
+import gzip
 import json
 import csv
 import shutil
@@ -21,6 +22,193 @@ from .new_database import NewDatabase
 from .inventory_imports import get_classification_entry, get_classifications
 from .utils import clear_runtime_caches, delete_all_pickles, end_of_process
 
+MATRIX_FIELDS = {
+    "A_matrix": (
+        ("index of activity", "integer"),
+        ("index of product", "integer"),
+    ),
+    "B_matrix": (
+        ("index of activity", "integer"),
+        ("index of biosphere flow", "integer"),
+    ),
+}
+UNCERTAINTY_FIELDS = (
+    ("value", "number"),
+    ("uncertainty type", "integer"),
+    ("loc", "number"),
+    ("scale", "number"),
+    ("shape", "number"),
+    ("minimum", "number"),
+    ("maximum", "number"),
+    ("negative", "boolean"),
+    ("flip", "boolean"),
+)
+
+# Schemas of the tables written by premise, declared in the datapackage
+# instead of being inferred by re-reading each file.
+KNOWN_SCHEMAS = {
+    "A_matrix": MATRIX_FIELDS["A_matrix"] + UNCERTAINTY_FIELDS,
+    "B_matrix": MATRIX_FIELDS["B_matrix"] + UNCERTAINTY_FIELDS,
+    "A_matrix_index": (
+        ("name", "string"),
+        ("reference product", "string"),
+        ("unit", "string"),
+        ("location", "string"),
+        ("index", "integer"),
+    ),
+    "B_matrix_index": (
+        ("name", "string"),
+        ("compartment", "string"),
+        ("subcompartment", "string"),
+        ("unit", "string"),
+        ("index", "integer"),
+    ),
+    "classifications": (
+        ("name", "string"),
+        ("reference product", "string"),
+        ("classification_system", "string"),
+        ("classification_code", "string"),
+    ),
+}
+SEMICOLON_TABLES = ("A_matrix", "B_matrix", "A_matrix_index", "B_matrix_index")
+SCENARIO_DATA_TYPES = {"year": "integer", "value": "number"}
+SCENARIO_DATA_FORMATS = {
+    "csv": "scenario_data.csv",
+    "csv.gz": "scenario_data.csv.gz",
+    "parquet": "scenario_data.parquet",
+}
+
+
+def table_schema(fields) -> dict:
+    """
+    Table schema descriptor for a sequence of (name, type) fields.
+    """
+    return {
+        "fields": [
+            {"name": name, "type": field_type, "format": "default"}
+            for name, field_type in fields
+        ],
+        "missingValues": [""],
+    }
+
+
+class ScenarioDataWriter:
+    """
+    Write the scenario data one scenario at a time, as CSV, gzip-compressed
+    CSV or Parquet, so that only the scenario being written is held as a
+    dataframe.
+
+    :ivar filepath: path of the file written
+    :ivar file_format: "csv", "csv.gz" or "parquet"
+    """
+
+    def __init__(self, directory: Path, file_format: str = "csv") -> None:
+        if file_format not in SCENARIO_DATA_FORMATS:
+            raise ValueError(
+                f"Unknown scenario data format '{file_format}'. "
+                f"Choose among {list(SCENARIO_DATA_FORMATS)}."
+            )
+        self.file_format = file_format
+        self.filepath = Path(directory) / SCENARIO_DATA_FORMATS[file_format]
+        self.columns = None
+        self._handle = None
+        self._parquet_schema = None
+
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        if self.filepath.exists():
+            self.filepath.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, dataframe) -> None:
+        """
+        Append the rows of one scenario.
+        """
+        if self.columns is None:
+            self.columns = list(dataframe.columns)
+        dataframe = dataframe[self.columns]
+
+        if self.file_format == "parquet":
+            self._write_parquet(dataframe)
+            return
+
+        if self._handle is None:
+            if self.file_format == "csv.gz":
+                self._handle = gzip.open(
+                    self.filepath, "wt", encoding="utf-8", newline=""
+                )
+            else:
+                self._handle = open(self.filepath, "w", encoding="utf-8", newline="")
+            dataframe.to_csv(self._handle, index=False)
+        else:
+            dataframe.to_csv(self._handle, header=False, index=False)
+
+    def _write_parquet(self, dataframe) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._handle is None:
+            self._parquet_schema = pa.schema(
+                [
+                    (
+                        column,
+                        {"integer": pa.int64(), "number": pa.float64()}.get(
+                            SCENARIO_DATA_TYPES.get(column), pa.string()
+                        ),
+                    )
+                    for column in self.columns
+                ]
+            )
+            self._handle = pq.ParquetWriter(self.filepath, self._parquet_schema)
+
+        self._handle.write_table(
+            pa.Table.from_pandas(
+                dataframe, schema=self._parquet_schema, preserve_index=False
+            )
+        )
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def resource(self, base_path: Path) -> dict:
+        """
+        Datapackage resource descriptor of the file written, with its schema.
+        """
+        descriptor = {
+            "name": "scenario_data",
+            "path": self.filepath.relative_to(base_path).as_posix(),
+            "schema": table_schema(
+                (column, SCENARIO_DATA_TYPES.get(column, "string"))
+                for column in self.columns or []
+            ),
+        }
+        if self.file_format == "parquet":
+            descriptor.update(
+                {
+                    "profile": "data-resource",
+                    "format": "parquet",
+                    "mediatype": "application/vnd.apache.parquet",
+                }
+            )
+        else:
+            descriptor.update(
+                {
+                    "profile": "tabular-data-resource",
+                    "format": "csv",
+                    "mediatype": "text/csv",
+                    "encoding": "utf-8",
+                }
+            )
+            if self.file_format == "csv.gz":
+                descriptor["compression"] = "gz"
+        return descriptor
+
 
 class PathwaysDataPackage:
     def __init__(
@@ -76,7 +264,20 @@ class PathwaysDataPackage:
         name: str = f"pathways_{date.today()}",
         contributors: list = None,
         transformations: list = None,
+        workers: int = 1,
+        max_memory: float = None,
+        scenario_data_format: str = "csv",
     ):
+        """
+        Update the scenarios and export them as a datapackage.
+
+        :param name: name of the datapackage
+        :param contributors: list of contributors (title, name, email)
+        :param transformations: sectors to update. Defaults to all.
+        :param workers: number of scenario-years exported in parallel
+        :param max_memory: memory limit, in GB, for the databases exported in parallel
+        :param scenario_data_format: "csv", "csv.gz" or "parquet"
+        """
         try:
             if transformations:
                 self.datapackage.update(transformations)
@@ -86,6 +287,9 @@ class PathwaysDataPackage:
             self._export_datapackage(
                 name=name,
                 contributors=contributors,
+                workers=workers,
+                max_memory=max_memory,
+                scenario_data_format=scenario_data_format,
             )
         finally:
             self._cleanup_after_export()
@@ -94,6 +298,9 @@ class PathwaysDataPackage:
         self,
         name: str,
         contributors: list = None,
+        workers: int = 1,
+        max_memory: float = None,
+        scenario_data_format: str = "csv",
     ):
 
         # first, delete the content of the "pathways_temp" folder
@@ -102,10 +309,12 @@ class PathwaysDataPackage:
         # create matrices in current directory
         self.datapackage.write_db_to_matrices(
             filepath=str(Path.cwd() / "pathways_temp" / "inventories"),
+            workers=workers,
+            max_memory=max_memory,
         )
         self.variables_name_change = {}
         self._add_variables_mapping()
-        self._add_scenario_data()
+        self._add_scenario_data(file_format=scenario_data_format)
         self._add_classifications_file()
         self._build_datapackage(name, contributors)
 
@@ -174,9 +383,12 @@ class PathwaysDataPackage:
         with open(Path.cwd() / "pathways_temp" / "mapping" / "mapping.yaml", "w") as f:
             yaml.dump(mappings, f)
 
-    def _add_scenario_data(self):
+    def _add_scenario_data(self, file_format: str = "csv"):
         """
-        Add scenario data in the "pathways_temp" folder.
+        Add scenario data in the "pathways_temp" folder. Each scenario is
+        written as soon as its production volumes are interpolated.
+
+        :param file_format: "csv", "csv.gz" or "parquet"
         """
 
         def _prefix_vars(arr, prefix: str):
@@ -186,77 +398,68 @@ class PathwaysDataPackage:
             ]
             return arr.assign_coords(variables=("variables", new_vars))
 
-        data_list, extra_units = [], {}
-        outfile = None
-
-        for scenario in self.datapackage.scenarios:
-            # --- base: production volumes
-            pv = scenario["iam data"].production_volumes.interp(year=scenario["year"])
-            old_vars = pv.coords["variables"].values.tolist()
-            # translate model var -> final mapping key; fallback to readable default
-            new_vars = [self.variables_name_change.get(v, v) for v in old_vars]
-            pv = pv.assign_coords(variables=("variables", new_vars))
-            # same for units
-            units = {
-                self.variables_name_change.get(k, k): v
-                for k, v in pv.attrs.get("unit", {}).items()
-            }
-
-            scenario_name = f"{scenario['model']} - {scenario['pathway']}"
-
-            # --- optional: external data blocks
-            if "external data" in scenario:
-                for ext_key, external in scenario["external data"].items():
-                    ext = external["production volume"].interp(year=scenario["year"])
-                    # prefix includes the external block key so different externals don't collide
-                    ext_prefix = f"EXT - {ext_key}"
-                    ext = _prefix_vars(ext, ext_prefix)
-                    ext_units = {
-                        f"{ext_prefix} - {k}": v
-                        for k, v in external["production volume"]
-                        .attrs.get("unit", {})
-                        .items()
-                    }
-
-                    pv = xr.concat([pv, ext], dim="variables")
-                    units.update(ext_units)
-                    extra_units.update(ext_units)
-                    scenario_name += (
-                        f" - {scenario['external scenarios'][ext_key]['scenario']}"
-                    )
-
-            # add scenario dimension
-            pv = pv.expand_dims("scenario")
-            pv = pv.assign_coords(scenario=[scenario_name])
-
-            # keep the merged units on the array (xarray may drop attrs on concat later)
-            pv.attrs["unit"] = units
+        scenario_names = set()
 
-            data_list.append(pv)
-
-        # ensure output dir
-        outdir = Path.cwd() / "pathways_temp" / "scenario_data"
-        outdir.mkdir(parents=True, exist_ok=True)
+        with ScenarioDataWriter(
+            Path.cwd() / "pathways_temp" / "scenario_data", file_format
+        ) as writer:
+            for scenario in self.datapackage.scenarios:
+                # --- base: production volumes
+                pv = scenario["iam data"].production_volumes.interp(
+                    year=scenario["year"]
+                )
+                old_vars = pv.coords["variables"].values.tolist()
+                # translate model var -> final mapping key; fallback to readable default
+                new_vars = [self.variables_name_change.get(v, v) for v in old_vars]
+                pv = pv.assign_coords(variables=("variables", new_vars))
+                # same for units
+                units = {
+                    self.variables_name_change.get(k, k): v
+                    for k, v in pv.attrs.get("unit", {}).items()
+                }
 
-        outfile = outdir / "scenario_data.csv"
-        if outfile.exists():
-            outfile.unlink()
+                scenario_name = f"{scenario['model']} - {scenario['pathway']}"
 
-        self.scenario_names = []
+                # --- optional: external data blocks
+                if "external data" in scenario:
+                    for ext_key, external in scenario["external data"].items():
+                        ext = external["production volume"].interp(
+                            year=scenario["year"]
+                        )
+                        # prefix includes the external block key so different externals don't collide
+                        ext_prefix = f"EXT - {ext_key}"
+                        ext = _prefix_vars(ext, ext_prefix)
+                        ext_units = {
+                            f"{ext_prefix} - {k}": v
+                            for k, v in external["production volume"]
+                            .attrs.get("unit", {})
+                            .items()
+                        }
 
-        # write per-scenario to reduce peak memory
-        for pv in data_list:
-            df = pv.to_dataframe().reset_index()
-            unit_map = dict(pv.attrs.get("unit", {}))
-            unit_map.update(extra_units)
-            df["unit"] = df["variables"].map(unit_map)
-            df[["model", "pathway"]] = df["scenario"].str.split(" - ", n=1, expand=True)
-            df = df.drop(columns=["scenario"])
-            self.scenario_names.extend(df["pathway"].unique().tolist())
-            df = df.dropna(subset=["value"])
-            df.to_csv(outfile, mode="a", header=not outfile.exists(), index=False)
+                        pv = xr.concat([pv, ext], dim="variables")
+                        units.update(ext_units)
+                        scenario_name += (
+                            f" - {scenario['external scenarios'][ext_key]['scenario']}"
+                        )
 
-        self.scenario_names = sorted(set(self.scenario_names))
+                # add scenario dimension
+                pv = pv.expand_dims("scenario")
+                pv = pv.assign_coords(scenario=[scenario_name])
+
+                df = pv.to_dataframe().reset_index()
+                df["unit"] = df["variables"].map(units)
+                df[["model", "pathway"]] = df["scenario"].str.split(
+                    " - ", n=1, expand=True
+                )
+                df = df.drop(columns=["scenario"])
+                scenario_names.update(df["pathway"].unique().tolist())
+                df = df.dropna(subset=["value"])
+                writer.write(df)
+
+        self.scenario_data_resource = (
+            writer.resource(Path.cwd()) if writer.columns is not None else None
+        )
+        self.scenario_names = sorted(scenario_names)
 
     def _add_classifications_file(self):
         """
@@ -367,18 +570,36 @@ class PathwaysDataPackage:
         """
         # create a new datapackage
         package = Package(base_path=Path.cwd().as_posix())
+        scenario_data = getattr(self, "scenario_data_resource", None)
+        if scenario_data is not None:
+            package.add_resource(scenario_data)
+
         # Find all CSV files manually
         csv_files = list((Path.cwd() / "pathways_temp").glob("**/*.csv"))
 
         for file in csv_files:
             relpath = file.relative_to(Path.cwd()).as_posix()
-            package.add_resource(
-                {
-                    "path": relpath,
-                    "profile": "tabular-data-resource",
-                    "encoding": "utf-8",
-                }
-            )
+            if scenario_data is not None and relpath == scenario_data["path"]:
+                continue
+            resource = {
+                "path": relpath,
+                "profile": "tabular-data-resource",
+                "encoding": "utf-8",
+            }
+            # tables written by premise have a known schema:
+            # only the other ones are inferred from their content
+            if file.stem in KNOWN_SCHEMAS:
+                resource.update(
+                    {
+                        "name": file.stem,
+                        "format": "csv",
+                        "mediatype": "text/csv",
+                        "schema": table_schema(KNOWN_SCHEMAS[file.stem]),
+                    }
+                )
+                if file.stem in SEMICOLON_TABLES:
+                    resource["dialect"] = {"delimiter": ";"}
+            package.add_resource(resource)
 
         package.infer("pathways_temp/**/*.yaml")
         package.infer()
@@ -0,0 +1,246 @@
+"""
+Performance profiling of premise runs. When enabled, with
+``NewDatabase(profile=True)`` or the ``PREMISE_PROFILE`` environment
+variable, each stage of a run (extraction, inventory imports, IAM data,
+sector steps, validation, cache dump and load, export) records its wall
+time, CPU time, peak memory and the size of the database it leaves.
+The records are written as JSON and CSV files, and optionally as a
+Chrome trace (chrome://tracing, Perfetto), next to the change reports.
+"""
+
+import csv
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# set to 1 to profile runs, or to "trace" to also write a Chrome trace
+PROFILE_ENV_VAR = "PREMISE_PROFILE"
+
+# same folder as the change reports
+DIR_PROFILE_REPORT = Path.cwd() / "export" / "change reports"
+
+PROFILE_FIELDS = [
+    "stage",
+    "depth",
+    "start",
+    "wall time",
+    "cpu time",
+    "peak rss",
+    "datasets",
+    "exchanges",
+]
+
+_PROFILER = None
+
+
+def _peak_rss() -> Optional[int]:
+    """Peak resident memory of the process so far, in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _database_size(database) -> tuple:
+    if not isinstance(database, list):
+        return None, None
+    return len(database), sum(len(ds.get("exchanges", [])) for ds in database)
+
+
+class Profiler:
+    """
+    Records the stages of a run. The records are written to `directory`
+    each time an outermost stage completes, even if it failed.
+
+    :ivar records: one dictionary per completed stage, with the fields
+        listed in `PROFILE_FIELDS`
+    :ivar trace: whether to also write a Chrome trace
+    :ivar directory: output directory
+    """
+
+    def __init__(self, trace: bool = False, directory: Path = DIR_PROFILE_REPORT):
+        self.records: List[dict] = []
+        self.trace = trace
+        self.directory = directory
+        self.started = datetime.now()
+        self._origin = time.perf_counter()
+        self._depth = threading.local()
+
+    @contextmanager
+    def stage(self, name: str, database: Callable = None):
+        """
+        Record a stage.
+
+        :param name: name of the stage
+        :param database: callable returning the database at the end of
+            the stage, to count its datasets and exchanges
+        """
+        depth = getattr(self._depth, "value", 0)
+        self._depth.value = depth + 1
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            end_wall, end_cpu = time.perf_counter(), time.process_time()
+            self._depth.value = depth
+            datasets, exchanges = _database_size(
+                database() if database is not None else None
+            )
+            self.records.append(
+                {
+                    "stage": name,
+                    "depth": depth,
+                    "start": start_wall - self._origin,
+                    "wall time": end_wall - start_wall,
+                    "cpu time": end_cpu - start_cpu,
+                    "peak rss": _peak_rss(),
+                    "datasets": datasets,
+                    "exchanges": exchanges,
+                    "thread": threading.get_ident(),
+                }
+            )
+            if depth == 0:
+                self.write(self.directory)
+
+    def write(self, directory: Path) -> Path:
+        """
+        Write the records to `directory`, as "profile <date>.json" and
+        ".csv" files, and ".trace.json" if `trace` is set. Files of the
+        same run are overwritten with all the records so far.
+
+        :param directory: output directory
+        :return: path of the JSON file
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"profile {self.started.strftime('%Y-%m-%d %H-%M-%S')}"
+        records = sorted(self.records, key=lambda record: record["start"])
+
+        filepath = directory / f"{stem}.json"
+        with open(filepath, "w", encoding="utf-8") as file:
+            json.dump(
+                [{k: record[k] for k in PROFILE_FIELDS} for record in records],
+                file,
+                indent=2,
+            )
+
+        with open(directory / f"{stem}.csv", "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(
+                file, fieldnames=PROFILE_FIELDS, extrasaction="ignore"
+            )
+            writer.writeheader()
+            writer.writerows(records)
+
+        if self.trace:
+            with open(directory / f"{stem}.trace.json", "w", encoding="utf-8") as file:
+                json.dump(
+                    {
+                        "traceEvents": [
+                            {
+                                "name": record["stage"],
+                                "ph": "X",
+                                "ts": record["start"] * 1e6,
+                                "dur": record["wall time"] * 1e6,
+                                "pid": os.getpid(),
+                                "tid": record["thread"],
+                                "args": {
+                                    k: record[k]
+                                    for k in (
+                                        "cpu time",
+                                        "peak rss",
+                                        "datasets",
+                                        "exchanges",
+                                    )
+                                },
+                            }
+                            for record in records
+                        ]
+                    },
+                    file,
+                )
+
+        return filepath
+
+
+def enable_profiling(trace: bool = False) -> Profiler:
+    """
+    Start recording the stages of the run, if not already done.
+
+    :param trace: whether to also write a Chrome trace
+    :return: the active profiler
+    """
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = Profiler(trace=trace)
+    _PROFILER.trace = _PROFILER.trace or trace
+    return _PROFILER
+
+
+def disable_profiling() -> None:
+    """Stop recording the stages of the run."""
+    global _PROFILER
+    _PROFILER = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    """Return the active profiler, or None if profiling is disabled."""
+    return _PROFILER
+
+
+@contextmanager
+def profile_stage(name: str, database: Callable = None):
+    """
+    Record a stage with the active profiler, if any.
+
+    :param name: name of the stage
+    :param database: callable returning the database at the end of the stage
+    """
+    if _PROFILER is None:
+        yield
+        return
+
+    with _PROFILER.stage(name, database):
+        yield
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    Record each call of a function as a stage. Methods are named after
+    the class of the instance and count the datasets of its `database`
+    attribute.
+    """
+    is_method = "." in func.__qualname__ and "<locals>" not in func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _PROFILER is None:
+            return func(*args, **kwargs)
+
+        if is_method:
+            instance = args[0]
+            name = f"{type(instance).__name__}.{func.__name__}"
+            database = lambda: getattr(instance, "database", None)
+        else:
+            name, database = func.__name__, None
+
+        with _PROFILER.stage(name, database):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+if os.environ.get(PROFILE_ENV_VAR, "").lower() not in ("", "0", "false"):
+    enable_profiling(trace=os.environ[PROFILE_ENV_VAR].lower() == "trace")
@@ -9,6 +9,7 @@ import uuid
 
 from .activity_maps import InventorySet
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import BaseTransformation, IAMDataCollection, List, np, ws
 
 logger = create_logger("wind_turbine")
@@ -87,6 +88,7 @@ class WindTurbine(BaseTransformation):
         mapping = InventorySet(database=database, version=version, model=model)
         self.powerplant_map = mapping.generate_powerplant_map()
 
+    @profiled
     def create_direct_drive_turbines(self):
         """
         Create direct-drive wind turbine datasets.
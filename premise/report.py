@@ -18,6 +18,7 @@ from openpyxl.worksheet.dimensions import ColumnDimension, DimensionHolder
 from pandas.errors import EmptyDataError
 
 from . import __version__
+from .data_collection import IAMDataCollection
 from .filesystem_constants import DATA_DIR, VARIABLES_DIR
 from .logger import empty_log_files
 
@@ -62,217 +63,118 @@ def get_variables(
     return list(out.keys())
 
 
+# Report sector -> IAMDataCollection variables to read it from, as
+# (variable holding the data, variable that must be available) pairs,
+# tried in order. Only the variables of the sectors actually reported
+# are derived.
+REPORT_VARIABLES = {
+    "Population": (("other_vars", "other_vars"),),
+    "GDP": (("other_vars", "other_vars"),),
+    "CO2": (("other_vars", "other_vars"),),
+    "GMST": (("other_vars", "other_vars"),),
+    "Electricity - generation": (("production_volumes", "electricity_mix"),),
+    "Electricity (biom) - generation": (("production_volumes", "biomass_mix"),),
+    "Electricity - efficiency": (
+        ("electricity_technology_efficiencies", "electricity_technology_efficiencies"),
+    ),
+    "Heat (buildings) - generation": (
+        ("buildings_heat_end_use", "buildings_heat_end_use"),
+        ("production_volumes", "production_volumes"),
+    ),
+    "Heat (industrial) - generation": (
+        ("industrial_heat_end_use", "industrial_heat_end_use"),
+        ("production_volumes", "production_volumes"),
+    ),
+    "Heat (secondary) - generation": (
+        ("secondary_heat_supply", "secondary_heat_supply"),
+        ("production_volumes", "production_volumes"),
+    ),
+    "Fuel (gasoline) - generation": (("production_volumes", "production_volumes"),),
+    "Fuel (gasoline) - efficiency": (
+        ("petrol_technology_efficiencies", "petrol_technology_efficiencies"),
+    ),
+    "Fuel (diesel) - generation": (("production_volumes", "production_volumes"),),
+    "Fuel (diesel) - efficiency": (
+        ("diesel_technology_efficiencies", "diesel_technology_efficiencies"),
+    ),
+    "Fuel (gas) - generation": (("production_volumes", "production_volumes"),),
+    "Fuel (gas) - efficiency": (
+        ("gas_technology_efficiencies", "gas_technology_efficiencies"),
+    ),
+    "Fuel (hydrogen) - generation": (("production_volumes", "production_volumes"),),
+    "Fuel (hydrogen) - efficiency": (
+        ("hydrogen_technology_efficiencies", "hydrogen_technology_efficiencies"),
+    ),
+    "Fuel (kerosene) - generation": (("production_volumes", "production_volumes"),),
+    "Fuel (kerosene) - efficiency": (
+        ("kerosene_technology_efficiencies", "kerosene_technology_efficiencies"),
+    ),
+    "Fuel (LPG) - generation": (("production_volumes", "production_volumes"),),
+    "Fuel (LPG) - efficiency": (
+        ("lpg_technology_efficiencies", "lpg_technology_efficiencies"),
+    ),
+    "Cement - generation": (("production_volumes", "production_volumes"),),
+    "Cement - efficiency": (
+        ("cement_technology_efficiencies", "cement_technology_efficiencies"),
+    ),
+    "Steel - generation": (("production_volumes", "production_volumes"),),
+    "Steel - efficiency": (
+        ("steel_technology_efficiencies", "steel_technology_efficiencies"),
+    ),
+    "CDR - generation": (("production_volumes", "production_volumes"),),
+    "CDR - energy use": (("cdr_energy_use", "cdr_energy_use"),),
+    "CDR - efficiency": (
+        ("cdr_technology_efficiencies", "cdr_technology_efficiencies"),
+    ),
+    "Transport (two-wheelers)": (("production_volumes", "two_wheelers_fleet"),),
+    "Transport (two-wheelers) - eff": (
+        ("two_wheelers_efficiencies", "two_wheelers_efficiencies"),
+    ),
+    "Transport (cars)": (("production_volumes", "passenger_car_fleet"),),
+    "Transport (cars) - eff": (
+        ("passenger_car_efficiencies", "passenger_car_efficiencies"),
+    ),
+    "Transport (buses)": (("production_volumes", "bus_fleet"),),
+    "Transport (buses) - eff": (("bus_efficiencies", "bus_efficiencies"),),
+    "Transport (trucks)": (("production_volumes", "road_freight_fleet"),),
+    "Transport (trucks) - eff": (
+        ("road_freight_efficiencies", "road_freight_efficiencies"),
+    ),
+    "Transport (trains)": (("production_volumes", "rail_freight_fleet"),),
+    "Transport (trains) - eff": (
+        ("rail_freight_efficiencies", "rail_freight_efficiencies"),
+    ),
+    "Transport (ships)": (("production_volumes", "sea_freight_fleet"),),
+    "Transport (ships) - eff": (
+        ("sea_freight_efficiencies", "sea_freight_efficiencies"),
+    ),
+    "Battery (mobile)": (("battery_mobile_scenarios", "battery_mobile_scenarios"),),
+    "Battery (stationary)": (
+        ("battery_stationary_scenarios", "battery_stationary_scenarios"),
+    ),
+}
+
+
+def _provides(iam_data, name: str) -> bool:
+    if isinstance(iam_data, IAMDataCollection):
+        return iam_data.provides(name)
+    return hasattr(iam_data, name)
+
+
 def fetch_data(
     iam_data: xr.DataArray, sector: str, variable: str
 ) -> [xr.DataArray, None]:
-    data = {
-        "Population": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "GDP": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "CO2": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "GMST": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "Electricity - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "electricity_mix")
-            else None
-        ),
-        "Electricity (biom) - generation": (
-            iam_data.production_volumes if hasattr(iam_data, "biomass_mix") else None
-        ),
-        "Electricity - efficiency": (
-            iam_data.electricity_technology_efficiencies
-            if hasattr(iam_data, "electricity_technology_efficiencies")
-            else None
-        ),
-        "Heat (buildings) - generation": (
-            iam_data.buildings_heat_end_use
-            if hasattr(iam_data, "buildings_heat_end_use")
-            else (
-                iam_data.production_volumes
-                if hasattr(iam_data, "production_volumes")
-                else None
-            )
-        ),
-        "Heat (industrial) - generation": (
-            iam_data.industrial_heat_end_use
-            if hasattr(iam_data, "industrial_heat_end_use")
-            else (
-                iam_data.production_volumes
-                if hasattr(iam_data, "production_volumes")
-                else None
-            )
-        ),
-        "Heat (secondary) - generation": (
-            iam_data.secondary_heat_supply
-            if hasattr(iam_data, "secondary_heat_supply")
-            else (
-                iam_data.production_volumes
-                if hasattr(iam_data, "production_volumes")
-                else None
-            )
-        ),
-        "Fuel (gasoline) - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "Fuel (gasoline) - efficiency": (
-            iam_data.petrol_technology_efficiencies
-            if hasattr(iam_data, "petrol_technology_efficiencies")
-            else None
-        ),
-        "Fuel (diesel) - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "Fuel (diesel) - efficiency": (
-            iam_data.diesel_technology_efficiencies
-            if hasattr(iam_data, "diesel_technology_efficiencies")
-            else None
-        ),
-        "Fuel (gas) - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "Fuel (gas) - efficiency": (
-            iam_data.gas_technology_efficiencies
-            if hasattr(iam_data, "gas_technology_efficiencies")
-            else None
-        ),
-        "Fuel (hydrogen) - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "Fuel (hydrogen) - efficiency": (
-            iam_data.hydrogen_technology_efficiencies
-            if hasattr(iam_data, "hydrogen_technology_efficiencies")
-            else None
-        ),
-        "Fuel (kerosene) - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "Fuel (kerosene) - efficiency": (
-            iam_data.kerosene_technology_efficiencies
-            if hasattr(iam_data, "kerosene_technology_efficiencies")
-            else None
-        ),
-        "Fuel (LPG) - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "Fuel (LPG) - efficiency": (
-            iam_data.lpg_technology_efficiencies
-            if hasattr(iam_data, "lpg_technology_efficiencies")
-            else None
-        ),
-        "Cement - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
+    data = next(
+        (
+            getattr(iam_data, attribute)
+            for attribute, required in REPORT_VARIABLES[sector]
+            if _provides(iam_data, required)
         ),
-        "Cement - efficiency": (
-            iam_data.cement_technology_efficiencies
-            if hasattr(iam_data, "cement_technology_efficiencies")
-            else None
-        ),
-        "Steel - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "Steel - efficiency": (
-            iam_data.steel_technology_efficiencies
-            if hasattr(iam_data, "steel_technology_efficiencies")
-            else None
-        ),
-        "CDR - generation": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "production_volumes")
-            else None
-        ),
-        "CDR - energy use": (
-            iam_data.cdr_energy_use if hasattr(iam_data, "cdr_energy_use") else None
-        ),
-        "CDR - efficiency": (
-            iam_data.cdr_technology_efficiencies
-            if hasattr(iam_data, "cdr_technology_efficiencies")
-            else None
-        ),
-        "Transport (two-wheelers)": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "two_wheelers_fleet")
-            else None
-        ),
-        "Transport (two-wheelers) - eff": (
-            iam_data.two_wheelers_efficiencies
-            if hasattr(iam_data, "two_wheelers_efficiencies")
-            else None
-        ),
-        "Transport (cars)": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "passenger_car_fleet")
-            else None
-        ),
-        "Transport (cars) - eff": (
-            iam_data.passenger_car_efficiencies
-            if hasattr(iam_data, "passenger_car_efficiencies")
-            else None
-        ),
-        "Transport (buses)": (
-            iam_data.production_volumes if hasattr(iam_data, "bus_fleet") else None
-        ),
-        "Transport (buses) - eff": (
-            iam_data.bus_efficiencies if hasattr(iam_data, "bus_efficiencies") else None
-        ),
-        "Transport (trucks)": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "road_freight_fleet")
-            else None
-        ),
-        "Transport (trucks) - eff": (
-            iam_data.road_freight_efficiencies
-            if hasattr(iam_data, "road_freight_efficiencies")
-            else None
-        ),
-        "Transport (trains)": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "rail_freight_fleet")
-            else None
-        ),
-        "Transport (trains) - eff": (
-            iam_data.rail_freight_efficiencies
-            if hasattr(iam_data, "rail_freight_efficiencies")
-            else None
-        ),
-        "Transport (ships)": (
-            iam_data.production_volumes
-            if hasattr(iam_data, "sea_freight_fleet")
-            else None
-        ),
-        "Transport (ships) - eff": (
-            iam_data.sea_freight_efficiencies
-            if hasattr(iam_data, "sea_freight_efficiencies")
-            else None
-        ),
-        "Battery (mobile)": (
-            iam_data.battery_mobile_scenarios
-            if hasattr(iam_data, "battery_mobile_scenarios")
-            else None
-        ),
-        "Battery (stationary)": (
-            iam_data.battery_stationary_scenarios
-            if hasattr(iam_data, "battery_stationary_scenarios")
-            else None
-        ),
-    }
+        None,
+    )
 
-    if data[sector] is not None:
-        iam_data = data[sector]
+    if data is not None:
+        iam_data = data
         if sector in ("Battery (mobile)", "Battery (stationary)"):
             iam_data = iam_data.rename({"chemistry": "variables"})
 
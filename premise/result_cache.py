@@ -0,0 +1,207 @@
+"""
+Content-addressed store of updated scenario databases. A scenario updated
+with the same inputs as a stored one (source database, inventories, IAM
+file, external scenarios, system model and sectors) is loaded from the
+store instead of being updated again. The least recently used results are
+evicted when the store exceeds its disk quota.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .filesystem_constants import DIR_CACHED_FILES, DIR_CACHED_RESULTS, VARIABLES
+from .utils import cache_content_hash, cache_ref_files, delete_cache_ref
+
+# disk quota of the result store, in GB
+MAX_RESULT_CACHE_SIZE = float(VARIABLES.get("MAX_RESULT_CACHE_SIZE", 20))
+
+# scenario entries written by the sector updates, stored with the database
+RESULT_SCENARIO_KEYS = (
+    "applied functions",
+    "mapping",
+    "heat diagnostics",
+    "configurations",
+)
+
+# scenario entries referencing the cached database
+RESULT_CACHE_REFS = ("database filepath", "database metadata filepath")
+
+
+def file_hash(filepath: Path) -> str:
+    """
+    SHA-256 of the content of a file.
+
+    :param filepath: path to the file
+    :return: hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_ref_fingerprint(cache_ref: Path) -> str:
+    """
+    Hash of the content of a cached database, recorded when the cache was
+    created, so that a cache rebuilt from the same source (e.g. on a CI
+    runner) has the same fingerprint. For caches created before content
+    hashes were recorded, the files are hashed.
+
+    :param cache_ref: cache reference
+    :return: hexadecimal digest
+    """
+    content_hash = cache_content_hash(cache_ref)
+    if content_hash is not None:
+        return content_hash
+
+    digest = hashlib.sha256()
+    for file in cache_ref_files(cache_ref):
+        digest.update(file_hash(file).encode())
+    return digest.hexdigest()
+
+
+def result_key(inputs: Dict[str, Any]) -> str:
+    """
+    Key of a result in the store, derived from all its inputs.
+
+    :param inputs: JSON-serializable description of the inputs
+    :return: hexadecimal digest
+    """
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    # hard links cost no space and survive the deletion of the source
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _entries() -> Iterable[Path]:
+    return (
+        path
+        for path in DIR_CACHED_RESULTS.iterdir()
+        if path.is_dir() and (path / "scenario.pickle").exists()
+    )
+
+
+def _entry_size(entry: Path) -> int:
+    return sum(file.stat().st_size for file in entry.iterdir())
+
+
+def store_result(
+    key: str, scenario: dict, max_size: float = MAX_RESULT_CACHE_SIZE
+) -> None:
+    """
+    Store the cached database of an updated scenario, and the
+    scenario entries written by its sector updates, under `key`.
+
+    :param key: result key
+    :param scenario: scenario dictionary, with its database dumped to cache
+    :param max_size: disk quota of the store, in GB
+    """
+    entry = DIR_CACHED_RESULTS / key
+    if entry.exists() or not all(ref in scenario for ref in RESULT_CACHE_REFS):
+        return
+
+    # written under a temporary name, so that an interrupted
+    # store does not leave an incomplete result behind
+    tmp_entry = DIR_CACHED_RESULTS / f".{key}.{uuid.uuid4().hex}"
+    tmp_entry.mkdir(parents=True)
+
+    state = {k: scenario[k] for k in RESULT_SCENARIO_KEYS if k in scenario}
+    for ref in RESULT_CACHE_REFS:
+        files = cache_ref_files(scenario[ref])
+        for file in files:
+            _link_or_copy(file, tmp_entry / file.name)
+        state[ref] = files[0].name
+
+    with open(tmp_entry / "scenario.pickle", "wb") as file:
+        pickle.dump(state, file)
+
+    try:
+        tmp_entry.rename(entry)
+    except OSError:
+        # stored meanwhile by another process
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        return
+
+    evict_results(max_size, keep=key)
+
+
+def load_result(key: str, scenario: dict) -> bool:
+    """
+    Load a stored result into a scenario: its database is made
+    available in the scenario cache directory, as if the scenario
+    had just been updated and dumped.
+
+    :param key: result key
+    :param scenario: scenario dictionary
+    :return: True if a result was found
+    """
+    entry = DIR_CACHED_RESULTS / key
+    if not (entry / "scenario.pickle").exists():
+        return False
+
+    with open(entry / "scenario.pickle", "rb") as file:
+        state = pickle.load(file)
+
+    DIR_CACHED_FILES.mkdir(parents=True, exist_ok=True)
+    for ref in RESULT_CACHE_REFS:
+        if ref in scenario:
+            delete_cache_ref(scenario[ref])
+
+        for file in cache_ref_files(entry / state[ref]):
+            destination = DIR_CACHED_FILES / file.name
+            if not destination.exists():
+                _link_or_copy(file, destination)
+        state[ref] = DIR_CACHED_FILES / state[ref]
+
+    scenario.pop("database", None)
+    scenario.update(state)
+
+    # mark the result as recently used
+    os.utime(entry)
+
+    return True
+
+
+def evict_results(
+    max_size: float = MAX_RESULT_CACHE_SIZE, keep: Optional[str] = None
+) -> None:
+    """
+    Delete the least recently used results until the
+    store fits within `max_size`.
+
+    :param max_size: disk quota of the store, in GB
+    :param keep: key of a result never to delete
+    """
+    entries = sorted(_entries(), key=lambda path: path.stat().st_mtime_ns)
+    sizes = {entry: _entry_size(entry) for entry in entries}
+    total = sum(sizes.values())
+
+    for entry in entries:
+        if total <= max_size * 1e9:
+            break
+        if entry.name == keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= sizes[entry]
+
+
+def clear_result_cache() -> None:
+    """Remove all stored results."""
+
+    for entry in DIR_CACHED_RESULTS.iterdir():
+        if entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+    print("Result cache cleared!")
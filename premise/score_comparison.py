@@ -1,5 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 import bw2data, bw2calc
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import splu
 from tqdm import tqdm
 import sys
 import re
@@ -49,12 +55,132 @@ def _get_bw25_demand_key(ds, lca):
     )
 
 
+def _classification_codes(ds) -> tuple:
+    """Return the (CPC, ISIC) codes of a dataset, or None when missing."""
+
+    # iterate through the "classifications" list
+    # which contains tuples, and fetch the second item
+    cpc = [
+        item[1].split(":")[-1]
+        for item in ds.get("classifications", [])
+        if item[0] == "CPC"
+    ]
+    isic = [
+        item[1].split(":")[-1]
+        for item in ds.get("classifications", [])
+        if item[0] == "ISIC rev.4 ecoinvent"
+    ]
+
+    return (cpc[0] if cpc else None), (isic[0] if isic else None)
+
+
+def _production_amount(ds) -> float:
+    amount = 1
+    for e in ds.production():
+        amount = e["amount"]
+    return amount
+
+
+def _stack_characterization_matrices(lca, indicators: list) -> sparse.csr_matrix:
+    """
+    Stack the diagonals of the characterization matrices of
+    all indicators into one (indicators x biosphere flows) matrix.
+    `lca` must already have been characterized with the first indicator.
+    """
+
+    rows = [lca.characterization_matrix.diagonal()]
+    for indicator in indicators[1:]:
+        lca.switch_method(indicator)
+        rows.append(lca.characterization_matrix.diagonal())
+
+    return sparse.csr_matrix(np.vstack(rows))
+
+
+def _score_database_in_batch(
+    db_name: str,
+    indicators: list,
+    common_datasets: set,
+    direct_only: bool = False,
+    batch_size: int = 100,
+    project: str = None,
+) -> dict:
+    """
+    Score all common datasets of a database. The technosphere matrix is
+    factorized once and the demand vectors are solved together, in batches
+    of `batch_size`. All indicators are applied at once through the stacked
+    characterization matrix.
+
+    :return: a dictionary {(name, reference product, location, CPC, ISIC): {indicator: score}}
+    """
+
+    if project is not None and bw2data.projects.current != project:
+        bw2data.projects.set_current(project)
+
+    db = bw2data.Database(db_name)
+    use_bw25_indexing = _is_brightway25_stack()
+
+    lca = bw2calc.LCA({db.random(): 1}, method=indicators[0])
+    lca.lci()
+    lca.lcia()
+
+    characterization = _stack_characterization_matrices(lca, indicators)
+    # characterized biosphere flows of each activity, per unit of activity
+    characterized_biosphere = (characterization @ lca.biosphere_matrix).tocsc()
+    solver = splu(lca.technosphere_matrix.tocsc())
+
+    keys, product_indices, activity_indices, amounts = [], [], [], []
+    for ds in tqdm(db, desc=f"Indexing {db.name}"):
+        key = (ds["name"], ds["reference product"], ds["location"])
+        if key not in common_datasets:
+            continue
+
+        keys.append(key + _classification_codes(ds))
+        amounts.append(_production_amount(ds))
+        if use_bw25_indexing:
+            product_indices.append(lca.dicts.product[_get_bw25_demand_key(ds, lca)])
+            activity_indices.append(lca.dicts.activity[ds.id])
+        else:
+            product_indices.append(lca.product_dict[ds.key])
+            activity_indices.append(lca.activity_dict[ds.key])
+
+    scores = {}
+    n_products = lca.technosphere_matrix.shape[0]
+
+    for start in tqdm(range(0, len(keys), batch_size), desc=f"Processing {db.name}"):
+        end = min(start + batch_size, len(keys))
+        columns = np.arange(end - start)
+
+        demand = np.zeros((n_products, end - start))
+        demand[product_indices[start:end], columns] = amounts[start:end]
+        supply = solver.solve(demand)
+
+        if direct_only:
+            activities = activity_indices[start:end]
+            results = (
+                characterized_biosphere[:, activities].toarray()
+                * supply[activities, columns]
+            )
+        else:
+            results = characterized_biosphere @ supply
+
+        for c, key in enumerate(keys[start:end]):
+            scores[key] = {
+                indicator: {db.name: results[j, c]}
+                for j, indicator in enumerate(indicators)
+            }
+
+    return scores
+
+
 def comparative_analysis(
     ndb: NewDatabase = None,
     indicators: list = None,
     databases: list = None,
     limit: int = 1000,
     direct_only=False,
+    batch: bool = True,
+    batch_size: int = 100,
+    workers: int = 1,
 ) -> pd.DataFrame:
     """
     A function that does an LCA of all common datasets in databases
@@ -72,6 +198,12 @@ def comparative_analysis(
     :param indicators: list of indicators to calculate
     :param databases: list of databases to calculate if not from scenarios
     :param limit: limit the number of datasets to process
+    :param direct_only: if True, only score the direct emissions of each dataset
+    :param batch: if True, factorize the technosphere matrix once per database
+        and solve the demand vectors of `batch_size` datasets together.
+        Otherwise, run one LCI calculation per dataset.
+    :param batch_size: number of datasets solved together in batch mode
+    :param workers: number of databases scored in parallel processes, in batch mode
     """
 
     if indicators is None:
@@ -114,6 +246,33 @@ def comparative_analysis(
     if len(common_datasets) > limit:
         common_datasets = common_datasets[:limit]
 
+    common_datasets = set(common_datasets)
+
+    if batch:
+        arguments = [
+            (
+                db.name,
+                indicators,
+                common_datasets,
+                direct_only,
+                batch_size,
+                bw2data.projects.current,
+            )
+            for db in databases
+        ]
+        if workers > 1 and len(databases) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_score_database_in_batch, *zip(*arguments)))
+        else:
+            results = [_score_database_in_batch(*args) for args in arguments]
+
+        for result in results:
+            for key, db_scores in result.items():
+                for indicator, score in db_scores.items():
+                    scores.setdefault(key, {}).setdefault(indicator, {}).update(score)
+
+        return _scores_to_dataframe(scores)
+
     use_bw25_indexing = _is_brightway25_stack()
 
     for db in databases:
@@ -141,42 +300,12 @@ def comparative_analysis(
             if key not in common_datasets:
                 continue
 
-            # iterate through the "classifications" list
-            # which contains tuples, and fetch the second item
-            cpc = [
-                item[1].split(":")[-1]
-                for item in ds.get("classifications", [])
-                if item[0] == "CPC"
-            ]
-            if cpc:
-                cpc = cpc[0]
-
-            isic = [
-                item[1].split(":")[-1]
-                for item in ds.get("classifications", [])
-                if item[0] == "ISIC rev.4 ecoinvent"
-            ]
-            if isic:
-                isic = isic[0]
-            else:
-                isic = None
-
-            if cpc:
-                key += (cpc,)
-            else:
-                key += (None,)
-
-            if isic:
-                key += (isic,)
-            else:
-                key += (None,)
+            key += _classification_codes(ds)
 
             if key not in scores:
                 scores[key] = {}
 
-            amount = 1
-            for e in ds.production():
-                amount = e["amount"]
+            amount = _production_amount(ds)
 
             if use_bw25_indexing:
                 lca.lci(demand={_get_bw25_demand_key(ds, lca): amount})
@@ -201,7 +330,12 @@ def comparative_analysis(
                     ).sum()
             sys.stdout.flush()
 
-    # Convert nested dictionary to DataFrame
+    return _scores_to_dataframe(scores)
+
+
+def _scores_to_dataframe(scores: dict) -> pd.DataFrame:
+    """Convert the nested dictionary of scores to a DataFrame."""
+
     records = []
     for key, result in scores.items():
 
@@ -224,38 +358,183 @@ def comparative_analysis(
     return pd.DataFrame(records)
 
 
+# interconnection statistics, keyed by (project, database, modification time)
+_INTERCONNECTION_CACHE = {}
+
+
+def _technosphere_graph(database: bw2data.Database) -> tuple:
+    """
+    Build the technosphere adjacency matrix of a database, where
+    `graph[i, j]` is the number of technosphere exchanges from
+    dataset `i` (supplier) to dataset `j` (consumer). Inputs from
+    other databases are left out.
+
+    :return: the graph as a CSR matrix and the
+        (name, reference product, location) of each dataset
+    """
+
+    if _is_brightway25_stack():
+        from bw2data.backends import ActivityDataset as AD
+
+        nodes = list(
+            AD.select(AD.id, AD.name, AD.product, AD.location)
+            .where(AD.database == database.name)
+            .tuples()
+        )
+
+        if bw2data.databases[database.name].get("dirty"):
+            database.process()
+        datapackage = database.datapackage()
+        prefix = f"{database.name}_technosphere_matrix"
+        indices = datapackage.get_resource(f"{prefix}.indices")[0]
+        # technosphere inputs are flipped, production exchanges are not
+        flip = datapackage.get_resource(f"{prefix}.flip")[0]
+        suppliers, consumers = indices["row"][flip], indices["col"][flip]
+    else:
+        nodes, suppliers, consumers = [], [], []
+        for ds in database:
+            nodes.append((ds.key, ds["name"], ds["reference product"], ds["location"]))
+            for exc in ds.technosphere():
+                suppliers.append(exc["input"])
+                consumers.append(ds.key)
+
+        # replace dataset keys by integer ids
+        ids = {node[0]: i for i, node in enumerate(nodes)}
+        nodes = [(i,) + node[1:] for i, node in enumerate(nodes)]
+        suppliers = np.array([ids.get(s, -1) for s in suppliers], dtype=np.int64)
+        consumers = np.array([ids[c] for c in consumers], dtype=np.int64)
+
+    # map node ids to matrix positions, dropping inputs from other databases
+    node_ids = np.array([node[0] for node in nodes], dtype=np.int64)
+    order = np.argsort(node_ids)
+    sorted_ids = node_ids[order]
+
+    def positions(ids):
+        if len(sorted_ids) == 0:
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+        found = np.clip(np.searchsorted(sorted_ids, ids), 0, len(sorted_ids) - 1)
+        return order[found], sorted_ids[found] == ids
+
+    rows, valid_rows = positions(np.asarray(suppliers, dtype=np.int64))
+    cols, valid_cols = positions(np.asarray(consumers, dtype=np.int64))
+    mask = valid_rows & valid_cols
+
+    graph = sparse.csr_matrix(
+        (np.ones(mask.sum()), (rows[mask], cols[mask])),
+        shape=(len(nodes), len(nodes)),
+    )
+
+    return graph, [node[1:] for node in nodes]
+
+
+def _upstream_counts(
+    graph: sparse.csr_matrix, labels: np.ndarray, n_components: int
+) -> np.ndarray:
+    """
+    Count, for each dataset, the other datasets found in its supply chain.
+
+    Strongly connected components are condensed into a DAG, which is
+    traversed from the components without suppliers. The components
+    reached by each component are stored as a packed bitset.
+    """
+
+    sizes = np.bincount(labels, minlength=n_components)
+    coo = graph.tocoo()
+    supplier_components, consumer_components = labels[coo.row], labels[coo.col]
+    mask = supplier_components != consumer_components
+
+    # consumer component -> supplier components, and the reverse
+    condensed = sparse.csr_matrix(
+        (
+            np.ones(mask.sum()),
+            (consumer_components[mask], supplier_components[mask]),
+        ),
+        shape=(n_components, n_components),
+    )
+    consumers_of = condensed.T.tocsr()
+
+    remaining = np.diff(condensed.indptr)
+    reach = np.zeros((n_components, (n_components + 7) // 8), dtype=np.uint8)
+    stack = list(np.flatnonzero(remaining == 0))
+
+    while stack:
+        c = stack.pop()
+        reach[c, c >> 3] |= np.uint8(128 >> (c & 7))
+        suppliers = condensed.indices[condensed.indptr[c] : condensed.indptr[c + 1]]
+        if len(suppliers):
+            reach[c] |= np.bitwise_or.reduce(reach[suppliers], axis=0)
+        for consumer in consumers_of.indices[
+            consumers_of.indptr[c] : consumers_of.indptr[c + 1]
+        ]:
+            remaining[consumer] -= 1
+            if remaining[consumer] == 0:
+                stack.append(consumer)
+
+    counts = np.zeros(n_components, dtype=np.int64)
+    for start in range(0, n_components, 1_000):
+        bits = np.unpackbits(reach[start : start + 1_000], axis=1, count=n_components)
+        counts[start : start + 1_000] = bits @ sizes
+
+    # a dataset is not part of its own supply chain
+    return counts[labels] - 1
+
+
 def interconnection_analysis(
     database: bw2data.Database,
-):
+    use_cache: bool = True,
+) -> pd.DataFrame:
     """
     A function that list all datasets in the database
     and counts the numbers of datasets each
     gives inputs to.
+
+    The statistics are computed on the technosphere graph of the database:
+    * count: number of technosphere exchanges the dataset supplies (out-degree)
+    * suppliers: number of technosphere inputs from the same database (in-degree)
+    * upstream datasets: number of datasets in its supply chain
+    * component, component size: strongly connected component the dataset belongs to
+
+    Results are cached until the database is modified.
+
+    :param database: Brightway database
+    :param use_cache: if False, always recompute the statistics
     """
 
-    counts = {}
+    cache_key = (
+        bw2data.projects.current,
+        database.name,
+        bw2data.databases[database.name].get("modified"),
+    )
+    if use_cache and cache_key in _INTERCONNECTION_CACHE:
+        return _INTERCONNECTION_CACHE[cache_key].copy()
 
-    for ds in database:
-        key = (ds["name"], ds["reference product"], ds["location"])
-        if key not in counts:
-            counts[key] = 0
+    graph, keys = _technosphere_graph(database)
+    n_components, labels = connected_components(
+        graph, directed=True, connection="strong"
+    )
+
+    dataframe = pd.DataFrame(keys, columns=["name", "reference product", "location"])
+    dataframe["count"] = np.asarray(graph.sum(axis=1)).ravel().astype(int)
+    dataframe["suppliers"] = np.asarray(graph.sum(axis=0)).ravel().astype(int)
+    dataframe["upstream datasets"] = _upstream_counts(graph, labels, n_components)
+    dataframe["component"] = labels
+    dataframe["component size"] = np.bincount(labels)[labels]
+
+    # datasets sharing the same name, reference product and location are merged
+    dataframe = dataframe.groupby(
+        ["name", "reference product", "location"], as_index=False, sort=False
+    ).agg(
+        {
+            "count": "sum",
+            "suppliers": "sum",
+            "upstream datasets": "max",
+            "component": "first",
+            "component size": "max",
+        }
+    )
+    dataframe = dataframe.sort_values(by="count", ascending=False)
 
-    for ds in database:
-        for exc in ds.technosphere():
-            key = (exc["name"], exc["product"], exc["location"])
-            if key in counts:
-                counts[key] += 1
+    if use_cache:
+        _INTERCONNECTION_CACHE[cache_key] = dataframe
 
-    # Convert counts to DataFrame
-    records = []
-    for key, count in counts.items():
-        name, ref_prod, loc = key
-        records.append(
-            {
-                "name": name,
-                "reference product": ref_prod,
-                "location": loc,
-                "count": count,
-            }
-        )
-    return pd.DataFrame(records).sort_values(by="count", ascending=False)
+    return dataframe.copy()
@@ -0,0 +1,416 @@
+"""
+Read-only base database shared with worker processes. The datasets are laid
+out once in a file, as columns of numbers and string ids plus a string
+table, and each process maps the file in memory instead of unpickling its
+own copy: attaching costs milliseconds, and the pages are shared by all the
+processes through the page cache. A `SharedDatabase` pickles as the path of
+its file, so it can be passed to a process pool as is. Datasets are decoded
+on access, as read-only mappings. The file is deleted when the `with` block
+of the process that created it ends.
+"""
+
+import json
+import mmap
+import pickle
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+import numpy as np
+
+# dataset and exchange fields stored as columns, other fields are pickled
+DATASET_STRING_FIELDS = ("name", "reference product", "location", "unit")
+EXCHANGE_STRING_FIELDS = ("name", "product", "location", "unit", "type")
+EXCHANGE_FLOAT_FIELDS = (
+    "amount",
+    "loc",
+    "scale",
+    "shape",
+    "minimum",
+    "maximum",
+    "production volume",
+)
+
+# categories are stored as one string
+CATEGORY_SEPARATOR = "\x1f"
+
+# id of missing strings, and value of missing uncertainty types
+_NONE = -1
+
+_ALIGNMENT = 64
+
+_EXCHANGE_EXTRA = "__exchange_extra__"
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def _is_number(value: Any) -> bool:
+    return (
+        isinstance(value, (int, float, np.integer, np.floating))
+        and not isinstance(value, bool)
+        and not np.isnan(value)
+    )
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def id(self, value: str) -> int:
+        return self.ids.setdefault(value, len(self.ids))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        encoded = [value.encode("utf-8") for value in self.ids]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return {
+            "string offsets": offsets,
+            "strings": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        }
+
+
+def _encode_exchange(exc: Mapping, strings: _StringTable, columns: dict) -> dict:
+    """Append an exchange to `columns`, and return its fields not stored there."""
+
+    extra = {}
+    remaining = dict(exc)
+
+    for field in EXCHANGE_STRING_FIELDS:
+        value = remaining.pop(field, None)
+        if isinstance(value, str):
+            columns[field].append(strings.id(value))
+        else:
+            columns[field].append(_NONE)
+            if value is not None:
+                extra[field] = value
+
+    categories = remaining.pop("categories", None)
+    if isinstance(categories, tuple) and all(
+        isinstance(c, str) and CATEGORY_SEPARATOR not in c for c in categories
+    ):
+        columns["categories"].append(strings.id(CATEGORY_SEPARATOR.join(categories)))
+    else:
+        columns["categories"].append(_NONE)
+        if categories is not None:
+            extra["categories"] = categories
+
+    exc_input = remaining.pop("input", None)
+    if (
+        isinstance(exc_input, tuple)
+        and len(exc_input) == 2
+        and all(isinstance(v, str) for v in exc_input)
+    ):
+        columns["input database"].append(strings.id(exc_input[0]))
+        columns["input code"].append(strings.id(exc_input[1]))
+    else:
+        columns["input database"].append(_NONE)
+        columns["input code"].append(_NONE)
+        if exc_input is not None:
+            extra["input"] = exc_input
+
+    # one bit per float field present, NaN values included
+    present = 0
+    for bit, field in enumerate(EXCHANGE_FLOAT_FIELDS):
+        value = remaining.pop(field, None)
+        if isinstance(value, float) or _is_number(value):
+            columns[field].append(float(value))
+            present |= 1 << bit
+        else:
+            columns[field].append(np.nan)
+            if value is not None:
+                extra[field] = value
+    columns["float fields"].append(present)
+
+    uncertainty = remaining.pop("uncertainty type", None)
+    if isinstance(uncertainty, (int, np.integer)) and 0 <= uncertainty < 128:
+        columns["uncertainty type"].append(int(uncertainty))
+    else:
+        columns["uncertainty type"].append(_NONE)
+        if uncertainty is not None:
+            extra["uncertainty type"] = uncertainty
+
+    extra.update(remaining)
+    return extra
+
+
+def _write_columns(filepath: Path, columns: Dict[str, np.ndarray]) -> None:
+    # an 8-byte header size, a JSON header giving the dtype, offset
+    # and length of each column, then the aligned columns
+    header = {}
+    offset = 0
+    for name, values in columns.items():
+        header[name] = [values.dtype.str, offset, len(values)]
+        offset += _aligned(values.nbytes)
+
+    payload = json.dumps(header).encode("utf-8")
+    start = _aligned(8 + len(payload))
+
+    with open(filepath, "wb") as file:
+        file.write(len(payload).to_bytes(8, "little"))
+        file.write(payload)
+        file.write(b"\0" * (start - 8 - len(payload)))
+        for values in columns.values():
+            file.write(values.tobytes())
+            file.write(b"\0" * (_aligned(values.nbytes) - values.nbytes))
+
+
+class SharedDataset(Mapping):
+    """
+    Read-only view of a dataset of a `SharedDatabase`. Exchanges are
+    decoded, as new dictionaries, each time they are accessed.
+    """
+
+    __slots__ = ("_database", "_index", "_extra")
+
+    def __init__(self, database: "SharedDatabase", index: int):
+        self._database = database
+        self._index = index
+        self._extra = None
+
+    def _extra_fields(self) -> dict:
+        if self._extra is None:
+            self._extra = self._database._dataset_extra(self._index)
+        return self._extra
+
+    def __getitem__(self, key):
+        if key == "exchanges":
+            return self._database._exchanges(self._index)
+        if key in DATASET_STRING_FIELDS:
+            value = self._database._dataset_string(key, self._index)
+            if value is not None:
+                return value
+        if key != _EXCHANGE_EXTRA and key in self._extra_fields():
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for field in DATASET_STRING_FIELDS:
+            if self._database._dataset_string(field, self._index) is not None:
+                yield field
+        yield "exchanges"
+        yield from (k for k in self._extra_fields() if k != _EXCHANGE_EXTRA)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._database.filepath.name}, {self._index})"
+
+
+class SharedDatabase(Sequence):
+    """
+    Database mapped from a file written by `SharedDatabase.create`.
+
+    :ivar filepath: path to the file
+    """
+
+    def __init__(self, filepath: Path):
+        self.filepath = Path(filepath)
+        with open(self.filepath, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        size = int.from_bytes(self._mmap[:8], "little")
+        header = json.loads(self._mmap[8 : 8 + size])
+        start = _aligned(8 + size)
+        self._columns = {
+            name: np.frombuffer(
+                self._mmap, dtype=np.dtype(dtype), count=count, offset=start + offset
+            )
+            for name, (dtype, offset, count) in header.items()
+        }
+        self._string_offsets = self._columns["string offsets"]
+        # strings are decoded once per process, when first needed
+        self._strings: List[Any] = [None] * (len(self._string_offsets) - 1)
+
+    @classmethod
+    def create(cls, database: List[dict], filepath: Path) -> "SharedDatabase":
+        """
+        Lay out a database in a file, and map it.
+
+        :param database: list of datasets
+        :param filepath: path to the file to write
+        :return: the shared database
+        """
+        strings = _StringTable()
+        datasets = {field: [] for field in DATASET_STRING_FIELDS}
+        exchanges = {
+            field: []
+            for field in (
+                *EXCHANGE_STRING_FIELDS,
+                "categories",
+                "input database",
+                "input code",
+                *EXCHANGE_FLOAT_FIELDS,
+                "float fields",
+                "uncertainty type",
+            )
+        }
+        exchange_starts = [0]
+        extras = []
+
+        for ds in database:
+            extra = {}
+            for field, value in ds.items():
+                if field == "exchanges":
+                    continue
+                if field in DATASET_STRING_FIELDS and isinstance(value, str):
+                    continue
+                extra[field] = value
+            for field in DATASET_STRING_FIELDS:
+                value = ds.get(field)
+                datasets[field].append(
+                    strings.id(value) if isinstance(value, str) else _NONE
+                )
+
+            exchange_extra = {}
+            for position, exc in enumerate(ds.get("exchanges", [])):
+                fields = _encode_exchange(exc, strings, exchanges)
+                if fields:
+                    exchange_extra[position] = fields
+            if exchange_extra:
+                extra[_EXCHANGE_EXTRA] = exchange_extra
+
+            exchange_starts.append(exchange_starts[-1] + len(ds.get("exchanges", [])))
+            extras.append(pickle.dumps(extra, -1) if extra else b"")
+
+        extra_offsets = np.zeros(len(extras) + 1, dtype=np.int64)
+        np.cumsum([len(extra) for extra in extras], out=extra_offsets[1:])
+
+        columns = {
+            **strings.columns(),
+            **{
+                f"dataset {field}": np.array(values, dtype=np.int32)
+                for field, values in datasets.items()
+            },
+            "exchange starts": np.array(exchange_starts, dtype=np.int64),
+            "extra offsets": extra_offsets,
+            "extras": np.frombuffer(b"".join(extras), dtype=np.uint8),
+        }
+        for field, values in exchanges.items():
+            if field in EXCHANGE_FLOAT_FIELDS:
+                dtype = np.float64
+            elif field == "uncertainty type":
+                dtype = np.int8
+            elif field == "float fields":
+                dtype = np.uint8
+            else:
+                dtype = np.int32
+            columns[f"exchange {field}"] = np.array(values, dtype=dtype)
+
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        _write_columns(filepath, columns)
+
+        return cls(filepath)
+
+    def __reduce__(self):
+        # processes receive the path, and map the file themselves
+        return type(self), (self.filepath,)
+
+    def __len__(self) -> int:
+        return len(self._columns["exchange starts"]) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dataset index out of range")
+        return SharedDataset(self, index)
+
+    def _string(self, string_id: int):
+        if string_id < 0:
+            return None
+        value = self._strings[string_id]
+        if value is None:
+            start, end = self._string_offsets[string_id : string_id + 2]
+            value = self._strings[string_id] = (
+                self._columns["strings"][start:end].tobytes().decode("utf-8")
+            )
+        return value
+
+    def _dataset_string(self, field: str, index: int):
+        return self._string(int(self._columns[f"dataset {field}"][index]))
+
+    def _dataset_extra(self, index: int) -> dict:
+        start, end = self._columns["extra offsets"][index : index + 2]
+        if start == end:
+            return {}
+        return pickle.loads(self._columns["extras"][start:end].data)
+
+    def _exchanges(self, index: int) -> List[dict]:
+        start, end = (
+            int(i) for i in self._columns["exchange starts"][index : index + 2]
+        )
+        columns = {
+            field: self._columns[f"exchange {field}"][start:end].tolist()
+            for field in (
+                *EXCHANGE_STRING_FIELDS,
+                "categories",
+                "input database",
+                "input code",
+                *EXCHANGE_FLOAT_FIELDS,
+                "float fields",
+                "uncertainty type",
+            )
+        }
+        extra = self._dataset_extra(index).get(_EXCHANGE_EXTRA, {})
+
+        exchanges = []
+        for position in range(end - start):
+            exc = {}
+            for field in EXCHANGE_STRING_FIELDS:
+                value = self._string(columns[field][position])
+                if value is not None:
+                    exc[field] = value
+            categories = self._string(columns["categories"][position])
+            if categories is not None:
+                exc["categories"] = tuple(categories.split(CATEGORY_SEPARATOR))
+            if columns["input database"][position] >= 0:
+                exc["input"] = (
+                    self._string(columns["input database"][position]),
+                    self._string(columns["input code"][position]),
+                )
+            present = columns["float fields"][position]
+            for bit, field in enumerate(EXCHANGE_FLOAT_FIELDS):
+                if present >> bit & 1:
+                    exc[field] = columns[field][position]
+            if columns["uncertainty type"][position] >= 0:
+                exc["uncertainty type"] = columns["uncertainty type"][position]
+            exc.update(extra.get(position, {}))
+            exchanges.append(exc)
+
+        return exchanges
+
+    def dataset_keys(self) -> Set[tuple]:
+        """(name, reference product, location) of the datasets."""
+        return {
+            tuple(self._string(int(i)) for i in ids)
+            for ids in zip(
+                *(
+                    self._columns[f"dataset {field}"]
+                    for field in ("name", "reference product", "location")
+                )
+            )
+        }
+
+    def to_list(self) -> List[dict]:
+        """Decode all the datasets, as a list of dictionaries."""
+        return [dict(ds) for ds in self]
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._columns = {}
+        self._string_offsets = None
+        self._mmap.close()
+
+    def __enter__(self) -> "SharedDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        # the process that created the file deletes it
+        self.close()
+        self.filepath.unlink(missing_ok=True)
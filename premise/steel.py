@@ -7,9 +7,10 @@ from collections import defaultdict
 
 from .data_collection import IAMDataCollection
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import BaseTransformation, ws
 from .utils import rescale_exchanges
-from .validation import SteelValidation
+from .validation import SteelValidation, get_validation_context
 from .activity_maps import InventorySet
 
 logger = create_logger("steel")
@@ -53,6 +54,7 @@ def _update_steel(scenario, version, system_model):
         database=steel.database,
         iam_data=scenario["iam data"],
         system_model=system_model,
+        context=get_validation_context(scenario, version),
     )
     validate.run_steel_checks()
 
@@ -105,6 +107,7 @@ class Steel(BaseTransformation):
         self.inv = InventorySet(self.database, self.version, self.model)
         self.steel_map = self.inv.generate_steel_map()
 
+    @profiled
     def create_steel_markets(self):
         """
         Create steel markets for different regions
@@ -157,6 +160,7 @@ class Steel(BaseTransformation):
                 },
             )
 
+    @profiled
     def create_steel_production_activities(self):
         """
         Create steel production activities for different regions.
@@ -190,6 +194,7 @@ class Steel(BaseTransformation):
             mapping=steel_datasets,
         )
 
+    @profiled
     def create_pig_iron_production_activities(self):
         """
         Create region-specific pig iron production activities.
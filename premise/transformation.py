@@ -9,28 +9,29 @@ import copy
 import logging.config
 import math
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from collections.abc import ValuesView
 from copy import deepcopy
-from functools import lru_cache
 from itertools import groupby, product
 from pathlib import Path
-from typing import Any, Dict, List, Set, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
 import xarray as xr
 import yaml
 from _operator import itemgetter
 from constructive_geometries import resolved_row
-from wurst import reference_product, rescale_exchange
+from wurst import reference_product
 from wurst import searching as ws
 from wurst import transformations as wt
 from xarray import DataArray
 
 from .activity_maps import InventorySet
+from .compact import rescale_exchange
 from .data_collection import IAMDataCollection
 from .filesystem_constants import DATA_DIR
-from .geomap import Geomap
+from .geomap import Geomap, get_geomap
+from .profiling import profiled
 from .utils import get_fuel_properties
 
 LOG_CONFIG = DATA_DIR / "utils" / "logging" / "logconfig.yaml"
@@ -489,6 +490,102 @@ def find_fuel_efficiency(
     return current_efficiency
 
 
+class ParameterTable:
+    """
+    Values of an IAM array (with `region`, `variables` and `year`
+    dimensions) at a given year, as a dense NumPy array indexed by region
+    and variable. The array is sliced, or interpolated, once for the year;
+    values are then read without going through xarray.
+
+    :ivar values: array of values, of shape (regions, variables)
+    :ivar regions: position of each region
+    :ivar variables: position of each variable
+    """
+
+    def __init__(self, data: xr.DataArray, year: int) -> None:
+        data = data.transpose("region", "variables", "year")
+        years = data.coords["year"].values
+
+        if year in years:
+            self.values = data.values[:, :, years.tolist().index(year)]
+        else:
+            # same as interpolating each series with xarray,
+            # which returns NaN outside the years provided
+            self.values = np.array(
+                [
+                    [
+                        np.interp(year, years, series, left=np.nan, right=np.nan)
+                        for series in region
+                    ]
+                    for region in data.values
+                ],
+                dtype=float,
+            ).reshape(data.shape[:2])
+
+        self.regions = {}
+        for position, region in enumerate(data.coords["region"].values.tolist()):
+            self.regions.setdefault(region, position)
+        self.variables = {}
+        for position, variable in enumerate(data.coords["variables"].values.tolist()):
+            self.variables.setdefault(variable, position)
+
+    def get(self, region: str, variable: str) -> float:
+        """
+        Return the value of `variable` in `region`.
+
+        :raises KeyError: if the region or the variable is not in the table
+        """
+
+        return self.values[self.regions[region], self.variables[variable]].item()
+
+    def region_totals(self, variables: list = None) -> Dict[str, float]:
+        """
+        Return the sum of the values of `variables` (all variables if None)
+        in each region, ignoring NaNs.
+        """
+
+        columns = (
+            self.values
+            if variables is None
+            else self.values[:, [self.variables[v] for v in variables]]
+        )
+        return {
+            region: float(np.nansum(columns[position].copy()))
+            for region, position in self.regions.items()
+        }
+
+
+# parameter tables of the IAM arrays of the scenarios being processed,
+# by array and year
+_PARAMETER_TABLES = OrderedDict()
+PARAMETER_TABLES_CACHE_SIZE = 128
+
+
+def get_parameter_table(data: xr.DataArray, year: int) -> Optional[ParameterTable]:
+    """
+    Return the parameter table of `data` at `year`, built once per array and
+    year. Returns None if `data` does not have exactly the `region`,
+    `variables` and `year` dimensions.
+    """
+
+    if set(data.dims) != {"region", "variables", "year"}:
+        return None
+
+    key = (id(data), year)
+    cached = _PARAMETER_TABLES.get(key)
+    # the array is kept with its table, so that its id is not reused
+    if cached is not None and cached[0] is data:
+        _PARAMETER_TABLES.move_to_end(key)
+        return cached[1]
+
+    table = ParameterTable(data, year)
+    _PARAMETER_TABLES[key] = (data, table)
+    while len(_PARAMETER_TABLES) > PARAMETER_TABLES_CACHE_SIZE:
+        _PARAMETER_TABLES.popitem(last=False)
+
+    return table
+
+
 class BaseTransformation:
     """
     Base transformation class.
@@ -516,7 +613,7 @@ class BaseTransformation:
         self.iam_data: IAMDataCollection = iam_data
         self.model: str = model
         self.regions: List[str] = iam_data.regions
-        self.geo: Geomap = Geomap(model=model)
+        self.geo: Geomap = get_geomap(model)
         self.scenario: str = pathway
         self.year: int = year
         self.version: str = version
@@ -743,15 +840,16 @@ class BaseTransformation:
         regional_shares = (production_volumes / regional_totals).fillna(0)
         world_shares = (regional_totals / regional_totals.sum()).fillna(0)
 
+        shares = regional_shares.transpose("variables", "region").values
         technology_shares_dict = {
-            (var, reg): regional_shares.sel(variables=var, region=reg).values.item(0)
-            for var in regional_shares.variables.values
-            for reg in regional_shares.region.values
+            (var, reg): shares[v, r].item()
+            for v, var in enumerate(regional_shares.variables.values)
+            for r, reg in enumerate(regional_shares.region.values)
         }
 
         regional_shares_dict = {
-            reg: world_shares.sel(region=reg).item()
-            for reg in world_shares.region.values
+            reg: world_shares.values[r].item()
+            for r, reg in enumerate(world_shares.region.values)
         }
 
         return production_volumes, technology_shares_dict, regional_shares_dict
@@ -834,15 +932,17 @@ class BaseTransformation:
             market_unit=unit,
         )
 
+        if production_volumes is not None:
+            # summed per region as xarray would, ignoring NaNs
+            volumes = production_volumes.transpose("region", "variables").values
+            regional_production_volumes = {
+                region: float(np.nansum(volumes[r].copy()))
+                for r, region in enumerate(production_volumes.region.values.tolist())
+            }
+
         for region in regions:
             if production_volumes is not None:
-                production_volume = float(
-                    production_volumes.sel(
-                        region=region,
-                    )
-                    .sum(dim="variables")
-                    .values.item(0)
-                )
+                production_volume = regional_production_volumes[region]
 
                 if production_volume == 0:
                     continue
@@ -1563,6 +1663,7 @@ class BaseTransformation:
             self.write_log(dataset=dataset, status="empty")
             self.remove_from_index(dataset)
 
+    @profiled
     def relink_datasets(self, excludes_datasets=None, alt_names=None):
         """
         For a given exchange name, product, and unit, change its location to an IAM location,
@@ -1892,6 +1993,37 @@ class BaseTransformation:
             for (name, prod, loc, unit), excs in grouped_exchanges
         ]
 
+    def get_iam_value(
+        self, data: xr.DataArray, region: str, variable: Union[str, list]
+    ) -> float:
+        """
+        Return the value of `variable` in `region` at the year of the
+        scenario, interpolated if the year is not provided. Values are read
+        from the parameter table of `data`.
+        :param data: IAM array
+        :param region: IAM region
+        :param variable: IAM variable name
+        :return: value
+        """
+
+        # lists of variables are interpolated together by xarray
+        table = (
+            get_parameter_table(data, self.year) if isinstance(variable, str) else None
+        )
+        if table is not None:
+            return table.get(region, variable)
+
+        if self.year in data.coords["year"].values:
+            return data.sel(
+                region=region, variables=variable, year=self.year
+            ).values.item(0)
+
+        return (
+            data.sel(region=region, variables=variable)
+            .interp(year=self.year)
+            .values.item(0)
+        )
+
     def find_iam_efficiency_change(
         self,
         data: xr.DataArray,
@@ -1906,16 +2038,7 @@ class BaseTransformation:
         :return: relative efficiency change (e.g., 1.05)
         """
 
-        if self.year in data.coords["year"].values:
-            scaling_factor = data.sel(
-                region=location, variables=variable, year=self.year
-            ).values.item(0)
-        else:
-            scaling_factor = (
-                data.sel(region=location, variables=variable)
-                .interp(year=self.year)
-                .values.item(0)
-            )
+        scaling_factor = self.get_iam_value(data, location, variable)
 
         if np.isnan(scaling_factor) or np.isinf(scaling_factor):
             scaling_factor = 1
@@ -2549,7 +2672,6 @@ class BaseTransformation:
 
         return dataset
 
-    @lru_cache()
     def get_gis_match(
         self,
         location,
@@ -2557,6 +2679,30 @@ class BaseTransformation:
         contained,
         exclusive,
         biggest_first,
+    ):
+        # matches only depend on geography: they are kept by the
+        # Geomap of the model, and shared by the years of a pathway
+        key = (
+            tuple(self.regions),
+            location,
+            possible_locations,
+            contained,
+            exclusive,
+            biggest_first,
+        )
+        if key not in self.geo.gis_matches:
+            self.geo.gis_matches[key] = self._find_gis_match(
+                location, possible_locations, contained, exclusive, biggest_first
+            )
+        return self.geo.gis_matches[key]
+
+    def _find_gis_match(
+        self,
+        location,
+        possible_locations,
+        contained,
+        exclusive,
+        biggest_first,
     ):
         # prepare locations in possible_locations
         # all locations in possible_locations that are an IAM region
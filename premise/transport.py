@@ -15,9 +15,10 @@ from wurst import searching as ws
 from .activity_maps import InventorySet
 from .filesystem_constants import DATA_DIR, IAM_OUTPUT_DIR
 from .logger import create_logger
+from .profiling import profiled
 from .transformation import BaseTransformation, IAMDataCollection
 from .utils import eidb_label, rescale_exchanges
-from .validation import CarValidation, TruckValidation
+from .validation import CarValidation, TruckValidation, get_validation_context
 
 logger = create_logger("transport")
 
@@ -86,6 +87,7 @@ def _update_vehicles(scenario, vehicle_type, version, system_model):
             regions=scenario["iam data"].regions,
             database=trspt.database,
             iam_data=scenario["iam data"],
+            context=get_validation_context(scenario, version),
         )
         validate.run_checks()
 
@@ -197,6 +199,7 @@ class Transport(BaseTransformation):
             if not v:
                 print(f"Vehicle map is empty for {self.vehicle_type}.")
 
+    @profiled
     def regionalize_transport_datasets(self):
         """
         Regionalize transport datasets, which are currently only available in RER, CA and RoW.
@@ -208,6 +211,7 @@ class Transport(BaseTransformation):
             efficiency_adjustment_fn=self.adjust_transport_efficiency,
         )
 
+    @profiled
     def create_vehicle_markets(self) -> list:
         """
         Create vehicle market (fleet average) datasets.
@@ -305,6 +309,7 @@ class Transport(BaseTransformation):
 
         return None, None
 
+    @profiled
     def relink_transport_datasets(self):
         # if trucks or ships, need to reconnect everything
         # loop through datasets that use truck transport
@@ -2,11 +2,17 @@
 Various utils functions.
 """
 
+import gc
+import hashlib
 import json
 import os
 import pickle
+import shutil
 import sys
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from functools import lru_cache
 from numbers import Number
@@ -18,23 +24,30 @@ import xarray as xr
 import yaml
 from country_converter import CountryConverter
 from prettytable import PrettyTable
-from wurst import rescale_exchange
 from wurst.searching import biosphere, equals, get_many, technosphere
 import numpy as np
 
 from . import __version__
+from .compact import rescale_exchange
 from .data_collection import get_delimiter
 from .filesystem_constants import (
     DATA_DIR,
     DIR_CACHED_DB,
     DIR_CACHED_FILES,
+    DIR_CHECKPOINTS,
     VARIABLES_DIR,
 )
-from .geomap import Geomap
+from .geomap import Geomap, get_geomap
+from .profiling import profiled
+from .shared_database import SharedDatabase
 
 FUELS_PROPERTIES = VARIABLES_DIR / "fuels.yaml"
 EFFICIENCY_RATIO_SOLAR_PV = DATA_DIR / "renewables" / "efficiency_solar_PV.csv"
 CACHE_MANIFEST_SUFFIX = ".manifest.json"
+# shards read from disk ahead of the one being decoded
+CACHE_SHARD_PREFETCH = 2
+# key of the position of a dataset in the metadata of scenario caches
+METADATA_POSITION_KEY = "__position__"
 
 
 def rescale_exchanges(
@@ -397,9 +410,11 @@ def clear_existing_cache(
 
 # clear the cache folder
 def clear_cache() -> None:
-    """Remove all cached database files."""
+    """Remove all cached database files, and the checkpoints of updates."""
 
     clear_existing_cache(all_versions=True)
+    shutil.rmtree(DIR_CHECKPOINTS, ignore_errors=True)
+    DIR_CHECKPOINTS.mkdir(parents=True, exist_ok=True)
     print("Cache folder cleared!")
 
 
@@ -413,28 +428,40 @@ def clear_inventory_cache() -> None:
     print("Inventory cache cleared!")
 
 
-def clear_runtime_caches() -> None:
-    """Clear runtime caches that can retain large transformation objects."""
+def clear_runtime_caches(keep_structural_caches: bool = False) -> None:
+    """Clear runtime caches that can retain large transformation objects.
 
+    :param keep_structural_caches: keep the location lookups and GIS matches
+        of :class:`Geomap` and the datasets matched by the mapping filters,
+        which are reused by the next years of the same model and pathway.
+    :type keep_structural_caches: bool
+    """
+
+    from .activity_maps import _FILTER_RESULTS
     from .electricity import Electricity
     from .emissions import Emissions
     from .export import exc_codes, fetch_exchange_code
     from .external import ExternalScenario
     from .inventory_imports import BaseInventoryImport
     from .metals import Metals
-    from .transformation import BaseTransformation
+    from .transformation import _PARAMETER_TABLES
 
-    cached_functions = (
+    location_functions = (
+        get_geomap,
         Geomap.iam_to_ecoinvent_location,
         Geomap.ecoinvent_to_iam_location,
+    )
+    cached_functions = (
         BaseInventoryImport.correct_product_field,
-        BaseTransformation.get_gis_match,
         Electricity.get_production_per_tech_dict,
         Emissions.find_gains_emissions_change,
         ExternalScenario.add_additional_exchanges,
         Metals.get_metal_market_dataset,
         fetch_exchange_code,
     )
+    if not keep_structural_caches:
+        cached_functions = location_functions + cached_functions
+        _FILTER_RESULTS.clear()
 
     for cached_function in cached_functions:
         cache_clear = getattr(cached_function, "cache_clear", None)
@@ -442,6 +469,7 @@ def clear_runtime_caches() -> None:
             cache_clear()
 
     exc_codes.clear()
+    _PARAMETER_TABLES.clear()
 
 
 def print_version():
@@ -564,6 +592,7 @@ def create_scenario_list(scenarios: List[Dict[str, Any]]) -> List[str]:
     return list_scenarios
 
 
+@profiled
 def dump_database(scenario: Dict[str, Any]) -> Dict[str, Any]:
     """Persist a scenario database to disk.
 
@@ -672,17 +701,102 @@ def delete_cache_ref(cache_ref: Path) -> None:
         cache_ref.unlink()
 
 
+def cache_ref_size(cache_ref: Path) -> int:
+    """Return the size on disk, in bytes, of a legacy cache file or shard set."""
+
+    cache_ref = resolve_cache_ref(cache_ref)
+
+    if not cache_ref.exists():
+        return 0
+
+    if _is_cache_manifest(cache_ref):
+        return sum(
+            shard_file.stat().st_size
+            for shard_file in _iter_cache_bundle_paths(cache_ref)
+            if shard_file.exists()
+        )
+
+    return cache_ref.stat().st_size
+
+
+def cache_ref_files(cache_ref: Path) -> List[Path]:
+    """Return the files of a legacy cache file or of a shard set, manifest first."""
+
+    cache_ref = resolve_cache_ref(cache_ref)
+
+    if _is_cache_manifest(cache_ref):
+        return [cache_ref, *_iter_cache_bundle_paths(cache_ref)]
+
+    return [cache_ref]
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector, which would otherwise scan
+    the datasets being unpickled over and over."""
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _read_bytes(file_name: Path) -> bytes:
+    with open(file_name, "rb") as file:
+        return file.read()
+
+
+def _iter_cache_payloads(cache_ref: Path) -> Iterable[Tuple[Path, Any]]:
+    """Yield the path and content of each file of a legacy pickle or shard set.
+
+    The next shards are read from disk in a background thread while the
+    current one is decoded and used.
+    """
+
+    cache_ref = resolve_cache_ref(cache_ref)
+
+    if not _is_cache_manifest(cache_ref):
+        with open(cache_ref, "rb") as file, _gc_paused():
+            payload = pickle.load(file)
+        yield cache_ref, payload
+        return
+
+    shard_files = list(_iter_cache_bundle_paths(cache_ref))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        reads = deque(
+            executor.submit(_read_bytes, shard_file)
+            for shard_file in shard_files[:CACHE_SHARD_PREFETCH]
+        )
+        for position, shard_file in enumerate(shard_files):
+            data = reads.popleft().result()
+            if position + CACHE_SHARD_PREFETCH < len(shard_files):
+                reads.append(
+                    executor.submit(
+                        _read_bytes, shard_files[position + CACHE_SHARD_PREFETCH]
+                    )
+                )
+            with _gc_paused():
+                payload = pickle.loads(data)
+            del data
+            yield shard_file, payload
+
+
+@profiled
 def load_cached_database(cache_ref: Path) -> List[Dict[str, Any]]:
     """Load a cached database from a legacy pickle or manifest-backed shard set."""
 
     cache_ref = resolve_cache_ref(cache_ref)
 
-    if _is_cache_manifest(cache_ref):
-        database: List[Dict[str, Any]] = []
-        for shard_file in _iter_cache_bundle_paths(cache_ref):
-            with open(shard_file, "rb") as file:
-                shard = pickle.load(file)
+    if not _is_cache_manifest(cache_ref):
+        return next(iter(_iter_cache_payloads(cache_ref)))[1]
 
+    database: List[Dict[str, Any]] = []
+    with _gc_paused():
+        for shard_file, shard in _iter_cache_payloads(cache_ref):
             if not isinstance(shard, list):
                 raise TypeError(
                     f"Database shard {shard_file} must contain a list of datasets."
@@ -690,10 +804,7 @@ def load_cached_database(cache_ref: Path) -> List[Dict[str, Any]]:
 
             database.extend(shard)
 
-        return database
-
-    with open(cache_ref, "rb") as file:
-        return pickle.load(file)
+    return database
 
 
 def iter_cached_metadata(cache_ref: Path) -> Iterable[Dict[tuple, Dict[str, Any]]]:
@@ -701,27 +812,15 @@ def iter_cached_metadata(cache_ref: Path) -> Iterable[Dict[tuple, Dict[str, Any]
 
     cache_ref = resolve_cache_ref(cache_ref)
 
-    if _is_cache_manifest(cache_ref):
-        for shard_file in _iter_cache_bundle_paths(cache_ref):
-            with open(shard_file, "rb") as file:
-                metadata = pickle.load(file)
-
-            if not isinstance(metadata, dict):
+    for shard_file, metadata in _iter_cache_payloads(cache_ref):
+        if not isinstance(metadata, dict):
+            if _is_cache_manifest(cache_ref):
                 raise TypeError(
                     f"Metadata shard {shard_file} must contain a dictionary."
                 )
+            raise TypeError(f"Metadata cache {cache_ref} must contain a dictionary.")
 
-            yield metadata
-
-        return
-
-    with open(cache_ref, "rb") as file:
-        metadata = pickle.load(file)
-
-    if not isinstance(metadata, dict):
-        raise TypeError(f"Metadata cache {cache_ref} must contain a dictionary.")
-
-    yield metadata
+        yield metadata
 
 
 def restore_cached_classifications(
@@ -766,6 +865,123 @@ def restore_cached_classifications(
     return database
 
 
+# metadata fields not merged back into datasets
+_METADATA_SKIPPED_FIELDS = {
+    "__exchange_metadata__",
+    METADATA_POSITION_KEY,
+    "code",
+    "worksheet name",
+    "database",
+}
+
+
+def _merge_metadata_values(
+    target: Dict[str, Any],
+    values: Dict[str, Any],
+    skipped: Iterable[str],
+    description: str,
+    name: str,
+) -> None:
+    for k, v in values.items():
+        if k in skipped:
+            continue
+
+        if v is None or v == "None" or v == "nan" or not v:
+            # skip None or empty values
+            continue
+
+        if k not in target or target[k] is None:
+            target[k] = v
+
+        # if the key already exists, concatenate the values
+        elif isinstance(target[k], list):
+            target[k].extend(v)
+
+        elif isinstance(target[k], str):
+            try:
+                if len(target[k]) != len(v):
+                    target[k] = f"{target[k]}. {v}"
+            except Exception as exc:
+                raise ValueError(
+                    f"Failed to merge {description} for {name}: "
+                    f"key={k}, existing={target[k]!r}, new={v!r}, error={exc}"
+                ) from exc
+
+        elif isinstance(target[k], dict):
+            target[k].update(v)
+
+
+def merge_cached_metadata(
+    database: List[Dict[str, Any]],
+    metadata_chunks: Iterable[Dict[tuple, Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Merge cached metadata back into the datasets and exchanges of a database.
+
+    Scenario caches store the position of each dataset with its metadata, so
+    datasets are found without indexing the database. Datasets are indexed
+    by key only for metadata without a position, or whose position does not
+    hold the dataset any more.
+
+    :param database: Database the metadata was extracted from.
+    :type database: list
+    :param metadata_chunks: Metadata chunks, as yielded by :func:`iter_cached_metadata`.
+    :type metadata_chunks: collections.abc.Iterable
+    :return: The database, with its metadata restored.
+    :rtype: list
+    """
+
+    datasets_by_key = None
+
+    for metadata in metadata_chunks:
+        for key, metadata_values in metadata.items():
+            ds = None
+            position = metadata_values.get(METADATA_POSITION_KEY)
+            if position is not None and position < len(database):
+                candidate = database[position]
+                if (
+                    candidate["name"],
+                    candidate["reference product"],
+                    candidate["location"],
+                ) == key:
+                    ds = candidate
+
+            if ds is None:
+                if datasets_by_key is None:
+                    datasets_by_key = {
+                        (ds["name"], ds["reference product"], ds["location"]): ds
+                        for ds in database
+                    }
+                ds = datasets_by_key.get(key)
+                if ds is None:
+                    continue
+
+            _merge_metadata_values(
+                ds,
+                metadata_values,
+                _METADATA_SKIPPED_FIELDS,
+                "metadata",
+                ds.get("name"),
+            )
+
+            exchange_metadata = metadata_values.get("__exchange_metadata__")
+            if exchange_metadata:
+                for exchange, exchange_values in zip(
+                    ds.get("exchanges", []), exchange_metadata
+                ):
+                    if not exchange_values:
+                        continue
+                    _merge_metadata_values(
+                        exchange,
+                        exchange_values,
+                        (),
+                        "exchange metadata",
+                        ds.get("name"),
+                    )
+
+    return database
+
+
+@profiled
 def load_database(
     scenario: Dict[str, Any],
     original_database: List[Dict[str, Any]],
@@ -795,7 +1011,11 @@ def load_database(
     if "database filepath" not in scenario:
         if warning:
             print("WARNING: loading unmodified database!")
-        scenario["database"] = pickle.loads(pickle.dumps(original_database, -1))
+        if isinstance(original_database, SharedDatabase):
+            scenario["database"] = original_database.to_list()
+        else:
+            with _gc_paused():
+                scenario["database"] = pickle.loads(pickle.dumps(original_database, -1))
 
     else:
         filepath = scenario["database filepath"]
@@ -817,88 +1037,17 @@ def load_database(
                 scenario["database metadata cache filepath"],
                 scenario["inventories metadata cache filepath"],
             ]
-        datasets_by_key = {
-            (ds["name"], ds["reference product"], ds["location"]): ds
-            for ds in scenario["database"]
-        }
-
-        # check if metadata files exist
-        for filepath_metadata in filepaths:
-            if not cache_ref_exists(filepath_metadata):
-                raise FileNotFoundError(
-                    f"Metadata file {filepath_metadata} does not exist."
-                )
-            for metadata in iter_cached_metadata(filepath_metadata):
-                for key, metadata_values in metadata.items():
-                    ds = datasets_by_key.get(key)
-                    if ds is None:
-                        continue
 
-                    exchange_metadata = metadata_values.get("__exchange_metadata__")
-
-                    for k, v in metadata_values.items():
-                        if k == "__exchange_metadata__":
-                            continue
-                        if k in [
-                            "code",
-                            "worksheet name",
-                            "database",
-                        ]:
-                            continue
-
-                        if v is None or v == "None" or v == "nan" or not v:
-                            # skip None or empty values
-                            continue
-
-                        if k not in ds:
-                            ds[k] = v
-
-                        elif ds[k] is None:
-                            ds[k] = v
-
-                        else:
-                            # if the key already exists, concatenate the values
-                            if isinstance(ds[k], list):
-                                ds[k].extend(v)
-
-                            elif isinstance(ds[k], str):
-                                try:
-                                    if len(ds[k]) != len(v):
-                                        ds[k] = f"{ds[k]}. {v}"
-                                except Exception as exc:
-                                    raise ValueError(
-                                        f"Failed to merge metadata for {ds.get('name')}: "
-                                        f"key={k}, existing={ds[k]!r}, new={v!r}, error={exc}"
-                                    ) from exc
-
-                            elif isinstance(ds[k], dict):
-                                ds[k].update(v)
-
-                    if exchange_metadata:
-                        for exchange, exchange_values in zip(
-                            ds.get("exchanges", []), exchange_metadata
-                        ):
-                            for k, v in exchange_values.items():
-                                if v is None or v == "None" or v == "nan" or not v:
-                                    continue
-
-                                if k not in exchange:
-                                    exchange[k] = v
-                                elif exchange[k] is None:
-                                    exchange[k] = v
-                                elif isinstance(exchange[k], list):
-                                    exchange[k].extend(v)
-                                elif isinstance(exchange[k], str):
-                                    try:
-                                        if len(exchange[k]) != len(v):
-                                            exchange[k] = f"{exchange[k]}. {v}"
-                                    except Exception as exc:
-                                        raise ValueError(
-                                            f"Failed to merge exchange metadata for {ds.get('name')}: "
-                                            f"key={k}, existing={exchange[k]!r}, new={v!r}, error={exc}"
-                                        ) from exc
-                                elif isinstance(exchange[k], dict):
-                                    exchange[k].update(v)
+        def iter_metadata():
+            # check if metadata files exist
+            for filepath_metadata in filepaths:
+                if not cache_ref_exists(filepath_metadata):
+                    raise FileNotFoundError(
+                        f"Metadata file {filepath_metadata} does not exist."
+                    )
+                yield from iter_cached_metadata(filepath_metadata)
+
+        merge_cached_metadata(scenario["database"], iter_metadata())
 
     # scenario caches can preserve dataset codes directly; fall back to
     # generating new identifiers only when a dataset has none.
@@ -949,7 +1098,7 @@ def end_of_process(scenario: Dict[str, Any]) -> Dict[str, Any]:
     """
 
     # delete the database from the scenario
-    del scenario["database"]
+    scenario.pop("database", None)
 
     if "applied functions" in scenario:
         del scenario["applied functions"]
@@ -959,6 +1108,8 @@ def end_of_process(scenario: Dict[str, Any]) -> Dict[str, Any]:
     if "index" in scenario:
         scenario["index"] = {}
 
+    scenario.pop("validation context", None)
+
     return scenario
 
 
@@ -1181,45 +1332,97 @@ def _chunk_mapping(
         yield dict(chunk)
 
 
+class _HashingWriter:
+    """File wrapper feeding the bytes written to a hash."""
+
+    def __init__(self, file, digest):
+        self.file = file
+        self.digest = digest
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        return self.file.write(data)
+
+
+def _dump_pickle(obj: Any, file_name: Path, digest=None) -> None:
+    """Pickle `obj` to `file_name`, feeding the bytes written to `digest`."""
+
+    with open(file_name, "wb") as file:
+        pickle.dump(obj, file if digest is None else _HashingWriter(file, digest))
+
+
 def _write_cache_manifest(
-    cache_ref: Path, shard_paths: Sequence[Path], payload_kind: str
+    cache_ref: Path,
+    shard_paths: Sequence[Path],
+    payload_kind: str,
+    content_hash: Optional[str] = None,
 ) -> Path:
     manifest_path = get_cache_manifest_path(cache_ref)
 
+    manifest = {
+        "cache_format": 1,
+        "storage": "pickle-shards",
+        "kind": payload_kind,
+        "files": [shard_path.name for shard_path in shard_paths],
+    }
+    if content_hash is not None:
+        manifest["content_hash"] = content_hash
+
     with open(manifest_path, "w", encoding="utf-8") as file:
-        json.dump(
-            {
-                "cache_format": 1,
-                "storage": "pickle-shards",
-                "kind": payload_kind,
-                "files": [shard_path.name for shard_path in shard_paths],
-            },
-            file,
-        )
+        json.dump(manifest, file)
 
     return manifest_path
 
 
+def cache_content_hash(cache_ref: Path) -> Optional[str]:
+    """Return the SHA-256 of the content of a cache, recorded in its manifest
+    when the cache was created.
+
+    The database of a cache created by :func:`create_cache` is a single
+    pickle: its hash, which also covers its metadata, is recorded in the
+    manifest of the metadata.
+
+    :param cache_ref: Cache reference.
+    :type cache_ref: pathlib.Path
+    :return: Hexadecimal digest, or ``None`` for caches created before
+        content hashes were recorded.
+    :rtype: str, optional
+    """
+
+    cache_ref = resolve_cache_ref(cache_ref)
+
+    if not _is_cache_manifest(cache_ref):
+        cache_ref = resolve_cache_ref(
+            Path(str(cache_ref).replace(".pickle", " (metadata).pickle"))
+        )
+        if not _is_cache_manifest(cache_ref) or not cache_ref.exists():
+            return None
+
+    return _load_cache_manifest(cache_ref).get("content_hash")
+
+
 def _write_cache_shards(
     cache_ref: Path, chunks: Iterable[Any], payload_kind: str
 ) -> Path:
     shard_paths = []
+    digest = hashlib.sha256()
 
     for index, chunk in enumerate(chunks):
         shard_path = cache_ref.with_name(f"{cache_ref.name}.part-{index:04d}.pickle")
-        with open(shard_path, "wb") as file:
-            pickle.dump(chunk, file)
+        _dump_pickle(chunk, shard_path, digest)
         shard_paths.append(shard_path)
 
     if not shard_paths:
         shard_path = cache_ref.with_name(f"{cache_ref.name}.part-0000.pickle")
-        with open(shard_path, "wb") as file:
-            pickle.dump([] if payload_kind == "database" else {}, file)
+        _dump_pickle([] if payload_kind == "database" else {}, shard_path, digest)
         shard_paths.append(shard_path)
 
-    return _write_cache_manifest(cache_ref, shard_paths, payload_kind)
+    return _write_cache_manifest(
+        cache_ref, shard_paths, payload_kind, digest.hexdigest()
+    )
 
 
+@profiled
 def create_cache(
     database: List[Dict[str, Any]], file_name: Path
 ) -> Tuple[List[Dict[str, Any]], Path]:
@@ -1239,6 +1442,8 @@ def create_cache(
     metadata_cache_file = Path(str(file_name).replace(".pickle", " (metadata).pickle"))
     metadata_chunk_size = 5_000
     metadata_shard_paths = []
+    # content hash of the database and its metadata
+    digest = hashlib.sha256()
     metadata_chunk: Dict[tuple, Dict[str, Any]] = {}
 
     for dataset in database:
@@ -1252,8 +1457,7 @@ def create_cache(
             shard_path = metadata_cache_file.with_name(
                 f"{metadata_cache_file.name}.part-{len(metadata_shard_paths):04d}.pickle"
             )
-            with open(shard_path, "wb") as file:
-                pickle.dump(metadata_chunk, file)
+            _dump_pickle(metadata_chunk, shard_path, digest)
             metadata_shard_paths.append(shard_path)
             metadata_chunk = {}
 
@@ -1261,27 +1465,25 @@ def create_cache(
         shard_path = metadata_cache_file.with_name(
             f"{metadata_cache_file.name}.part-{len(metadata_shard_paths):04d}.pickle"
         )
-        with open(shard_path, "wb") as file:
-            pickle.dump(metadata_chunk, file)
+        _dump_pickle(metadata_chunk, shard_path, digest)
         metadata_shard_paths.append(shard_path)
     elif not metadata_shard_paths:
         shard_path = metadata_cache_file.with_name(
             f"{metadata_cache_file.name}.part-0000.pickle"
         )
-        with open(shard_path, "wb") as file:
-            pickle.dump({}, file)
+        _dump_pickle({}, shard_path, digest)
         metadata_shard_paths.append(shard_path)
 
-    with open(file_name, "wb") as file:
-        pickle.dump(database, file)
+    _dump_pickle(database, file_name, digest)
 
     metadata_cache_ref = _write_cache_manifest(
-        metadata_cache_file, metadata_shard_paths, "metadata"
+        metadata_cache_file, metadata_shard_paths, "metadata", digest.hexdigest()
     )
 
     return database, metadata_cache_ref
 
 
+@profiled
 def create_scenario_cache(
     database: List[Dict[str, Any]], file_name: Path
 ) -> Tuple[Path, Path]:
@@ -1292,11 +1494,13 @@ def create_scenario_cache(
     metadata_cache_file = Path(str(file_name).replace(".pickle", " (metadata).pickle"))
     metadata_chunk_size = 1_000
     metadata_shard_paths = []
+    digest = hashlib.sha256()
     metadata_chunk: Dict[tuple, Dict[str, Any]] = {}
 
-    for dataset in database:
+    for position, dataset in enumerate(database):
         key, metadata = _metadata_for_scenario_dataset(dataset)
         if metadata:
+            metadata[METADATA_POSITION_KEY] = position
             metadata_chunk[key] = metadata
 
         _trim_scenario_dataset_in_place(dataset)
@@ -1305,8 +1509,7 @@ def create_scenario_cache(
             shard_path = metadata_cache_file.with_name(
                 f"{metadata_cache_file.name}.part-{len(metadata_shard_paths):04d}.pickle"
             )
-            with open(shard_path, "wb") as file:
-                pickle.dump(metadata_chunk, file)
+            _dump_pickle(metadata_chunk, shard_path, digest)
             metadata_shard_paths.append(shard_path)
             metadata_chunk = {}
 
@@ -1314,27 +1517,122 @@ def create_scenario_cache(
         shard_path = metadata_cache_file.with_name(
             f"{metadata_cache_file.name}.part-{len(metadata_shard_paths):04d}.pickle"
         )
-        with open(shard_path, "wb") as file:
-            pickle.dump(metadata_chunk, file)
+        _dump_pickle(metadata_chunk, shard_path, digest)
         metadata_shard_paths.append(shard_path)
     elif not metadata_shard_paths:
         shard_path = metadata_cache_file.with_name(
             f"{metadata_cache_file.name}.part-0000.pickle"
         )
-        with open(shard_path, "wb") as file:
-            pickle.dump({}, file)
+        _dump_pickle({}, shard_path, digest)
         metadata_shard_paths.append(shard_path)
 
     database_cache_ref = _write_cache_shards(
         file_name, _chunk_sequence(database, 2_500), "database"
     )
     metadata_cache_ref = _write_cache_manifest(
-        metadata_cache_file, metadata_shard_paths, "metadata"
+        metadata_cache_file, metadata_shard_paths, "metadata", digest.hexdigest()
     )
 
     return database_cache_ref, metadata_cache_ref
 
 
+def create_checkpoint_cache(database: List[Dict[str, Any]], file_name: Path) -> Path:
+    """Persist a scenario database in shard files, without trimming it.
+
+    Unlike :func:`create_scenario_cache`, the datasets are left untouched, so
+    that the update of the scenario can carry on with the in-memory database.
+
+    :param database: Database to checkpoint.
+    :type database: list
+    :param file_name: Cache reference of the checkpoint.
+    :type file_name: pathlib.Path
+    :return: Path of the checkpoint manifest.
+    :rtype: pathlib.Path
+    """
+
+    DIR_CACHED_FILES.mkdir(parents=True, exist_ok=True)
+
+    return _write_cache_shards(file_name, _chunk_sequence(database, 2_500), "database")
+
+
+def _checkpoint_state_path(key: str) -> Path:
+    return DIR_CHECKPOINTS / f"{key}.json"
+
+
+def write_checkpoint(
+    database: List[Dict[str, Any]], key: str, applied_functions: List[str]
+) -> Path:
+    """Checkpoint a scenario database, with the sectors applied to it.
+
+    Checkpoints are kept in ``DIR_CHECKPOINTS``, which is not cleared when a
+    :class:`NewDatabase` is created, under the key of the scenario inputs: a
+    new process updating the same scenario finds them. The state file naming
+    the checkpoint is replaced atomically, after the checkpoint is written,
+    so that a crash while writing leaves the previous checkpoint usable.
+
+    :param database: Database to checkpoint. It is left untouched.
+    :type database: list
+    :param key: Key of the scenario inputs.
+    :type key: str
+    :param applied_functions: Sectors applied to the database.
+    :type applied_functions: list
+    :return: Path of the checkpoint manifest.
+    :rtype: pathlib.Path
+    """
+
+    DIR_CHECKPOINTS.mkdir(parents=True, exist_ok=True)
+    previous = find_checkpoint(key)
+
+    cache_ref = create_checkpoint_cache(
+        database, DIR_CHECKPOINTS / f"{key}.{uuid.uuid4().hex}.pickle"
+    )
+
+    state_path = _checkpoint_state_path(key)
+    tmp_path = state_path.with_name(f".{state_path.name}.{uuid.uuid4().hex}")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(
+            {"database": cache_ref.name, "applied functions": applied_functions},
+            file,
+        )
+    os.replace(tmp_path, state_path)
+
+    if previous is not None:
+        delete_cache_ref(previous[0])
+
+    return cache_ref
+
+
+def find_checkpoint(key: str) -> Optional[Tuple[Path, List[str]]]:
+    """Return the checkpoint of the scenario inputs `key`, if any.
+
+    :param key: Key of the scenario inputs.
+    :type key: str
+    :return: Path of the checkpoint manifest, and sectors applied to it.
+    :rtype: tuple, optional
+    """
+
+    try:
+        with open(_checkpoint_state_path(key), encoding="utf-8") as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    cache_ref = DIR_CHECKPOINTS / state["database"]
+    if not cache_ref.exists():
+        return None
+
+    return cache_ref, list(state["applied functions"])
+
+
+def delete_checkpoint(key: str) -> None:
+    """Delete the checkpoint of the scenario inputs `key`, if any."""
+
+    checkpoint = find_checkpoint(key)
+    _checkpoint_state_path(key).unlink(missing_ok=True)
+    if checkpoint is not None:
+        delete_cache_ref(checkpoint[0])
+
+
 def load_metadata(file_name: Path) -> Dict[str, Any]:
     """Load metadata stored alongside a cached database.
 
@@ -4,15 +4,16 @@ This module contains classes for validating datasets after they have been transf
 
 import csv
 import math
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 import numpy as np
 import pandas as pd
 import yaml
 
 from .filesystem_constants import DATA_DIR
-from .geomap import Geomap
+from .geomap import get_geomap
 from .logger import create_logger
+from .profiling import profiled
 from .utils import rescale_exchanges, get_uuids
 from .inventory_imports import (
     get_biosphere_code,
@@ -256,9 +257,103 @@ def convert_numpy_generics_to_float(
     return _sanitize(records)
 
 
+def _dataset_key(dataset: dict) -> tuple:
+    return (
+        dataset.get("name"),
+        dataset.get("reference product"),
+        dataset.get("location"),
+    )
+
+
+def _dataset_fingerprint(dataset: dict) -> int:
+    """
+    Cheap fingerprint of the exchanges of a dataset: it changes when
+    an exchange is added, removed, relinked or rescaled.
+    """
+    return hash(
+        tuple(
+            (exc.get("name"), exc.get("product"), exc.get("location"), exc["amount"])
+            for exc in dataset.get("exchanges", [])
+        )
+    )
+
+
+class ValidationContext:
+    """
+    Tables shared by the validators of a scenario, built once instead of
+    once per validator, and the state of the database at the last
+    validation, so that sector checks only inspect the datasets
+    changed since then.
+
+    :ivar model: IAM model (e.g., "remind", "image")
+    :ivar version: ecoinvent version
+    """
+
+    def __init__(self, model: str, version: str = None, database: list = None):
+        self.model = model
+        self.version = version
+        self.fingerprints = None
+
+        if database is not None:
+            self.changed_since_last_validation(database)
+
+    @property
+    def geo(self):
+        return get_geomap(self.model)
+
+    @cached_property
+    def biosphere_codes(self) -> dict:
+        return get_biosphere_code(self.version)
+
+    @cached_property
+    def classifications(self) -> dict:
+        return get_classifications()
+
+    def changed_since_last_validation(self, database: list) -> list:
+        """
+        Return the datasets of `database` which were created or whose
+        exchanges changed since the last call, and record the current
+        state of the database. The first call returns all datasets.
+
+        :param database: list of datasets
+        :return: list of changed datasets
+        """
+
+        fingerprints = {}
+        changed = []
+        for dataset in database:
+            key = _dataset_key(dataset)
+            fingerprint = _dataset_fingerprint(dataset)
+            fingerprints[key] = fingerprint
+            if self.fingerprints is None or self.fingerprints.get(key) != fingerprint:
+                changed.append(dataset)
+
+        self.fingerprints = fingerprints
+        return changed
+
+
+def get_validation_context(scenario: dict, version: str = None) -> ValidationContext:
+    """
+    Return the validation context of a scenario, creating it if needed.
+
+    :param scenario: scenario dictionary
+    :param version: ecoinvent version
+    :return: validation context
+    """
+    if scenario.get("validation context") is None:
+        scenario["validation context"] = ValidationContext(
+            model=scenario["model"], version=version
+        )
+    return scenario["validation context"]
+
+
 class BaseDatasetValidator:
     """
     Base class for validating datasets after they have been transformed.
+
+    When a :class:`ValidationContext` is given, its tables are reused and
+    sector checks only inspect :attr:`datasets_to_check`, the datasets
+    changed since the previous validation of the scenario.
     """
 
     def __init__(
@@ -274,7 +369,15 @@ class BaseDatasetValidator:
         version=None,
         system_model="cutoff",
         extra_regions=None,
+        context=None,
     ):
+        if context is None:
+            context = ValidationContext(model=model, version=version)
+            self.datasets_to_check = database
+        else:
+            self.datasets_to_check = context.changed_since_last_validation(database)
+
+        self.context = context
         self.original_database = original_database
         self.database = database
         self.model = model
@@ -283,12 +386,12 @@ class BaseDatasetValidator:
         self.regions = regions
         self.valid_regions = set(regions or []) | set(extra_regions or [])
         self.db_name = db_name
-        self.geo = Geomap(model)
+        self.geo = context.geo
         self.minor_issues_log = []
         self.major_issues_log = []
         self.biosphere_name = biosphere_name
-        self.biosphere_codes = get_biosphere_code(version)
-        self.classifications = get_classifications()
+        self.biosphere_codes = context.biosphere_codes
+        self.classifications = context.classifications
 
     def check_matrix_squareness(self):
         """
@@ -397,10 +500,18 @@ class BaseDatasetValidator:
             for ds in self.original_database
         ]
 
-        new_activities = [
+        new_activities = {
             (ds["name"], ds["reference product"], ds["location"])
             for ds in self.database
-        ]
+        }
+
+        # activities indexed by name and location, with repeats kept,
+        # to find the product of exchanges that lack one
+        activities_by_name_and_location = {}
+        for ds in self.database:
+            activities_by_name_and_location.setdefault(
+                (ds["name"], ds["location"]), []
+            ).append((ds["name"], ds["reference product"], ds["location"]))
 
         for ds in original_activities:
             if ds not in new_activities:
@@ -431,11 +542,9 @@ class BaseDatasetValidator:
                 if exc["type"] == "technosphere" and exc.get("product") is None:
                     # find it in new_activities based on the name and location
                     # of the exchange
-                    candidate = [
-                        x
-                        for x in new_activities
-                        if x[0] == exc["name"] and x[2] == exc["location"]
-                    ]
+                    candidate = activities_by_name_and_location.get(
+                        (exc["name"], exc["location"]), []
+                    )
                     if len(candidate) == 1:
                         exc["product"] = candidate[0][1]
                     elif len(candidate) > 1:
@@ -834,6 +943,7 @@ class BaseDatasetValidator:
                 f"{entry['location']}|{entry['severity']}|{entry['reason']}|{entry['message']}"
             )
 
+    @profiled
     def run_all_checks(self):
         # Run all checks
         print("Running all checks...")
@@ -855,6 +965,7 @@ class BaseDatasetValidator:
         self.check_uncertainty()
         self._finalize_logs()
 
+    @profiled
     def run_fast_export_checks(self):
         """
         Run a reduced validation pass for the fast Brightway export path.
@@ -889,14 +1000,16 @@ class BaseDatasetValidator:
 
 
 class BatteryValidation(BaseDatasetValidator):
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, context=context)
         self.iam_data = iam_data
 
     def check_battery_capacity(self):
         # Check that the battery capacity is within the expected range
         for ds in ws.get_many(
-            self.database,
+            self.datasets_to_check,
             ws.contains("name", "market for battery capacity"),
             ws.equals("location", "GLO"),
             ws.equals("unit", "kilowatt hour"),
@@ -922,7 +1035,7 @@ class BatteryValidation(BaseDatasetValidator):
                 )
 
         for ds in ws.get_many(
-            self.database,
+            self.datasets_to_check,
             ws.contains("name", "market for battery capacity, "),
             ws.equals("location", "GLO"),
             ws.equals("unit", "kilowatt hour"),
@@ -968,6 +1081,7 @@ class BatteryValidation(BaseDatasetValidator):
                     ds, "Energy density too high", message, issue_type="major"
                 )
 
+    @profiled
     def run_battery_checks(self):
         self.check_battery_capacity()
         self.save_log()
@@ -979,8 +1093,10 @@ class BatteryValidation(BaseDatasetValidator):
 
 
 class HeatValidation(BaseDatasetValidator):
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, context=context)
         self.iam_data = iam_data
 
     def check_heat_markets_input(self):
@@ -989,7 +1105,7 @@ class HeatValidation(BaseDatasetValidator):
         # the market for heat is equal to 1
 
         for ds in ws.get_many(
-            self.database,
+            self.datasets_to_check,
             ws.either(
                 *[
                     ws.equals("name", name)
@@ -1021,7 +1137,7 @@ class HeatValidation(BaseDatasetValidator):
         # Check that the heat conversion efficiency
         # is within the expected range
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 "heat" in ds["name"]
                 and ds["unit"] == "megajoule"
@@ -1286,7 +1402,7 @@ class HeatValidation(BaseDatasetValidator):
         """Ensure each end-use market links to secondary heat at most once."""
 
         for ds in ws.get_many(
-            self.database,
+            self.datasets_to_check,
             ws.either(
                 ws.equals("name", "market for heat, for buildings"),
                 ws.equals("name", "market for heat, district or industrial"),
@@ -1328,6 +1444,7 @@ class HeatValidation(BaseDatasetValidator):
                     f"Negative values found in IAM heat layer {attribute}."
                 )
 
+    @profiled
     def run_heat_checks(self):
         self.check_heat_iam_values()
         self.check_heat_markets_input()
@@ -1342,8 +1459,10 @@ class HeatValidation(BaseDatasetValidator):
 
 
 class TransportValidation(BaseDatasetValidator):
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, context=context)
         self.iam_data = iam_data
         self.euro_class_map = {
             "EURO-III": 3,
@@ -1362,7 +1481,7 @@ class TransportValidation(BaseDatasetValidator):
     def validate_and_normalize_exchanges(self):
         for act in [
             a
-            for a in self.database
+            for a in self.datasets_to_check
             if a["name"].startswith("transport, ")
             and ", unspecified" in a["name"]
             and "hydrogen" not in a["name"]
@@ -1381,7 +1500,7 @@ class TransportValidation(BaseDatasetValidator):
     def check_vehicles(self):
         for act in [
             a
-            for a in self.database
+            for a in self.datasets_to_check
             if a["name"].startswith("transport, ") and ", unspecified" in a["name"]
         ]:
             # check that all transport exchanges are differently named
@@ -1439,7 +1558,7 @@ class TransportValidation(BaseDatasetValidator):
         # Pre-filter datasets
         relevant_ds = [
             ds
-            for ds in self.database
+            for ds in self.datasets_to_check
             if ds["name"].startswith(vehicle_name)
             and ds["location"] in self.regions
             and any(
@@ -1491,7 +1610,7 @@ class TransportValidation(BaseDatasetValidator):
         # check that the efficiency of the car production datasets
         # is within the expected range
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if "plugin" in ds["name"]:
                 continue
 
@@ -1588,10 +1707,13 @@ class TransportValidation(BaseDatasetValidator):
 
 class TruckValidation(TransportValidation):
 
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database, iam_data)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, iam_data, context)
         self.exhaust = load_truck_exhaust_pollutants()
 
+    @profiled
     def run_checks(self):
         self.run_vehicle_checks()
         self.check_vehicle_efficiency(
@@ -1607,10 +1729,13 @@ class TruckValidation(TransportValidation):
 
 class CarValidation(TransportValidation):
 
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database, iam_data)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, iam_data, context)
         self.exhaust = load_car_exhaust_pollutants()
 
+    @profiled
     def run_checks(self):
         self.run_vehicle_checks()
         self.check_pollutant_emissions(vehicle_name="transport, passenger car")
@@ -1625,8 +1750,10 @@ class CarValidation(TransportValidation):
 
 
 class ElectricityValidation(BaseDatasetValidator):
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, context=context)
         self.iam_data = iam_data
 
     def check_electricity_market_composition(self):
@@ -1639,7 +1766,7 @@ class ElectricityValidation(BaseDatasetValidator):
             )
 
         # checks that inputs in an electricity markets equal more or less to 1
-        for dataset in self.database:
+        for dataset in self.datasets_to_check:
             if (
                 dataset["name"].lower().startswith("market group for electricity")
                 and dataset["location"] in self.regions
@@ -1676,7 +1803,7 @@ class ElectricityValidation(BaseDatasetValidator):
         # one technosphere exchange
         # linking to the newly created markets
 
-        for dataset in self.database:
+        for dataset in self.datasets_to_check:
             if (
                 (
                     dataset["name"].lower().startswith("market group for electricity")
@@ -1786,7 +1913,7 @@ class ElectricityValidation(BaseDatasetValidator):
                 dim="variables"
             )
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"] == "market group for electricity, high voltage"
                 and ds["location"] in self.regions
@@ -1815,7 +1942,7 @@ class ElectricityValidation(BaseDatasetValidator):
         # input from medium voltage electricity in the low voltage
         # market is superior to 1
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"] == "market group for electricity, low voltage"
                 and ds["location"] in self.regions
@@ -1860,7 +1987,7 @@ class ElectricityValidation(BaseDatasetValidator):
         electricity_datasets = electricity_vars["electricity datasets"]
         efficiencies = electricity_vars["efficiencies"]
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["unit"] == "kilowatt hour"
                 and any(ds["name"].startswith(x) for x in electricity_datasets)
@@ -1931,6 +2058,7 @@ class ElectricityValidation(BaseDatasetValidator):
                         message,
                     )
 
+    @profiled
     def run_electricity_checks(self):
         self.check_electricity_market_composition()
         self.check_old_datasets()
@@ -1945,8 +2073,10 @@ class ElectricityValidation(BaseDatasetValidator):
 
 
 class FuelsValidation(BaseDatasetValidator):
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, context=context)
         self.iam_data = iam_data
 
     def check_fuel_market_composition(self):
@@ -1962,7 +2092,7 @@ class FuelsValidation(BaseDatasetValidator):
             "market for liquefied petroleum gas",
         ]
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 any(ds["name"].startswith(x) for x in fuel_market_names)
                 and ds["location"] in self.regions
@@ -2019,7 +2149,7 @@ class FuelsValidation(BaseDatasetValidator):
 
             if len(regionalized_markets) > 0:
 
-                for ds in self.database:
+                for ds in self.datasets_to_check:
                     if (
                         ds["name"].startswith(fuel)
                         and ds["location"] not in self.regions
@@ -2053,7 +2183,7 @@ class FuelsValidation(BaseDatasetValidator):
         # check that the input of electricity for hydrogen production
         # is within the expected range
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith("hydrogen production")
                 and "electrolysis" in ds["name"]
@@ -2095,7 +2225,7 @@ class FuelsValidation(BaseDatasetValidator):
                 if ds["name"] == market_name and ds["location"] in self.regions:
                     regions_with_fuel_markets.add(ds["location"])
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if ds["location"] not in ["RoW", "GLO", "World"]:
                 for e in ds["exchanges"]:
                     if e["type"] == "technosphere" and any(
@@ -2128,6 +2258,7 @@ class FuelsValidation(BaseDatasetValidator):
                                         issue_type="major",
                                     )
 
+    @profiled
     def run_fuel_checks(self):
         self.check_fuel_market_composition()
         self.check_empty_fuel_markets()
@@ -2143,9 +2274,25 @@ class FuelsValidation(BaseDatasetValidator):
 
 class SteelValidation(BaseDatasetValidator):
     def __init__(
-        self, model, scenario, year, regions, database, iam_data, system_model
+        self,
+        model,
+        scenario,
+        year,
+        regions,
+        database,
+        iam_data,
+        system_model,
+        context=None,
     ):
-        super().__init__(model, scenario, year, regions, database, system_model)
+        super().__init__(
+            model,
+            scenario,
+            year,
+            regions,
+            database,
+            system_model=system_model,
+            context=context,
+        )
         self.iam_data = iam_data
         self.system_model = system_model
 
@@ -2153,7 +2300,7 @@ class SteelValidation(BaseDatasetValidator):
         # check that the steel markets inputs
         # equal to 1
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith("market for steel, ")
                 and ds["location"] in self.regions
@@ -2255,7 +2402,7 @@ class SteelValidation(BaseDatasetValidator):
             "market for steel, unalloyed",
         ]
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 any(ds["name"].startswith(x) for x in market_names)
                 and ds["location"] not in self.regions
@@ -2273,7 +2420,7 @@ class SteelValidation(BaseDatasetValidator):
             "market for steel, unalloyed",
         ]
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             for e in ds["exchanges"]:
                 if e["type"] == "technosphere" and any(
                     e["name"].startswith(x) for x in fuel_market_names
@@ -2291,7 +2438,7 @@ class SteelValidation(BaseDatasetValidator):
         has the correct location.
         """
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith(
                     "steel production, blast furnace-basic oxygen furnace"
@@ -2327,7 +2474,7 @@ class SteelValidation(BaseDatasetValidator):
         # check that low-alloyed steel produced by EAF
         # use at least 0.4 MWh electricity per kg of steel
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith("steel production, electric")
                 and "steel" in ds["reference product"]
@@ -2363,7 +2510,7 @@ class SteelValidation(BaseDatasetValidator):
         # check pig iron production datasets
         # against expected values
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith("pig iron production")
                 and ds["location"] in self.regions
@@ -2429,6 +2576,7 @@ class SteelValidation(BaseDatasetValidator):
                         issue_type="major",
                     )
 
+    @profiled
     def run_steel_checks(self):
         self.check_steel_markets()
         self.check_empty_markets()
@@ -2445,15 +2593,17 @@ class SteelValidation(BaseDatasetValidator):
 
 
 class CementValidation(BaseDatasetValidator):
-    def __init__(self, model, scenario, year, regions, database, iam_data):
-        super().__init__(model, scenario, year, regions, database)
+    def __init__(
+        self, model, scenario, year, regions, database, iam_data, context=None
+    ):
+        super().__init__(model, scenario, year, regions, database, context=context)
         self.iam_data = iam_data
 
     def check_cement_markets(self):
         # check that the cement markets inputs
         # equal to 1
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith("market for cement, ")
                 and ds["location"] in self.regions
@@ -2477,7 +2627,7 @@ class CementValidation(BaseDatasetValidator):
                         issue_type="major",
                     )
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith("market for clinker, ")
                 and ds["location"] in self.regions
@@ -2507,7 +2657,7 @@ class CementValidation(BaseDatasetValidator):
             "market for clinker",
         ]
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 any(ds["name"].startswith(x) for x in market_names)
                 and ds["location"] not in self.regions
@@ -2527,7 +2677,7 @@ class CementValidation(BaseDatasetValidator):
             "market for clinker",
         ]
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             for e in ds["exchanges"]:
                 if e["type"] == "technosphere" and any(
                     e["name"].startswith(x) for x in fuel_market_names
@@ -2543,7 +2693,7 @@ class CementValidation(BaseDatasetValidator):
         # Check that accounted clinker fuel energy respects the practical
         # lower bound for efficient kiln technologies.
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith("clinker production")
                 and ds["location"] in self.regions
@@ -2648,6 +2798,7 @@ class CementValidation(BaseDatasetValidator):
                         issue_type="minor",
                     )
 
+    @profiled
     def run_cement_checks(self):
         self.check_cement_markets()
         self.check_empty_markets()
@@ -2662,9 +2813,25 @@ class CementValidation(BaseDatasetValidator):
 
 class BiomassValidation(BaseDatasetValidator):
     def __init__(
-        self, model, scenario, year, regions, database, iam_data, system_model
+        self,
+        model,
+        scenario,
+        year,
+        regions,
+        database,
+        iam_data,
+        system_model,
+        context=None,
     ):
-        super().__init__(model, scenario, year, regions, database, system_model)
+        super().__init__(
+            model,
+            scenario,
+            year,
+            regions,
+            database,
+            system_model=system_model,
+            context=context,
+        )
         self.iam_data = iam_data
         self.system_model = system_model
 
@@ -2672,7 +2839,7 @@ class BiomassValidation(BaseDatasetValidator):
         # check that the biomass markets inputs
         # equal to 1
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"].startswith(
                     "market for lignocellulosic biomass, used as fuel"
@@ -2701,7 +2868,7 @@ class BiomassValidation(BaseDatasetValidator):
         regions = self.iam_data.biomass_mix.coords["region"].values
 
         for dataset in ws.get_many(
-            self.database,
+            self.datasets_to_check,
             ws.either(*[ws.equals("unit", u) for u in ["kilowatt hour", "megajoule"]]),
             ws.either(
                 *[ws.contains("name", n) for n in ["electricity", "heat", "power"]]
@@ -2769,7 +2936,7 @@ class BiomassValidation(BaseDatasetValidator):
 
         is_consequential = self.system_model == "consequential"
 
-        for ds in self.database:
+        for ds in self.datasets_to_check:
             if (
                 ds["name"] == "market for lignocellulosic biomass, used as fuel"
                 and ds["location"] in self.regions
@@ -2826,6 +2993,7 @@ class BiomassValidation(BaseDatasetValidator):
                         issue_type="major",
                     )
 
+    @profiled
     def run_biomass_checks(self):
         self.check_biomass_markets()
         self.checking_linking()
@@ -2840,15 +3008,32 @@ class BiomassValidation(BaseDatasetValidator):
 
 class MetalsValidation(BaseDatasetValidator):
     def __init__(
-        self, model, scenario, year, regions, database, iam_data, system_model, version
+        self,
+        model,
+        scenario,
+        year,
+        regions,
+        database,
+        iam_data,
+        system_model,
+        version,
+        context=None,
     ):
         super().__init__(
-            model, scenario, year, regions, database, system_model, version
+            model,
+            scenario,
+            year,
+            regions,
+            database,
+            version=version,
+            system_model=system_model,
+            context=context,
         )
         self.iam_data = iam_data
         self.system_model = system_model
         self.version = version
 
+    @profiled
     def run_metals_checks(self):
         self.check_market_balance()
         self.check_split_yaml_consistency()
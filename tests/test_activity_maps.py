@@ -1,4 +1,7 @@
 # content of test_activity_maps.py
+from collections import OrderedDict
+from copy import deepcopy
+
 import pytest
 
 from premise.activity_maps import InventorySet
@@ -159,3 +162,32 @@ def test_heat_pump_dac_maps_to_sorbent_inventory_for_selected_models(model):
     assert (
         "direct air capture (solvent, high-temp, heat pump) with storage" not in cdr_map
     )
+
+
+def test_filter_results_are_shared_by_databases_of_the_same_structure(monkeypatch):
+    evaluated = []
+    filter_positions = InventorySet._filter_positions
+
+    def counting(filtr, database):
+        evaluated.append(len(database))
+        return filter_positions(filtr, database)
+
+    monkeypatch.setattr(InventorySet, "_filter_positions", staticmethod(counting))
+    monkeypatch.setattr("premise.activity_maps._FILTER_RESULTS", OrderedDict())
+
+    filters = {"coal": {"fltr": "hard coal", "mask": "co-generation"}}
+    year_1, year_2 = deepcopy(dummy_minimal_db), deepcopy(dummy_minimal_db)
+    year_2[0]["location"] = "FR"
+
+    first = InventorySet(year_1).generate_sets_from_filters(filters)
+    second = InventorySet(year_2).generate_sets_from_filters(filters)
+
+    assert len(evaluated) == 1
+    assert [ds["name"] for ds in second["coal"]] == [ds["name"] for ds in first["coal"]]
+    assert all(any(ds is d for d in year_2) for ds in second["coal"])
+
+    year_2[7]["name"] = "electricity production, lignite"
+    third = InventorySet(year_2).generate_sets_from_filters(filters)
+
+    assert len(evaluated) == 2
+    assert len(third["coal"]) == len(first["coal"]) - 1
@@ -20,6 +20,7 @@ def get_cdr_transform(
 ):
     cdr = object.__new__(CarbonDioxideRemoval)
     cdr.year = 2030
+    cdr._cdr_efficiencies_by_carrier = {}
     cdr.iam_data = SimpleNamespace(
         cdr_technology_efficiencies=xr.DataArray(
             np.array([[[[electricity_efficiency]], [[heat_efficiency]]]]),
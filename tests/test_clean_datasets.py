@@ -4,7 +4,15 @@ from pathlib import Path
 import pytest
 from bw2data.database import DatabaseChooser
 
-from premise.clean_datasets import DatabaseCleaner
+from premise.clean_datasets import (
+    CleaningPipeline,
+    CleaningStep,
+    DatabaseCleaner,
+    extract_brightway_databases_for_premise,
+    extract_brightway_databases_from_sqlite,
+    remove_categories,
+    strip_string_from_spaces,
+)
 
 
 def get_dict():
@@ -138,3 +146,57 @@ def test_brightway_extraction_omits_redundant_fields():
     assert tech_exc["product"] == "product two"
     assert tech_exc["location"] == "RER"
     assert "database" not in tech_exc
+
+
+def test_sqlite_extraction_matches_orm_extraction_and_cleaning():
+    dummy_db, dummy_bio = get_dict()
+    dummy_db[("dummy_db", "6543541")]["name"] = " fake activity\xa0"
+    dummy_db[("dummy_db", "6543541")]["categories"] = ("a category",)
+    DatabaseChooser("dummy_bio").write(dummy_bio)
+    DatabaseChooser("dummy_db").write(dummy_db)
+
+    for kwargs in ({}, {"add_properties": True, "add_identifiers": True}):
+        expected = strip_string_from_spaces(
+            remove_categories(
+                extract_brightway_databases_for_premise("dummy_db", **kwargs)
+            )
+        )
+
+        assert extract_brightway_databases_from_sqlite("dummy_db", **kwargs) == expected
+
+    assert expected[0]["name"] == "fake activity"
+    assert "categories" not in expected[0]
+
+
+def test_cleaning_pipeline_applies_steps_in_order_in_one_traversal():
+    database = [
+        {"name": "a", "exchanges": [{"amount": 0.0}, {"amount": 1.0}]},
+        {"name": "b", "exchanges": [{"amount": 2.0}]},
+    ]
+
+    def append_exchange(dataset):
+        dataset["exchanges"].append({"amount": 0.0})
+
+    def tag(exc, dataset):
+        exc["tagged"] = True
+        return exc
+
+    pipeline = CleaningPipeline(
+        [
+            CleaningStep(
+                "remove zeros",
+                exchange_hook=lambda exc, dataset: exc if exc["amount"] else None,
+            ),
+            CleaningStep("append", dataset_hook=append_exchange),
+            CleaningStep("tag", exchange_hook=tag),
+        ]
+    )
+    pipeline.run(database)
+
+    # exchanges added by a step only go through the following steps
+    assert database[0]["exchanges"] == [
+        {"amount": 1.0, "tagged": True},
+        {"amount": 0.0, "tagged": True},
+    ]
+    assert len(database[1]["exchanges"]) == 2
+    assert set(pipeline.timings) == {"remove zeros", "append", "tag"}
@@ -0,0 +1,134 @@
+import copy
+import pickle
+
+import pytest
+
+from premise.compact import (
+    CompactExchange,
+    SymbolTable,
+    compact_database,
+    compact_exchange,
+    expand_database,
+    rescale_exchange,
+)
+from premise.utils import create_scenario_cache, load_cached_database
+
+
+def _exchange(**fields):
+    return {
+        "name": "market for electricity, low voltage",
+        "product": "electricity, low voltage",
+        "location": "CH",
+        "unit": "kilowatt hour",
+        "type": "technosphere",
+        "amount": 0.5,
+        "uncertainty type": 2,
+        "loc": -0.69,
+        "scale": 0.1,
+        **fields,
+    }
+
+
+def _database():
+    return [
+        {
+            "name": "steel production",
+            "reference product": "steel",
+            "location": location,
+            "unit": "kilogram",
+            "exchanges": [
+                {
+                    "name": "steel production",
+                    "product": "steel",
+                    "location": location,
+                    "unit": "kilogram",
+                    "type": "production",
+                    "amount": 1.0,
+                    "production volume": 1000.0,
+                },
+                _exchange(),
+            ],
+        }
+        for location in ("CH", "DE")
+    ]
+
+
+def test_compact_exchange_behaves_as_a_dictionary():
+    exc = compact_exchange(_exchange(comment="from a study"))
+
+    assert exc == _exchange(comment="from a study")
+    assert dict(exc) == _exchange(comment="from a study")
+    assert exc["amount"] == 0.5 and exc.get("comment") == "from a study"
+    assert "categories" not in exc and exc.get("categories") is None
+    assert len(exc) == 10
+
+    exc["amount"] *= 2
+    exc["input"] = ("biosphere3", "abc")
+    del exc["comment"]
+    assert exc["amount"] == 1.0 and exc["input"] == ("biosphere3", "abc")
+    assert "comment" not in exc
+
+    with pytest.raises(KeyError):
+        exc["categories"]
+    with pytest.raises(KeyError):
+        del exc["comment"]
+
+    assert exc.pop("loc") == -0.69 and "loc" not in exc
+    assert {**exc, "location": "DE"}["location"] == "DE"
+
+
+def test_compact_exchange_copies_and_pickles():
+    exc = compact_exchange(_exchange(comment="from a study"))
+
+    for duplicate in (
+        exc.copy(),
+        copy.copy(exc),
+        copy.deepcopy(exc),
+        pickle.loads(pickle.dumps(exc, -1)),
+    ):
+        assert isinstance(duplicate, CompactExchange)
+        assert duplicate == exc
+        duplicate["location"] = "DE"
+        assert exc["location"] == "CH"
+
+
+def test_compact_database_interns_strings_across_datasets():
+    database = pickle.loads(pickle.dumps(_database()))
+    symbols = SymbolTable()
+
+    compact_database(database, symbols)
+
+    first, second = (ds["exchanges"][1] for ds in database)
+    assert all(
+        isinstance(exc, CompactExchange) for ds in database for exc in ds["exchanges"]
+    )
+    assert first["name"] is second["name"]
+    assert database[0]["reference product"] is database[1]["reference product"]
+    assert database[0]["exchanges"][0]["production volume"] == 1000.0
+
+    # compacting again leaves the exchanges as they are
+    exchanges = list(database[0]["exchanges"])
+    compact_database(database, symbols)
+    assert all(a is b for a, b in zip(exchanges, database[0]["exchanges"]))
+
+    assert expand_database(database) == _database()
+    assert all(type(exc) is dict for ds in database for exc in ds["exchanges"])
+
+
+def test_rescale_exchange_handles_compact_exchanges():
+    exc = compact_exchange(_exchange())
+
+    assert rescale_exchange(exc, 2.0) is exc
+    assert exc["amount"] == 1.0
+    assert exc["uncertainty type"] == 0 and "scale" not in exc
+
+
+def test_compact_databases_are_cached_as_dictionaries(tmp_path, monkeypatch):
+    monkeypatch.setattr("premise.utils.DIR_CACHED_FILES", tmp_path)
+    database = compact_database(_database(), SymbolTable())
+
+    database_ref, _ = create_scenario_cache(database, tmp_path / "scenario.pickle")
+
+    loaded = load_cached_database(database_ref)
+    assert all(type(exc) is dict for ds in loaded for exc in ds["exchanges"])
+    assert loaded[0]["exchanges"][1]["amount"] == 0.5
@@ -5,9 +5,10 @@ from pathlib import Path
 
 import numpy as np
 import pytest
+import xarray as xr
 
 from premise.data_collection import IAMDataCollection
-from premise.electricity import Electricity
+from premise.electricity import Electricity, select_or_interpolate
 from premise.filesystem_constants import DATA_DIR
 
 LHV_FUELS = DATA_DIR / "fuels_lower_heating_value.txt"
@@ -180,3 +181,25 @@ def test_losses():
 def test_powerplant_map():
     s = el.powerplant_map["Biomass IGCC CCS"]
     assert isinstance(s, list)
+
+
+def test_select_or_interpolate_reads_parameter_tables():
+    data = xr.DataArray(
+        np.arange(12, dtype=float).reshape(2, 3, 2),
+        dims=("region", "variables", "year"),
+        coords={
+            "region": ["EUR", "USA"],
+            "variables": ["coal", "gas", "wind"],
+            "year": [2020, 2030],
+        },
+    )
+
+    for year in (2020, 2025):
+        expected = (
+            data.sel(region="USA", variables=["gas", "wind"])
+            .interp(year=year)
+            .values.item(0)
+        )
+        assert select_or_interpolate(
+            data, year, region="USA", variables=["gas", "wind"]
+        ) == pytest.approx(expected)
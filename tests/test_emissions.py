@@ -73,3 +73,35 @@ def test_update_emissions_updates_world_dataset_with_world_scaling():
 
     assert dataset["exchanges"][0]["amount"] == pytest.approx(10.0 * 110 / 400)
     assert dataset["log parameters"]["NOx"] == pytest.approx(110 / 400)
+
+
+def test_gains_iam_data_is_compiled_once_and_shared(tmp_path, monkeypatch):
+    import premise.data_collection as data_collection
+
+    monkeypatch.setattr(data_collection, "DIR_GAINS_CACHE", tmp_path)
+    data_collection.get_gains_IAM_data.cache_clear()
+    compiled = data_collection.compile_gains_IAM_data("remind", "CLE")
+
+    try:
+        first = data_collection.get_gains_IAM_data("remind", "CLE")
+        assert len(list(tmp_path.glob("CLE_remind_*.npz"))) == 1
+        assert data_collection.get_gains_IAM_data("remind", "CLE") is first
+
+        data_collection.get_gains_IAM_data.cache_clear()
+        monkeypatch.setattr(
+            data_collection,
+            "compile_gains_IAM_data",
+            lambda *args: pytest.fail("GAINS tables compiled twice"),
+        )
+        loaded = data_collection.get_gains_IAM_data("remind", "CLE")
+    finally:
+        data_collection.get_gains_IAM_data.cache_clear()
+
+    assert loaded.identical(compiled)
+    assert not loaded.values.flags.writeable
+
+    emissions = object.__new__(Emissions)
+    emissions.year = 2030
+    assert Emissions.prepare_data(emissions, loaded).identical(
+        Emissions.prepare_data(emissions, compiled)
+    )
@@ -1,3 +1,4 @@
+import multiprocessing as mp
 from types import SimpleNamespace
 
 import numpy as np
@@ -180,6 +181,51 @@ def test_prepare_db_for_fast_export_runs_core_checks(monkeypatch):
     assert result == prepared_database
 
 
+def test_check_geographical_linking_relinks_new_datasets_only():
+    def dataset(name, location, supplier_location):
+        return {
+            "name": name,
+            "reference product": "steel",
+            "location": location,
+            "exchanges": [
+                {
+                    "name": "electricity production",
+                    "product": "electricity",
+                    "location": supplier_location,
+                    "type": "technosphere",
+                    "amount": 1.0,
+                },
+            ],
+        }
+
+    original_database = [dataset("steel production", "CH", "GLO")]
+    scenario = {
+        "database": [
+            dataset("steel production", "CH", "GLO"),
+            dataset("steel production", "DE", "GLO"),
+            dataset("steel production", "FR", "GLO"),
+        ],
+        "index": {
+            ("electricity production", "electricity"): [
+                {"location": "CH"},
+                {"location": "DE"},
+            ]
+        },
+    }
+    original_keys = get_dataset_keys(original_database)
+
+    assert (
+        find_new_datasets(scenario["database"], original_keys)
+        == scenario["database"][1:]
+    )
+
+    check_geographical_linking(scenario, original_database, original_keys=original_keys)
+
+    locations = [ds["exchanges"][0]["location"] for ds in scenario["database"]]
+    # the original dataset is left untouched, FR has no local supplier
+    assert locations == ["GLO", "DE", "GLO"]
+
+
 def test_aggregate_duplicate_superstructure_rows_sums_biosphere_collisions():
     df = pd.DataFrame(
         [
@@ -457,3 +503,194 @@ def test_generate_superstructure_db_aggregates_duplicate_key_pairs(
     self_loop_row = exported.loc[exported["to activity name"] == "consumer 2"].iloc[0]
     assert self_loop_row["flow type"] == "production"
     assert self_loop_row["scenario a"] == pytest.approx(0.6)
+
+
+def _simapro_test_database():
+    database = []
+    for i, location in enumerate(["CH", "DE", "FR", "GLO"]):
+        database.append(
+            {
+                "name": "autoclaved aerated concrete block production",
+                "reference product": "hard coal ash",
+                "location": location,
+                "unit": "kilogram",
+                "comment": "a “quoted”\ncomment",
+                "exchanges": [
+                    {
+                        "name": "autoclaved aerated concrete block production",
+                        "product": "hard coal ash",
+                        "location": location,
+                        "unit": "kilogram",
+                        "type": "production",
+                        "amount": 1.0,
+                    },
+                    {
+                        "name": "cement production",
+                        "product": "cement",
+                        "location": "GLO",
+                        "unit": "kilogram",
+                        "type": "technosphere",
+                        "amount": 0.1 * (i + 1),
+                    },
+                    {
+                        "name": "Water",
+                        "categories": ("air",),
+                        "unit": "cubic meter",
+                        "type": "biosphere",
+                        "amount": 0.002,
+                    },
+                ],
+            }
+        )
+    database.append(
+        {
+            "name": "cement production",
+            "reference product": "cement",
+            "location": "GLO",
+            "unit": "kilogram",
+            "exchanges": [
+                {
+                    "name": "cement production",
+                    "product": "cement",
+                    "location": "GLO",
+                    "unit": "kilogram",
+                    "type": "production",
+                    "amount": 1.0,
+                },
+                {
+                    "name": "Carbon dioxide, fossil",
+                    "categories": ("air", "urban air close to ground"),
+                    "unit": "kilogram",
+                    "type": "biosphere",
+                    "amount": 0.8,
+                },
+            ],
+        }
+    )
+    return database
+
+
+def test_simapro_export_is_identical_in_serial_and_parallel(tmp_path, monkeypatch):
+    # unmatched categories are logged to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        "premise.export.get_uuids",
+        lambda db: {
+            (ds["name"], ds["reference product"], ds["location"]): f"id-{i}"
+            for i, ds in enumerate(db)
+        },
+    )
+
+    outputs = []
+    for workers in (1, 2):
+        database = _simapro_test_database()
+        export = Export(
+            scenario={
+                "database": database,
+                "model": "remind",
+                "pathway": "SSP2",
+                "year": 2030,
+            },
+            filepath=tmp_path / str(workers),
+            version="3.12",
+            system_model="cutoff",
+        )
+        export.export_db_to_simapro(workers=workers, chunk_size=2)
+        outputs.append(
+            (
+                tmp_path / str(workers) / "simapro_export_remind_SSP2_2030.csv"
+            ).read_bytes()
+        )
+
+        # the database itself is left untouched
+        assert database == _simapro_test_database()
+
+    # with a pool shared by several scenarios
+    with mp.Pool(processes=2) as pool:
+        export.filepath = tmp_path / "pool"
+        export.export_db_to_simapro(chunk_size=2, pool=pool)
+    outputs.append(
+        (tmp_path / "pool" / "simapro_export_remind_SSP2_2030.csv").read_bytes()
+    )
+
+    assert outputs[0] == outputs[1] == outputs[2]
+    content = outputs[0].decode("latin1")
+    assert content.count("\r\nProcess\r\n") == 5
+    # water emissions are converted from cubic meters to kilograms
+    assert "2.000E+00" in content
+
+
+def _difference_file_dataset(amount, co2):
+    return {
+        "name": "steel production",
+        "reference product": "steel",
+        "location": "GLO",
+        "unit": "kilogram",
+        "comment": "a comment",
+        "exchanges": [
+            {
+                "name": "steel production",
+                "product": "steel",
+                "location": "GLO",
+                "unit": "kilogram",
+                "type": "production",
+                "amount": 1.0,
+            },
+            {
+                "name": "electricity production",
+                "product": "electricity",
+                "location": "GLO",
+                "unit": "kilowatt hour",
+                "type": "technosphere",
+                "amount": amount,
+            },
+            {
+                "name": "Carbon dioxide, fossil",
+                "categories": ("air", "non-urban air or from high stacks"),
+                "unit": "kilogram",
+                "type": "biosphere",
+                "amount": co2,
+            },
+        ],
+    }
+
+
+def test_scenario_difference_file_folds_scenarios_one_at_a_time():
+    origin_db = [_difference_file_dataset(amount=2.0, co2=1.0)]
+    folded = []
+
+    def scenarios():
+        for amount in (1.0, 2.0):
+            database = [_difference_file_dataset(amount=amount, co2=1.0)]
+            folded.append(amount)
+            yield {"database": database}
+            # once folded, the database is no longer needed
+            database.clear()
+
+    df, new_db, list_acts = generate_scenario_difference_file(
+        db_name="super-db",
+        origin_db=origin_db,
+        scenarios=scenarios(),
+        version="3.12",
+        scenario_list=["scenario a", "scenario b"],
+        biosphere_name="biosphere3",
+    )
+
+    assert folded == [1.0, 2.0]
+    assert len(list_acts) == 3
+
+    # only the electricity input changes, and the
+    # unchanged CO2 emission is left out of the table
+    assert df["from activity name"].tolist() == ["electricity production"]
+    assert df[["original", "scenario a", "scenario b"]].values.tolist() == [
+        [2.0, 1.0, 2.0]
+    ]
+
+    # the superstructure dataset has all exchanges, with original amounts
+    (dataset,) = new_db
+    assert dataset["comment"] == "a comment"
+    assert {exc["name"]: exc["amount"] for exc in dataset["exchanges"]} == {
+        "steel production": 1.0,
+        "electricity production": 2.0,
+        "Carbon dioxide, fossil": 1.0,
+    }
@@ -1,8 +1,16 @@
 import numpy as np
 import pytest
 import xarray as xr
+import yaml
 
-from premise.external import _interpolate_year_with_bounds
+import premise.data_collection as data_collection_module
+from premise.data_collection import IAMDataCollection
+from premise.external import (
+    ExternalScenario,
+    _interpolate_year_with_bounds,
+    compile_exchange_filter,
+    compile_exchange_filters,
+)
 from premise.transformation import get_shares_from_production_volume
 
 
@@ -41,3 +49,171 @@ def test_get_shares_from_production_volume_handles_nan():
     assert all(np.isfinite(supplier["share"]) for supplier in shares)
     assert shares[0]["share"] == pytest.approx(1e-9 / (3.0 + 1e-9))
     assert shares[1]["share"] == pytest.approx(3.0 / (3.0 + 1e-9))
+
+
+class FakeResource:
+    def __init__(self, raw):
+        self.raw = raw
+        self.headers = None
+
+    def raw_read(self):
+        return self.raw
+
+
+class FakeDatapackage:
+    def __init__(self, scenario_data, config):
+        self.resources = {
+            "scenario_data": FakeResource(scenario_data.encode()),
+            "config": FakeResource(yaml.safe_dump(config).encode()),
+        }
+
+    def get_resource(self, name):
+        return self.resources[name]
+
+
+def test_external_datapackage_is_parsed_once_for_all_scenario_entries(monkeypatch):
+    scenario_data = (
+        "model,pathway,scenario,region,variables,unit,2020,2050\n"
+        "m,p,A,CH,h2 production,EJ,1,4\n"
+        "m,p,A,CH,h2 efficiency,%,50,60\n"
+        "m,p,B,CH,h2 production,EJ,7,9\n"
+        "m,p,B,CH,h2 efficiency,%,40,80\n"
+    )
+    config = {
+        "production pathways": {
+            "hydrogen": {
+                "production volume": {"variable": "h2 production"},
+                "efficiency": [{"variable": "h2 efficiency"}],
+            }
+        }
+    }
+    reads = []
+    read_table = data_collection_module._read_tabular_from_resource
+    monkeypatch.setattr(
+        data_collection_module,
+        "_read_tabular_from_resource",
+        lambda resource: reads.append(resource) or read_table(resource),
+    )
+    iam_data = object.__new__(IAMDataCollection)
+
+    # the same datapackage, attached to several scenario years
+    results = [
+        iam_data.get_external_data(
+            [
+                {"scenario": "A", "data": FakeDatapackage(scenario_data, config)},
+                {"scenario": "B", "data": FakeDatapackage(scenario_data, config)},
+            ]
+        )
+        for _ in range(3)
+    ]
+
+    assert len(reads) == 1
+    assert results[0][0]["production volume"].sel(region="CH", year=2050) == 4
+    assert results[0][1]["production volume"].sel(region="CH", year=2050) == 9
+    # efficiencies are relative to the earliest year
+    assert results[0][1]["efficiency"].sel(region="CH", year=2050) == 2
+    assert results[2][1]["efficiency"].identical(results[0][1]["efficiency"])
+
+    # each entry gets its own arrays
+    results[0][0]["production volume"][:] = 0
+    assert results[1][0]["production volume"].sel(region="CH", year=2050) == 4
+
+
+def test_datapackage_resources_are_hashed_once_per_file_version(tmp_path):
+    class LocalResource:
+        local, multipart = True, False
+
+        def __init__(self, source):
+            self.source = str(source)
+            self.reads = 0
+
+        def raw_read(self):
+            self.reads += 1
+            with open(self.source, "rb") as file:
+                return file.read()
+
+    filepath = tmp_path / "scenario_data.csv"
+    filepath.write_text("a,b\n1,2\n")
+    first, second = LocalResource(filepath), LocalResource(filepath)
+
+    digest = data_collection_module._resource_hash(first)
+    assert data_collection_module._resource_hash(second) == digest
+    assert (first.reads, second.reads) == (1, 0)
+
+    filepath.write_text("a,b\n1,30\n")
+    assert data_collection_module._resource_hash(second) != digest
+    assert second.reads == 1
+
+
+def test_compile_exchange_filter_matches_wurst_filters():
+    exc = {"name": "hydrogen, from SMR", "product": "hydrogen", "location": "CH"}
+
+    assert compile_exchange_filter({"name": "hydrogen, from SMR"})(exc)
+    assert not compile_exchange_filter({"name": "hydrogen"})(exc)
+    assert compile_exchange_filter({"name": "hydrogen", "operator": "contains"})(exc)
+    assert not compile_exchange_filter(
+        {"name": "hydrogen", "location": "C", "operator": "contains"}
+    )(exc)
+
+
+def test_compile_exchange_filters_select_in_one_pass_grouped_by_entry():
+    exchanges = [
+        {"name": "hydrogen, from SMR", "product": "hydrogen", "type": "technosphere"},
+        {"name": "hydrogen, from PEM", "product": "hydrogen", "type": "technosphere"},
+        {"name": "hydrogen, from SMR", "product": "hydrogen", "type": "production"},
+        {"name": "diesel", "product": "diesel", "type": "technosphere"},
+    ]
+    select = compile_exchange_filters(
+        [
+            {"name": "hydrogen", "operator": "contains"},
+            {"name": "diesel"},
+            {"name": "hydrogen, from SMR"},
+        ]
+    )
+
+    selected = select({"name": "truck", "exchanges": exchanges})
+    assert selected == [exchanges[0], exchanges[1], exchanges[3], exchanges[0]]
+
+    with pytest.raises(ValueError, match="truck"):
+        compile_exchange_filters([{"unit": "kg", "operator": "contains"}])(
+            {"name": "truck", "exchanges": exchanges}
+        )
+
+
+def test_supply_shares_and_market_volumes_use_year_slices():
+    scenario = object.__new__(ExternalScenario)
+    scenario.year = 2025
+    scenario.production_volumes_at_year = {}
+    scenario.external_scenarios_data = {
+        0: {
+            "production volume": xr.DataArray(
+                np.array(
+                    [
+                        [[1.0, 3.0], [3.0, 1.0]],
+                        [[2.0, 2.0], [0.0, 0.0]],
+                    ]
+                ),
+                coords={
+                    "region": ["CH", "FR"],
+                    "variables": ["a", "b"],
+                    "year": [2020, 2030],
+                },
+                dims=["region", "variables", "year"],
+            )
+        }
+    }
+
+    assert scenario.fetch_supply_share(0, "CH", "a", ["a", "b"]) == 0.5
+    assert scenario.fetch_supply_share(0, "FR", "a", ["a", "b"]) == 1.0
+    assert scenario.get_market_production_volumes(0, ["a", "b"], ["CH", "FR"]) == {
+        "CH": 4.0,
+        "FR": 2.0,
+    }
+    assert scenario.get_world_production_volume(0, ["a"], ["CH", "FR", "World"]) == 4.0
+
+    scenario.year = 2040
+    scenario.production_volumes_at_year = {}
+    assert scenario.get_market_production_volumes(0, ["a"], ["CH"]) == {"CH": 3.0}
+    assert np.isnan(
+        scenario.get_market_production_volumes(0, ["a"], ["CH"], bounded=False)["CH"]
+    )
@@ -0,0 +1,132 @@
+import pickle
+
+import premise.incremental as incremental_module
+from premise.incremental import IncrementalDatabase
+
+
+def _dataset(name, amount=1.0):
+    return {
+        "name": name,
+        "reference product": name,
+        "location": "GLO",
+        "unit": "kilogram",
+        "exchanges": [{"name": name, "amount": amount, "type": "production"}],
+    }
+
+
+def test_increments_are_stored_as_deltas_and_rebuilt_from_the_chain(
+    monkeypatch, tmp_path
+):
+    obj = object.__new__(IncrementalDatabase)
+    obj.version = "3.12"
+    obj.system_model = "cutoff"
+    obj.use_absolute_efficiency = False
+    obj.gains_scenario = "CLE"
+    obj.database = [_dataset("a"), _dataset("b"), _dataset("c")]
+    obj._database_is_complete = True
+    obj.scenarios = [{"model": "remind", "pathway": "SSP2-Base", "year": 2030}]
+
+    def update_electricity(scenario, *args):
+        scenario["database"][0]["exchanges"][0]["amount"] = 2.0
+        return scenario
+
+    def update_biomass(scenario, *args):
+        scenario["database"].append(_dataset("d"))
+        return scenario
+
+    monkeypatch.setattr(incremental_module, "DIR_CACHED_FILES", tmp_path)
+    monkeypatch.setattr(incremental_module, "_update_electricity", update_electricity)
+    monkeypatch.setattr(incremental_module, "_update_biomass", update_biomass)
+
+    obj.update({"electricity": "electricity", "biomass": "biomass"})
+
+    assert [s["pathway"] for s in obj.scenarios] == [
+        "SSP2-Base... + electricity",
+        "SSP2-Base... + biomass",
+    ]
+    assert obj.database[0]["exchanges"][0]["amount"] == 1.0
+
+    deltas = []
+    for filepath in obj.scenarios[-1]["database delta chain"]:
+        with open(filepath, "rb") as file:
+            deltas.append(pickle.load(file))
+    assert [
+        [pickle.loads(payload)["name"] for payload in delta["datasets"].values()]
+        for delta in deltas
+    ] == [["a"], ["d"]]
+
+    databases = [s["database"] for s in obj._load_increments()]
+    assert [[ds["name"] for ds in db] for db in databases] == [
+        ["a", "b", "c"],
+        ["a", "b", "c", "d"],
+    ]
+    assert all(db[0]["exchanges"][0]["amount"] == 2.0 for db in databases)
+    assert databases[0][1] is not databases[1][1]
+
+
+def test_increments_are_streamed_to_the_superstructure_builder(monkeypatch, tmp_path):
+    obj = object.__new__(IncrementalDatabase)
+    obj.version = "3.12"
+    obj.system_model = "cutoff"
+    obj.use_absolute_efficiency = False
+    obj.gains_scenario = "CLE"
+    obj.database = [_dataset("a"), _dataset("b")]
+    obj._database_is_complete = True
+    obj.scenarios = [{"model": "remind", "pathway": "SSP2-Base", "year": 2030}]
+
+    def update_electricity(scenario, *args):
+        scenario["database"][1]["exchanges"][0]["amount"] = 3.0
+        return scenario
+
+    monkeypatch.setattr(incremental_module, "DIR_CACHED_FILES", tmp_path)
+    monkeypatch.setattr(incremental_module, "_update_electricity", update_electricity)
+    monkeypatch.setattr(incremental_module, "_update_biomass", lambda s, *a: s)
+
+    obj.update({"electricity": "electricity", "biomass": "biomass"})
+
+    loaded = []
+    for scenario in obj._iter_loaded_scenarios(obj.database):
+        # the previous increment is released before the next one is rebuilt
+        assert sum(s.get("database") is not None for s in obj.scenarios) == 1
+        loaded.append(scenario["database"][1]["exchanges"][0]["amount"])
+
+    assert loaded == [3.0, 3.0]
+    assert all("database" not in s for s in obj.scenarios)
+    assert all("database delta chain" in s for s in obj.scenarios)
+
+
+def test_increments_keep_changes_outside_exchange_amounts(monkeypatch, tmp_path):
+    obj = object.__new__(IncrementalDatabase)
+    obj.version = "3.12"
+    obj.system_model = "cutoff"
+    obj.use_absolute_efficiency = False
+    obj.gains_scenario = "CLE"
+    obj.database = [_dataset("a"), _dataset("b")]
+    obj._database_is_complete = True
+    obj.scenarios = [{"model": "remind", "pathway": "SSP2-Base", "year": 2030}]
+
+    def update_electricity(scenario, *args):
+        scenario["database"][0]["comment"] = "x"
+        scenario["database"][1]["exchanges"][0]["production volume"] = 99
+        return scenario
+
+    monkeypatch.setattr(incremental_module, "DIR_CACHED_FILES", tmp_path)
+    monkeypatch.setattr(incremental_module, "_update_electricity", update_electricity)
+    monkeypatch.setattr(incremental_module, "_update_biomass", lambda s, *a: s)
+
+    obj.update({"electricity": "electricity", "biomass": "biomass"})
+
+    with open(obj.scenarios[0]["database delta chain"][0], "rb") as file:
+        assert len(pickle.load(file)["datasets"]) == 2
+
+    dumped = []
+    monkeypatch.setattr(
+        incremental_module, "dump_database", lambda s: dumped.append(s.pop("database"))
+    )
+    obj._dump_increments()
+
+    assert [db[0]["comment"] for db in dumped] == ["x", "x"]
+    assert [db[1]["exchanges"][0]["production volume"] for db in dumped] == [99, 99]
+    # the deltas are deleted once the increments are dumped
+    assert not list(tmp_path.glob("* (delta).pickle"))
+    assert all("database delta chain" not in s for s in obj.scenarios)
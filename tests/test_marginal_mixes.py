@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import numpy as np
 import pytest
 import xarray as xr
@@ -201,3 +203,67 @@ def test_area_capital_replacement_uses_squared_individual_intervals(
 
     np.testing.assert_allclose(result.values.ravel(), [0.1, 0.9])
     capsys.readouterr()
+
+
+def make_multi_region_production_data():
+    growing = make_production_data()
+    shrinking = growing.isel(year=slice(None, None, -1)).assign_coords(
+        year=growing.year
+    )
+    empty = xr.zeros_like(growing)
+    return xr.concat(
+        [
+            growing.assign_coords(region=["growing"]),
+            shrinking.assign_coords(region=["shrinking"]),
+            empty.assign_coords(region=["empty"]),
+        ],
+        dim="region",
+    )
+
+
+@pytest.mark.parametrize("measurement", [0, 1, 2, 3, 4, 5])
+@pytest.mark.parametrize("capital_replacement_rate", [False, True])
+def test_regions_are_solved_independently(
+    monkeypatch, measurement, capital_replacement_rate, capsys
+):
+    patch_technology_metadata(monkeypatch)
+    data = make_multi_region_production_data()
+    args = {
+        "range time": 2,
+        "foresight": False,
+        "capital replacement rate": capital_replacement_rate,
+        "measurement": measurement,
+    }
+
+    result = marginal_mixes.consequential_method(data, 2030, args, "test market")
+
+    for region in data.region.values:
+        expected = marginal_mixes.consequential_method(
+            data.sel(region=[region]), 2030, args, "test market"
+        )
+        np.testing.assert_allclose(result.sel(region=[region]).values, expected.values)
+    assert not result.sel(region="empty").values.any()
+    capsys.readouterr()
+
+
+def test_yearly_interpolation_is_reused_across_years(monkeypatch, capsys):
+    patch_technology_metadata(monkeypatch)
+    monkeypatch.setattr(marginal_mixes, "_INTERPOLATION_CACHE", OrderedDict())
+    data = make_production_data()
+    interpolations = []
+    interpolate_na = xr.DataArray.interpolate_na
+
+    def counting_interpolate_na(self, *args, **kwargs):
+        interpolations.append(kwargs.get("method"))
+        return interpolate_na(self, *args, **kwargs)
+
+    monkeypatch.setattr(xr.DataArray, "interpolate_na", counting_interpolate_na)
+
+    for year in (2025, 2030, 2035):
+        marginal_mixes.consequential_method(
+            data, year, {"range time": 2}, "test market"
+        )
+    marginal_mixes.consequential_method(data, 2030, {"range time": 2}, "other market")
+
+    assert interpolations == ["akima", "akima"]
+    capsys.readouterr()
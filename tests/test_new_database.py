@@ -33,6 +33,7 @@ except ModuleNotFoundError:
     schema_stub.Use = lambda *args, **kwargs: ("Use", args, kwargs)
     sys.modules["schema"] = schema_stub
 
+import premise.export as export_module
 import premise.new_database as new_database_module
 import premise.pathways as pathways_module
 from premise.new_database import NewDatabase, check_presence_biosphere_database
@@ -411,7 +412,9 @@ def test_write_superstructure_to_brightway_requires_registered_biosphere(monkeyp
 def test_write_superstructure_to_brightway_uses_fast_writer_after_full_preparation(
     monkeypatch,
 ):
-    original_database = [{"name": "original"}]
+    original_database = [
+        {"name": "original", "reference product": "original", "location": "GLO"}
+    ]
     exported_database = [{"name": "superstructure dataset", "exchanges": []}]
     prepared_database = [{"name": "prepared superstructure", "exchanges": []}]
     captured = {
@@ -423,12 +426,15 @@ def test_write_superstructure_to_brightway_uses_fast_writer_after_full_preparati
         "pickles_deleted": 0,
     }
 
-    def fake_load_database(scenario, original_database, load_metadata, warning=True):
+    def fake_load_database(
+        scenario, original_database, load_metadata, delete=True, warning=True
+    ):
         captured["loaded"].append(
             {
                 "scenario": scenario.copy(),
                 "original_database": original_database,
                 "load_metadata": load_metadata,
+                "delete": delete,
                 "warning": warning,
             }
         )
@@ -442,6 +448,7 @@ def test_write_superstructure_to_brightway_uses_fast_writer_after_full_preparati
         original_database,
         biosphere_name,
         version,
+        original_keys=None,
     ):
         captured["prepared"].append(
             {
@@ -468,7 +475,9 @@ def test_write_superstructure_to_brightway_uses_fast_writer_after_full_preparati
         preserve_original_column,
     ):
         assert origin_db == original_database
-        assert scenarios == obj.scenarios
+        # scenarios are loaded and prepared as they are consumed
+        assert captured["loaded"] == []
+        assert [scenario["year"] for scenario in scenarios] == [2030, 2035]
         assert db_name == "super-db"
         assert biosphere_name == "test-biosphere"
         assert filepath is None
@@ -484,6 +493,7 @@ def test_write_superstructure_to_brightway_uses_fast_writer_after_full_preparati
         original_database,
         biosphere_name,
         version,
+        original_keys=None,
     ):
         captured["prepared_export"] = {
             "scenario": scenario.copy(),
@@ -564,6 +574,7 @@ def test_write_superstructure_to_brightway_uses_fast_writer_after_full_preparati
 
     assert len(captured["loaded"]) == 2
     assert all(call["load_metadata"] is True for call in captured["loaded"])
+    assert all(call["delete"] is False for call in captured["loaded"])
     assert len(captured["prepared"]) == 2
     assert all(call["db_name"] == "super-db" for call in captured["prepared"])
     assert captured["prepared_export"] == {
@@ -988,3 +999,311 @@ def test_inventory_cache_miss_replaces_full_inventory_tail_with_trimmed_cache(
         "inventories-metadata.pickle"
     )
     assert obj._reload_original_database_from_cache_for_update is True
+
+
+def _fake_export_scenario_matrices(scenario, filepath, context=None):
+    # runs in a worker process: record the export on disk
+    Path(filepath).mkdir(parents=True, exist_ok=True)
+    (Path(filepath) / "A_matrix.csv").write_text(str(scenario["year"]))
+    return scenario["year"] != 2040
+
+
+def _matrices_export_obj(monkeypatch, years):
+    monkeypatch.setattr(
+        new_database_module,
+        "export_scenario_matrices",
+        _fake_export_scenario_matrices,
+    )
+    monkeypatch.setattr(
+        new_database_module, "delete_all_pickles", lambda *args, **kwargs: None
+    )
+
+    obj = object.__new__(NewDatabase)
+    obj.version = "3.12"
+    obj.biosphere_name = "biosphere3"
+    obj.system_model = "cutoff"
+    obj.generate_reports = False
+    obj._load_original_database = lambda: []
+    obj.scenarios = [
+        {
+            "model": "image",
+            "pathway": "SSP2-Base",
+            "year": year,
+            "iam data": types.SimpleNamespace(regions=["WEU"]),
+        }
+        for year in years
+    ]
+    return obj
+
+
+def test_write_db_to_matrices_exports_scenarios_in_parallel(monkeypatch, tmp_path):
+    obj = _matrices_export_obj(monkeypatch, [2030, 2035, 2050])
+
+    obj.write_db_to_matrices(filepath=str(tmp_path), workers=2, max_memory=1)
+
+    for scenario, year in zip(obj.scenarios, [2030, 2035, 2050]):
+        exported = tmp_path / "image" / "SSP2-Base" / str(year) / "A_matrix.csv"
+        assert exported.read_text() == str(year)
+        # the scenario was released once exported
+        assert "database" not in scenario
+        assert "iam data" in scenario
+
+
+def _fake_export_reading_original_database(scenario, filepath, context=None):
+    original_database = export_module._MATRICES_EXPORT_CONTEXT["original_database"]
+    Path(filepath).mkdir(parents=True, exist_ok=True)
+    (Path(filepath) / "original.txt").write_text(
+        f"{type(original_database).__name__}: {original_database[0]['name']}"
+    )
+    return True
+
+
+def test_write_db_to_matrices_in_parallel_shares_the_original_database(
+    monkeypatch, tmp_path
+):
+    obj = _matrices_export_obj(monkeypatch, [2030, 2035])
+    obj._load_original_database = lambda: [
+        {
+            "name": "steel production",
+            "reference product": "steel",
+            "location": "CH",
+            "exchanges": [],
+        }
+    ]
+    monkeypatch.setattr(
+        new_database_module,
+        "export_scenario_matrices",
+        _fake_export_reading_original_database,
+    )
+    monkeypatch.setattr(new_database_module, "DIR_CACHED_FILES", tmp_path / "cache")
+
+    obj.write_db_to_matrices(filepath=str(tmp_path / "export"), workers=2)
+
+    for year in (2030, 2035):
+        exported = tmp_path / "export" / "image" / "SSP2-Base" / str(year)
+        assert (exported / "original.txt").read_text() == (
+            "SharedDatabase: steel production"
+        )
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_write_db_to_matrices_in_parallel_raises_on_invalid_scenario(
+    monkeypatch, tmp_path
+):
+    obj = _matrices_export_obj(monkeypatch, [2030, 2040])
+    reports = []
+    obj.generate_change_report = lambda: reports.append(True)
+
+    with pytest.raises(ValueError, match="not ready for export"):
+        obj.write_db_to_matrices(filepath=str(tmp_path), workers=2)
+
+    assert reports == [True]
+
+
+def test_estimate_scenario_memory_uses_cache_size(tmp_path):
+    cache_file = tmp_path / "scenario.pickle"
+    cache_file.write_bytes(b"0" * 100)
+
+    assert new_database_module.estimate_scenario_memory({}) == 0
+    assert (
+        new_database_module.estimate_scenario_memory({"database filepath": cache_file})
+        == 100 * new_database_module.CACHE_MEMORY_FACTOR
+    )
+
+
+def test_update_processes_the_years_of_a_pathway_consecutively(monkeypatch):
+    obj = object.__new__(NewDatabase)
+    obj.version = "3.12"
+    obj.system_model = "cutoff"
+    obj.use_absolute_efficiency = False
+    obj.gains_scenario = "CLE"
+    obj.database = None
+    # scenarios ordered as PathwaysDataPackage builds them: years first
+    obj.scenarios = [
+        {"model": "image", "pathway": pathway, "year": year}
+        for year in (2030, 2020)
+        for pathway in ("SSP2-Base", "SSP2-RCP19")
+    ]
+    obj._load_scenario_database_for_update = (
+        lambda scenario, scenario_position: scenario
+    )
+
+    updated = []
+    kept_structural_caches = []
+
+    def fake_update(scenario, *args):
+        updated.append((scenario["pathway"], scenario["year"]))
+        return scenario
+
+    monkeypatch.setattr(new_database_module, "_update_biomass", fake_update)
+    monkeypatch.setattr(new_database_module, "dump_database", lambda scenario: None)
+    monkeypatch.setattr(
+        new_database_module,
+        "clear_runtime_caches",
+        lambda keep_structural_caches=False: kept_structural_caches.append(
+            keep_structural_caches
+        ),
+    )
+
+    obj.update("biomass")
+
+    assert updated == [
+        ("SSP2-Base", 2020),
+        ("SSP2-Base", 2030),
+        ("SSP2-RCP19", 2020),
+        ("SSP2-RCP19", 2030),
+    ]
+    assert kept_structural_caches == [True, True, True, False]
+    assert all(s["applied functions"] == ["biomass"] for s in obj.scenarios)
+
+
+def test_order_sectors_puts_dependencies_first_and_keeps_order_otherwise():
+    assert new_database_module.order_sectors(["heat", "cement", "fuels"]) == [
+        "cement",
+        "fuels",
+        "heat",
+    ]
+    assert new_database_module.order_sectors(["metals", "heat"]) == [
+        "metals",
+        "heat",
+    ]
+
+
+def _update_test_object(monkeypatch, sector_functions):
+    obj = object.__new__(NewDatabase)
+    obj.version = "3.12"
+    obj.system_model = "cutoff"
+    obj.use_absolute_efficiency = False
+    obj.gains_scenario = "CLE"
+    obj.database = [{"name": "base", "exchanges": []}]
+    obj._database_is_complete = True
+    obj.database_cache_filepath = None
+    obj.inventories_cache_filepath = None
+    obj.additional_inventories = None
+    obj.scenarios = [{"model": "image", "pathway": "SSP2-Base", "year": 2030}]
+
+    for name, func in sector_functions.items():
+        monkeypatch.setattr(new_database_module, name, func)
+    monkeypatch.setattr(new_database_module, "dump_database", lambda scenario: None)
+
+    return obj
+
+
+def test_update_skips_sectors_without_iam_inputs(monkeypatch):
+    def fail(scenario, *args):
+        raise AssertionError("sector should have been skipped")
+
+    obj = _update_test_object(monkeypatch, {"_update_cement": fail})
+    obj.scenarios[0]["iam data"] = types.SimpleNamespace(cement_technology_mix=None)
+
+    obj.update("cement")
+
+    assert obj.scenarios[0]["applied functions"] == ["cement"]
+
+
+def test_update_resumes_from_last_checkpoint(monkeypatch, tmp_path):
+    monkeypatch.setattr("premise.utils.DIR_CHECKPOINTS", tmp_path)
+    calls = []
+
+    def biomass(scenario, *args):
+        calls.append("biomass")
+        scenario["database"].append({"name": "biomass", "exchanges": []})
+        return scenario
+
+    def cement(scenario, *args):
+        calls.append("cement")
+        scenario["database"].append({"name": "half-done", "exchanges": []})
+        if calls.count("cement") == 1:
+            raise RuntimeError("crash")
+        return scenario
+
+    obj = _update_test_object(
+        monkeypatch, {"_update_biomass": biomass, "_update_cement": cement}
+    )
+
+    with pytest.raises(RuntimeError):
+        obj.update(["biomass", "cement"], checkpoint=True)
+
+    scenario = obj.scenarios[0]
+    assert "database" not in scenario
+    assert scenario["applied functions"] == ["biomass"]
+
+    obj.update(["biomass", "cement"], checkpoint=True)
+
+    assert calls == ["biomass", "cement", "cement"]
+    assert [ds["name"] for ds in scenario["database"]] == [
+        "base",
+        "biomass",
+        "half-done",
+    ]
+    assert "checkpoint filepath" not in scenario
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_update_resumes_from_checkpoint_of_another_process(monkeypatch, tmp_path):
+    monkeypatch.setattr("premise.utils.DIR_CHECKPOINTS", tmp_path)
+    calls = []
+
+    def biomass(scenario, *args):
+        calls.append("biomass")
+        scenario["database"].append({"name": "biomass", "exchanges": []})
+        return scenario
+
+    def crash(scenario, *args):
+        calls.append("crash")
+        raise RuntimeError("crash")
+
+    def cement(scenario, *args):
+        calls.append("cement")
+        return scenario
+
+    def new_object(sector_functions):
+        obj = _update_test_object(monkeypatch, sector_functions)
+        # same inputs in both processes
+        obj._scenario_inputs = lambda scenario: {"iam": "image, SSP2-Base, 2030"}
+        return obj
+
+    first = new_object({"_update_biomass": biomass, "_update_cement": crash})
+    with pytest.raises(RuntimeError):
+        first.update(["biomass", "cement"], checkpoint=True)
+
+    # a new process, as after the previous one was killed
+    second = new_object({"_update_biomass": biomass, "_update_cement": cement})
+    second.update(["biomass", "cement"], checkpoint=True)
+
+    assert calls == ["biomass", "crash", "cement"]
+    scenario = second.scenarios[0]
+    assert [ds["name"] for ds in scenario["database"]] == ["base", "biomass"]
+    assert scenario["applied functions"] == ["biomass", "cement"]
+    assert list(tmp_path.iterdir()) == []
+
+    # checkpoints with sectors that are not requested are not resumed
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        new_object({"_update_biomass": biomass, "_update_cement": crash}).update(
+            ["biomass", "cement"], checkpoint=True
+        )
+    third = new_object({"_update_cement": cement})
+    third.update(["cement"], checkpoint=True)
+
+    assert calls == ["biomass", "crash", "cement"]
+    assert [ds["name"] for ds in third.scenarios[0]["database"]] == ["base"]
+
+
+def test_update_holds_compact_databases(monkeypatch):
+    seen = []
+
+    def biomass(scenario, *args):
+        seen.extend(exc for ds in scenario["database"] for exc in ds["exchanges"])
+        return scenario
+
+    obj = _update_test_object(monkeypatch, {"_update_biomass": biomass})
+    obj.database[0]["exchanges"] = [
+        {"name": "base", "unit": "kilogram", "type": "production", "amount": 1.0}
+    ]
+    obj.compact = True
+
+    obj.update("biomass")
+
+    assert [type(exc).__name__ for exc in seen] == ["CompactExchange"]
+    assert len(new_database_module.SYMBOLS) == 0
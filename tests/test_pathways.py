@@ -1,5 +1,12 @@
+import json
 from types import SimpleNamespace
 
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+import premise.pathways as pathways_module
 from premise.pathways import PathwaysDataPackage
 
 
@@ -39,3 +46,100 @@ def test_cleanup_after_export_releases_loaded_scenarios(monkeypatch):
     assert deleted_pickles["called"] is True
     assert cleared_runtime_caches["called"] is True
     assert collected["called"] is True
+
+
+def make_scenario(pathway, year):
+    production_volumes = xr.DataArray(
+        np.array([[[1.0, 3.0], [2.0, 4.0]]]),
+        coords={
+            "region": ["WEU"],
+            "variables": ["Wind", "Solar"],
+            "year": [2020, 2040],
+        },
+        dims=["region", "variables", "year"],
+        name="value",
+        attrs={"unit": {"Wind": "EJ/yr", "Solar": "EJ/yr"}},
+    )
+    return {
+        "model": "image",
+        "pathway": pathway,
+        "year": year,
+        "iam data": SimpleNamespace(production_volumes=production_volumes),
+    }
+
+
+def scenario_datapackage(file_format="csv"):
+    obj = object.__new__(PathwaysDataPackage)
+    obj.datapackage = SimpleNamespace(
+        scenarios=[make_scenario("SSP2-Base", 2030), make_scenario("SSP1", 2030)]
+    )
+    obj.variables_name_change = {"Wind": "SE - electricity - Wind"}
+    obj._add_scenario_data(file_format=file_format)
+    return obj
+
+
+@pytest.mark.parametrize("file_format", ["csv", "csv.gz"])
+def test_scenario_data_is_streamed_with_its_schema(tmp_path, monkeypatch, file_format):
+    monkeypatch.chdir(tmp_path)
+    obj = scenario_datapackage(file_format)
+
+    scenario_data = pd.read_csv(
+        tmp_path / "pathways_temp" / "scenario_data" / f"scenario_data.{file_format}"
+    )
+    assert obj.scenario_names == ["SSP1", "SSP2-Base"]
+    assert scenario_data.to_dict("records") == [
+        {
+            "region": "WEU",
+            "variables": variable,
+            "year": 2030,
+            "value": value,
+            "unit": "EJ/yr",
+            "model": "image",
+            "pathway": pathway,
+        }
+        for pathway in ("SSP2-Base", "SSP1")
+        for variable, value in (("SE - electricity - Wind", 2.0), ("Solar", 3.0))
+    ]
+    assert obj.scenario_data_resource["schema"]["fields"][2] == {
+        "name": "year",
+        "type": "integer",
+        "format": "default",
+    }
+
+
+def test_build_datapackage_declares_known_schemas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    obj = scenario_datapackage()
+    matrices = tmp_path / "pathways_temp" / "inventories" / "image" / "SSP1" / "2030"
+    matrices.mkdir(parents=True)
+    (matrices / "A_matrix_index.csv").write_text(
+        "name;reference product;unit;location;index\na;b;kg;FR;0\n"
+    )
+
+    inferred = []
+    infer = pathways_module.Package.infer
+    monkeypatch.setattr(
+        pathways_module.Package,
+        "infer",
+        lambda self, *args, **kwargs: inferred.extend(
+            r.name for r in self.resources if not r.descriptor.get("schema")
+        )
+        or infer(self, *args, **kwargs),
+    )
+    monkeypatch.setattr(pathways_module.shutil, "make_archive", lambda *a: None)
+
+    obj._build_datapackage("test")
+
+    with open(tmp_path / "pathways_temp" / "datapackage.json") as file:
+        resources = {r["name"]: r for r in json.load(file)["resources"]}
+
+    assert inferred == []
+    assert resources["scenario_data"]["path"] == "scenario_data/scenario_data.csv"
+    assert resources["a_matrix_index"]["dialect"]["delimiter"] == ";"
+    assert [f["type"] for f in resources["a_matrix_index"]["schema"]["fields"]] == [
+        "string",
+        "string",
+        "string",
+        "string",
+        "integer",
+    ]
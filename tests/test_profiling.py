@@ -0,0 +1,86 @@
+import csv
+import json
+
+import pytest
+
+import premise.profiling as profiling
+from premise.profiling import Profiler, profile_stage, profiled
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = profiling.enable_profiling(trace=True)
+    profiler.directory = tmp_path
+    yield profiler
+    profiling.disable_profiling()
+
+
+class _Step:
+    def __init__(self):
+        self.database = [{"exchanges": [{}, {}]}, {"exchanges": [{}]}]
+
+    @profiled
+    def run(self):
+        self.database.append({"exchanges": []})
+        return "done"
+
+
+def test_stages_are_recorded_with_their_depth_and_database_size(profiler):
+    step = _Step()
+
+    with profile_stage("update", lambda: step.database):
+        assert step.run() == "done"
+
+    outer, inner = sorted(profiler.records, key=lambda record: record["depth"])
+    assert outer["stage"] == "update" and outer["depth"] == 0
+    assert inner["stage"] == "_Step.run" and inner["depth"] == 1
+    assert (inner["datasets"], inner["exchanges"]) == (3, 3)
+    assert outer["wall time"] >= inner["wall time"] >= 0
+
+
+def test_profiled_functions_are_recorded_by_name(profiler):
+    @profiled
+    def load():
+        return 1
+
+    assert load() == 1
+    assert [record["stage"] for record in profiler.records] == ["load"]
+    assert profiler.records[0]["datasets"] is None
+
+
+def test_profiled_functions_are_not_recorded_when_disabled():
+    profiling.disable_profiling()
+
+    @profiled
+    def load():
+        return 1
+
+    assert load() == 1
+    assert profiling.get_profiler() is None
+
+
+def test_records_are_written_when_an_outer_stage_fails(profiler, tmp_path):
+    with pytest.raises(ValueError):
+        with profile_stage("update"):
+            raise ValueError
+
+    (json_file,) = tmp_path.glob("profile *[0-9].json")
+    records = json.loads(json_file.read_text())
+    assert records[0]["stage"] == "update"
+    assert set(records[0]) == set(profiling.PROFILE_FIELDS)
+
+    with open(json_file.with_suffix(".csv"), encoding="utf-8") as file:
+        assert next(csv.DictReader(file))["stage"] == "update"
+
+    (trace_file,) = tmp_path.glob("*.trace.json")
+    (event,) = json.loads(trace_file.read_text())["traceEvents"]
+    assert event["name"] == "update" and event["ph"] == "X"
+
+
+def test_write_without_trace(tmp_path):
+    profiler = Profiler(directory=tmp_path)
+    with profiler.stage("export"):
+        pass
+
+    assert not list(tmp_path.glob("*.trace.json"))
+    assert len(list(tmp_path.glob("*.csv"))) == 1
@@ -3,6 +3,7 @@ from types import SimpleNamespace
 import openpyxl
 import xarray as xr
 
+from premise.data_collection import IAMDataCollection
 from premise.report import fetch_data, generate_summary_report
 
 
@@ -34,6 +35,30 @@ def test_fetch_secondary_heat_uses_explicit_layer():
     assert result.identical(secondary)
 
 
+def test_fetch_data_derives_only_the_requested_variable_once(monkeypatch):
+    secondary = make_heat_layer("heat, secondary, from natural gas", [1.0, 2.0])
+    derived = []
+
+    def derive_heat_layer(self, layer):
+        derived.append(layer)
+        return secondary
+
+    monkeypatch.setattr(IAMDataCollection, "_derive_heat_layer", derive_heat_layer)
+    iam_data = object.__new__(IAMDataCollection)
+    iam_data.data = secondary
+
+    for _ in range(2):
+        result = fetch_data(
+            iam_data,
+            "Heat (secondary) - generation",
+            ["heat, secondary, from natural gas"],
+        )
+
+    assert result.identical(secondary)
+    assert derived == ["secondary_supply"]
+    assert "production_volumes" not in vars(iam_data)
+
+
 def test_summary_report_contains_all_three_heat_sheets(tmp_path):
     iam_data = SimpleNamespace(
         buildings_heat_end_use=make_heat_layer(
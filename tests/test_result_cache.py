@@ -0,0 +1,113 @@
+import os
+
+import premise.result_cache as result_cache
+from premise.utils import create_cache, create_scenario_cache, load_cached_database
+
+
+def _dumped_scenario(directory, name):
+    database = [
+        {
+            "name": name,
+            "reference product": name,
+            "location": "GLO",
+            "unit": "kilogram",
+            "exchanges": [],
+        }
+    ]
+    database_ref, metadata_ref = create_scenario_cache(
+        database, directory / f"{name}.pickle"
+    )
+    return {
+        "model": "remind",
+        "pathway": "SSP2-Base",
+        "year": 2030,
+        "database filepath": database_ref,
+        "database metadata filepath": metadata_ref,
+        "applied functions": ["biomass"],
+        "mapping": {"biomass": {"wood": set()}},
+    }
+
+
+def _use_tmp_dirs(monkeypatch, tmp_path):
+    store, files = tmp_path / "results", tmp_path / "files"
+    store.mkdir()
+    files.mkdir()
+    monkeypatch.setattr(result_cache, "DIR_CACHED_RESULTS", store)
+    monkeypatch.setattr(result_cache, "DIR_CACHED_FILES", files)
+    return store, files
+
+
+def test_result_key_depends_on_every_input():
+    inputs = {"iam": ["remind", "SSP2-Base", 2030], "sectors": ["biomass"]}
+
+    assert result_cache.result_key(inputs) == result_cache.result_key(dict(inputs))
+    assert result_cache.result_key(inputs) != result_cache.result_key(
+        {**inputs, "sectors": ["biomass", "cement"]}
+    )
+
+
+def test_cache_fingerprints_depend_on_content_only(monkeypatch, tmp_path):
+    monkeypatch.setattr("premise.utils.DIR_CACHED_DB", tmp_path)
+
+    def rebuilt(name, mtime, unit="kilogram"):
+        database = [
+            {
+                "name": "steel",
+                "reference product": "steel",
+                "location": "GLO",
+                "unit": unit,
+                "comment": "a comment",
+                "exchanges": [],
+            }
+        ]
+        create_cache(database, tmp_path / f"{name}.pickle")
+        os.utime(tmp_path / f"{name}.pickle", ns=(mtime, mtime))
+        return tmp_path / f"{name}.pickle"
+
+    first, second = rebuilt("a", 10**18), rebuilt("b", 2 * 10**18)
+    other = rebuilt("c", 10**18, unit="ton")
+
+    fingerprint = result_cache.cache_ref_fingerprint(first)
+    assert result_cache.cache_ref_fingerprint(second) == fingerprint
+    assert result_cache.cache_ref_fingerprint(other) != fingerprint
+
+    # caches written without a content hash are hashed
+    scenario = _dumped_scenario(tmp_path, "dataset")
+    manifest = scenario["database filepath"]
+    manifest.write_text(manifest.read_text().replace('"content_hash"', '"old"'))
+    assert len(result_cache.cache_ref_fingerprint(manifest)) == 64
+
+
+def test_stored_result_is_loaded_after_the_scenario_cache_is_gone(
+    monkeypatch, tmp_path
+):
+    store, files = _use_tmp_dirs(monkeypatch, tmp_path)
+    scenario = _dumped_scenario(tmp_path, "dataset")
+
+    result_cache.store_result("key", scenario)
+    for file in tmp_path.glob("dataset*"):
+        file.unlink()
+
+    loaded = {"model": "remind", "pathway": "SSP2-Base", "year": 2030}
+    assert result_cache.load_result("key", loaded)
+    assert not result_cache.load_result("other key", {})
+
+    assert loaded["applied functions"] == ["biomass"]
+    assert loaded["mapping"] == {"biomass": {"wood": set()}}
+    assert loaded["database filepath"].parent == files
+    assert [ds["name"] for ds in load_cached_database(loaded["database filepath"])] == [
+        "dataset"
+    ]
+
+
+def test_least_recently_used_results_are_evicted(monkeypatch, tmp_path):
+    store, _ = _use_tmp_dirs(monkeypatch, tmp_path)
+
+    for name in ("a", "b", "c"):
+        result_cache.store_result(name, _dumped_scenario(tmp_path, name))
+    result_cache.load_result("a", {})
+
+    entry_size = result_cache._entry_size(store / "a")
+    result_cache.evict_results(max_size=2 * entry_size / 1e9)
+
+    assert sorted(path.name for path in store.iterdir()) == ["a", "c"]
@@ -1,3 +1,4 @@
+import premise.data_collection as data_collection_module
 from premise.data_collection import IAMDataCollection
 from premise.scenario_downloader import (
     ZENODO_IAM_SCENARIO_RECORD_ID,
@@ -45,3 +46,51 @@ def test_iam_data_collection_reads_underscore_named_local_image_file(tmp_path):
     )
 
     assert result.sel(region="WEU", variables="Example|Variable", year=2020).item() == 1
+
+
+def test_iam_file_is_read_once_for_all_years_of_a_pathway(tmp_path, monkeypatch):
+    scenario_file = tmp_path / "image_SSP2_VLHO.csv"
+    scenario_file.write_text(
+        "Region,Variable,Unit,2020,2030\nWEU,Example|Variable,EJ/yr,1,2\n",
+        encoding="utf-8",
+    )
+    reads = []
+    read_csv = data_collection_module.pd.read_csv
+    monkeypatch.setattr(
+        data_collection_module.pd,
+        "read_csv",
+        lambda *args, **kwargs: reads.append(args) or read_csv(*args, **kwargs),
+    )
+
+    results = []
+    for year in (2020, 2030):
+        iam_data = object.__new__(IAMDataCollection)
+        iam_data.model = "image"
+        iam_data.pathway = "SSP2-VLHO"
+        iam_data.year = year
+        results.append(
+            iam_data._IAMDataCollection__get_iam_data(
+                key=None,
+                filedir=tmp_path,
+                variables=[],
+            )
+        )
+        assert (iam_data.min_year, iam_data.max_year) == (2020, 2030)
+
+    # header and content are read for the first year only
+    assert len(reads) == 2
+    assert results[0].identical(results[1])
+
+    # each scenario gets its own copy of the shared array
+    results[0].loc[dict(region="WEU", year=2030)] = 0
+    assert results[1].sel(region="WEU", year=2030).item() == 2
+
+    # a modified file is read again
+    scenario_file.write_text(
+        "Region,Variable,Unit,2020,2030\nWEU,Example|Variable,EJ/yr,1,30\n",
+        encoding="utf-8",
+    )
+    result = iam_data._IAMDataCollection__get_iam_data(
+        key=None, filedir=tmp_path, variables=[]
+    )
+    assert result.sel(region="WEU", year=2030).item() == 30
@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+
+from premise.score_comparison import comparative_analysis
+
+
+def _write_test_databases(bd):
+    bd.Database("biosphere").write(
+        {
+            ("biosphere", flow): {
+                "name": flow,
+                "unit": "kilogram",
+                "categories": ("air",),
+                "type": "emission",
+            }
+            for flow in ("co2", "ch4")
+        }
+    )
+
+    for db_name, factor in (("db-a", 1.0), ("db-b", 2.0)):
+        activities = {}
+        for i in range(5):
+            exchanges = [
+                {
+                    "input": (db_name, f"act-{i}"),
+                    "amount": 2.0 if i == 0 else 1.0,
+                    "type": "production",
+                },
+                {
+                    "input": ("biosphere", "co2"),
+                    "amount": factor * (i + 1),
+                    "type": "biosphere",
+                },
+                {
+                    "input": ("biosphere", "ch4"),
+                    "amount": 0.1 * i,
+                    "type": "biosphere",
+                },
+            ]
+            if i > 0:
+                exchanges.append(
+                    {
+                        "input": (db_name, f"act-{i - 1}"),
+                        "amount": 0.5,
+                        "type": "technosphere",
+                    }
+                )
+            activities[(db_name, f"act-{i}")] = {
+                "name": f"activity {i}",
+                "reference product": f"product {i}",
+                "unit": "kilogram",
+                "location": "GLO",
+                "classifications": [("CPC", "01: products")],
+                "exchanges": exchanges,
+            }
+        bd.Database(db_name).write(activities)
+
+    bd.Method(("test", "co2")).write([(("biosphere", "co2"), 1)])
+    bd.Method(("test", "ch4")).write([(("biosphere", "ch4"), 28)])
+
+
+@pytest.mark.parametrize("direct_only", [False, True])
+def test_batch_comparative_analysis_matches_per_dataset_lca(direct_only):
+    bd = pytest.importorskip("bw2data")
+    from bw2data.tests import bw2test
+
+    results = {}
+
+    @bw2test
+    def run_in_temporary_brightway_project():
+        _write_test_databases(bd)
+        for batch in (False, True):
+            results[batch] = comparative_analysis(
+                indicators=[("test", "co2"), ("test", "ch4")],
+                databases=["db-a", "db-b"],
+                direct_only=direct_only,
+                batch=batch,
+                batch_size=2,
+            )
+
+    run_in_temporary_brightway_project()
+
+    columns = ["name", "reference product", "location", "CPC", "indicator"]
+    per_dataset = results[False].sort_values(columns).reset_index(drop=True)
+    batched = results[True].sort_values(columns).reset_index(drop=True)
+
+    assert len(batched) == 10
+    assert batched[columns].equals(per_dataset[columns])
+    assert np.allclose(
+        batched[["db-a", "db-b"]].values, per_dataset[["db-a", "db-b"]].values
+    )
+
+
+def test_interconnection_analysis_graph_statistics():
+    bd = pytest.importorskip("bw2data")
+    from bw2data.tests import bw2test
+
+    from premise import score_comparison
+
+    # supplier -> consumers; d and e supply each other
+    consumers = {"a": ["b"], "b": ["c"], "c": [], "d": ["c", "e"], "e": ["d"]}
+    results = {}
+
+    @bw2test
+    def run_in_temporary_brightway_project():
+        activities = {}
+        for name in consumers:
+            exchanges = [
+                {"input": ("graph-db", name), "amount": 1, "type": "production"}
+            ]
+            exchanges.extend(
+                {"input": ("graph-db", supplier), "amount": 1, "type": "technosphere"}
+                for supplier, clients in consumers.items()
+                if name in clients
+            )
+            activities[("graph-db", name)] = {
+                "name": name,
+                "reference product": name,
+                "unit": "unit",
+                "location": "GLO",
+                "exchanges": exchanges,
+            }
+        bd.Database("graph-db").write(activities)
+
+        database = bd.Database("graph-db")
+        results["first"] = score_comparison.interconnection_analysis(database)
+        results["cached"] = score_comparison.interconnection_analysis(database)
+
+    run_in_temporary_brightway_project()
+
+    dataframe = results["first"].set_index("name")
+    assert dataframe["count"].to_dict() == {"a": 1, "b": 1, "c": 0, "d": 2, "e": 1}
+    assert dataframe["suppliers"].to_dict() == {
+        "a": 0,
+        "b": 1,
+        "c": 2,
+        "d": 1,
+        "e": 1,
+    }
+    assert dataframe["upstream datasets"].to_dict() == {
+        "a": 0,
+        "b": 1,
+        "c": 4,
+        "d": 1,
+        "e": 1,
+    }
+    assert dataframe.loc["d", "component"] == dataframe.loc["e", "component"]
+    assert dataframe.loc["d", "component size"] == 2
+    assert results["first"]["count"].is_monotonic_decreasing
+    assert results["cached"].equals(results["first"])
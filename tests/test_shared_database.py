@@ -0,0 +1,157 @@
+import math
+import pickle
+
+import numpy as np
+import pytest
+
+from premise.shared_database import SharedDatabase
+from premise.utils import load_database
+
+
+def _database():
+    return [
+        {
+            "name": "steel production",
+            "reference product": "steel",
+            "location": "CH",
+            "unit": "kilogram",
+            "code": "abc",
+            "classifications": [("ISIC rev.4 ecoinvent", "2410")],
+            "exchanges": [
+                {
+                    "name": "steel production",
+                    "product": "steel",
+                    "location": "CH",
+                    "unit": "kilogram",
+                    "type": "production",
+                    "amount": 1.0,
+                    "production volume": 1000.0,
+                },
+                {
+                    "name": "market for electricity, low voltage",
+                    "product": "electricity, low voltage",
+                    "location": "CH",
+                    "unit": "kilowatt hour",
+                    "type": "technosphere",
+                    "amount": np.float32(0.5),
+                    "uncertainty type": 2,
+                    "loc": -0.69,
+                    "scale": 0.1,
+                    "comment": "from a study",
+                },
+                {
+                    "name": "Carbon dioxide, fossil",
+                    "categories": ("air", "urban air close to ground"),
+                    "unit": "kilogram",
+                    "type": "biosphere",
+                    "amount": 2,
+                    "input": ("biosphere3", "f9749677"),
+                },
+            ],
+        },
+        {
+            "name": "market for steel",
+            "reference product": "steel",
+            "location": "GLO",
+            "unit": "kilogram",
+            "exchanges": [],
+        },
+    ]
+
+
+@pytest.fixture
+def shared(tmp_path):
+    with SharedDatabase.create(_database(), tmp_path / "base.shared") as shared:
+        yield shared
+
+
+def test_shared_database_decodes_datasets_and_exchanges(shared):
+    assert len(shared) == 2
+    assert shared.to_list() == _database()
+
+    steel = shared[0]
+    assert steel["name"] == "steel production"
+    assert steel["classifications"] == [("ISIC rev.4 ecoinvent", "2410")]
+    assert steel["exchanges"][1]["comment"] == "from a study"
+    assert steel["exchanges"][2]["input"] == ("biosphere3", "f9749677")
+    assert "code" not in shared[-1]
+    assert shared.dataset_keys() == {
+        ("steel production", "steel", "CH"),
+        ("market for steel", "steel", "GLO"),
+    }
+
+
+def test_shared_database_is_read_only(shared):
+    with pytest.raises(TypeError):
+        shared[0]["location"] = "DE"
+
+    # exchanges are decoded as new dictionaries
+    shared[0]["exchanges"][0]["amount"] = 2.0
+    assert shared[0]["exchanges"][0]["amount"] == 1.0
+
+
+def test_shared_database_keeps_nan_values(tmp_path):
+    database = [
+        {
+            "name": "a",
+            "exchanges": [
+                {
+                    "name": "a",
+                    "type": "production",
+                    "amount": 1.0,
+                    "uncertainty type": 0,
+                    "loc": 1.0,
+                    "scale": math.nan,
+                    "minimum": math.nan,
+                },
+                {"name": "b", "type": "technosphere", "amount": 2.0},
+            ],
+        }
+    ]
+
+    with SharedDatabase.create(database, tmp_path / "base.shared") as shared:
+        production, technosphere = shared[0]["exchanges"]
+        assert production.keys() == database[0]["exchanges"][0].keys()
+        assert math.isnan(production["scale"]) and math.isnan(production["minimum"])
+        assert technosphere == database[0]["exchanges"][1]
+
+
+def test_to_list_decodes_exchanges_once(shared, monkeypatch):
+    decoded = []
+    exchanges = shared._exchanges
+
+    def counting(index):
+        decoded.append(index)
+        return exchanges(index)
+
+    monkeypatch.setattr(shared, "_exchanges", counting)
+
+    assert shared.to_list() == _database()
+    assert decoded == [0, 1]
+
+
+def test_shared_database_pickles_as_its_file(shared):
+    attached = pickle.loads(pickle.dumps(shared))
+
+    assert len(pickle.dumps(shared)) < 200
+    assert attached.to_list() == _database()
+    attached.close()
+
+
+def test_shared_database_file_is_deleted_by_its_owner(tmp_path):
+    filepath = tmp_path / "base.shared"
+
+    with SharedDatabase.create(_database(), filepath):
+        assert filepath.exists()
+
+    assert not filepath.exists()
+
+
+def test_load_database_copies_a_shared_original_database(shared):
+    scenario = load_database({}, original_database=shared, load_metadata=False)
+
+    assert scenario["database"] == [
+        {**ds, "code": scenario["database"][i]["code"]}
+        for i, ds in enumerate(_database())
+    ]
+    assert all(type(ds) is dict for ds in scenario["database"])
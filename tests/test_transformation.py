@@ -1,11 +1,16 @@
 from collections import defaultdict
 
+import numpy as np
 import pytest
 import xarray as xr
 
 from premise.activity_maps import InventorySet
 from premise.marginal_mixes import get_list_contrained_suppliers
-from premise.transformation import BaseTransformation, find_fuel_efficiency
+from premise.transformation import (
+    BaseTransformation,
+    find_fuel_efficiency,
+    get_parameter_table,
+)
 
 
 def make_market_transformation(monkeypatch, technology_shares):
@@ -342,3 +347,56 @@ def test_market_does_not_require_supplier_for_zero_share(monkeypatch):
     assert [
         exc["name"] for exc in market["exchanges"] if exc["type"] == "technosphere"
     ] == ["supplier"]
+
+
+def test_parameter_table_matches_xarray_lookups():
+    data = xr.DataArray(
+        np.array([[[1.0, 2.0, 4.0], [3.0, np.nan, 1.0]]]),
+        dims=("region", "variables", "year"),
+        coords={"region": ["WEU"], "variables": ["a", "b"], "year": [2020, 2030, 2050]},
+    )
+    transformation = object.__new__(BaseTransformation)
+
+    for year in (2020, 2025, 2040, 2060):
+        transformation.year = year
+        for variable in ("a", "b", ["b", "a"]):
+            if year in (2020, 2030, 2050):
+                expected = data.sel(
+                    region="WEU", variables=variable, year=year
+                ).values.item(0)
+            else:
+                expected = (
+                    data.sel(region="WEU", variables=variable)
+                    .interp(year=year)
+                    .values.item(0)
+                )
+            value = transformation.get_iam_value(data, "WEU", variable)
+            assert value == expected or (np.isnan(value) and np.isnan(expected))
+
+    assert get_parameter_table(data, 2025) is get_parameter_table(data, 2025)
+    with pytest.raises(KeyError):
+        get_parameter_table(data, 2025).get("USA", "a")
+
+
+def test_gis_matches_are_shared_by_transformations_of_a_model(monkeypatch):
+    geo = type("FakeGeo", (), {"gis_matches": {}})()
+    searched = []
+
+    def fake_find_gis_match(self, location, possible_locations, *args):
+        searched.append(location)
+        return ["FR"]
+
+    monkeypatch.setattr(BaseTransformation, "_find_gis_match", fake_find_gis_match)
+
+    matches = []
+    for year in (2030, 2040):
+        transformation = object.__new__(BaseTransformation)
+        transformation.year = year
+        transformation.regions = ["WEU"]
+        transformation.geo = geo
+        matches.append(
+            transformation.get_gis_match("RER", ("FR", "DE"), False, True, False)
+        )
+
+    assert matches == [["FR"], ["FR"]]
+    assert searched == ["RER"]
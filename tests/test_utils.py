@@ -1,3 +1,4 @@
+import gc
 import json
 import pickle
 from pathlib import Path
@@ -5,7 +6,7 @@ from unittest.mock import call, patch
 
 from premise import __version__
 from premise.export import exc_codes, fetch_exchange_code
-from premise.geomap import Geomap
+from premise.geomap import Geomap, get_geomap
 from premise.utils import *
 from premise.fuels.utils import get_crops_properties
 
@@ -184,6 +185,90 @@ def test_iter_cached_metadata_supports_manifest_shards(tmp_path):
     assert list(iter_cached_metadata(metadata_ref)) == [metadata_a, metadata_b]
 
 
+def test_load_cached_database_reads_shards_ahead_in_order(tmp_path):
+    cache_ref = tmp_path / "db-cache.pickle"
+    shards = []
+    for index in range(5):
+        shard = tmp_path / f"db-cache.part-{index}.pickle"
+        with open(shard, "wb") as file:
+            pickle.dump([{"name": f"dataset-{index}"}], file)
+        shards.append(shard)
+
+    _write_cache_manifest(cache_ref, *shards)
+
+    assert [ds["name"] for ds in load_cached_database(cache_ref)] == [
+        f"dataset-{index}" for index in range(5)
+    ]
+    assert gc.isenabled()
+
+
+def _metadata_test_database():
+    return [
+        {
+            "name": f"market for {product}",
+            "reference product": product,
+            "location": "GLO",
+            "unit": "kilogram",
+            "comment": f"{product} comment",
+            "exchanges": [
+                {
+                    "name": f"market for {product}",
+                    "product": product,
+                    "amount": 1.0,
+                    "type": "production",
+                    "unit": "kilogram",
+                    "location": "GLO",
+                    "pedigree": {"reliability": 2},
+                }
+            ],
+        }
+        for product in ("steel", "cement")
+    ]
+
+
+def test_scenario_cache_metadata_holds_dataset_positions(tmp_path, monkeypatch):
+    monkeypatch.setattr("premise.utils.DIR_CACHED_FILES", tmp_path)
+    database_ref, metadata_ref = create_scenario_cache(
+        _metadata_test_database(), tmp_path / "scenario.pickle"
+    )
+
+    (metadata,) = iter_cached_metadata(metadata_ref)
+    assert [values[METADATA_POSITION_KEY] for values in metadata.values()] == [0, 1]
+
+    scenario = {
+        "database filepath": database_ref,
+        "database metadata filepath": metadata_ref,
+    }
+    load_database(scenario, original_database=[], delete=False)
+
+    for ds, expected in zip(scenario["database"], _metadata_test_database()):
+        assert ds["comment"] == expected["comment"]
+        assert ds["exchanges"][0]["pedigree"] == {"reliability": 2}
+        assert METADATA_POSITION_KEY not in ds
+
+
+def test_merge_cached_metadata_falls_back_on_dataset_keys():
+    database = _metadata_test_database()
+    for ds in database:
+        del ds["comment"]
+
+    merge_cached_metadata(
+        database,
+        [
+            {
+                # stale position, and no position at all
+                ("market for steel", "steel", "GLO"): {
+                    "comment": "steel comment",
+                    METADATA_POSITION_KEY: 1,
+                },
+                ("market for cement", "cement", "GLO"): {"comment": "cement comment"},
+            }
+        ],
+    )
+
+    assert [ds["comment"] for ds in database] == ["steel comment", "cement comment"]
+
+
 def test_scenario_cache_preserves_regionalized_without_metadata_reload(tmp_path):
     cache_ref = tmp_path / "scenario-cache.pickle"
     database = [
@@ -353,3 +438,20 @@ def test_load_database_rehydrates_metadata_from_manifest_shards(tmp_path):
 
     assert loaded["database"][0]["comment"] == "database metadata"
     assert loaded["database"][0]["classifications"] == {"foo": "bar"}
+
+
+def test_clear_runtime_caches_can_keep_structural_caches():
+    geomap = get_geomap("image")
+    geomap.ecoinvent_to_iam_location("FR")
+    fetch_exchange_code("fake activity", "fake product", "FR", "kilogram")
+
+    clear_runtime_caches(keep_structural_caches=True)
+
+    assert get_geomap("image") is geomap
+    assert Geomap.ecoinvent_to_iam_location.cache_info().currsize > 0
+    assert fetch_exchange_code.cache_info().currsize == 0
+
+    clear_runtime_caches()
+
+    assert Geomap.ecoinvent_to_iam_location.cache_info().currsize == 0
+    assert get_geomap("image") is not geomap
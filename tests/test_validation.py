@@ -1,6 +1,6 @@
 from premise.geomap import Geomap
 from premise.inventory_imports import canonicalize_classification_key
-from premise.validation import BaseDatasetValidator
+from premise.validation import BaseDatasetValidator, ValidationContext
 
 
 def _validator_for_locations(database_locations, regions=None, extra_regions=None):
@@ -92,3 +92,29 @@ def test_fast_export_checks_add_missing_classifications(tmp_path, monkeypatch):
     validator.run_fast_export_checks()
 
     assert dataset["classifications"] == expected
+
+
+def _dataset(name, amount=1.0):
+    return {
+        "name": name,
+        "reference product": name,
+        "location": "GLO",
+        "exchanges": [
+            {"name": name, "product": name, "location": "GLO", "amount": amount}
+        ],
+    }
+
+
+def test_validation_context_returns_datasets_changed_since_last_call():
+    database = [_dataset("a"), _dataset("b")]
+    context = ValidationContext(model="remind", database=database)
+
+    assert context.changed_since_last_validation(database) == []
+
+    database[1]["exchanges"][0]["amount"] = 2.0
+    database.append(_dataset("c"))
+
+    changed = context.changed_since_last_validation(database)
+
+    assert [ds["name"] for ds in changed] == ["b", "c"]
+    assert context.changed_since_last_validation(database) == []